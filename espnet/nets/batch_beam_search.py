@@ -12,6 +12,7 @@ from torch.nn.utils.rnn import pad_sequence
 
 from espnet.nets.beam_search import BeamSearch
 from espnet.nets.beam_search import Hypothesis
+from espnet.nets.e2e_asr_common import end_detect
 
 
 class BatchHypothesis(NamedTuple):
@@ -52,7 +53,7 @@ class BatchBeamSearch(BeamSearch):
             length=hyps.length[ids],
             scores={k: v[ids] for k, v in hyps.scores.items()},
             states={
-                k: [self.scorers[k].select_state(v, i) for i in ids]
+                k: self.scorers[k].batch_select_state(v, ids)
                 for k, v in hyps.states.items()
             },
         )
@@ -216,12 +217,37 @@ class BatchBeamSearch(BeamSearch):
 
         """
         n_batch = len(running_hyps)
-        part_ids = None  # no pre-beam
         # batch scoring
+        scores, states = self.score_full(running_hyps, x.expand(n_batch, *x.shape))
+        return self.search_with_full_scores(running_hyps, x, scores, states)
+
+    def search_with_full_scores(
+        self,
+        running_hyps: BatchHypothesis,
+        x: torch.Tensor,
+        scores: Dict[str, torch.Tensor],
+        states: Dict[str, Any],
+    ) -> BatchHypothesis:
+        """Search new tokens with the scores of `self.full_scorers` given.
+
+        It is the latter part of `search()` after `score_full()`, so that
+        the full scorers can be computed for several searches at once.
+
+        Args:
+            running_hyps (BatchHypothesis): Running hypotheses on beam
+            x (torch.Tensor): Encoded speech feature (T, D)
+            scores (Dict[str, torch.Tensor]): scores by `self.full_scorers`
+            states (Dict[str, Any]): states by `self.full_scorers`
+
+        Returns:
+            BatchHypothesis: Best sorted hypotheses
+
+        """
+        n_batch = len(running_hyps)
+        part_ids = None  # no pre-beam
         weighted_scores = torch.zeros(
             n_batch, self.n_vocab, dtype=x.dtype, device=x.device
         )
-        scores, states = self.score_full(running_hyps, x.expand(n_batch, *x.shape))
         for k in self.full_scorers:
             weighted_scores += self.weights[k] * scores[k]
         # partial scoring
@@ -243,45 +269,158 @@ class BatchBeamSearch(BeamSearch):
             dtype=x.dtype, device=x.device
         ).unsqueeze(1)
 
-        # TODO(karita): do not use list. use batch instead
-        # see also https://github.com/espnet/espnet/pull/1402#discussion_r354561029
-        # update hyps
-        best_hyps = []
-        prev_hyps = self.unbatchfy(running_hyps)
-        for (
-            full_prev_hyp_id,
-            full_new_token_id,
-            part_prev_hyp_id,
-            part_new_token_id,
-        ) in zip(*self.batch_beam(weighted_scores, part_ids)):
-            prev_hyp = prev_hyps[full_prev_hyp_id]
-            best_hyps.append(
-                Hypothesis(
-                    score=weighted_scores[full_prev_hyp_id, full_new_token_id],
-                    yseq=self.append_token(prev_hyp.yseq, full_new_token_id),
-                    scores=self.merge_scores(
-                        prev_hyp.scores,
-                        {k: v[full_prev_hyp_id] for k, v in scores.items()},
-                        full_new_token_id,
-                        {k: v[part_prev_hyp_id] for k, v in part_scores.items()},
-                        part_new_token_id,
-                    ),
-                    states=self.merge_states(
-                        {
-                            k: self.full_scorers[k].select_state(v, full_prev_hyp_id)
-                            for k, v in states.items()
-                        },
-                        {
-                            k: self.part_scorers[k].select_state(
-                                v, part_prev_hyp_id, part_new_token_id
-                            )
-                            for k, v in part_states.items()
-                        },
-                        part_new_token_id,
-                    ),
-                )
+        # update hyps without converting them into a list of Hypothesis
+        return self.update_hyps(
+            running_hyps,
+            weighted_scores,
+            scores,
+            states,
+            part_scores,
+            part_states,
+            self.batch_beam(weighted_scores, part_ids),
+        )
+
+    def update_hyps(
+        self,
+        running_hyps: BatchHypothesis,
+        weighted_scores: torch.Tensor,
+        scores: Dict[str, torch.Tensor],
+        states: Dict[str, Any],
+        part_scores: Dict[str, torch.Tensor],
+        part_states: Dict[str, Any],
+        best_ids: Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor],
+    ) -> BatchHypothesis:
+        """Build the new hypotheses selected by the beam.
+
+        Args:
+            running_hyps (BatchHypothesis): Running hypotheses on beam
+            weighted_scores (torch.Tensor): The weighted sum scores for each tokens
+                (n_batch, n_vocab)
+            scores (Dict[str, torch.Tensor]): scores by `self.full_scorers`
+            states (Dict[str, Any]): states by `self.full_scorers`
+            part_scores (Dict[str, torch.Tensor]): scores by `self.part_scorers`
+            part_states (Dict[str, Any]): states by `self.part_scorers`
+            best_ids (Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]):
+                The output of `batch_beam()`
+
+        Returns:
+            BatchHypothesis: The new hypotheses
+
+        """
+        (
+            full_prev_hyp_ids,
+            full_new_token_ids,
+            part_prev_hyp_ids,
+            part_new_token_ids,
+        ) = best_ids
+        return BatchHypothesis(
+            yseq=self.batch_append_token(
+                running_hyps.yseq,
+                running_hyps.length,
+                full_prev_hyp_ids,
+                full_new_token_ids,
+            ),
+            score=weighted_scores[full_prev_hyp_ids, full_new_token_ids],
+            length=running_hyps.length[full_prev_hyp_ids.cpu()] + 1,
+            scores=self.batch_merge_scores(
+                running_hyps.scores,
+                scores,
+                full_prev_hyp_ids,
+                full_new_token_ids,
+                part_scores,
+                part_prev_hyp_ids,
+                part_new_token_ids,
+            ),
+            states=self.merge_states(
+                {
+                    k: self.full_scorers[k].batch_select_state(v, full_prev_hyp_ids)
+                    for k, v in states.items()
+                },
+                {
+                    k: self.part_scorers[k].batch_select_state(
+                        v, part_prev_hyp_ids, part_new_token_ids
+                    )
+                    for k, v in part_states.items()
+                },
+                part_new_token_ids,
+            ),
+        )
+
+    def batch_append_token(
+        self,
+        yseq: torch.Tensor,
+        length: torch.Tensor,
+        prev_hyp_ids: torch.Tensor,
+        new_token_ids: torch.Tensor,
+    ) -> torch.Tensor:
+        """Append new tokens to the selected prefix tokens.
+
+        Args:
+            yseq (torch.Tensor): The prefix tokens padded with eos (n_batch, maxlen).
+            length (torch.Tensor): The lengths of the prefix tokens (n_batch,).
+            prev_hyp_ids (torch.Tensor): The selected hypotheses (n_beam,).
+            new_token_ids (torch.Tensor): The new tokens (n_beam,).
+
+        Returns:
+            torch.Tensor: The new prefix tokens padded with eos (n_beam, maxlen').
+
+        """
+        prev_length = length[prev_hyp_ids.cpu()]
+        maxlen = int(prev_length.max()) + 1
+        new_yseq = torch.full(
+            (len(prev_hyp_ids), maxlen),
+            self.eos,
+            dtype=yseq.dtype,
+            device=yseq.device,
+        )
+        new_yseq[:, : maxlen - 1] = yseq[prev_hyp_ids, : maxlen - 1]
+        new_yseq[torch.arange(len(prev_hyp_ids)), prev_length] = new_token_ids.to(
+            yseq.dtype
+        )
+        return new_yseq
+
+    @staticmethod
+    def batch_merge_scores(
+        prev_scores: Dict[str, torch.Tensor],
+        next_full_scores: Dict[str, torch.Tensor],
+        full_prev_hyp_ids: torch.Tensor,
+        full_new_token_ids: torch.Tensor,
+        next_part_scores: Dict[str, torch.Tensor],
+        part_prev_hyp_ids: torch.Tensor,
+        part_new_token_ids: torch.Tensor,
+    ) -> Dict[str, torch.Tensor]:
+        """Merge scores for new hypotheses.
+
+        Args:
+            prev_scores (Dict[str, torch.Tensor]):
+                The previous hypotheses scores by `self.scorers` (n_batch,)
+            next_full_scores (Dict[str, torch.Tensor]):
+                scores by `self.full_scorers` (n_batch, n_vocab)
+            full_prev_hyp_ids (torch.Tensor): The selected hypotheses (n_beam,)
+            full_new_token_ids (torch.Tensor): The new token ids (n_beam,)
+            next_part_scores (Dict[str, torch.Tensor]):
+                scores of partial tokens by `self.part_scorers` (n_batch, n_vocab)
+            part_prev_hyp_ids (torch.Tensor): The selected hypotheses (n_beam,)
+            part_new_token_ids (torch.Tensor): The new token ids (n_beam,)
+
+        Returns:
+            Dict[str, torch.Tensor]: The new score dict.
+                Its keys are names of `self.full_scorers` and `self.part_scorers`.
+                Its values are tensors of shape `(n_beam,)`.
+
+        """
+        new_scores = dict()
+        for k, v in next_full_scores.items():
+            new_scores[k] = (
+                prev_scores[k].to(v.device)[full_prev_hyp_ids]
+                + v[full_prev_hyp_ids, full_new_token_ids]
+            )
+        for k, v in next_part_scores.items():
+            new_scores[k] = (
+                prev_scores[k].to(v.device)[part_prev_hyp_ids]
+                + v[part_prev_hyp_ids, part_new_token_ids]
             )
-        return self.batchfy(best_hyps)
+        return new_scores
 
     def post_process(
         self,
@@ -346,3 +485,321 @@ class BatchBeamSearch(BeamSearch):
             ended_hyps.append(hyp)
         remained_ids = torch.nonzero(is_eos == 0, as_tuple=False).view(-1)
         return self._batch_select(running_hyps, remained_ids)
+
+    def batch_init_hyp(
+        self, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> BatchHypothesis:
+        """Get initial hypotheses of several utterances.
+
+        Each utterance has `self.beam_size` hypotheses ordered by utterance,
+        but only the first one is active at the beginning.
+        The inactive hypotheses have the score of -inf.
+
+        Args:
+            xs (torch.Tensor): The padded encoder output feature (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of xs (n_utt,)
+
+        Returns:
+            BatchHypothesis: The initial hypotheses.
+
+        """
+        init_states = {
+            k: d.batch_init_state_padded(xs, xs_lens) for k, d in self.scorers.items()
+        }
+        return self.batchfy(
+            [
+                Hypothesis(
+                    score=0.0 if j == 0 else float("-inf"),
+                    scores={k: 0.0 for k in self.scorers},
+                    states={k: v[b] for k, v in init_states.items()},
+                    yseq=torch.tensor([self.sos], device=xs.device),
+                )
+                for b in range(len(xs))
+                for j in range(self.beam_size)
+            ]
+        )
+
+    def score_full_padded(
+        self, hyp: BatchHypothesis, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> Tuple[Dict[str, torch.Tensor], Dict[str, Any]]:
+        """Score new hypothesis of several utterances by `self.full_scorers`.
+
+        Args:
+            hyp (BatchHypothesis): Hypotheses with prefix tokens to score
+            xs (torch.Tensor): Corresponding padded input feature (n_batch, T, D)
+            xs_lens (torch.Tensor): The lengths of xs (n_batch,)
+
+        Returns:
+            Tuple[Dict[str, torch.Tensor], Dict[str, Any]]: Tuple of
+                score dict of `hyp` that has string keys of `self.full_scorers`
+                and tensor score values of shape: `(n_batch, self.n_vocab)`,
+                and state dict that has string keys
+                and state values of `self.full_scorers`
+
+        """
+        scores = dict()
+        states = dict()
+        for k, d in self.full_scorers.items():
+            scores[k], states[k] = d.batch_score_padded(
+                hyp.yseq, hyp.states[k], xs, xs_lens
+            )
+        return scores, states
+
+    def score_partial_padded(
+        self,
+        hyp: BatchHypothesis,
+        ids: torch.Tensor,
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[Dict[str, torch.Tensor], Dict[str, Any]]:
+        """Score new hypothesis of several utterances by `self.part_scorers`.
+
+        Args:
+            hyp (BatchHypothesis): Hypotheses with prefix tokens to score
+            ids (torch.Tensor): 2D tensor of new partial tokens to score
+            xs (torch.Tensor): Corresponding padded input feature (n_batch, T, D)
+            xs_lens (torch.Tensor): The lengths of xs (n_batch,)
+
+        Returns:
+            Tuple[Dict[str, torch.Tensor], Dict[str, Any]]: Tuple of
+                score dict of `hyp` that has string keys of `self.part_scorers`
+                and tensor score values of shape: `(n_batch, self.n_vocab)`,
+                and state dict that has string keys
+                and state values of `self.part_scorers`
+
+        """
+        scores = dict()
+        states = dict()
+        for k, d in self.part_scorers.items():
+            scores[k], states[k] = d.batch_score_partial_padded(
+                hyp.yseq, ids, hyp.states[k], xs, xs_lens
+            )
+        return scores, states
+
+    def multi_beam(
+        self, weighted_scores: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Compute topk full token ids and partial token ids of each utterance.
+
+        Args:
+            weighted_scores (torch.Tensor): The weighted sum scores for each tokens.
+                Its shape is `(n_utt * self.beam_size, self.vocab_size)`.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+                The topk full (prev_hyp, new_token) ids
+                and partial (prev_hyp, new_token) ids.
+                Their shapes are all `(n_utt * self.beam_size,)`
+
+        """
+        top_ids = weighted_scores.view(-1, self.beam_size * self.n_vocab).topk(
+            self.beam_size
+        )[1]
+        offsets = torch.arange(
+            0, weighted_scores.size(0), self.beam_size, device=top_ids.device
+        ).unsqueeze(1)
+        prev_hyp_ids = (top_ids // self.n_vocab + offsets).view(-1)
+        new_token_ids = (top_ids % self.n_vocab).view(-1)
+        return prev_hyp_ids, new_token_ids, prev_hyp_ids, new_token_ids
+
+    def batch_search(
+        self, running_hyps: BatchHypothesis, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> BatchHypothesis:
+        """Search new tokens for running hypotheses of several utterances.
+
+        Args:
+            running_hyps (BatchHypothesis): Running hypotheses on beam
+                ordered by utterance (n_utt * self.beam_size)
+            xs (torch.Tensor): Padded encoded speech feature of each hypothesis
+                (n_utt * self.beam_size, T, D)
+            xs_lens (torch.Tensor): The lengths of xs (n_utt * self.beam_size,)
+
+        Returns:
+            BatchHypothesis: Best sorted hypotheses of each utterance
+
+        """
+        n_batch = len(running_hyps)
+        part_ids = None  # no pre-beam
+        weighted_scores = torch.zeros(
+            n_batch, self.n_vocab, dtype=xs.dtype, device=xs.device
+        )
+        scores, states = self.score_full_padded(running_hyps, xs, xs_lens)
+        for k in self.full_scorers:
+            weighted_scores += self.weights[k] * scores[k]
+        if self.do_pre_beam:
+            pre_beam_scores = (
+                weighted_scores
+                if self.pre_beam_score_key == "full"
+                else scores[self.pre_beam_score_key]
+            )
+            part_ids = torch.topk(pre_beam_scores, self.pre_beam_size, dim=-1)[1]
+        part_scores, part_states = self.score_partial_padded(
+            running_hyps, part_ids, xs, xs_lens
+        )
+        for k in self.part_scorers:
+            weighted_scores += self.weights[k] * part_scores[k]
+        # the inactive hypotheses have -inf
+        weighted_scores += running_hyps.score.to(
+            dtype=xs.dtype, device=xs.device
+        ).unsqueeze(1)
+        return self.update_hyps(
+            running_hyps,
+            weighted_scores,
+            scores,
+            states,
+            part_scores,
+            part_states,
+            self.multi_beam(weighted_scores),
+        )
+
+    def batch_post_process(
+        self,
+        i: int,
+        maxlens: List[int],
+        maxlenratio: float,
+        running_hyps: BatchHypothesis,
+        ended_hyps: List[List[Hypothesis]],
+        finished: List[bool],
+    ) -> BatchHypothesis:
+        """Perform post-processing of beam search iterations of several utterances.
+
+        The ended hypotheses are moved to `ended_hyps` and deactivated
+        in the running hypotheses, and `finished` is updated by end detection.
+
+        Args:
+            i (int): The length of hypothesis tokens.
+            maxlens (List[int]): The maximum length of tokens of each utterance.
+            maxlenratio (int): The maximum length ratio in beam search.
+            running_hyps (BatchHypothesis): The running hypotheses in beam search.
+            ended_hyps (List[List[Hypothesis]]):
+                The ended hypotheses of each utterance.
+            finished (List[bool]): Whether the search of each utterance is finished.
+
+        Returns:
+            BatchHypothesis: The new running hypotheses.
+
+        """
+        n_batch = len(running_hyps)
+        score = running_hyps.score.clone()
+        is_active = torch.isfinite(score).cpu().tolist()
+        is_eos = (
+            (running_hyps.yseq[torch.arange(n_batch), running_hyps.length - 1])
+            == self.eos
+        ).tolist()
+        for b, maxlen in enumerate(maxlens):
+            if finished[b]:
+                continue
+            n_active = 0
+            for j in range(b * self.beam_size, (b + 1) * self.beam_size):
+                if not is_active[j]:
+                    continue
+                # add eos in the final loop to avoid that there are no ended hyps
+                if i == maxlen - 1:
+                    hyp = self._select(running_hyps, j)
+                    ended_hyps[b].append(
+                        hyp._replace(yseq=self.append_token(hyp.yseq, self.eos))
+                    )
+                    score[j] = float("-inf")
+                elif is_eos[j]:
+                    ended_hyps[b].append(self._select(running_hyps, j))
+                    score[j] = float("-inf")
+                else:
+                    n_active += 1
+            if (
+                n_active == 0
+                or i == maxlen - 1
+                or (
+                    maxlenratio == 0.0
+                    and end_detect([h.asdict() for h in ended_hyps[b]], i)
+                )
+            ):
+                logging.debug(f"search of utterance {b} finished at {i}")
+                finished[b] = True
+                score[b * self.beam_size : (b + 1) * self.beam_size] = float("-inf")
+        # NOTE: _replace() doesn't work because __len__ is overridden
+        return BatchHypothesis(
+            yseq=running_hyps.yseq,
+            score=score,
+            length=running_hyps.length,
+            scores=running_hyps.scores,
+            states=running_hyps.states,
+        )
+
+    def batch_forward(
+        self,
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+        maxlenratio: float = 0.0,
+        minlenratio: float = 0.0,
+    ) -> List[List[Hypothesis]]:
+        """Perform beam search of several utterances at once.
+
+        The running hypotheses of all the utterances are scored together, and
+        each utterance keeps `self.beam_size` slots of hypotheses in them.
+        The slots of the ended hypotheses and the finished utterances are
+        deactivated with the score of -inf, so the result of each utterance
+        is the same as the one of `forward()`.
+        All the scorers must implement `BatchScorerInterface`, and the ones using
+        the encoder feature have to mask its padded frames
+        (see `BatchScorerInterface.batch_score_padded`).
+
+        Args:
+            xs (torch.Tensor): Padded encoded speech feature (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of xs (n_utt,)
+            maxlenratio (float): Input length ratio to obtain max output length.
+                If maxlenratio=0.0 (default), it uses a end-detect function
+                to automatically find maximum hypothesis lengths
+                If maxlenratio<0.0, its absolute value is interpreted
+                as a constant max output length.
+            minlenratio (float): Input length ratio to obtain min output length.
+
+        Returns:
+            list[list[Hypothesis]]: N-best decoding results of each utterance
+
+        """
+        xs_lens = xs_lens.cpu()
+        maxlens = []
+        for xlen in xs_lens.tolist():
+            if maxlenratio == 0:
+                maxlens.append(xlen)
+            elif maxlenratio < 0:
+                maxlens.append(-1 * int(maxlenratio))
+            else:
+                maxlens.append(max(1, int(maxlenratio * xlen)))
+        logging.info("decoder input lengths: " + str(xs_lens.tolist()))
+        logging.info("max output lengths: " + str(maxlens))
+
+        # main loop of prefix search
+        running_hyps = self.batch_init_hyp(xs, xs_lens)
+        hyp_xs = xs.repeat_interleave(self.beam_size, dim=0)
+        hyp_xs_lens = xs_lens.to(xs.device).repeat_interleave(self.beam_size)
+        ended_hyps = [[] for _ in range(len(xs))]
+        finished = [False] * len(xs)
+        for i in range(max(maxlens)):
+            logging.debug("position " + str(i))
+            best = self.batch_search(running_hyps, hyp_xs, hyp_xs_lens)
+            running_hyps = self.batch_post_process(
+                i, maxlens, maxlenratio, best, ended_hyps, finished
+            )
+            if all(finished):
+                break
+
+        results = []
+        for b, hyps in enumerate(ended_hyps):
+            nbest_hyps = sorted(hyps, key=lambda x: x.score, reverse=True)
+            if len(nbest_hyps) == 0:
+                logging.warning(
+                    "there is no N-best results, perform recognition "
+                    "again with smaller minlenratio."
+                )
+                if minlenratio >= 0.1:
+                    nbest_hyps = self.forward(
+                        xs[b, : xs_lens[b]], maxlenratio, max(0.0, minlenratio - 0.1)
+                    )
+            else:
+                logging.info(
+                    f"total log probability of utterance {b}: "
+                    f"{nbest_hyps[0].score:.2f}"
+                )
+            results.append(nbest_hyps)
+        return results
@@ -13,6 +13,7 @@ from typing import (
     Tuple,  # noqa: H301
     Dict,  # noqa: H301
     Any,  # noqa: H301
+    Generator,  # noqa: H301
 )
 
 
@@ -89,9 +90,7 @@ class BatchBeamSearchOnline(BatchBeamSearch):
                     1, -self.decoder_text_length_limit, self.decoder_text_length_limit
                 ).clone()
                 temp_yseq[:, 0] = self.sos
-                self.running_hyps.states["decoder"] = [
-                    None for _ in self.running_hyps.states["decoder"]
-                ]
+                self.running_hyps.states["decoder"] = [None] * len(self.running_hyps)
                 scores[k], states[k] = d.batch_score(temp_yseq, hyp.states[k], x)
             else:
                 scores[k], states[k] = d.batch_score(hyp.yseq, hyp.states[k], x)
@@ -116,6 +115,50 @@ class BatchBeamSearchOnline(BatchBeamSearch):
         Returns:
             list[Hypothesis]: N-best decoding results
 
+        """
+        return self.run_steps(self.forward_steps(x, maxlenratio, minlenratio, is_final))
+
+    def run_steps(self, steps: Generator[torch.Tensor, BatchHypothesis, Any]) -> Any:
+        """Run the steps of the search by `self.search()`.
+
+        Args:
+            steps: Generator yielding the encoded feature to search new tokens
+                for `self.running_hyps`, which receives the result of the search.
+
+        Returns:
+            The return value of the generator.
+
+        """
+        try:
+            h = next(steps)
+            while True:
+                h = steps.send(self.search(self.running_hyps, h))
+        except StopIteration as e:
+            return e.value
+
+    def forward_steps(
+        self,
+        x: torch.Tensor,
+        maxlenratio: float = 0.0,
+        minlenratio: float = 0.0,
+        is_final: bool = True,
+    ) -> Generator[torch.Tensor, BatchHypothesis, List[Hypothesis]]:
+        """Perform beam search step by step.
+
+        It is the same as `forward()`, but the search of each token is left
+        to the caller: the generator yields the encoded feature of the block and
+        receives the result of `self.search(self.running_hyps, h)`.
+        So the searches of several streams can be performed together.
+
+        Args:
+            x (torch.Tensor): Encoded speech feature (T, D)
+            maxlenratio (float): Input length ratio to obtain max output length.
+            minlenratio (float): Input length ratio to obtain min output length.
+            is_final (bool): Whether x is the last feature of the stream.
+
+        Returns:
+            list[Hypothesis]: N-best decoding results
+
         """
         if self.encbuffer is None:
             self.encbuffer = x
@@ -163,7 +206,9 @@ class BatchBeamSearchOnline(BatchBeamSearch):
 
             if self.running_hyps is None:
                 self.running_hyps = self.init_hyp(h)
-            ret = self.process_one_block(h, block_is_final, maxlen, maxlenratio)
+            ret = yield from self.process_one_block_steps(
+                h, block_is_final, maxlen, maxlenratio
+            )
             logging.debug("Finished processing block: %d", self.processed_block)
             self.processed_block += 1
             if block_is_final:
@@ -180,11 +225,17 @@ class BatchBeamSearchOnline(BatchBeamSearch):
 
     def process_one_block(self, h, is_final, maxlen, maxlenratio):
         """Recognize one block."""
+        return self.run_steps(
+            self.process_one_block_steps(h, is_final, maxlen, maxlenratio)
+        )
+
+    def process_one_block_steps(self, h, is_final, maxlen, maxlenratio):
+        """Recognize one block step by step (see `forward_steps()`)."""
         # extend states for ctc
         self.extend(h, self.running_hyps)
         while self.process_idx < maxlen:
             logging.debug("position " + str(self.process_idx))
-            best = self.search(self.running_hyps, h)
+            best = yield h
 
             if self.process_idx == maxlen - 1:
                 # end decoding
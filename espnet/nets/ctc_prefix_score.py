@@ -9,6 +9,44 @@ import numpy as np
 import six
 
 
+def _logaddexp(a, b):
+    """Compute log(exp(a) + exp(b)) elementwise (torch.logaddexp needs torch>=1.6)."""
+    m = torch.max(a, b)
+    return m + torch.log1p(torch.exp(-torch.abs(a - b)))
+
+
+def log_linear_scan(a, b, init, chunk_size=64):
+    """Compute the recursion y_t = a_t + log(exp(y_{t-1}) + exp(b_t)) for all t
+
+    The step of the recursion is an affine map in the log semiring,
+    so the steps of a chunk are composed by a parallel prefix scan
+    in log2(chunk_size) vectorized operations,
+    and only the chunks are processed sequentially.
+
+    :param torch.Tensor a: added log probabilities (T, ...)
+    :param torch.Tensor b: log probabilities entering the recursion (T, ...)
+    :param torch.Tensor init: y_{-1} (...)
+    :param int chunk_size: number of frames composed at once
+    :return y (T, ...)
+    """
+    ys = []
+    for s in range(0, a.size(0), chunk_size):
+        alpha = a[s : s + chunk_size]
+        beta = alpha + b[s : s + chunk_size]
+        d = 1
+        while d < alpha.size(0):
+            # compose the map of each step with the map d steps before
+            beta = torch.cat((beta[:d], _logaddexp(beta[:-d] + alpha[d:], beta[d:])))
+            alpha = torch.cat((alpha[:d], alpha[:-d] + alpha[d:]))
+            d *= 2
+        y = _logaddexp(init + alpha, beta)
+        ys.append(y)
+        init = y[-1]
+    if len(ys) == 0:
+        return a.clone()
+    return torch.cat(ys)
+
+
 class CTCPrefixScoreTH(object):
     """Batch processing of CTCPrefixScore
 
@@ -18,9 +56,22 @@ class CTCPrefixScoreTH(object):
     hypotheses simultaneously
     See also Seki et al. "Vectorized Beam Search for CTC-Attention-Based
     Speech Recognition," In INTERSPEECH (pp. 3825-3829), 2019.
+
+    The forward probabilities are computed by a chunked parallel scan over
+    the frames instead of a loop over them (see log_linear_scan).
+
+    With track_alignment=True, the frames are windowed around the CTC peak
+    frames of the last labels of the hypotheses without attention weights.
+    The window spans the frames within `margin` non-blank frames, i.e. frames
+    whose most probable label isn't blank, before and after the peak frames,
+    so pauses don't narrow the window. The forward probabilities are kept only
+    for the window, so the cost of a label doesn't depend on the input length,
+    and the end-of-sequence score assumes blanks after the window.
     """
 
-    def __init__(self, x, xlens, blank, eos, margin=0):
+    def __init__(
+        self, x, xlens, blank, eos, margin=0, track_alignment=False, chunk_size=64
+    ):
         """Construct CTC prefix scorer
 
         :param torch.Tensor x: input label posterior sequences (B, T, O)
@@ -28,6 +79,9 @@ class CTCPrefixScoreTH(object):
         :param int blank: blank label id
         :param int eos: end-of-sequence id
         :param int margin: margin parameter for windowing (0 means no windowing)
+        :param bool track_alignment: decide the window by the CTC peak frames
+            instead of attention weights, where margin counts non-blank frames
+        :param int chunk_size: number of frames composed at once by the scan
         """
         # In the comment lines,
         # we assume T: input_length, B: batch size, W: beam width, O: output dim.
@@ -54,18 +108,55 @@ class CTCPrefixScoreTH(object):
         xb = xn[:, :, self.blank].unsqueeze(2).expand(-1, -1, self.odim)
         self.x = torch.stack([xn, xb])  # (2, T, B, O)
         self.end_frames = torch.as_tensor(xlens) - 1
+        self.chunk_size = chunk_size
 
         # Setup CTC windowing
         self.margin = margin
+        self.track_alignment = track_alignment and margin > 0
         if margin > 0:
             self.frame_ids = torch.arange(
                 self.input_length, dtype=self.dtype, device=self.device
             )
+        if self.track_alignment:
+            # log probabilities of blanks until each frame
+            # to score the end of sequence after the window
+            self.blank_cumsum = torch.cumsum(xn[:, :, self.blank].double(), 0)
+            # number of non-blank frames until each frame (B, T)
+            nonblank = (xn.argmax(2) != self.blank).long()
+            self.nonblank_cumsum = torch.cumsum(nonblank, 0).t().cpu().numpy()
         # Base indices for index conversion
         self.idx_bh = None
         self.idx_b = torch.arange(self.batch, device=self.device)
         self.idx_bo = (self.idx_b * self.odim).unsqueeze(1)
 
+    def _extend_forward(self, r_prev, last_ids, r_offset, end, n_hyps):
+        """Extend the forward probabilities of the prefixes beyond their window
+
+        The prefixes are assumed not to be extended after the window, i.e.
+        only the last labels and blanks are emitted in the extended frames.
+
+        :param torch.Tensor r_prev: forward probabilities from r_offset (L, 2, BW)
+        :param torch.Tensor last_ids: last label ids (BW,)
+        :param int r_offset: first frame of r_prev
+        :param int end: frame until which r_prev is extended
+        :param int n_hyps: number of hypotheses of an utterance
+        :return extended forward probabilities (end - r_offset, 2, BW)
+        """
+        prev_end = r_offset + r_prev.size(0)
+        if end <= prev_end:
+            return r_prev
+        utt_ids = self.idx_b.repeat_interleave(n_hyps)
+        xs = self.x[0, prev_end:end][:, utt_ids]  # (L, BW, O)
+        x_last = xs.gather(2, last_ids.view(1, -1, 1).expand(xs.size(0), -1, 1))
+        r_n = r_prev[-1, 0] + torch.cumsum(x_last.squeeze(2), 0)
+        r_b = log_linear_scan(
+            xs[:, :, self.blank],
+            torch.cat((r_prev[-1:, 0], r_n[:-1])),
+            r_prev[-1, 1],
+            self.chunk_size,
+        )
+        return torch.cat((r_prev, torch.stack([r_n, r_b], dim=1)))
+
     def __call__(self, y, state, scoring_ids=None, att_w=None):
         """Compute CTC prefix scores for next labels
 
@@ -76,10 +167,15 @@ class CTCPrefixScoreTH(object):
         :return new_state, ctc_local_scores (BW, O)
         """
         output_length = len(y[0]) - 1  # ignore sos
-        last_ids = [yi[-1] for yi in y]  # last output label ids
+        last_ids = torch.as_tensor(
+            [int(yi[-1]) for yi in y], dtype=torch.long, device=self.device
+        )  # last output label ids
         n_bh = len(last_ids)  # batch * hyps
         n_hyps = n_bh // self.batch  # assuming each utterance has the same # of hyps
         self.scoring_num = scoring_ids.size(-1) if scoring_ids is not None else 0
+        if self.idx_bh is None or n_bh > len(self.idx_bh):
+            self.idx_bh = torch.arange(n_bh, device=self.device).view(-1, 1)
+        idx_bh = self.idx_bh[:n_bh, 0]
         # prepare state info
         if state is None:
             r_prev = torch.full(
@@ -91,8 +187,8 @@ class CTCPrefixScoreTH(object):
             r_prev[:, 1] = torch.cumsum(self.x[0, :, :, self.blank], 0).unsqueeze(2)
             r_prev = r_prev.view(-1, 2, n_bh)
             s_prev = 0.0
-            f_min_prev = 0
-            f_max_prev = 1
+            f_min_prev = None if self.track_alignment else 0
+            f_max_prev = 0 if self.track_alignment else 1
         else:
             r_prev, s_prev, f_min_prev, f_max_prev = state
 
@@ -102,8 +198,6 @@ class CTCPrefixScoreTH(object):
                 (n_bh, self.odim), -1, dtype=torch.long, device=self.device
             )
             snum = self.scoring_num
-            if self.idx_bh is None or n_bh > len(self.idx_bh):
-                self.idx_bh = torch.arange(n_bh, device=self.device).view(-1, 1)
             scoring_idmap[self.idx_bh[:n_bh], scoring_ids] = torch.arange(
                 snum, device=self.device
             )
@@ -119,72 +213,115 @@ class CTCPrefixScoreTH(object):
             snum = self.odim
             x_ = self.x.unsqueeze(3).repeat(1, 1, 1, n_hyps, 1).view(2, -1, n_bh, snum)
 
-        # new CTC forward probs are prepared as a (T x 2 x BW x S) tensor
-        # that corresponds to r_t^n(h) and r_t^b(h) in a batch.
-        r = torch.full(
-            (self.input_length, 2, n_bh, snum),
-            self.logzero,
-            dtype=self.dtype,
-            device=self.device,
-        )
-        if output_length == 0:
-            r[0, 0] = x_[0, 0]
-
-        r_sum = torch.logsumexp(r_prev, 1)
-        log_phi = r_sum.unsqueeze(2).repeat(1, 1, snum)
-        if scoring_ids is not None:
-            for idx in range(n_bh):
-                pos = scoring_idmap[idx, last_ids[idx]]
-                if pos >= 0:
-                    log_phi[:, idx, pos] = r_prev[:, 1, idx]
-        else:
-            for idx in range(n_bh):
-                log_phi[:, idx, last_ids[idx]] = r_prev[:, 1, idx]
-
-        # decide start and end frames based on attention weights
-        if att_w is not None and self.margin > 0:
+        # decide start and end frames
+        if self.track_alignment:
+            # r_prev holds the frames from r_offset (f_max_prev)
+            # and f_min_prev holds the peak frames of the last labels
+            r_offset = f_max_prev
+            if f_min_prev is None:
+                start = max(output_length, 1)
+                end = self.input_length
+            else:
+                peaks = f_min_prev.view(self.batch, n_hyps).cpu().numpy()
+                starts, ends = [], []
+                for nb, p in zip(self.nonblank_cumsum, peaks):
+                    starts.append(np.searchsorted(nb, nb[p.min()] - self.margin))
+                    ends.append(
+                        np.searchsorted(nb, nb[p.max()] + self.margin, side="right")
+                    )
+                start = max(int(min(starts)), output_length, r_offset + 1)
+                end = min(int(max(ends)), self.input_length)
+            r_prev = self._extend_forward(
+                r_prev, last_ids, r_offset, max(end, start), n_hyps
+            )
+        elif att_w is not None and self.margin > 0:
+            r_offset = 0
             f_arg = torch.matmul(att_w, self.frame_ids)
             f_min = max(int(f_arg.min().cpu()), f_min_prev)
             f_max = max(int(f_arg.max().cpu()), f_max_prev)
             start = min(f_max_prev, max(f_min - self.margin, output_length, 1))
             end = min(f_max + self.margin, self.input_length)
         else:
+            r_offset = 0
             f_min = f_max = 0
             start = max(output_length, 1)
             end = self.input_length
 
-        # compute forward probabilities log(r_t^n(h)) and log(r_t^b(h))
-        for t in range(start, end):
-            rp = r[t - 1]
-            rr = torch.stack([rp[0], log_phi[t - 1], rp[0], rp[1]]).view(
-                2, 2, n_bh, snum
-            )
-            r[t] = torch.logsumexp(rr, 1) + x_[:, t]
+        start = min(start, self.input_length)
+        end = max(end, start)
+        # the frames [start - 1, end) are processed
+        w0 = start - 1
+        rp = r_prev[w0 - r_offset : end - r_offset]
+        xw = x_[:, w0:end]
+        r_sum = torch.logsumexp(rp, 1)
+        log_phi = r_sum.unsqueeze(2).repeat(1, 1, snum)
+        if scoring_ids is not None:
+            pos = scoring_idmap[idx_bh, last_ids]
+            hyp_ids = idx_bh[pos >= 0]
+            pos = pos[pos >= 0]
+        else:
+            hyp_ids = idx_bh
+            pos = last_ids
+        log_phi[:, hyp_ids, pos] = rp[:, 1, hyp_ids]
+
+        # new CTC forward probs are prepared as a (T x 2 x BW x S) tensor
+        # that corresponds to r_t^n(h) and r_t^b(h) in a batch.
+        r0 = torch.full(
+            (2, n_bh, snum), self.logzero, dtype=self.dtype, device=self.device
+        )
+        if output_length == 0 and w0 == 0:
+            r0[0] = xw[0, 0]
+
+        # compute forward probabilities log(r_t^n(h)) and log(r_t^b(h)), i.e.
+        # r_t^n = logaddexp(r_{t-1}^n, phi_{t-1}) + x_t^n
+        # r_t^b = logaddexp(r_{t-1}^n, r_{t-1}^b) + x_t^b
+        r_n = log_linear_scan(xw[0, 1:], log_phi[:-1], r0[0], self.chunk_size)
+        r_n = torch.cat((r0[0].unsqueeze(0), r_n))
+        r_b = log_linear_scan(xw[1, 1:], r_n[:-1], r0[1], self.chunk_size)
+        r_b = torch.cat((r0[1].unsqueeze(0), r_b))
+        r_win = torch.stack([r_n, r_b], dim=1)  # (end - w0, 2, BW, S)
 
         # compute log prefix probabilities log(psi)
-        log_phi_x = torch.cat((log_phi[0].unsqueeze(0), log_phi[:-1]), dim=0) + x_[0]
+        log_psi_ = torch.logsumexp(
+            torch.cat((log_phi[:-1] + xw[0, 1:], r_n[:1]), dim=0), dim=0
+        )
         if scoring_ids is not None:
             log_psi = torch.full(
                 (n_bh, self.odim), self.logzero, dtype=self.dtype, device=self.device
             )
-            log_psi_ = torch.logsumexp(
-                torch.cat((log_phi_x[start:end], r[start - 1, 0].unsqueeze(0)), dim=0),
-                dim=0,
-            )
-            for si in range(n_bh):
-                log_psi[si, scoring_ids[si]] = log_psi_[si]
+            log_psi.scatter_(1, scoring_ids, log_psi_)
         else:
-            log_psi = torch.logsumexp(
-                torch.cat((log_phi_x[start:end], r[start - 1, 0].unsqueeze(0)), dim=0),
-                dim=0,
-            )
-
-        for si in range(n_bh):
-            log_psi[si, self.eos] = r_sum[self.end_frames[si // n_hyps], si]
+            log_psi = log_psi_
+
+        utt_ids = idx_bh // n_hyps
+        if self.track_alignment:
+            # the frames after the window are assumed to be blanks
+            e = end - 1
+            log_psi[:, self.eos] = r_sum[e - w0] + (
+                self.blank_cumsum[-1, utt_ids] - self.blank_cumsum[e, utt_ids]
+            ).to(self.dtype)
+        else:
+            eos_frames = self.end_frames.to(self.device)[utt_ids]
+            log_psi[:, self.eos] = torch.logsumexp(r_prev[eos_frames, :, idx_bh], 1)
 
         # exclude blank probs
         log_psi[:, self.blank] = self.logzero
 
+        if self.track_alignment:
+            # peak frames of the new labels
+            if end - w0 > 1:
+                peaks = torch.argmax(r_n[1:], 0) + start
+            else:
+                peaks = torch.full_like(log_psi_, w0, dtype=torch.long)
+            return (log_psi - s_prev), (r_win, log_psi, peaks, w0, scoring_idmap)
+
+        r = torch.full(
+            (self.input_length, 2, n_bh, snum),
+            self.logzero,
+            dtype=self.dtype,
+            device=self.device,
+        )
+        r[w0:end] = r_win
         return (log_psi - s_prev), (r, log_psi, f_min, f_max, scoring_idmap)
 
     def index_select_state(self, state, best_ids):
@@ -218,6 +355,9 @@ class CTCPrefixScoreTH(object):
         r_new = torch.index_select(r.view(-1, 2, n_bh * snum), 2, vidx).view(
             -1, 2, n_bh
         )
+        if self.track_alignment:
+            # select the peak frames of the selected labels
+            f_min = torch.index_select(f_min.view(-1), 0, vidx)
         return r_new, s_new, f_min, f_max
 
     def extend_prob(self, x):
@@ -225,6 +365,10 @@ class CTCPrefixScoreTH(object):
 
         :param torch.Tensor x: input label posterior sequences (B, T, O)
         """
+        if self.track_alignment:
+            raise NotImplementedError(
+                "track_alignment is not supported for streaming decoding"
+            )
 
         if self.x.shape[1] < x.shape[1]:  # self.x (2,T,B,O); x (B,T,O)
             # Pad the rest of posteriors in the batch
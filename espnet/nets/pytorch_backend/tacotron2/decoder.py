@@ -515,6 +515,51 @@ class Decoder(torch.nn.Module):
 
         .. _`Deep Voice 3`: https://arxiv.org/abs/1710.07654
 
+        """
+        outs, probs, att_ws = [], [], []
+        for out, prob, att_w in self.inference_steps(
+            h,
+            threshold=threshold,
+            minlenratio=minlenratio,
+            maxlenratio=maxlenratio,
+            use_att_constraint=use_att_constraint,
+            backward_window=backward_window,
+            forward_window=forward_window,
+        ):
+            outs += [out]  # [(1, odim, r), ...]
+            probs += [prob]  # [(r), ...]
+            att_ws += [att_w]
+        outs = torch.cat(outs, dim=2)  # (1, odim, L)
+        if self.postnet is not None:
+            outs = outs + self.postnet(outs)  # (1, odim, L)
+        outs = outs.transpose(2, 1).squeeze(0)  # (L, odim)
+        probs = torch.cat(probs, dim=0)
+        att_ws = torch.cat(att_ws, dim=0)
+
+        if self.output_activation_fn is not None:
+            outs = self.output_activation_fn(outs)
+
+        return outs, probs, att_ws
+
+    def inference_steps(
+        self,
+        h,
+        threshold=0.5,
+        minlenratio=0.0,
+        maxlenratio=10.0,
+        use_att_constraint=False,
+        backward_window=None,
+        forward_window=None,
+    ):
+        """Generate the features step by step before the postnet.
+
+        The arguments are the same as inference().
+
+        Yields:
+            Tensor: Output features of the step before the postnet (1, odim, r).
+            Tensor: Stop probabilities of the step (r,).
+            Tensor: Attention weights of the step (1, T).
+
         """
         # setup
         assert len(h.size()) == 2
@@ -543,7 +588,6 @@ class Decoder(torch.nn.Module):
 
         # loop for an output sequence
         idx = 0
-        outs, att_ws, probs = [], [], []
         while True:
             # updated index
             idx += self.reduction_factor
@@ -571,7 +615,6 @@ class Decoder(torch.nn.Module):
                     forward_window=forward_window,
                 )
 
-            att_ws += [att_w]
             prenet_out = self.prenet(prev_out) if self.prenet is not None else prev_out
             xs = torch.cat([att_c, prenet_out], dim=1)
             z_list[0], c_list[0] = self.lstm[0](xs, (z_list[0], c_list[0]))
@@ -584,12 +627,14 @@ class Decoder(torch.nn.Module):
                 if self.use_concate
                 else z_list[-1]
             )
-            outs += [self.feat_out(zcs).view(1, self.odim, -1)]  # [(1, odim, r), ...]
-            probs += [torch.sigmoid(self.prob_out(zcs))[0]]  # [(r), ...]
+            out = self.feat_out(zcs).view(1, self.odim, -1)  # (1, odim, r)
+            prob = torch.sigmoid(self.prob_out(zcs))[0]  # (r)
+            yield out, prob, att_w
+
             if self.output_activation_fn is not None:
-                prev_out = self.output_activation_fn(outs[-1][:, :, -1])  # (1, odim)
+                prev_out = self.output_activation_fn(out[:, :, -1])  # (1, odim)
             else:
-                prev_out = outs[-1][:, :, -1]  # (1, odim)
+                prev_out = out[:, :, -1]  # (1, odim)
             if self.cumulate_att_w and prev_att_w is not None:
                 prev_att_w = prev_att_w + att_w  # Note: error when use +=
             else:
@@ -598,23 +643,12 @@ class Decoder(torch.nn.Module):
                 last_attended_idx = int(att_w.argmax())
 
             # check whether to finish generation
-            if int(sum(probs[-1] >= threshold)) > 0 or idx >= maxlen:
+            if int(sum(prob >= threshold)) > 0 or idx >= maxlen:
                 # check mininum length
                 if idx < minlen:
                     continue
-                outs = torch.cat(outs, dim=2)  # (1, odim, L)
-                if self.postnet is not None:
-                    outs = outs + self.postnet(outs)  # (1, odim, L)
-                outs = outs.transpose(2, 1).squeeze(0)  # (L, odim)
-                probs = torch.cat(probs, dim=0)
-                att_ws = torch.cat(att_ws, dim=0)
                 break
 
-        if self.output_activation_fn is not None:
-            outs = self.output_activation_fn(outs)
-
-        return outs, probs, att_ws
-
     def calculate_all_attentions(self, hs, hlens, ys):
         """Calculate all of the attention weights.
 
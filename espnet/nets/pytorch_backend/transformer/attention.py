@@ -113,6 +113,44 @@ class MultiHeadedAttention(nn.Module):
         scores = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(self.d_k)
         return self.forward_attention(v, scores, mask)
 
+    def forward_incremental(self, x, key_cache, value_cache, offset, mask=None):
+        """Compute self-attention of new frames with cached keys and values.
+
+        The keys and values of `x` are written to the buffers in place.
+
+        Args:
+            x (torch.Tensor): Input tensor of the new frames (#batch, time1, size).
+            key_cache (torch.Tensor): Key buffer (#batch, max_time, size).
+            value_cache (torch.Tensor): Value buffer (#batch, max_time, size).
+            offset (Union[int, torch.Tensor]): The number of cached frames, or
+                the numbers of each sequence (#batch,) if time1 is 1.
+            mask (torch.Tensor): Mask tensor (#batch, time1, offset + time1)
+                or None to attend all the frames.
+
+        Returns:
+            torch.Tensor: Output tensor (#batch, time1, d_model).
+
+        """
+        n_batch = x.size(0)
+        if isinstance(offset, torch.Tensor):
+            # The new frame of each sequence is at the different position
+            assert x.size(1) == 1 and mask is None, (x.shape, mask)
+            end = int(offset.max()) + 1
+            rows = torch.arange(n_batch, device=x.device)
+            key_cache[rows, offset] = self.linear_k(x).squeeze(1)
+            value_cache[rows, offset] = self.linear_v(x).squeeze(1)
+            mask = torch.arange(end, device=x.device) <= offset.unsqueeze(1)
+            mask = mask.unsqueeze(1)
+        else:
+            end = offset + x.size(1)
+            key_cache[:, offset:end] = self.linear_k(x)
+            value_cache[:, offset:end] = self.linear_v(x)
+        q = self.linear_q(x).view(n_batch, -1, self.h, self.d_k).transpose(1, 2)
+        k = key_cache[:, :end].view(n_batch, end, self.h, self.d_k).transpose(1, 2)
+        v = value_cache[:, :end].view(n_batch, end, self.h, self.d_k).transpose(1, 2)
+        scores = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(self.d_k)
+        return self.forward_attention(v, scores, mask)
+
 
 class LegacyRelPositionMultiHeadedAttention(MultiHeadedAttention):
     """Multi-Head Attention layer with relative position encoding (old version).
@@ -14,6 +14,7 @@ from typing import Tuple
 
 import torch
 
+from espnet.nets.pytorch_backend.nets_utils import make_pad_mask
 from espnet.nets.pytorch_backend.nets_utils import rename_state_dict
 from espnet.nets.pytorch_backend.transformer.attention import MultiHeadedAttention
 from espnet.nets.pytorch_backend.transformer.decoder_layer import DecoderLayer
@@ -249,7 +250,7 @@ class Decoder(BatchScorerInterface, torch.nn.Module):
             x = self.output_layer(x)
         return x, tgt_mask
 
-    def forward_one_step(self, tgt, tgt_mask, memory, cache=None):
+    def forward_one_step(self, tgt, tgt_mask, memory, cache=None, memory_mask=None):
         """Forward one step.
 
         Args:
@@ -260,6 +261,7 @@ class Decoder(BatchScorerInterface, torch.nn.Module):
             memory (torch.Tensor): Encoded memory, float32 (#batch, maxlen_in, feat).
             cache (List[torch.Tensor]): List of cached tensors.
                 Each tensor shape should be (#batch, maxlen_out - 1, size).
+            memory_mask (torch.Tensor): Encoded memory mask (#batch, 1, maxlen_in).
 
         Returns:
             torch.Tensor: Output tensor (batch, maxlen_out, odim).
@@ -272,7 +274,7 @@ class Decoder(BatchScorerInterface, torch.nn.Module):
         new_cache = []
         for c, decoder in zip(cache, self.decoders):
             x, tgt_mask, memory, memory_mask = decoder(
-                x, tgt_mask, memory, None, cache=c
+                x, tgt_mask, memory, memory_mask, cache=c
             )
             new_cache.append(x)
 
@@ -302,7 +304,11 @@ class Decoder(BatchScorerInterface, torch.nn.Module):
 
     # batch beam search API (see BatchScorerInterface)
     def batch_score(
-        self, ys: torch.Tensor, states: List[Any], xs: torch.Tensor
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        memory_mask: torch.Tensor = None,
     ) -> Tuple[torch.Tensor, List[Any]]:
         """Score new token batch (required).
 
@@ -311,6 +317,7 @@ class Decoder(BatchScorerInterface, torch.nn.Module):
             states (List[Any]): Scorer states for prefix tokens.
             xs (torch.Tensor):
                 The encoder feature that generates ys (n_batch, xlen, n_feat).
+            memory_mask (torch.Tensor): Mask of xs (n_batch, 1, xlen).
 
         Returns:
             tuple[torch.Tensor, List[Any]]: Tuple of
@@ -332,8 +339,37 @@ class Decoder(BatchScorerInterface, torch.nn.Module):
 
         # batch decoding
         ys_mask = subsequent_mask(ys.size(-1), device=xs.device).unsqueeze(0)
-        logp, states = self.forward_one_step(ys, ys_mask, xs, cache=batch_state)
+        logp, states = self.forward_one_step(
+            ys, ys_mask, xs, cache=batch_state, memory_mask=memory_mask
+        )
 
         # transpose state of [layer, batch] into [batch, layer]
         state_list = [[states[i][b] for i in range(n_layers)] for b in range(n_batch)]
         return logp, state_list
+
+    def batch_score_padded(
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch whose encoder features are padded.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The padded encoder feature that generates ys (n_batch, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of xs (n_batch,).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        memory_mask = (~make_pad_mask(xs_lens, maxlen=xs.size(1)))[:, None, :].to(
+            xs.device
+        )
+        return self.batch_score(ys, states, xs, memory_mask=memory_mask)
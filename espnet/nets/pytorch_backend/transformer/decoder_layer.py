@@ -108,6 +108,55 @@ class DecoderLayer(nn.Module):
         if not self.normalize_before:
             x = self.norm1(x)
 
+        x = self._forward_src_attn_and_feed_forward(x, memory, memory_mask)
+
+        if cache is not None:
+            x = torch.cat([cache, x], dim=1)
+
+        return x, tgt_mask, memory, memory_mask
+
+    def forward_incremental(
+        self, tgt, tgt_mask, memory, memory_mask, key_cache, value_cache, offset
+    ):
+        """Compute decoded features of new frames with cached keys and values.
+
+        Unlike `forward()` with `cache`, which keeps the outputs of the layer and
+        recomputes the keys and values of all the frames at every step,
+        the keys and values of the self-attention are computed only for
+        the new frames and written to the preallocated buffers in place.
+        `self_attn` must be `MultiHeadedAttention`.
+
+        Args:
+            tgt (torch.Tensor): Input tensor of the new frames (#batch, time1, size).
+            tgt_mask (torch.Tensor): Mask for input tensor
+                (#batch, time1, offset + time1) or None.
+            memory (torch.Tensor): Encoded memory, float32 (#batch, maxlen_in, size).
+            memory_mask (torch.Tensor): Encoded memory mask (#batch, maxlen_in).
+            key_cache (torch.Tensor): Key buffer (#batch, max_time, size).
+            value_cache (torch.Tensor): Value buffer (#batch, max_time, size).
+            offset (int): The number of cached frames.
+
+        Returns:
+            torch.Tensor: Output tensor (#batch, time1, size).
+
+        """
+        residual = tgt
+        if self.normalize_before:
+            tgt = self.norm1(tgt)
+
+        att = self.self_attn.forward_incremental(
+            tgt, key_cache, value_cache, offset, tgt_mask
+        )
+        if self.concat_after:
+            x = residual + self.concat_linear1(torch.cat((tgt, att), dim=-1))
+        else:
+            x = residual + self.dropout(att)
+        if not self.normalize_before:
+            x = self.norm1(x)
+
+        return self._forward_src_attn_and_feed_forward(x, memory, memory_mask)
+
+    def _forward_src_attn_and_feed_forward(self, x, memory, memory_mask):
         residual = x
         if self.normalize_before:
             x = self.norm2(x)
@@ -127,8 +176,4 @@ class DecoderLayer(nn.Module):
         x = residual + self.dropout(self.feed_forward(x))
         if not self.normalize_before:
             x = self.norm3(x)
-
-        if cache is not None:
-            x = torch.cat([cache, x], dim=1)
-
-        return x, tgt_mask, memory, memory_mask
+        return x
@@ -8,6 +8,7 @@
 
 import math
 import torch
+from typing import Union
 
 
 def _pre_hook(
@@ -369,16 +370,25 @@ class StreamPositionalEncoding(torch.nn.Module):
         pe = pe.unsqueeze(0)
         self.pe = pe.to(device=device, dtype=dtype)
 
-    def forward(self, x: torch.Tensor, start_idx: int = 0):
+    def forward(self, x: torch.Tensor, start_idx: Union[int, torch.Tensor] = 0):
         """Add positional encoding.
 
         Args:
             x (torch.Tensor): Input tensor (batch, time, `*`).
+            start_idx (Union[int, torch.Tensor]): The position of the first frame,
+                or the positions of each sequence in the batch (batch,).
 
         Returns:
             torch.Tensor: Encoded tensor (batch, time, `*`).
 
         """
+        if isinstance(start_idx, torch.Tensor):
+            self.extend_pe(x.size(1) + int(start_idx.max()), x.device, x.dtype)
+            idx = start_idx.to(x.device).unsqueeze(1) + torch.arange(
+                x.size(1), device=x.device
+            )
+            x = x * self.xscale + self.pe[0, idx]
+            return self.dropout(x)
         self.extend_pe(x.size(1) + start_idx, x.device, x.dtype)
         x = x * self.xscale + self.pe[:, start_idx : start_idx + x.size(1)]
         return self.dropout(x)
@@ -0,0 +1,122 @@
+"""Key/value cache for incremental decoding of transformer decoders."""
+
+from typing import List
+from typing import Sequence
+from typing import Union
+
+import torch
+
+
+class KVCache:
+    """Preallocated key/value buffers of self-attention layers.
+
+    The keys and values of all the layers are kept in a single tensor
+    of shape (n_batch, n_layers, 2, max_len, size), so that the states of
+    the hypotheses can be reordered in beam search by one ``index_select``
+    without transposing the per-hypothesis lists of tensors.
+    The buffer is grown by doubling when ``max_len`` is exceeded.
+    The frames after ``length`` are zeros or the ones of the previous steps,
+    so they are finite and can be attended with the weights of zero.
+
+    Args:
+        buffer (torch.Tensor): Key/value buffer
+            (n_batch, n_layers, 2, max_len, size).
+        length (Union[int, torch.Tensor]): The number of cached frames,
+            or the numbers of each hypothesis (n_batch,) if they are different.
+
+    """
+
+    def __init__(self, buffer: torch.Tensor, length: Union[int, torch.Tensor] = 0):
+        """Construct a KVCache object."""
+        self.buffer = buffer
+        self.length = length
+
+    @classmethod
+    def allocate(
+        cls,
+        n_batch: int,
+        n_layers: int,
+        size: int,
+        max_len: int,
+        device: torch.device = None,
+        dtype: torch.dtype = None,
+    ) -> "KVCache":
+        """Allocate an empty cache."""
+        buffer = torch.zeros(
+            n_batch, n_layers, 2, max_len, size, device=device, dtype=dtype
+        )
+        return cls(buffer, 0)
+
+    @classmethod
+    def cat(cls, caches: Sequence["KVCache"]) -> "KVCache":
+        """Concatenate the caches along the batch axis.
+
+        If the lengths of the caches are different, e.g. for the prefixes of
+        several beam searches, the length of the result is the tensor of
+        the lengths of each hypothesis.
+
+        """
+        length = caches[0].length
+        if all(isinstance(c.length, int) and c.length == length for c in caches):
+            max_len = min(c.max_len for c in caches)
+            return cls(torch.cat([c.buffer[:, :, :, :max_len] for c in caches]), length)
+
+        n_batch, n_layers, _, _, size = caches[0].buffer.shape
+        buffer = caches[0].buffer.new_zeros(
+            sum(len(c) for c in caches),
+            n_layers,
+            2,
+            max(c.max_len for c in caches),
+            size,
+        )
+        lengths = []
+        start = 0
+        for c in caches:
+            buffer[start : start + len(c), :, :, : c.max_len] = c.buffer
+            start += len(c)
+            if isinstance(c.length, int):
+                lengths.append(torch.full((len(c),), c.length, dtype=torch.long))
+            else:
+                lengths.append(c.length.cpu())
+        return cls(buffer, torch.cat(lengths).to(buffer.device))
+
+    @property
+    def max_len(self) -> int:
+        """Return the capacity of the buffer."""
+        return self.buffer.size(3)
+
+    def __len__(self) -> int:
+        """Return the batch size."""
+        return self.buffer.size(0)
+
+    def __getitem__(self, i: Union[int, torch.Tensor]) -> "KVCache":
+        """Select the cache of one hypothesis keeping the batch axis."""
+        return self.index_select(torch.as_tensor(i).view(1))
+
+    def index_select(self, ids: Union[List[int], torch.Tensor]) -> "KVCache":
+        """Select the caches of the hypotheses ``ids``."""
+        ids = torch.as_tensor(ids, dtype=torch.long, device=self.buffer.device)
+        if isinstance(self.length, int):
+            length = self.length
+        else:
+            length = self.length.index_select(0, ids)
+        return KVCache(self.buffer.index_select(0, ids), length)
+
+    def reserve(self, max_len: int) -> "KVCache":
+        """Return a cache having the capacity of ``max_len`` frames at least."""
+        if max_len <= self.max_len:
+            return self
+        n_batch, n_layers, _, _, size = self.buffer.shape
+        buffer = self.buffer.new_zeros(
+            n_batch, n_layers, 2, max(max_len, 2 * self.max_len), size
+        )
+        buffer[:, :, :, : self.max_len] = self.buffer
+        return KVCache(buffer, self.length)
+
+    def keys(self, layer: int) -> torch.Tensor:
+        """Return the key buffer of the layer (n_batch, max_len, size)."""
+        return self.buffer[:, layer, 0]
+
+    def values(self, layer: int) -> torch.Tensor:
+        """Return the value buffer of the layer (n_batch, max_len, size)."""
+        return self.buffer[:, layer, 1]
@@ -2,6 +2,7 @@
 
 from typing import Any
 from typing import List
+from typing import Sequence
 from typing import Tuple
 
 import torch
@@ -51,6 +52,28 @@ class ScorerInterface:
         """
         return None if state is None else state[i]
 
+    def batch_select_state(
+        self, states: Any, ids: Sequence[int], new_ids: Sequence[int] = None
+    ) -> Any:
+        """Select states of the hypotheses in the batch beam search.
+
+        Override this method if the scorer keeps the states of all the hypotheses
+        in a batchfied object instead of a list of the states of each hypothesis,
+        e.g. :class:`espnet.nets.pytorch_backend.transformer.kv_cache.KVCache`.
+
+        Args:
+            states: Batchfied decoder states for prefix tokens
+            ids (Sequence[int]): Indices to select states in the main beam search
+            new_ids (Sequence[int]): New label indices to select states if necessary
+
+        Returns:
+            states: pruned states
+
+        """
+        if new_ids is None:
+            return [self.select_state(states, i) for i in ids]
+        return [self.select_state(states, i, j) for i, j in zip(ids, new_ids)]
+
     def score(
         self, y: torch.Tensor, state: Any, x: torch.Tensor
     ) -> Tuple[torch.Tensor, Any]:
@@ -127,6 +150,49 @@ class BatchScorerInterface(ScorerInterface):
         scores = torch.cat(scores, 0).view(ys.shape[0], -1)
         return scores, outstates
 
+    def batch_init_state_padded(
+        self, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> List[Any]:
+        """Get initial states for decoding several utterances at once (optional).
+
+        Args:
+            xs (torch.Tensor): The padded encoded feature tensor (n_utt, xlen, n_feat)
+            xs_lens (torch.Tensor): The lengths of xs (n_utt,)
+
+        Returns: List of the initial states of the utterances
+
+        """
+        return [self.batch_init_state(x[:l]) for x, l in zip(xs, xs_lens)]
+
+    def batch_score_padded(
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch whose encoder features are padded (optional).
+
+        The default implementation passes the padded features to `batch_score`,
+        which is correct only if the scorer doesn't attend to `xs`
+        (e.g. language models and length bonus).
+        The scorers using `xs` must mask the padded frames by overriding it.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The padded encoder feature that generates ys (n_batch, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of xs (n_batch,)
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        return self.batch_score(ys, states, xs)
+
 
 class PartialScorerInterface(ScorerInterface):
     """Partial scorer interface for beam search.
@@ -186,3 +252,30 @@ class BatchPartialScorerInterface(BatchScorerInterface, PartialScorerInterface):
                 and next states for ys
         """
         raise NotImplementedError
+
+    def batch_score_partial_padded(
+        self,
+        ys: torch.Tensor,
+        next_tokens: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, Any]:
+        """Score new token whose encoder features are padded (optional).
+
+        See also `BatchScorerInterface.batch_score_padded`.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            next_tokens (torch.Tensor): torch.int64 tokens to score (n_batch, n_token).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The padded encoder feature that generates ys (n_batch, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of xs (n_batch,)
+
+        Returns:
+            tuple[torch.Tensor, Any]:
+                Tuple of a score tensor for ys that has a shape `(n_batch, n_vocab)`
+                and next states for ys
+        """
+        return self.batch_score_partial(ys, next_tokens, states, xs)
@@ -11,17 +11,23 @@ from espnet.nets.scorer_interface import BatchPartialScorerInterface
 class CTCPrefixScorer(BatchPartialScorerInterface):
     """Decoder interface wrapper for CTCPrefixScore."""
 
-    def __init__(self, ctc: torch.nn.Module, eos: int):
+    def __init__(self, ctc: torch.nn.Module, eos: int, window_margin: int = 0):
         """Initialize class.
 
         Args:
             ctc (torch.nn.Module): The CTC implementation.
                 For example, :class:`espnet.nets.pytorch_backend.ctc.CTC`
             eos (int): The end-of-sequence id.
+            window_margin (int): The margin of the frame window around
+                the CTC peak frames of the hypotheses in the batch beam search,
+                counted in non-blank frames. 0 means no windowing.
+                The window makes the cost of each label independent of
+                the input length, e.g. for long-form audio.
 
         """
         self.ctc = ctc
         self.eos = eos
+        self.window_margin = window_margin
         self.impl = None
 
     def init_state(self, x: torch.Tensor):
@@ -58,9 +64,13 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
                 r, log_psi, f_min, f_max, scoring_idmap = state
                 s = log_psi[i, new_id].expand(log_psi.size(1))
                 if scoring_idmap is not None:
-                    return r[:, :, i, scoring_idmap[i, new_id]], s, f_min, f_max
+                    j = scoring_idmap[i, new_id]
                 else:
-                    return r[:, :, i, new_id], s, f_min, f_max
+                    j = new_id
+                if isinstance(f_min, torch.Tensor):
+                    # the peak frames of the labels with window_margin
+                    f_min = f_min[i, j]
+                return r[:, :, i, j], s, f_min, f_max
         return None if state is None else state[i]
 
     def score_partial(self, y, ids, state, x):
@@ -96,9 +106,40 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
         """
         logp = self.ctc.log_softmax(x.unsqueeze(0))  # assuming batch_size = 1
         xlen = torch.tensor([logp.size(1)])
-        self.impl = CTCPrefixScoreTH(logp, xlen, 0, self.eos)
+        self.impl = CTCPrefixScoreTH(
+            logp,
+            xlen,
+            0,
+            self.eos,
+            margin=self.window_margin,
+            track_alignment=True,
+        )
         return None
 
+    def batch_init_state_padded(self, xs: torch.Tensor, xs_lens: torch.Tensor):
+        """Get initial states for decoding several utterances at once.
+
+        Note that CTCPrefixScoreTH assumes that every utterance has
+        the same number of hypotheses, which are ordered by utterance.
+
+        Args:
+            xs (torch.Tensor): The padded encoded feature tensor (n_utt, xlen, n_feat)
+            xs_lens (torch.Tensor): The lengths of xs (n_utt,)
+
+        Returns: initial states
+
+        """
+        logp = self.ctc.log_softmax(xs)
+        self.impl = CTCPrefixScoreTH(
+            logp,
+            xs_lens.cpu(),
+            0,
+            self.eos,
+            margin=self.window_margin,
+            track_alignment=True,
+        )
+        return [None] * len(xs)
+
     def batch_score_partial(self, y, ids, state, x):
         """Score new token.
 
@@ -118,7 +159,9 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
             (
                 torch.stack([s[0] for s in state], dim=2),
                 torch.stack([s[1] for s in state]),
-                state[0][2],
+                torch.stack([s[2] for s in state])
+                if isinstance(state[0][2], torch.Tensor)
+                else state[0][2],
                 state[0][3],
             )
             if state[0] is not None
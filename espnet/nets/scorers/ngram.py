@@ -5,25 +5,55 @@ from abc import ABC
 import kenlm
 import torch
 
+from espnet.nets.scorer_interface import BatchPartialScorerInterface
 from espnet.nets.scorer_interface import BatchScorerInterface
-from espnet.nets.scorer_interface import PartialScorerInterface
 
 
 class Ngrambase(ABC):
     """Ngram base implemented through ScorerInterface."""
 
-    def __init__(self, ngram_model, token_list):
+    def __init__(self, ngram_model, token_list, max_cached_states=4096):
         """Initialize Ngrambase.
 
         Args:
             ngram_model: ngram model path
             token_list: token list from dict or model.json
+            max_cached_states: the number of memoized kenlm states,
+                the memo is cleared when it is exceeded
 
         """
         self.chardict = [x if x != "<eos>" else "</s>" for x in token_list]
         self.charlen = len(self.chardict)
         self.lm = kenlm.LanguageModel(ngram_model)
         self.tmpkenlmstate = kenlm.State()
+        self.max_cached_states = max_cached_states
+
+        # The tokens unknown to the LM are all scored as <unk>,
+        # so they are looked up only once per context
+        null_state = self.init_state(None)
+        oov = [
+            self.lm.BaseFullScore(null_state, w, self.tmpkenlmstate).oov
+            for w in self.chardict
+        ]
+        self.known_ids = torch.tensor(
+            [i for i, o in enumerate(oov) if not o], dtype=torch.long
+        )
+        self.known_words = [self.chardict[i] for i in self.known_ids.tolist()]
+        self.unknown_ids = torch.tensor(
+            [i for i, o in enumerate(oov) if o], dtype=torch.long
+        )
+        self.reset_cache()
+
+    def reset_cache(self):
+        """Clear the memoized states and scores."""
+        # kenlm.State is hashable, so the states of hypotheses sharing
+        # the same history are interned to the same id
+        self.state_ids = {}
+        self.states = []
+        # (state id, token id) -> state id
+        self.transitions = {}
+        # state id -> scores of all the tokens (n_vocab,)
+        self.full_scores = {}
 
     def init_state(self, x):
         """Initialize tmp state."""
@@ -31,6 +61,55 @@ class Ngrambase(ABC):
         self.lm.NullContextWrite(state)
         return state
 
+    def reserve_cache(self, n_batch):
+        """Clear the memo if it may exceed max_cached_states in this step.
+
+        Each hypothesis interns two states at most, the given one and the next one.
+        """
+        if len(self.states) + 2 * n_batch > self.max_cached_states:
+            self.reset_cache()
+
+    def intern_state(self, state):
+        """Return the id of the state."""
+        i = self.state_ids.get(state)
+        if i is None:
+            i = len(self.states)
+            self.state_ids[state] = i
+            self.states.append(state)
+        return i
+
+    def next_state(self, y, state):
+        """Return the id of the state after reading the last token of y."""
+        i = self.intern_state(state)
+        token = int(y[-1]) if y.shape[0] > 1 else None
+        out = self.transitions.get((i, token))
+        if out is None:
+            out_state = kenlm.State()
+            ys = self.chardict[token] if token is not None else "<s>"
+            self.lm.BaseScore(state, ys, out_state)
+            out = self.intern_state(out_state)
+            self.transitions[(i, token)] = out
+        return out
+
+    def full_score(self, i):
+        """Return the memoized scores of all the tokens for the state id i."""
+        scores = self.full_scores.get(i)
+        if scores is None:
+            state = self.states[i]
+            scores = torch.empty(self.charlen)
+            scores[self.known_ids] = torch.tensor(
+                [
+                    self.lm.BaseScore(state, w, self.tmpkenlmstate)
+                    for w in self.known_words
+                ]
+            )
+            if len(self.unknown_ids) > 0:
+                scores[self.unknown_ids] = self.lm.BaseScore(
+                    state, "<unk>", self.tmpkenlmstate
+                )
+            self.full_scores[i] = scores
+        return scores
+
     def score_partial_(self, y, next_token, state, x):
         """Score interface for both full and partial scorer.
 
@@ -46,15 +125,63 @@ class Ngrambase(ABC):
                 and next state list for ys.
 
         """
-        out_state = kenlm.State()
-        ys = self.chardict[y[-1]] if y.shape[0] > 1 else "<s>"
-        self.lm.BaseScore(state, ys, out_state)
-        scores = torch.empty_like(next_token, dtype=x.dtype, device=y.device)
-        for i, j in enumerate(next_token):
-            scores[i] = self.lm.BaseScore(
-                out_state, self.chardict[j], self.tmpkenlmstate
+        self.reserve_cache(1)
+        out = self.next_state(y, state)
+        out_state = self.states[out]
+        scores = self.full_scores.get(out)
+        if scores is not None:
+            scores = scores[next_token.cpu()]
+        else:
+            scores = torch.tensor(
+                [
+                    self.lm.BaseScore(out_state, self.chardict[j], self.tmpkenlmstate)
+                    for j in next_token.tolist()
+                ]
             )
-        return scores, out_state
+        return scores.to(dtype=x.dtype, device=y.device), out_state
+
+    def batch_score_(self, ys, next_tokens, states, xs):
+        """Score new token batch for both full and partial scorer.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            next_tokens (torch.Tensor): torch.int64 tokens to score (n_batch, n_token).
+                All the tokens are scored if None.
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        ys_cpu = ys.cpu()
+        self.reserve_cache(len(states))
+        out = [self.next_state(y, s) for y, s in zip(ys_cpu, states)]
+        out_states = [self.states[i] for i in out]
+        if next_tokens is None:
+            scores = torch.stack([self.full_score(i) for i in out])
+        else:
+            # Only the requested tokens are scored unless already memoized
+            next_tokens = next_tokens.cpu()
+            scores = torch.zeros(len(out), self.charlen)
+            for b, (i, state) in enumerate(zip(out, out_states)):
+                full = self.full_scores.get(i)
+                ids = next_tokens[b]
+                if full is not None:
+                    scores[b, ids] = full[ids]
+                else:
+                    scores[b, ids] = torch.tensor(
+                        [
+                            self.lm.BaseScore(
+                                state, self.chardict[j], self.tmpkenlmstate
+                            )
+                            for j in ids.tolist()
+                        ]
+                    )
+        return scores.to(dtype=xs.dtype, device=xs.device), out_states
 
 
 class NgramFullScorer(Ngrambase, BatchScorerInterface):
@@ -74,10 +201,30 @@ class NgramFullScorer(Ngrambase, BatchScorerInterface):
                 and next state list for ys.
 
         """
-        return self.score_partial_(y, torch.tensor(range(self.charlen)), state, x)
+        self.reserve_cache(1)
+        out = self.next_state(y, state)
+        scores = self.full_score(out)
+        return scores.to(dtype=x.dtype, device=y.device), self.states[out]
+
+    def batch_score(self, ys, states, xs):
+        """Score new token batch.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        return self.batch_score_(ys, None, states, xs)
 
 
-class NgramPartScorer(Ngrambase, PartialScorerInterface):
+class NgramPartScorer(Ngrambase, BatchPartialScorerInterface):
     """Partialscorer for ngram."""
 
     def score_partial(self, y, next_token, state, x):
@@ -97,6 +244,28 @@ class NgramPartScorer(Ngrambase, PartialScorerInterface):
         """
         return self.score_partial_(y, next_token, state, x)
 
-    def select_state(self, state, i):
+    def batch_score_partial(self, ys, next_tokens, states, xs):
+        """Score new token batch.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            next_tokens (torch.Tensor): torch.int64 tokens to score (n_batch, n_token).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        return self.batch_score_(ys, next_tokens, states, xs)
+
+    def select_state(self, state, i, new_id=None):
         """Empty select state for scorer interface."""
         return state
+
+    def batch_select_state(self, states, ids, new_ids=None):
+        """Select the states of the hypotheses ids."""
+        return [states[i] for i in ids]
@@ -16,6 +16,7 @@ from espnet.nets.pytorch_backend.transformer.decoder_layer import DecoderLayer
 from espnet.nets.pytorch_backend.transformer.dynamic_conv import DynamicConvolution
 from espnet.nets.pytorch_backend.transformer.dynamic_conv2d import DynamicConvolution2D
 from espnet.nets.pytorch_backend.transformer.embedding import PositionalEncoding
+from espnet.nets.pytorch_backend.transformer.kv_cache import KVCache
 from espnet.nets.pytorch_backend.transformer.layer_norm import LayerNorm
 from espnet.nets.pytorch_backend.transformer.lightconv import LightweightConvolution
 from espnet.nets.pytorch_backend.transformer.lightconv2d import LightweightConvolution2D
@@ -122,6 +123,8 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
 
         # Must set by the inheritance
         self.decoders = None
+        # Use the preallocated key/value cache in batch_score() if possible
+        self.use_kv_cache = True
 
     def forward(
         self,
@@ -192,7 +195,8 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
         tgt_mask: torch.Tensor,
         memory: torch.Tensor,
         cache: List[torch.Tensor] = None,
-        lid: Union[None, str] = None
+        lid: Union[None, str] = None,
+        memory_mask: torch.Tensor = None,
     ) -> Tuple[torch.Tensor, List[torch.Tensor]]:
         """Forward one step.
 
@@ -203,6 +207,7 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
                       dtype=torch.bool in PyTorch 1.2+ (include 1.2)
             memory: encoded memory, float32  (batch, maxlen_in, feat)
             cache: cached output list of (batch, max_time_out-1, size)
+            memory_mask: encoded memory mask (batch, 1, maxlen_in)
         Returns:
             y, cache: NN output value and cache per `self.decoders`.
             y.shape` is (batch, maxlen_out, token)
@@ -216,7 +221,7 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
         new_cache = []
         for c, decoder in zip(cache, self.decoders):
             x, tgt_mask, memory, memory_mask = decoder(
-                x, tgt_mask, memory, None, cache=c
+                x, tgt_mask, memory, memory_mask, cache=c
             )
             new_cache.append(x)
 
@@ -241,7 +246,12 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
         return logp.squeeze(0), state
 
     def batch_score(
-            self, ys: torch.Tensor, states: List[Any], xs: torch.Tensor, lid: Union[None, str]=None
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        lid: Union[None, str] = None,
+        memory_mask: torch.Tensor = None,
     ) -> Tuple[torch.Tensor, List[Any]]:
         """Score new token batch.
 
@@ -250,6 +260,7 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
             states (List[Any]): Scorer states for prefix tokens.
             xs (torch.Tensor):
                 The encoder feature that generates ys (n_batch, xlen, n_feat).
+            memory_mask (torch.Tensor): Mask of xs (n_batch, 1, xlen)
 
         Returns:
             tuple[torch.Tensor, List[Any]]: Tuple of
@@ -257,6 +268,9 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
                 and next state list for ys.
 
         """
+        if self._use_kv_cache(states):
+            return self.batch_score_kv(ys, states, xs, lid=lid, memory_mask=memory_mask)
+
         # merge states
         n_batch = len(ys)
         n_layers = len(self.decoders)
@@ -271,12 +285,152 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
 
         # batch decoding
         ys_mask = subsequent_mask(ys.size(-1), device=xs.device).unsqueeze(0)
-        logp, states = self.forward_one_step(ys, ys_mask, xs, cache=batch_state, lid=lid)
+        logp, states = self.forward_one_step(
+            ys, ys_mask, xs, cache=batch_state, lid=lid, memory_mask=memory_mask
+        )
 
         # transpose state of [layer, batch] into [batch, layer]
         state_list = [[states[i][b] for i in range(n_layers)] for b in range(n_batch)]
         return logp, state_list
 
+    def batch_score_padded(
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+        lid: Union[None, str] = None,
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch whose encoder features are padded.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The padded encoder feature that generates ys (n_batch, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of xs (n_batch,)
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        memory_mask = (~make_pad_mask(xs_lens, maxlen=xs.size(1)))[:, None, :].to(
+            xs.device
+        )
+        return self.batch_score(ys, states, xs, lid=lid, memory_mask=memory_mask)
+
+    def _use_kv_cache(self, states: Union[KVCache, List[Any]]) -> bool:
+        if isinstance(states, KVCache):
+            return True
+        if not self.use_kv_cache or not (
+            states[0] is None or isinstance(states[0], KVCache)
+        ):
+            return False
+        # e.g. LightweightConvolution can't use the key/value cache
+        return all(
+            isinstance(d, DecoderLayer) and type(d.self_attn) is MultiHeadedAttention
+            for d in self.decoders
+        )
+
+    def batch_score_kv(
+        self,
+        ys: torch.Tensor,
+        states: Union[KVCache, List[Any]],
+        xs: torch.Tensor,
+        lid: Union[None, str] = None,
+        memory_mask: torch.Tensor = None,
+    ) -> Tuple[torch.Tensor, KVCache]:
+        """Score new token batch with the preallocated key/value cache.
+
+        The keys and values of the self-attention layers are computed only for
+        the tokens which are not cached yet, so the cost of each step doesn't
+        depend on the prefix length except for the attention itself.
+        If the KVCache has the lengths of each hypothesis, i.e. the prefixes of
+        the different lengths, ys is padded and only the token after the cached
+        ones in each prefix is fed.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (Union[KVCache, List[Any]]): KVCache for the prefix tokens,
+                or the list of the states of each hypothesis
+                (None or KVCache of the hypothesis).
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+            memory_mask (torch.Tensor): Mask of xs (n_batch, 1, xlen)
+
+        Returns:
+            tuple[torch.Tensor, KVCache]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and KVCache for ys.
+
+        """
+        if isinstance(states, list):
+            states = None if states[0] is None else KVCache.cat(states)
+
+        if lid:
+            x = self.embed[lid](ys)
+        else:
+            x = self.embed(ys)
+        if states is None:
+            states = KVCache.allocate(
+                n_batch=x.size(0),
+                n_layers=len(self.decoders),
+                size=x.size(-1),
+                max_len=max(2 * ys.size(1), 32),
+                device=x.device,
+                dtype=x.dtype,
+            )
+        offset = states.length
+        states = states.reserve(ys.size(1))
+
+        # Feed only the tokens which are not cached yet
+        if isinstance(offset, torch.Tensor):
+            x = x[torch.arange(x.size(0), device=x.device), offset].unsqueeze(1)
+            tgt_mask = None
+        else:
+            x = x[:, offset:]
+            if x.size(1) == 1:
+                tgt_mask = None
+            else:
+                tgt_mask = subsequent_mask(ys.size(1), device=x.device)[offset:]
+                tgt_mask = tgt_mask.unsqueeze(0)
+        for i, decoder in enumerate(self.decoders):
+            x = decoder.forward_incremental(
+                x,
+                tgt_mask,
+                xs,
+                memory_mask,
+                states.keys(i),
+                states.values(i),
+                offset,
+            )
+
+        if self.normalize_before:
+            y = self.after_norm(x[:, -1])
+        else:
+            y = x[:, -1]
+        if self.output_layer is not None:
+            if lid:
+                y = torch.log_softmax(self.output_layer[lid](y), dim=-1)
+            else:
+                y = torch.log_softmax(self.output_layer(y), dim=-1)
+        if isinstance(offset, torch.Tensor):
+            return y, KVCache(states.buffer, offset + 1)
+        return y, KVCache(states.buffer, ys.size(1))
+
+    def batch_select_state(
+        self,
+        states: Union[KVCache, List[Any]],
+        ids: Union[List[int], torch.Tensor],
+        new_ids: Union[List[int], torch.Tensor] = None,
+    ) -> Union[KVCache, List[Any]]:
+        """Select states of the hypotheses `ids` from the batchfied states."""
+        if isinstance(states, KVCache):
+            return states.index_select(ids)
+        return super().batch_select_state(states, ids, new_ids)
+
 
 class TransformerDecoder(BaseTransformerDecoder):
     def __init__(
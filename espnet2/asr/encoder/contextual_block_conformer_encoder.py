@@ -393,7 +393,10 @@ class ContextualBlockConformerEncoder(AbsEncoder):
         Args:
             xs_pad: input tensor (B, L, D)
             ilens: input length (B)
-            prev_states: Not to be used now.
+            prev_states: The states of the previous call. The states of several
+                streams can be batched, and "n_processed_blocks" can be a tensor
+                of the numbers of the blocks of each stream (B,) then.
+            is_final: Whether the input is the last one of the stream.
         Returns:
             position embedded tensor and mask
         """
@@ -412,7 +415,12 @@ class ContextualBlockConformerEncoder(AbsEncoder):
             n_processed_blocks = prev_states["n_processed_blocks"]
             past_encoder_ctx = prev_states["past_encoder_ctx"]
         bsize = xs_pad.size(0)
-        assert bsize == 1
+        if isinstance(n_processed_blocks, torch.Tensor):
+            is_first_block = bool((n_processed_blocks == 0).all())
+            # The streams batched together must be at the first block at once
+            assert is_first_block or bool((n_processed_blocks > 0).all())
+        else:
+            is_first_block = n_processed_blocks == 0
 
         if prev_states is not None:
             xs_pad = torch.cat([buffer_before_downsampling, xs_pad], dim=1)
@@ -444,10 +452,10 @@ class ContextualBlockConformerEncoder(AbsEncoder):
             xs_pad = xs_pad.narrow(1, 0, n_samples * self.subsample)
 
             ilens_buffer = ilens.new_full(
-                [1], dtype=torch.long, fill_value=n_res_samples
+                [bsize], dtype=torch.long, fill_value=n_res_samples
             )
             ilens = ilens.new_full(
-                [1], dtype=torch.long, fill_value=n_samples * self.subsample
+                [bsize], dtype=torch.long, fill_value=n_samples * self.subsample
             )
 
         if isinstance(self.embed, Conv2dSubsamplingWOPosEnc):
@@ -495,12 +503,12 @@ class ContextualBlockConformerEncoder(AbsEncoder):
         # block_size could be 0 meaning infinite
         # apply usual encoder for short sequence
         assert self.block_size > 0
-        if n_processed_blocks == 0 and total_frame_num <= self.block_size and is_final:
+        if is_first_block and total_frame_num <= self.block_size and is_final:
             xs_chunk = self.pos_enc(xs_pad).unsqueeze(1)
             xs_pad, _, _, _, _, _, _ = self.encoders(
                 xs_chunk, None, True, None, None, True
             )
-            xs_pad = xs_pad.squeeze(0)
+            xs_pad = xs_pad.squeeze(1)
             if self.normalize_before:
                 xs_pad = self.after_norm(xs_pad)
             return xs_pad, None, None
@@ -523,8 +531,8 @@ class ContextualBlockConformerEncoder(AbsEncoder):
 
             if prev_addin is None:
                 prev_addin = addin
-            xs_chunk[:, i, 0] = prev_addin
-            xs_chunk[:, i, -1] = addin
+            xs_chunk[:, i, 0:1] = prev_addin
+            xs_chunk[:, i, -1:] = addin
 
             chunk = self.pos_enc(
                 xs_pad.narrow(1, cur_hop, chunk_length),
@@ -552,20 +560,20 @@ class ContextualBlockConformerEncoder(AbsEncoder):
 
         offset = self.block_size - self.look_ahead - self.hop_size
         if is_final:
-            if n_processed_blocks == 0:
+            if is_first_block:
                 y_length = xs_pad.size(1)
             else:
                 y_length = xs_pad.size(1) - offset
         else:
             y_length = block_num * self.hop_size
-            if n_processed_blocks == 0:
+            if is_first_block:
                 y_length += offset
         ys_pad = xs_pad.new_zeros((xs_pad.size(0), y_length, xs_pad.size(2)))
-        if n_processed_blocks == 0:
+        if is_first_block:
             ys_pad[:, 0:offset] = ys_chunk[:, 0, 0:offset]
         for i in range(block_num):
             cur_hop = i * self.hop_size
-            if n_processed_blocks == 0:
+            if is_first_block:
                 cur_hop += offset
             if i == block_num - 1 and is_final:
                 chunk_length = min(self.block_size - offset, ys_pad.size(1) - cur_hop)
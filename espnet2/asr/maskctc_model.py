@@ -1,6 +1,5 @@
 from contextlib import contextmanager
 from distutils.version import LooseVersion
-from itertools import groupby
 import logging
 from typing import Dict
 from typing import List
@@ -8,7 +7,6 @@ from typing import Optional
 from typing import Tuple
 from typing import Union
 
-import numpy
 import torch
 from typeguard import check_argument_types
 
@@ -284,63 +282,172 @@ class MaskCTCInference(torch.nn.Module):
         text = "".join(self.converter.ids2tokens(ids))
         return text.replace("<mask>", "_").replace("<space>", " ")
 
-    def forward(self, enc_out: torch.Tensor) -> List[Hypothesis]:
+    def forward(self, enc_out: torch.Tensor) -> Hypothesis:
         """Perform Mask-CTC inference"""
+        enc_out_lens = enc_out.new_full([1], enc_out.size(0), dtype=torch.long)
+        return self.batch_forward(enc_out.unsqueeze(0), enc_out_lens)[0]
+
+    def batch_forward(
+        self, enc_out: torch.Tensor, enc_out_lens: torch.Tensor
+    ) -> List[Hypothesis]:
+        """Perform Mask-CTC inference for a batch of utterances
+
+        The greedy CTC outputs of all utterances are collapsed at once, and
+        the masked tokens of the padded batch are predicted by the MLM decoder
+        at each iteration. The number of the iterations and of the tokens
+        filled at each iteration are counted for each utterance as in the
+        inference of a single utterance.
+
+        Args:
+            enc_out: Encoder outputs (B, T, D)
+            enc_out_lens: The lengths of the encoder outputs (B,)
+        Returns:
+            The hypothesis of each utterance
+
+        """
+        bsize = enc_out.size(0)
+        device = enc_out.device
+        enc_out_lens = enc_out_lens.to(device)
+        if bsize > 0:
+            enc_out = enc_out[:, : enc_out_lens.max()]
+
         # greedy ctc outputs
-        enc_out = enc_out.unsqueeze(0)
         ctc_probs, ctc_ids = torch.exp(self.ctc.log_softmax(enc_out)).max(dim=-1)
-        y_hat = torch.stack([x[0] for x in groupby(ctc_ids[0])])
-        y_idx = torch.nonzero(y_hat != 0).squeeze(-1)
-
-        logging.info("ctc:{}".format(self.ids2text(y_hat[y_idx].tolist())))
-
-        # calculate token-level ctc probabilities by taking
-        # the maximum probability of consecutive frames with
-        # the same ctc symbols
-        probs_hat = []
-        cnt = 0
-        for i, y in enumerate(y_hat.tolist()):
-            probs_hat.append(-1)
-            while cnt < ctc_ids.shape[1] and y == ctc_ids[0][cnt]:
-                if probs_hat[i] < ctc_probs[0][cnt]:
-                    probs_hat[i] = ctc_probs[0][cnt].item()
-                cnt += 1
-        probs_hat = torch.from_numpy(numpy.array(probs_hat))
+        y_hat, probs_hat, n_runs = ctc_collapse(ctc_probs, ctc_ids, enc_out_lens)
+
+        # remove blanks: (B, R) -> (B, L)
+        is_token = (y_hat != 0) & (
+            torch.arange(y_hat.size(1), device=device)[None, :] < n_runs[:, None]
+        )
+        y_lens = is_token.sum(dim=1)
+        maxlen = int(y_lens.max()) if bsize > 0 else 0
+        y_valid = torch.arange(maxlen, device=device)[None, :] < y_lens[:, None]
+        y_pos = is_token.cumsum(dim=1) - 1
+        b_idx, r_idx = torch.nonzero(is_token, as_tuple=True)
+        y_in = y_hat.new_full((bsize, maxlen), self.mask_token)
+        confident = torch.zeros_like(y_valid)
 
         # mask ctc outputs based on ctc probabilities
         p_thres = self.threshold_probability
-        mask_idx = torch.nonzero(probs_hat[y_idx] < p_thres).squeeze(-1)
-        confident_idx = torch.nonzero(probs_hat[y_idx] >= p_thres).squeeze(-1)
-        mask_num = len(mask_idx)
-
-        y_in = torch.zeros(1, len(y_idx), dtype=torch.long) + self.mask_token
-        y_in[0][confident_idx] = y_hat[y_idx][confident_idx]
+        is_confident = probs_hat[b_idx, r_idx] >= p_thres
+        pos = y_pos[b_idx, r_idx]
+        confident[b_idx, pos] = is_confident
+        y_in[b_idx, pos] = torch.where(
+            is_confident, y_hat[b_idx, r_idx], y_in[b_idx, pos]
+        )
+        masked = y_valid & ~confident
+        mask_num = masked.sum(dim=1)
 
-        logging.info("msk:{}".format(self.ids2text(y_in[0].tolist())))
+        for i in range(bsize):
+            logging.info("ctc:{}".format(self.ids2text(y_hat[i][is_token[i]].tolist())))
+            logging.info("msk:{}".format(self.ids2text(y_in[i, : y_lens[i]].tolist())))
 
         # iterative decoding
-        if not mask_num == 0:
-            K = self.n_iterations
-            num_iter = K if mask_num >= K and K > 0 else mask_num
-
-            for t in range(num_iter - 1):
-                pred, _ = self.mlm(enc_out, [enc_out.size(1)], y_in, [y_in.size(1)])
-                pred_score, pred_id = pred[0][mask_idx].max(dim=-1)
-                cand = torch.topk(pred_score, mask_num // num_iter, -1)[1]
-                y_in[0][mask_idx[cand]] = pred_id[cand]
-                mask_idx = torch.nonzero(y_in[0] == self.mask_token).squeeze(-1)
-
-                logging.info("msk:{}".format(self.ids2text(y_in[0].tolist())))
+        K = self.n_iterations
+        if K > 0:
+            num_iter = torch.where(
+                mask_num >= K, torch.full_like(mask_num, K), mask_num
+            )
+        else:
+            num_iter = mask_num
+        n_cands = mask_num // num_iter.clamp(min=1)
+        is_decoded = mask_num > 0
+
+        max_iter = int(num_iter.max()) if bsize > 0 else 0
+        for t in range(max_iter - 1):
+            pred, _ = self.mlm(enc_out, enc_out_lens, y_in, y_lens)
+            pred_score, pred_id = pred.max(dim=-1)
+            pred_score = pred_score.masked_fill(~masked, float("-inf"))
+
+            # fill the "n_cands" most probable masks of each active utterance
+            active = t < num_iter - 1
+            k = int(n_cands[active].max())
+            cand = torch.topk(pred_score, k, -1)[1]
+            is_cand = (torch.arange(k, device=device)[None, :] < n_cands[:, None]) & (
+                active[:, None]
+            )
+            cb_idx, ck_idx = torch.nonzero(is_cand, as_tuple=True)
+            c_idx = cand[cb_idx, ck_idx]
+            y_in[cb_idx, c_idx] = pred_id[cb_idx, c_idx]
+            masked = (y_in == self.mask_token) & y_valid & is_decoded[:, None]
+
+            for i in torch.nonzero(active, as_tuple=False).squeeze(-1).tolist():
+                logging.info(
+                    "msk:{}".format(self.ids2text(y_in[i, : y_lens[i]].tolist()))
+                )
 
+        if bool(is_decoded.any()):
             # predict leftover masks (|masks| < mask_num // num_iter)
-            pred, _ = self.mlm(enc_out, [enc_out.size(1)], y_in, [y_in.size(1)])
-            y_in[0][mask_idx] = pred[0][mask_idx].argmax(dim=-1)
+            pred, _ = self.mlm(enc_out, enc_out_lens, y_in, y_lens)
+            y_in = torch.where(masked, pred.argmax(dim=-1), y_in)
 
-            logging.info("msk:{}".format(self.ids2text(y_in[0].tolist())))
+            for i in torch.nonzero(is_decoded, as_tuple=False).squeeze(-1).tolist():
+                logging.info(
+                    "msk:{}".format(self.ids2text(y_in[i, : y_lens[i]].tolist()))
+                )
 
         # pad with mask tokens to ensure compatibility with sos/eos tokens
-        yseq = torch.tensor(
-            [self.mask_token] + y_in.tolist()[0] + [self.mask_token], device=y_in.device
+        y_in = torch.nn.functional.pad(y_in, (1, 1), value=self.mask_token)
+        return [
+            Hypothesis(yseq=torch.cat([y_in[i, : y_lens[i] + 1], y_in[i, -1:]], dim=0))
+            for i in range(bsize)
+        ]
+
+
+def ctc_collapse(
+    ctc_probs: torch.Tensor, ctc_ids: torch.Tensor, lengths: torch.Tensor
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Collapse the consecutive frames of the same greedy CTC outputs.
+
+    The blank symbols are kept, so that the tokens separated by blanks
+    are not merged.
+
+    Args:
+        ctc_probs: The probabilities of the greedy CTC outputs (B, T)
+        ctc_ids: The greedy CTC outputs (B, T)
+        lengths: The number of the frames (B,)
+    Returns:
+        The collapsed outputs (B, R), the maximum probability of the frames
+        of each collapsed output (B, R) and the number of them (B,)
+
+    """
+    bsize, tsize = ctc_ids.shape
+    valid = torch.arange(tsize, device=ctc_ids.device)[None, :] < lengths[:, None]
+    # The first frames of the consecutive outputs
+    is_start = torch.ones_like(valid)
+    is_start[:, 1:] = ctc_ids[:, 1:] != ctc_ids[:, :-1]
+    is_start &= valid
+    # The last frames of the consecutive outputs
+    is_end = valid.clone()
+    is_end[:, :-1] &= is_start[:, 1:] | ~valid[:, 1:]
+
+    # run: (B, T) the index of the collapsed output of each frame
+    run = is_start.cumsum(dim=1) - 1
+    n_runs = is_start.sum(dim=1)
+    # The maximum probability of the frames up to each frame in the same run,
+    # computed by the doubling steps of segmented scan
+    probs = ctc_probs
+    shift = 1
+    while shift < tsize:
+        same = run[:, shift:] == run[:, :-shift]
+        probs = torch.cat(
+            [
+                probs[:, :shift],
+                torch.where(
+                    same,
+                    torch.max(probs[:, shift:], probs[:, :-shift]),
+                    probs[:, shift:],
+                ),
+            ],
+            dim=1,
         )
-
-        return Hypothesis(yseq=yseq)
+        shift *= 2
+
+    rsize = int(n_runs.max()) if bsize > 0 else 0
+    b_idx, t_idx = torch.nonzero(is_end, as_tuple=True)
+    r_idx = run[b_idx, t_idx]
+    y_hat = ctc_ids.new_zeros(bsize, rsize)
+    y_hat[b_idx, r_idx] = ctc_ids[b_idx, t_idx]
+    probs_hat = ctc_probs.new_zeros(bsize, rsize)
+    probs_hat[b_idx, r_idx] = probs[b_idx, t_idx]
+    return y_hat, probs_hat, n_runs
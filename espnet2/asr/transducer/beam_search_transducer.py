@@ -1,9 +1,12 @@
 """Search algorithms for Transducer models."""
 
 from dataclasses import dataclass
+from dataclasses import field
+import logging
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import NamedTuple
 from typing import Optional
 from typing import Tuple
 from typing import Union
@@ -18,6 +21,8 @@ from espnet.nets.pytorch_backend.transducer.utils import subtract
 
 from espnet2.asr.decoder.abs_decoder import AbsDecoder
 from espnet2.asr.transducer.joint_network import JointNetwork
+from espnet2.asr.transducer.prefix_cache import PrefixTrieCache
+from espnet2.asr.transducer.prefix_cache import PrefixTrieNode
 
 
 @dataclass
@@ -32,6 +37,10 @@ class Hypothesis:
         torch.Tensor,
     ]
     lm_state: Union[Dict[str, Any], List[Any]] = None
+    # Node of the decoder cache for the label sequence or its prefix
+    cache_node: Optional[PrefixTrieNode] = field(
+        default=None, repr=False, compare=False
+    )
 
 
 @dataclass
@@ -42,6 +51,19 @@ class ExtendedHypothesis(Hypothesis):
     lm_scores: torch.Tensor = None
 
 
+class BatchHypothesis(NamedTuple):
+    """Hypotheses in tensor form for the beam-parallel search algorithms."""
+
+    score: torch.Tensor  # (H,)
+    yseq: torch.Tensor  # (H, U) padded with -1
+    length: torch.Tensor  # (H,)
+    dec_out: torch.Tensor  # Decoder outputs after the label sequences. (H, D_dec)
+    dec_state: Tuple[torch.Tensor, Optional[torch.Tensor]]  # Inputs of last labels
+    next_dec_state: Tuple[torch.Tensor, Optional[torch.Tensor]]  # Inputs of next
+    lm_scores: Optional[torch.Tensor] = None  # LM scores of next labels. (H, V)
+    lm_state: Optional[List[Any]] = None  # LM states after the label sequences
+
+
 class BeamSearchTransducer:
     """Beam search implementation for Transducer."""
 
@@ -71,6 +93,7 @@ class BeamSearchTransducer:
             lm: LM class.
             lm_weight: LM weight for soft fusion.
             search_type: Search algorithm to use during inference.
+                "batch_tsd" is the beam-parallel implementation of "tsd".
             max_sym_exp: Number of maximum symbol expansions at each time step. (TSD)
             u_max: Maximum output sequence length. (ALSD)
             nstep: Number of maximum expansion steps at each time step. (NSC/mAES)
@@ -99,6 +122,10 @@ class BeamSearchTransducer:
             self.max_sym_exp = max_sym_exp
 
             self.search_algorithm = self.time_sync_decoding
+        elif search_type == "batch_tsd":
+            self.max_sym_exp = max_sym_exp
+
+            self.search_algorithm = self.batch_time_sync_decoding
         elif search_type == "alsd":
             self.u_max = u_max
 
@@ -125,6 +152,8 @@ class BeamSearchTransducer:
         self.score_norm = score_norm
         self.nbest = nbest
 
+        self.cache = None
+
     def __call__(
         self, enc_out: torch.Tensor
     ) -> Union[List[Hypothesis], List[ExtendedHypothesis]]:
@@ -141,8 +170,24 @@ class BeamSearchTransducer:
 
         nbest_hyps = self.search_algorithm(enc_out)
 
+        if self.cache is not None:
+            logging.debug(f"Decoder cache: {self.cache.stats()}")
+
         return nbest_hyps
 
+    def init_cache(self) -> PrefixTrieCache:
+        """Create the decoder cache for a search.
+
+        The cache is kept until the next search for its statistics.
+
+        Returns:
+            cache: Prefix trie cache of the decoder outputs.
+
+        """
+        self.cache = PrefixTrieCache()
+
+        return self.cache
+
     def sort_nbest(
         self, hyps: Union[List[Hypothesis], List[ExtendedHypothesis]]
     ) -> Union[List[Hypothesis], List[ExtendedHypothesis]]:
@@ -211,7 +256,7 @@ class BeamSearchTransducer:
         dec_state = self.decoder.init_state(1)
 
         hyp = Hypothesis(score=0.0, yseq=[self.blank_id], dec_state=dec_state)
-        cache = {}
+        cache = self.init_cache()
 
         dec_out, state, _ = self.decoder.score(hyp, cache)
 
@@ -250,7 +295,7 @@ class BeamSearchTransducer:
         dec_state = self.decoder.init_state(1)
 
         kept_hyps = [Hypothesis(score=0.0, yseq=[self.blank_id], dec_state=dec_state)]
-        cache = {}
+        cache = self.init_cache()
 
         for enc_out_t in enc_out:
             hyps = kept_hyps
@@ -274,6 +319,7 @@ class BeamSearchTransducer:
                         yseq=max_hyp.yseq[:],
                         dec_state=max_hyp.dec_state,
                         lm_state=max_hyp.lm_state,
+                        cache_node=max_hyp.cache_node,
                     )
                 )
 
@@ -296,6 +342,7 @@ class BeamSearchTransducer:
                             yseq=max_hyp.yseq[:] + [int(k + 1)],
                             dec_state=state,
                             lm_state=lm_state,
+                            cache_node=max_hyp.cache_node,
                         )
                     )
 
@@ -333,7 +380,7 @@ class BeamSearchTransducer:
                 dec_state=self.decoder.select_state(beam_state, 0),
             )
         ]
-        cache = {}
+        cache = self.init_cache()
 
         if self.use_lm:
             B[0].lm_state = self.lm.zero_state()
@@ -370,6 +417,7 @@ class BeamSearchTransducer:
                                 yseq=hyp.yseq[:],
                                 dec_state=hyp.dec_state,
                                 lm_state=hyp.lm_state,
+                                cache_node=hyp.cache_node,
                             )
                         )
                     else:
@@ -392,6 +440,7 @@ class BeamSearchTransducer:
                                 yseq=(hyp.yseq + [int(k)]),
                                 dec_state=self.decoder.select_state(beam_state, i),
                                 lm_state=hyp.lm_state,
+                                cache_node=hyp.cache_node,
                             )
 
                             if self.use_lm:
@@ -406,6 +455,236 @@ class BeamSearchTransducer:
 
         return self.sort_nbest(B)
 
+    def init_batch_hyp(self) -> BatchHypothesis:
+        """Get the initial hypothesis in tensor form.
+
+        Returns:
+            hyps: Initial hypothesis.
+
+        """
+        labels = torch.full(
+            (1,), self.blank_id, dtype=torch.long, device=self.decoder.device
+        )
+        dec_state = self.decoder.init_state(1)
+        dec_out, next_dec_state = self.decoder.forward_one_step(labels, dec_state)
+
+        lm_scores, lm_state = None, None
+        if self.use_lm:
+            lm_scores, lm_state = self.lm.batch_score(
+                labels.view(1, 1), [self.lm.zero_state()], None
+            )
+
+        return BatchHypothesis(
+            score=torch.zeros(1, dtype=torch.float64, device=labels.device),
+            yseq=labels.view(1, 1),
+            length=torch.ones(1, dtype=torch.long, device=labels.device),
+            dec_out=dec_out,
+            dec_state=dec_state,
+            next_dec_state=next_dec_state,
+            lm_scores=lm_scores,
+            lm_state=lm_state,
+        )
+
+    def select_batch_hyp(
+        self, hyps: BatchHypothesis, ids: torch.Tensor
+    ) -> BatchHypothesis:
+        """Select hypotheses in tensor form.
+
+        Args:
+            hyps: Hypotheses.
+            ids: IDs of the hypotheses to select. (H',)
+
+        Returns:
+            hyps: Selected hypotheses.
+
+        """
+
+        def _select_state(state):
+            return tuple(None if s is None else s[:, ids] for s in state)
+
+        return BatchHypothesis(
+            score=hyps.score[ids],
+            yseq=hyps.yseq[ids, : int(hyps.length[ids].max())],
+            length=hyps.length[ids],
+            dec_out=hyps.dec_out[ids],
+            dec_state=_select_state(hyps.dec_state),
+            next_dec_state=_select_state(hyps.next_dec_state),
+            lm_scores=None if hyps.lm_scores is None else hyps.lm_scores[ids],
+            lm_state=None
+            if hyps.lm_state is None
+            else [hyps.lm_state[i] for i in ids.tolist()],
+        )
+
+    def expand_batch_hyp(
+        self,
+        hyps: BatchHypothesis,
+        prev_ids: torch.Tensor,
+        labels: torch.Tensor,
+        scores: torch.Tensor,
+    ) -> BatchHypothesis:
+        """Extend hypotheses in tensor form by labels.
+
+        The decoder and the LM score all the new hypotheses at once.
+
+        Args:
+            hyps: Hypotheses.
+            prev_ids: IDs of the hypotheses to extend. (H',)
+            labels: Label IDs to append. (H',)
+            scores: Scores of the new hypotheses. (H',)
+
+        Returns:
+            hyps: New hypotheses.
+
+        """
+        prev = self.select_batch_hyp(hyps, prev_ids)
+
+        yseq = torch.cat((prev.yseq, prev.yseq.new_full((len(labels), 1), -1)), dim=1)
+        yseq.scatter_(1, prev.length.view(-1, 1), labels.view(-1, 1))
+
+        dec_out, next_dec_state = self.decoder.forward_one_step(
+            labels, prev.next_dec_state
+        )
+
+        lm_scores, lm_state = None, None
+        if self.use_lm:
+            lm_scores, lm_state = self.lm.batch_score(
+                labels.view(-1, 1), prev.lm_state, None
+            )
+
+        return BatchHypothesis(
+            score=scores,
+            yseq=yseq,
+            length=prev.length + 1,
+            dec_out=dec_out,
+            dec_state=prev.next_dec_state,
+            next_dec_state=next_dec_state,
+            lm_scores=lm_scores,
+            lm_state=lm_state,
+        )
+
+    def recombine_batch_hyp(
+        self, hyps: Optional[BatchHypothesis], new_hyps: BatchHypothesis
+    ) -> BatchHypothesis:
+        """Merge hypotheses in tensor form by summing up the same label sequences.
+
+        Args:
+            hyps: Hypotheses.
+            new_hyps: Hypotheses to merge, which have distinct label sequences.
+
+        Returns:
+            hyps: Merged hypotheses.
+
+        """
+        if hyps is None:
+            return new_hyps
+
+        width = max(hyps.yseq.size(1), new_hyps.yseq.size(1))
+        yseq = torch.nn.functional.pad(
+            hyps.yseq, (0, width - hyps.yseq.size(1)), value=-1
+        )
+        new_yseq = torch.nn.functional.pad(
+            new_hyps.yseq, (0, width - new_hyps.yseq.size(1)), value=-1
+        )
+        same = (yseq.unsqueeze(1) == new_yseq.unsqueeze(0)).all(dim=2)  # (H, H_new)
+        found = same.any(dim=0)
+
+        score = hyps.score.clone()
+        if found.any():
+            pos = same.long().argmax(dim=0)[found]
+            score[pos] = torch.logsumexp(
+                torch.stack((score[pos], new_hyps.score[found])), dim=0
+            )
+        hyps = hyps._replace(score=score)
+
+        if found.all():
+            return hyps
+        new_hyps = self.select_batch_hyp(new_hyps, torch.nonzero(~found).view(-1))
+
+        def _cat_state(state, new_state):
+            return tuple(
+                None if s is None else torch.cat((s, ns), dim=1)
+                for s, ns in zip(state, new_state)
+            )
+
+        return BatchHypothesis(
+            score=torch.cat((hyps.score, new_hyps.score)),
+            yseq=torch.cat((yseq, new_yseq[~found][:, :width])),
+            length=torch.cat((hyps.length, new_hyps.length)),
+            dec_out=torch.cat((hyps.dec_out, new_hyps.dec_out)),
+            dec_state=_cat_state(hyps.dec_state, new_hyps.dec_state),
+            next_dec_state=_cat_state(hyps.next_dec_state, new_hyps.next_dec_state),
+            lm_scores=None
+            if hyps.lm_scores is None
+            else torch.cat((hyps.lm_scores, new_hyps.lm_scores)),
+            lm_state=None
+            if hyps.lm_state is None
+            else hyps.lm_state + new_hyps.lm_state,
+        )
+
+    def batch_time_sync_decoding(self, enc_out: torch.Tensor) -> List[Hypothesis]:
+        """Beam-parallel time synchronous beam search implementation.
+
+        The results are the same as time_sync_decoding, but the hypotheses
+        are kept in tensor form. All the hypotheses are scored
+        by one call of the joint network at each expansion step,
+        and the new hypotheses are scored by one call of the decoder (and the LM).
+
+        Args:
+            enc_out: Encoder output sequence. (T, D)
+
+        Returns:
+            nbest_hyps: N-best hypothesis.
+
+        """
+        beam = min(self.beam_size, self.vocab_size)
+        beam_k = min(beam, (self.vocab_size - 1))
+
+        B = self.init_batch_hyp()
+
+        for enc_out_t in enc_out:
+            A = None
+            C = B
+
+            enc_out_t = enc_out_t.unsqueeze(0)
+
+            for v in range(self.max_sym_exp):
+                beam_logp = torch.log_softmax(
+                    self.joint_network(enc_out_t, C.dec_out),
+                    dim=-1,
+                )
+
+                A = self.recombine_batch_hyp(
+                    A, C._replace(score=C.score + beam_logp[:, 0])
+                )
+
+                if v < (self.max_sym_exp - 1):
+                    topk_logp, topk_ids = beam_logp[:, 1:].topk(beam_k, dim=-1)
+                    topk_ids = topk_ids + 1
+
+                    scores = C.score.unsqueeze(1) + topk_logp
+                    if self.use_lm:
+                        scores = scores + self.lm_weight * C.lm_scores.gather(
+                            1, topk_ids
+                        )
+
+                    scores, best = scores.view(-1).topk(min(beam, scores.numel()))
+                    C = self.expand_batch_hyp(
+                        C, best // beam_k, topk_ids.view(-1)[best], scores
+                    )
+
+            B = self.select_batch_hyp(A, A.score.topk(min(beam, len(A.score)))[1])
+
+        nbest_hyps = [
+            Hypothesis(
+                score=float(B.score[i]),
+                yseq=B.yseq[i, : B.length[i]].tolist(),
+                dec_state=self.decoder.select_state(B.dec_state, i),
+            )
+            for i in range(len(B.score))
+        ]
+
+        return self.sort_nbest(nbest_hyps)
+
     def align_length_sync_decoding(self, enc_out: torch.Tensor) -> List[Hypothesis]:
         """Alignment-length synchronous beam search implementation.
 
@@ -433,7 +712,7 @@ class BeamSearchTransducer:
             )
         ]
         final = []
-        cache = {}
+        cache = self.init_cache()
 
         if self.use_lm:
             B[0].lm_state = self.lm.zero_state()
@@ -482,6 +761,7 @@ class BeamSearchTransducer:
                         yseq=hyp.yseq[:],
                         dec_state=hyp.dec_state,
                         lm_state=hyp.lm_state,
+                        cache_node=hyp.cache_node,
                     )
 
                     A.append(new_hyp)
@@ -495,6 +775,7 @@ class BeamSearchTransducer:
                             yseq=(hyp.yseq[:] + [int(k)]),
                             dec_state=self.decoder.select_state(beam_state, i),
                             lm_state=hyp.lm_state,
+                            cache_node=hyp.cache_node,
                         )
 
                         if self.use_lm:
@@ -538,7 +819,7 @@ class BeamSearchTransducer:
             )
         ]
 
-        cache = {}
+        cache = self.init_cache()
 
         beam_dec_out, beam_state, beam_lm_tokens = self.decoder.batch_score(
             init_tokens,
@@ -601,6 +882,7 @@ class BeamSearchTransducer:
                             dec_state=hyp.dec_state,
                             lm_state=hyp.lm_state,
                             lm_scores=hyp.lm_scores,
+                            cache_node=hyp.cache_node,
                         )
                     )
 
@@ -618,6 +900,7 @@ class BeamSearchTransducer:
                                 dec_state=hyp.dec_state,
                                 lm_state=hyp.lm_state,
                                 lm_scores=hyp.lm_scores,
+                                cache_node=hyp.cache_node,
                             )
                         )
 
@@ -699,7 +982,7 @@ class BeamSearchTransducer:
             )
         ]
 
-        cache = {}
+        cache = self.init_cache()
 
         beam_dec_out, beam_state, beam_lm_tokens = self.decoder.batch_score(
             init_tokens,
@@ -763,6 +1046,7 @@ class BeamSearchTransducer:
                             dec_state=hyp.dec_state,
                             lm_state=hyp.lm_state,
                             lm_scores=hyp.lm_scores,
+                            cache_node=hyp.cache_node,
                         )
 
                         if k == 0:
@@ -0,0 +1,154 @@
+"""Prefix-trie cache of the decoder outputs for Transducer search algorithms."""
+
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+import weakref
+
+import torch
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+class PrefixTrieNode:
+    """Node of the prefix trie for a label sequence.
+
+    A node holds its children, but not its parent, so a node is freed with its
+    decoder outputs as soon as neither the node nor any of its ancestors
+    is referred by the hypotheses.
+
+    """
+
+    __slots__ = ("depth", "value", "nbytes", "children", "cache", "__weakref__")
+
+    def __init__(self, depth: int, cache: "PrefixTrieCache"):
+        self.depth = depth
+        self.value = None
+        self.nbytes = 0
+        self.children = None
+        self.cache = cache
+
+        cache.num_nodes += 1
+        cache.max_num_nodes = max(cache.max_num_nodes, cache.num_nodes)
+
+    def child(self, label: int) -> "PrefixTrieNode":
+        """Get or create the child node for the label."""
+        if self.children is None:
+            self.children = {}
+        node = self.children.get(label)
+        if node is None:
+            node = PrefixTrieNode(self.depth + 1, self.cache)
+            self.children[label] = node
+        return node
+
+    def __del__(self):
+        self.cache.num_nodes -= 1
+        self.cache.num_bytes -= self.nbytes
+
+
+class PrefixTrieCache:
+    """Cache of (dec_out, dec_state) for each label sequence as a prefix trie.
+
+    Each node is reached from its parent by the label ID, and a hypothesis
+    keeps the node of its label sequence in "cache_node", so the lookup of
+    a hypothesis extended by a label is O(1) instead of building a key from
+    the whole label sequence. The root is held only weakly, and the nodes are
+    evicted when the hypotheses referring them or their ancestors are pruned
+    from the beam, so the memory is bounded by the subtrees of the living
+    hypotheses regardless of the utterance length.
+
+    Examples:
+        >>> cache = PrefixTrieCache()
+        >>> node = cache.get_node(hyp)
+        >>> if node.value is None:
+        ...     cache.set_value(node, (dec_out, dec_state))
+
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.num_nodes = 0
+        self.max_num_nodes = 0
+        self.num_bytes = 0
+        self.max_num_bytes = 0
+
+        self._root = None
+
+    @property
+    def root(self) -> PrefixTrieNode:
+        """Node of the empty label sequence."""
+        root = None if self._root is None else self._root()
+        if root is None:
+            root = PrefixTrieNode(0, self)
+            self._root = weakref.ref(root)
+        return root
+
+    def find(
+        self, yseq: Sequence[int], hint: Optional[PrefixTrieNode] = None
+    ) -> PrefixTrieNode:
+        """Get or create the node of the label sequence.
+
+        Args:
+            yseq: Label sequence.
+            hint: Node of a prefix of the label sequence.
+
+        Returns:
+            node: Node of the label sequence.
+
+        """
+        if hint is None or hint.cache is not self or hint.depth > len(yseq):
+            hint = self.root
+        node = hint
+        for label in yseq[hint.depth :]:
+            node = node.child(label)
+        return node
+
+    def get_node(self, hyp: Any) -> PrefixTrieNode:
+        """Get the node of the hypothesis and keep it in the hypothesis.
+
+        The hypothesis is looked up from "hyp.cache_node", which is the node of
+        the hypothesis or its prefix, e.g. the node of the extended hypothesis.
+
+        Args:
+            hyp: Hypothesis.
+
+        Returns:
+            node: Node of the label sequence of the hypothesis.
+
+        """
+        node = self.find(hyp.yseq, getattr(hyp, "cache_node", None))
+        hyp.cache_node = node
+
+        if node.value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return node
+
+    def set_value(self, node: PrefixTrieNode, value: Any):
+        """Set (dec_out, dec_state) of the node."""
+        self.num_bytes -= node.nbytes
+        node.value = value
+        node.nbytes = _nbytes(value)
+        self.num_bytes += node.nbytes
+        self.max_num_bytes = max(self.max_num_bytes, self.num_bytes)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the counters of the cache."""
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            num_nodes=self.num_nodes,
+            max_num_nodes=self.max_num_nodes,
+            num_bytes=self.num_bytes,
+            max_num_bytes=self.max_num_bytes,
+        )
@@ -13,6 +13,7 @@ from typeguard import check_argument_types
 from espnet2.asr.decoder.abs_decoder import AbsDecoder
 from espnet2.asr.transducer.beam_search_transducer import ExtendedHypothesis
 from espnet2.asr.transducer.beam_search_transducer import Hypothesis
+from espnet2.asr.transducer.prefix_cache import PrefixTrieCache
 
 
 class TransducerDecoder(AbsDecoder):
@@ -164,14 +165,36 @@ class TransducerDecoder(AbsDecoder):
 
         return dec_out
 
+    def forward_one_step(
+        self,
+        labels: torch.Tensor,
+        dec_states: Tuple[torch.Tensor, Optional[torch.Tensor]],
+    ) -> Tuple[torch.Tensor, Tuple[torch.Tensor, Optional[torch.Tensor]]]:
+        """One-step forward labels of hypotheses in tensor form.
+
+        Args:
+            labels: Last label IDs of hypotheses. (B,)
+            dec_states: Decoder hidden states. ((N, B, D_dec), (N, B, D_dec))
+
+        Returns:
+            dec_out: Decoder output sequences. (B, D_dec)
+            dec_states: Decoder hidden states. ((N, B, D_dec), (N, B, D_dec))
+
+        """
+        dec_emb = self.embed(labels.view(-1, 1))
+        dec_out, dec_states = self.rnn_forward(dec_emb, dec_states)
+
+        return dec_out[:, 0], dec_states
+
     def score(
-        self, hyp: Hypothesis, cache: Dict[str, Any]
+        self, hyp: Hypothesis, cache: Union[Dict[str, Any], PrefixTrieCache]
     ) -> Tuple[torch.Tensor, Tuple[torch.Tensor, Optional[torch.Tensor]], torch.Tensor]:
         """One-step forward hypothesis.
 
         Args:
             hyp: Hypothesis.
-            cache: Pairs of (dec_out, state) for each label sequence. (key)
+            cache: Pairs of (dec_out, state) for each label sequence.
+                (prefix trie or dict with the keys of label sequences)
 
         Returns:
             dec_out: Decoder output sequence. (1, D_dec)
@@ -181,15 +204,24 @@ class TransducerDecoder(AbsDecoder):
         """
         label = torch.full((1, 1), hyp.yseq[-1], dtype=torch.long, device=self.device)
 
-        str_labels = "_".join(list(map(str, hyp.yseq)))
+        if isinstance(cache, PrefixTrieCache):
+            node = cache.get_node(hyp)
+            cached = node.value
+        else:
+            str_labels = "_".join(list(map(str, hyp.yseq)))
+            cached = cache.get(str_labels)
 
-        if str_labels in cache:
-            dec_out, dec_state = cache[str_labels]
+        if cached is not None:
+            dec_out, dec_state = cached
         else:
             dec_emb = self.embed(label)
 
             dec_out, dec_state = self.rnn_forward(dec_emb, hyp.dec_state)
-            cache[str_labels] = (dec_out, dec_state)
+
+            if isinstance(cache, PrefixTrieCache):
+                cache.set_value(node, (dec_out, dec_state))
+            else:
+                cache[str_labels] = (dec_out, dec_state)
 
         return dec_out[0][0], dec_state, label[0]
 
@@ -197,7 +229,7 @@ class TransducerDecoder(AbsDecoder):
         self,
         hyps: Union[List[Hypothesis], List[ExtendedHypothesis]],
         dec_states: Tuple[torch.Tensor, Optional[torch.Tensor]],
-        cache: Dict[str, Any],
+        cache: Union[Dict[str, Any], PrefixTrieCache],
         use_lm: bool,
     ) -> Tuple[torch.Tensor, Tuple[torch.Tensor, torch.Tensor], torch.Tensor]:
         """One-step forward hypotheses.
@@ -205,7 +237,8 @@ class TransducerDecoder(AbsDecoder):
         Args:
             hyps: Hypotheses.
             states: Decoder hidden states. ((N, B, D_dec), (N, B, D_dec))
-            cache: Pairs of (dec_out, dec_states) for each label sequences. (keys)
+            cache: Pairs of (dec_out, dec_states) for each label sequences.
+                (prefix trie or dict with the keys of label sequences)
             use_lm: Whether to compute label ID sequences for LM.
 
         Returns:
@@ -220,12 +253,17 @@ class TransducerDecoder(AbsDecoder):
         done = [None] * final_batch
 
         for i, hyp in enumerate(hyps):
-            str_labels = "_".join(list(map(str, hyp.yseq)))
+            if isinstance(cache, PrefixTrieCache):
+                key = cache.get_node(hyp)
+                cached = key.value
+            else:
+                key = "_".join(list(map(str, hyp.yseq)))
+                cached = cache.get(key)
 
-            if str_labels in cache:
-                done[i] = cache[str_labels]
+            if cached is not None:
+                done[i] = cached
             else:
-                process.append((str_labels, hyp.yseq[-1], hyp.dec_state))
+                process.append((key, hyp.yseq[-1], hyp.dec_state))
 
         if process:
             labels = torch.LongTensor([[p[1]] for p in process], device=self.device)
@@ -242,7 +280,10 @@ class TransducerDecoder(AbsDecoder):
                 state = self.select_state(new_states, j)
 
                 done[i] = (dec_out[j], state)
-                cache[process[j][0]] = (dec_out[j], state)
+                if isinstance(cache, PrefixTrieCache):
+                    cache.set_value(process[j][0], done[i])
+                else:
+                    cache[process[j][0]] = done[i]
 
                 j += 1
 
@@ -66,6 +66,7 @@ class Speech2Text:
         dtype: str = "float32",
         beam_size: int = 20,
         ctc_weight: float = 0.5,
+        ctc_window_margin: int = 0,
         lm_weight: float = 1.0,
         ngram_weight: float = 0.9,
         penalty: float = 0.0,
@@ -110,12 +111,20 @@ class Speech2Text:
 
         if lid is not None:
             token_list = asr_model.token_list[lid]
-            ctc = CTCPrefixScorer(ctc=asr_model.ctc[lid], eos=asr_model.eos[lid])
+            ctc = CTCPrefixScorer(
+                ctc=asr_model.ctc[lid],
+                eos=asr_model.eos[lid],
+                window_margin=ctc_window_margin,
+            )
             decoder.embed = decoder.embed[lid]
             decoder.output_layer = decoder.output_layer[lid]
         else:
             token_list = asr_model.token_list
-            ctc = CTCPrefixScorer(ctc=asr_model.ctc, eos=asr_model.eos)
+            ctc = CTCPrefixScorer(
+                ctc=asr_model.ctc,
+                eos=asr_model.eos,
+                window_margin=ctc_window_margin,
+            )
 
         scorers.update(
             decoder=decoder, ctc=ctc, length_bonus=LengthBonus(len(token_list)),
@@ -174,26 +183,28 @@ class Speech2Text:
                 pre_beam_score_key=None if ctc_weight == 1.0 else "full",
             )
             # TODO(karita): make all scorers batchfied
-            if batch_size == 1:
-                non_batch = [
-                    k
-                    for k, v in beam_search.full_scorers.items()
-                    if not isinstance(v, BatchScorerInterface)
-                ]
-                if len(non_batch) == 0:
-                    if streaming:
-                        beam_search.__class__ = BatchBeamSearchOnlineSim
-                        beam_search.set_streaming_config(asr_train_config)
-                        logging.info(
-                            "BatchBeamSearchOnlineSim implementation is selected."
-                        )
-                    else:
-                        beam_search.__class__ = BatchBeamSearch
-                        logging.info("BatchBeamSearch implementation is selected.")
+            non_batch = [
+                k
+                for k, v in beam_search.full_scorers.items()
+                if not isinstance(v, BatchScorerInterface)
+            ]
+            if len(non_batch) == 0:
+                if streaming:
+                    beam_search.__class__ = BatchBeamSearchOnlineSim
+                    beam_search.set_streaming_config(asr_train_config)
+                    logging.info("BatchBeamSearchOnlineSim implementation is selected.")
                 else:
+                    beam_search.__class__ = BatchBeamSearch
+                    logging.info("BatchBeamSearch implementation is selected.")
+            else:
+                logging.warning(
+                    f"As non-batch scorers {non_batch} are found, "
+                    f"fall back to non-batch implementation."
+                )
+                if batch_size > 1:
                     logging.warning(
-                        f"As non-batch scorers {non_batch} are found, "
-                        f"fall back to non-batch implementation."
+                        "The utterances in a batch are decoded one by one "
+                        "after the batch encoding."
                     )
 
             beam_search.to(device=device, dtype=getattr(torch, dtype)).eval()
@@ -277,13 +288,82 @@ class Speech2Text:
         assert len(enc) == 1, len(enc)
 
         # c. Passed the encoder result and the beam search
+        results = self._decode_single(enc[0])
+        assert check_return_type(results)
+        return results
+
+    @torch.no_grad()
+    def batch_decode(
+        self,
+        speech: Union[torch.Tensor, np.ndarray],
+        speech_lengths: Union[torch.Tensor, np.ndarray],
+        lid: Union[str, None] = None,
+    ) -> List[
+        List[
+            Tuple[
+                Optional[str],
+                List[str],
+                List[int],
+                Union[Hypothesis, ExtTransHypothesis, TransHypothesis],
+            ]
+        ]
+    ]:
+        """Inference of several utterances at once
+
+        The encoder is forwarded with the padded batch, and then the hypotheses of
+        all the utterances are searched together by BatchBeamSearch.
+        If BatchBeamSearch is not available, e.g. for transducer, streaming or
+        non-batch scorers, the utterances are searched one by one.
+
+        Args:
+            speech: Padded input speech data (Batch, Nsamples)
+            speech_lengths: The lengths of speech (Batch,)
+        Returns:
+            The list of (text, token, token_int, hyp) of each utterance
+
+        """
+        assert check_argument_types()
+
+        # Input as audio signal
+        if isinstance(speech, np.ndarray):
+            speech = torch.tensor(speech)
+        if isinstance(speech_lengths, np.ndarray):
+            speech_lengths = torch.tensor(speech_lengths)
+
+        speech = speech.to(getattr(torch, self.dtype))
+        batch = {"speech": speech, "speech_lengths": speech_lengths.long()}
+
+        # a. To device
+        batch = to_device(batch, device=self.device)
+        # b. Forward Encoder
+        enc, enc_lens = self.asr_model.encode(**batch)
+        if isinstance(enc, tuple):
+            enc = enc[0]
+
+        # c. Passed the encoder result and the beam search
+        if type(self.beam_search) is BatchBeamSearch:
+            nbest_hyps_list = self.beam_search.batch_forward(
+                enc,
+                enc_lens,
+                maxlenratio=self.maxlenratio,
+                minlenratio=self.minlenratio,
+            )
+            results = [self._to_results(nbest_hyps) for nbest_hyps in nbest_hyps_list]
+        else:
+            results = [self._decode_single(e[:l]) for e, l in zip(enc, enc_lens)]
+        assert check_return_type(results)
+        return results
+
+    def _decode_single(self, enc: torch.Tensor):
         if self.beam_search_transducer:
-            nbest_hyps = self.beam_search_transducer(enc[0])
+            nbest_hyps = self.beam_search_transducer(enc)
         else:
             nbest_hyps = self.beam_search(
-                x=enc[0], maxlenratio=self.maxlenratio, minlenratio=self.minlenratio
+                x=enc, maxlenratio=self.maxlenratio, minlenratio=self.minlenratio
             )
+        return self._to_results(nbest_hyps)
 
+    def _to_results(self, nbest_hyps):
         nbest_hyps = nbest_hyps[: self.nbest]
 
         results = []
@@ -308,8 +388,6 @@ class Speech2Text:
             else:
                 text = None
             results.append((text, token, token_int, hyp))
-
-        assert check_return_type(results)
         return results
 
     @staticmethod
@@ -376,10 +454,9 @@ def inference(
     enh_s2t_task: bool,
     lid: Union[str, None] = None,
     lid_as_prompt: Union[str, None] = None,
+    ctc_window_margin: int = 0,
 ):
     assert check_argument_types()
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if word_lm_train_config is not None:
         raise NotImplementedError("Word LM is not implemented")
     if ngpu > 1:
@@ -411,9 +488,11 @@ def inference(
         device=device,
         maxlenratio=maxlenratio,
         minlenratio=minlenratio,
+        batch_size=batch_size,
         dtype=dtype,
         beam_size=beam_size,
         ctc_weight=ctc_weight,
+        ctc_window_margin=ctc_window_margin,
         lm_weight=lm_weight,
         ngram_weight=ngram_weight,
         penalty=penalty,
@@ -446,29 +525,48 @@ def inference(
             assert all(isinstance(s, str) for s in keys), keys
             _bs = len(next(iter(batch.values())))
             assert len(keys) == _bs, f"{len(keys)} != {_bs}"
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
-
-            # N-best list of (text, token, token_int, hyp_object)
-            try:
-                results = speech2text(**batch, lid=lid)
-            except TooShortUttError as e:
-                logging.warning(f"Utterance {keys} {e}")
-                hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
-                results = [[" ", ["<space>"], [2], hyp]] * nbest
 
-            # Only supporting batch_size==1
-            key = keys[0]
-            for n, (text, token, token_int, hyp) in zip(range(1, nbest + 1), results):
-                # Create a directory: outdir/{n}best_recog
-                ibest_writer = writer[f"{n}best_recog"]
-
-                # Write the result to each file
-                ibest_writer["token"][key] = " ".join(token)
-                ibest_writer["token_int"][key] = " ".join(map(str, token_int))
-                ibest_writer["score"][key] = str(hyp.score)
-
-                if text is not None:
-                    ibest_writer["text"][key] = text
+            # N-best list of (text, token, token_int, hyp_object) of each utterance
+            results_list = None
+            if _bs > 1:
+                try:
+                    results_list = speech2text.batch_decode(
+                        batch["speech"], batch["speech_lengths"], lid=lid
+                    )
+                except TooShortUttError as e:
+                    logging.warning(f"Utterances {keys} {e}, decode them one by one")
+            if results_list is None:
+                results_list = []
+                for i, key in enumerate(keys):
+                    _data = {
+                        k: v[i, : batch[f"{k}_lengths"][i]]
+                        if f"{k}_lengths" in batch
+                        else v[i]
+                        for k, v in batch.items()
+                        if not k.endswith("_lengths")
+                    }
+                    try:
+                        results = speech2text(**_data, lid=lid)
+                    except TooShortUttError as e:
+                        logging.warning(f"Utterance {key} {e}")
+                        hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
+                        results = [[" ", ["<space>"], [2], hyp]] * nbest
+                    results_list.append(results)
+
+            for key, results in zip(keys, results_list):
+                for n, (text, token, token_int, hyp) in zip(
+                    range(1, nbest + 1), results
+                ):
+                    # Create a directory: outdir/{n}best_recog
+                    ibest_writer = writer[f"{n}best_recog"]
+
+                    # Write the result to each file
+                    ibest_writer["token"][key] = " ".join(token)
+                    ibest_writer["token_int"][key] = " ".join(map(str, token_int))
+                    ibest_writer["score"][key] = str(hyp.score)
+
+                    if text is not None:
+                        ibest_writer["text"][key] = text
 
 
 def get_parser():
@@ -586,6 +684,14 @@ def get_parser():
     group.add_argument(
         "--ctc_weight", type=float, default=0.5, help="CTC weight in joint decoding",
     )
+    group.add_argument(
+        "--ctc_window_margin",
+        type=int,
+        default=0,
+        help="The margin of the frame window around the CTC peak frames "
+        "of the hypotheses in CTC prefix scoring, e.g. for long-form audio. "
+        "It's counted in non-blank frames and 0 means no windowing",
+    )
     group.add_argument("--lm_weight", type=float, default=1.0, help="RNNLM weight")
     group.add_argument("--ngram_weight", type=float, default=0.9, help="ngram weight")
     group.add_argument("--streaming", type=str2bool, default=False)
@@ -132,6 +132,53 @@ class Speech2Text:
 
         # c. Passed the encoder result and the inference algorithm
         hyp = self.s2t(enc[0])
+        results = self._to_results(hyp)
+        assert check_return_type(results)
+        return results
+
+    @torch.no_grad()
+    def batch_decode(
+        self,
+        speech: Union[torch.Tensor, np.ndarray],
+        speech_lengths: Union[torch.Tensor, np.ndarray],
+    ) -> List[List[Tuple[Optional[str], List[str], List[int], Hypothesis]]]:
+        """Inference of several utterances at once
+
+        The encoder and the Mask-CTC iterations are forwarded with the padded batch.
+
+        Args:
+            speech: Padded input speech data (Batch, Nsamples)
+            speech_lengths: The lengths of speech (Batch,)
+        Returns:
+            The list of (text, token, token_int, hyp) of each utterance
+
+        """
+        assert check_argument_types()
+
+        # Input as audio signal
+        if isinstance(speech, np.ndarray):
+            speech = torch.tensor(speech)
+        if isinstance(speech_lengths, np.ndarray):
+            speech_lengths = torch.tensor(speech_lengths)
+
+        speech = speech.to(getattr(torch, self.dtype))
+        batch = {"speech": speech, "speech_lengths": speech_lengths.long()}
+
+        # a. To device
+        batch = to_device(batch, device=self.device)
+
+        # b. Forward Encoder
+        enc, enc_lens = self.asr_model.encode(**batch)
+        if isinstance(enc, tuple):
+            enc = enc[0]
+
+        # c. Passed the encoder result and the inference algorithm
+        hyps = self.s2t.batch_forward(enc, enc_lens)
+        results = [self._to_results(hyp) for hyp in hyps]
+        assert check_return_type(results)
+        return results
+
+    def _to_results(self, hyp: Hypothesis):
         assert isinstance(hyp, Hypothesis), type(hyp)
 
         # remove sos/eos and get results
@@ -147,10 +194,7 @@ class Speech2Text:
             text = self.tokenizer.tokens2text(token)
         else:
             text = None
-        results = [(text, token, token_int, hyp)]
-
-        assert check_return_type(results)
-        return results
+        return [(text, token, token_int, hyp)]
 
     @staticmethod
     def from_pretrained(
@@ -203,8 +247,6 @@ def inference(
     maskctc_threshold_probability: float,
 ):
     assert check_argument_types()
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
 
@@ -258,29 +300,47 @@ def inference(
             assert all(isinstance(s, str) for s in keys), keys
             _bs = len(next(iter(batch.values())))
             assert len(keys) == _bs, f"{len(keys)} != {_bs}"
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
 
-            try:
-                results = speech2text(**batch)
-            except TooShortUttError as e:
-                logging.warning(f"Utterance {keys} {e}")
-                hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
-                results = [[" ", ["<space>"], [2], hyp]]
-
-            # Only supporting batch_size==1
-            key = keys[0]
-            (text, token, token_int, hyp) = results[0]
-
-            # Create a directory: outdir/{n}best_recog
-            ibest_writer = writer["1best_recog"]
-
-            # Write the result to each file
-            ibest_writer["token"][key] = " ".join(token)
-            ibest_writer["token_int"][key] = " ".join(map(str, token_int))
-            ibest_writer["score"][key] = str(hyp.score)
-
-            if text is not None:
-                ibest_writer["text"][key] = text
+            # (text, token, token_int, hyp_object) of each utterance
+            results_list = None
+            if _bs > 1:
+                try:
+                    results_list = speech2text.batch_decode(
+                        batch["speech"], batch["speech_lengths"]
+                    )
+                except TooShortUttError as e:
+                    logging.warning(f"Utterances {keys} {e}, decode them one by one")
+            if results_list is None:
+                results_list = []
+                for i, key in enumerate(keys):
+                    _data = {
+                        k: v[i, : batch[f"{k}_lengths"][i]]
+                        if f"{k}_lengths" in batch
+                        else v[i]
+                        for k, v in batch.items()
+                        if not k.endswith("_lengths")
+                    }
+                    try:
+                        results = speech2text(**_data)
+                    except TooShortUttError as e:
+                        logging.warning(f"Utterance {key} {e}")
+                        hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
+                        results = [[" ", ["<space>"], [2], hyp]]
+                    results_list.append(results)
+
+            for key, results in zip(keys, results_list):
+                (text, token, token_int, hyp) = results[0]
+
+                # Create a directory: outdir/{n}best_recog
+                ibest_writer = writer["1best_recog"]
+
+                # Write the result to each file
+                ibest_writer["token"][key] = " ".join(token)
+                ibest_writer["token_int"][key] = " ".join(map(str, token_int))
+                ibest_writer["score"][key] = str(hyp.score)
+
+                if text is not None:
+                    ibest_writer["text"][key] = text
 
 
 def get_parser():
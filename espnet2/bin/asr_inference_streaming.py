@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 import argparse
+import collections
+import dataclasses
+from espnet.nets.batch_beam_search import BatchHypothesis
 from espnet.nets.batch_beam_search_online import BatchBeamSearchOnline
 from espnet.nets.beam_search import Hypothesis
+from espnet.nets.pytorch_backend.nets_utils import pad_list
+from espnet.nets.pytorch_backend.transformer.kv_cache import KVCache
 from espnet.nets.pytorch_backend.transformer.subsampling import TooShortUttError
 from espnet.nets.scorer_interface import BatchScorerInterface
 from espnet.nets.scorers.ctc import CTCPrefixScorer
 from espnet.nets.scorers.length_bonus import LengthBonus
 from espnet.utils.cli_utils import get_commandline_args
+from espnet2.asr.frontend.default import DefaultFrontend
 from espnet2.asr.encoder.contextual_block_transformer_encoder import (
     ContextualBlockTransformerEncoder,  # noqa: H301
 )
@@ -14,6 +20,7 @@ from espnet2.asr.encoder.contextual_block_conformer_encoder import (
     ContextualBlockConformerEncoder,  # noqa: H301
 )
 from espnet2.fileio.datadir_writer import DatadirWriter
+from espnet2.layers.stft import Stft
 from espnet2.tasks.asr import ASRTask
 from espnet2.tasks.lm import LMTask
 from espnet2.text.build_tokenizer import build_tokenizer
@@ -28,10 +35,14 @@ import logging
 import numpy as np
 from pathlib import Path
 import sys
+import time
 import torch
 from typeguard import check_argument_types
 from typeguard import check_return_type
+from typing import Any
+from typing import Iterator
 from typing import List
+from typing import NamedTuple
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -74,6 +85,7 @@ class Speech2TextStreaming:
         disable_repetition_detection=False,
         decoder_text_length_limit=0,
         encoded_feat_length_limit=0,
+        incremental_frontend: bool = False,
     ):
         assert check_argument_types()
 
@@ -122,10 +134,9 @@ class Speech2TextStreaming:
 
         assert batch_size == 1
 
-        beam_search = BatchBeamSearchOnline(
+        beam_search_conf = dict(
             beam_size=beam_size,
             weights=weights,
-            scorers=scorers,
             sos=asr_model.sos,
             eos=asr_model.eos,
             vocab_size=len(token_list),
@@ -135,6 +146,7 @@ class Speech2TextStreaming:
             decoder_text_length_limit=decoder_text_length_limit,
             encoded_feat_length_limit=encoded_feat_length_limit,
         )
+        beam_search = BatchBeamSearchOnline(scorers=scorers, **beam_search_conf)
 
         non_batch = [
             k
@@ -176,22 +188,184 @@ class Speech2TextStreaming:
         self.converter = converter
         self.tokenizer = tokenizer
         self.beam_search = beam_search
+        self.beam_search_conf = beam_search_conf
         self.maxlenratio = maxlenratio
         self.minlenratio = minlenratio
         self.device = device
         self.dtype = dtype
         self.nbest = nbest
+        self.incremental_frontend = incremental_frontend
+        self._set_frame_geometry(asr_model.frontend, incremental_frontend)
 
         self.reset()
 
+    def _set_frame_geometry(self, frontend, incremental: bool):
+        """Derive the geometry of the frames from the Stft of the frontend.
+
+        In the incremental mode, the frames of each chunk are computed once
+        by Stft(center=False) from the samples of the chunk and the ones kept
+        from the previous chunk, and the padding of Stft(center=True) is applied
+        at the start and the end of the stream.
+        Otherwise, the frames overlapping with the next chunk are computed again,
+        and the frames affected by the padding of each chunk are trimmed.
+
+        """
+        if isinstance(frontend, DefaultFrontend) and frontend.stft is not None:
+            stft = frontend.stft
+        elif incremental:
+            raise ValueError(
+                "incremental_frontend requires DefaultFrontend applying STFT: "
+                f"{frontend}"
+            )
+        else:
+            stft = Stft()
+        self.n_fft = stft.n_fft
+        self.hop_length = stft.hop_length
+        # The number of the samples padded to each side by Stft(center=True)
+        self.n_pad = stft.n_fft // 2 if stft.center else 0
+
+        if incremental:
+            # The last samples of the stream have to be kept for the padding
+            if self.n_fft - self.hop_length <= self.n_pad:
+                raise ValueError(
+                    "incremental_frontend requires hop_length < n_fft // 2: "
+                    f"n_fft={self.n_fft}, hop_length={self.hop_length}"
+                )
+            self.frame_stft = Stft(
+                n_fft=stft.n_fft,
+                win_length=stft.win_length,
+                hop_length=stft.hop_length,
+                window=stft.window,
+                center=False,
+                normalized=stft.normalized,
+                onesided=stft.onesided,
+            )
+        else:
+            if not stft.center:
+                raise ValueError(
+                    "Stft(center=False) is supported only with incremental_frontend"
+                )
+            # The number of the frames affected by the padding at each side
+            self.n_trim = -(-self.n_pad // self.hop_length)
+            # The number of the samples processed again with the next chunk
+            self.n_overlap = (2 * self.n_trim - 1) * self.hop_length
+
     def reset(self):
         self.frontend_states = None
         self.encoder_states = None
         self.beam_search.reset()
 
+    def build_beam_search(self) -> BatchBeamSearchOnline:
+        """Build another beam search sharing the models for another stream.
+
+        The CTC prefix scorer keeps the probabilities of the stream,
+        so it is built for each beam search.
+
+        """
+        scorers = dict(self.beam_search.scorers)
+        if "ctc" in scorers:
+            scorers["ctc"] = CTCPrefixScorer(
+                ctc=self.asr_model.ctc, eos=self.asr_model.eos
+            )
+        beam_search = BatchBeamSearchOnline(scorers=scorers, **self.beam_search_conf)
+        return beam_search.to(device=self.device, dtype=getattr(torch, self.dtype))
+
     def apply_frontend(
         self, speech: torch.Tensor, prev_states=None, is_final: bool = False
     ):
+        speech_to_process, next_states = self._split_waveform(
+            speech, prev_states, is_final
+        )
+        # data: (Nsamples,) -> (1, Nsamples)
+        feats = self._extract_feats(speech_to_process.unsqueeze(0))
+        feats = self._trim_feats(feats, prev_states, is_final)
+        feats_lengths = feats.new_full([1], dtype=torch.long, fill_value=feats.size(1))
+        return feats, feats_lengths, next_states
+
+    def batch_apply_frontend(
+        self,
+        speeches: List[torch.Tensor],
+        prev_states: List[Optional[dict]],
+        is_final: bool = False,
+    ) -> Tuple[List[torch.Tensor], List[Optional[dict]]]:
+        """Apply the frontend to the inputs of several streams at once.
+
+        The streams whose waveforms to process have the same length are batched,
+        so the features are the same as the ones of `apply_frontend()`.
+
+        Args:
+            speeches: The input waveform of each stream (Nsamples,)
+            prev_states: The frontend states of each stream
+            is_final: Whether the inputs are the last ones of the streams
+        Returns:
+            The features of each stream (1, T, D) and the next states
+
+        """
+        splits = [
+            self._split_waveform(speech, states, is_final)
+            for speech, states in zip(speeches, prev_states)
+        ]
+        groups = {}
+        for i, ((speech, _), states) in enumerate(zip(splits, prev_states)):
+            # The features are trimmed depending on the states except incremental
+            is_first = states is None and not self.incremental_frontend
+            groups.setdefault((speech.size(0), is_first), []).append(i)
+
+        feats = [None] * len(speeches)
+        for ids in groups.values():
+            xs = self._extract_feats(torch.stack([splits[i][0] for i in ids]))
+            xs = self._trim_feats(xs, prev_states[ids[0]], is_final)
+            for j, i in enumerate(ids):
+                feats[i] = xs[j : j + 1]
+        return feats, [next_states for _, next_states in splits]
+
+    def batch_encode(
+        self,
+        feats: List[torch.Tensor],
+        prev_states: List[Optional[dict]],
+        is_final: bool = False,
+    ) -> Tuple[List[torch.Tensor], List[Optional[dict]]]:
+        """Encode the features of several streams at once.
+
+        The streams having the features and the encoder states of the same shapes
+        are batched, so the outputs are the same as the ones of each stream.
+
+        Args:
+            feats: The features of each stream (1, T, D)
+            prev_states: The encoder states of each stream
+            is_final: Whether the inputs are the last ones of the streams
+        Returns:
+            The encoded features of each stream (T', D') and the next states
+
+        """
+        groups = {}
+        for i, (x, states) in enumerate(zip(feats, prev_states)):
+            groups.setdefault(_encoder_states_key(x, states), []).append(i)
+
+        encs = [None] * len(feats)
+        next_states = [None] * len(feats)
+        for ids in groups.values():
+            xs = torch.cat([feats[i] for i in ids])
+            xs_lens = xs.new_full([len(ids)], dtype=torch.long, fill_value=xs.size(1))
+            enc, _, states = self.asr_model.encoder(
+                xs,
+                xs_lens,
+                _stack_encoder_states([prev_states[i] for i in ids]),
+                is_final=is_final,
+                infer_mode=True,
+            )
+            states = _split_encoder_states(states, len(ids))
+            for j, i in enumerate(ids):
+                encs[i] = enc[j]
+                next_states[i] = states[j]
+        return encs, next_states
+
+    def _split_waveform(
+        self, speech: torch.Tensor, prev_states=None, is_final: bool = False
+    ):
+        if self.incremental_frontend:
+            return self._split_waveform_incremental(speech, prev_states, is_final)
+
         if prev_states is not None:
             buf = prev_states["waveform_buffer"]
             speech = torch.cat([buf, speech], dim=0)
@@ -200,49 +374,117 @@ class Speech2TextStreaming:
             speech_to_process = speech
             waveform_buffer = None
         else:
-            n_frames = (speech.size(0) - 384) // 128
-            n_residual = (speech.size(0) - 384) % 128
-            speech_to_process = speech.narrow(0, 0, 384 + n_frames * 128)
+            n_frames = (speech.size(0) - self.n_overlap) // self.hop_length
+            n_residual = (speech.size(0) - self.n_overlap) % self.hop_length
+            speech_to_process = speech.narrow(
+                0, 0, self.n_overlap + n_frames * self.hop_length
+            )
             waveform_buffer = speech.narrow(
-                0, speech.size(0) - 384 - n_residual, 384 + n_residual
+                0,
+                speech.size(0) - self.n_overlap - n_residual,
+                self.n_overlap + n_residual,
             ).clone()
 
-        # data: (Nsamples,) -> (1, Nsamples)
-        speech_to_process = speech_to_process.unsqueeze(0).to(
-            getattr(torch, self.dtype)
-        )
-        lengths = speech_to_process.new_full(
-            [1], dtype=torch.long, fill_value=speech_to_process.size(1)
+        if is_final:
+            next_states = None
+        else:
+            next_states = {"waveform_buffer": waveform_buffer}
+        return speech_to_process, next_states
+
+    def _split_waveform_incremental(
+        self, speech: torch.Tensor, prev_states=None, is_final: bool = False
+    ):
+        if prev_states is None:
+            padded = self.n_pad == 0
+        else:
+            speech = torch.cat([prev_states["waveform_buffer"], speech], dim=0)
+            padded = prev_states["padded"]
+
+        # The reflect padding at the start of the stream as torch.stft(center=True)
+        if not padded and (is_final or speech.size(0) > self.n_pad):
+            speech = torch.cat([speech[1 : self.n_pad + 1].flip(0), speech], dim=0)
+            padded = True
+
+        if is_final:
+            if self.n_pad > 0:
+                speech = torch.cat(
+                    [speech, speech[-self.n_pad - 1 : -1].flip(0)], dim=0
+                )
+            return speech, None
+
+        if padded and speech.size(0) >= self.n_fft:
+            n_frames = (speech.size(0) - self.n_fft) // self.hop_length + 1
+        else:
+            n_frames = 0
+        if n_frames > 0:
+            speech_to_process = speech.narrow(
+                0, 0, (n_frames - 1) * self.hop_length + self.n_fft
+            )
+        else:
+            speech_to_process = speech.narrow(0, 0, 0)
+        # The samples from the start of the next frame
+        waveform_buffer = speech.narrow(
+            0,
+            n_frames * self.hop_length,
+            speech.size(0) - n_frames * self.hop_length,
+        ).clone()
+        return speech_to_process, {"waveform_buffer": waveform_buffer, "padded": padded}
+
+    def _extract_feats(self, speech: torch.Tensor) -> torch.Tensor:
+        if self.incremental_frontend:
+            return self._extract_frame_feats(speech)
+
+        # data: (B, Nsamples)
+        speech = speech.to(getattr(torch, self.dtype))
+        lengths = speech.new_full(
+            [speech.size(0)], dtype=torch.long, fill_value=speech.size(1)
         )
-        batch = {"speech": speech_to_process, "speech_lengths": lengths}
+        batch = {"speech": speech, "speech_lengths": lengths}
 
-        # lenghts: (1,)
+        # lenghts: (B,)
         # a. To device
         batch = to_device(batch, device=self.device)
 
         feats, feats_lengths = self.asr_model._extract_feats(**batch)
         if self.asr_model.normalize is not None:
             feats, feats_lengths = self.asr_model.normalize(feats, feats_lengths)
+        return feats
+
+    def _extract_frame_feats(self, speech: torch.Tensor) -> torch.Tensor:
+        # data: (B, Nsamples) -> feats: (B, (Nsamples - n_fft) // hop_length + 1, D)
+        frontend = self.asr_model.frontend
+        speech = to_device(speech.to(getattr(torch, self.dtype)), device=self.device)
+        if speech.size(1) < self.n_fft:
+            return speech.new_zeros(speech.size(0), 0, frontend.output_size())
+
+        # input_stft: (B, T, F, 2)
+        input_stft, _ = self.frame_stft(speech)
+        input_power = input_stft[..., 0] ** 2 + input_stft[..., 1] ** 2
+        feats, feats_lengths = frontend.logmel(input_power)
+        # NOTE: Only the frames of the chunk are normalized by e.g. utterance_mvn
+        if self.asr_model.normalize is not None:
+            feats, feats_lengths = self.asr_model.normalize(feats, feats_lengths)
+        return feats
+
+    def _trim_feats(
+        self, feats: torch.Tensor, prev_states=None, is_final: bool = False
+    ) -> torch.Tensor:
+        if self.incremental_frontend:
+            return feats
 
         # Trimming
+        n_trim = self.n_trim
         if is_final:
             if prev_states is None:
                 pass
             else:
-                feats = feats.narrow(1, 2, feats.size(1) - 2)
+                feats = feats.narrow(1, n_trim, feats.size(1) - n_trim)
         else:
             if prev_states is None:
-                feats = feats.narrow(1, 0, feats.size(1) - 2)
+                feats = feats.narrow(1, 0, feats.size(1) - n_trim)
             else:
-                feats = feats.narrow(1, 2, feats.size(1) - 4)
-
-        feats_lengths = feats.new_full([1], dtype=torch.long, fill_value=feats.size(1))
-
-        if is_final:
-            next_states = None
-        else:
-            next_states = {"waveform_buffer": waveform_buffer}
-        return feats, feats_lengths, next_states
+                feats = feats.narrow(1, n_trim, feats.size(1) - 2 * n_trim)
+        return feats
 
     @torch.no_grad()
     def __call__(
@@ -309,6 +551,399 @@ class Speech2TextStreaming:
         return results
 
 
+def _encoder_states_key(feats: torch.Tensor, states: Optional[dict]) -> tuple:
+    """Return the key of the streams whose encoder inputs can be batched."""
+    if states is None:
+        return feats.size(1), None
+    return (
+        feats.size(1),
+        states["n_processed_blocks"] == 0,
+        tuple(
+            None if v is None else v.shape
+            for k, v in sorted(states.items())
+            if k != "n_processed_blocks"
+        ),
+    )
+
+
+def _stack_encoder_states(states: List[Optional[dict]]) -> Optional[dict]:
+    if states[0] is None:
+        return None
+    stacked = {}
+    for k in states[0]:
+        values = [s[k] for s in states]
+        if k == "n_processed_blocks":
+            if all(v == values[0] for v in values):
+                stacked[k] = values[0]
+            else:
+                stacked[k] = torch.tensor(values)
+        elif values[0] is None:
+            stacked[k] = None
+        else:
+            stacked[k] = torch.cat(values)
+    return stacked
+
+
+def _split_encoder_states(states: Optional[dict], n: int) -> List[Optional[dict]]:
+    if states is None:
+        return [None] * n
+    split = [dict() for _ in range(n)]
+    for k, v in states.items():
+        for i, s in enumerate(split):
+            if v is None:
+                s[k] = None
+            elif k == "n_processed_blocks":
+                s[k] = int(v[i]) if isinstance(v, torch.Tensor) else v
+            else:
+                s[k] = v[i : i + 1]
+    return split
+
+
+def _group_scorer_states(hyps: List[BatchHypothesis], key: str) -> List[List[int]]:
+    """Group the hypotheses of the searches scored by a full scorer at once.
+
+    KVCache can have the prefixes of the different lengths, and the lists of
+    the states of each hypothesis are concatenated for the prefixes of
+    the same lengths. The other states are scored by each search.
+
+    """
+    groups = {}
+    for i, hyp in enumerate(hyps):
+        states = hyp.states[key]
+        if isinstance(states, KVCache):
+            group = "kv"
+        elif isinstance(states, list):
+            group = hyp.yseq.size(1)
+        else:
+            group = i
+        groups.setdefault(group, []).append(i)
+    return list(groups.values())
+
+
+def _cat_scorer_states(states: List[Any]) -> Any:
+    if len(states) == 1:
+        return states[0]
+    if isinstance(states[0], KVCache):
+        return KVCache.cat(states)
+    return [x for s in states for x in s]
+
+
+def _split_scorer_states(states: Any, sizes: List[int]) -> List[Any]:
+    split = []
+    start = 0
+    for size in sizes:
+        if states is None:
+            split.append(None)
+        elif isinstance(states, KVCache):
+            length = states.length
+            if isinstance(length, torch.Tensor):
+                # The hypotheses of a search have the same length
+                length = int(length[start])
+            split.append(KVCache(states.buffer[start : start + size], length))
+        else:
+            split.append(states[start : start + size])
+        start += size
+    return split
+
+
+@dataclasses.dataclass
+class StreamMetrics:
+    """Metrics of a stream of MultiStreamSpeech2Text.
+
+    The latency of a block is the time from the arrival of its last sample,
+    i.e. the call of `feed()`, to the end of the tick processing the block.
+
+    """
+
+    n_samples: int = 0
+    n_blocks: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        if self.n_blocks == 0:
+            return 0.0
+        return self.total_latency / self.n_blocks
+
+    def add_block(self, latency: float):
+        self.n_blocks += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def merge(self, other: "StreamMetrics"):
+        self.n_samples += other.n_samples
+        self.n_blocks += other.n_blocks
+        self.total_latency += other.total_latency
+        self.max_latency = max(self.max_latency, other.max_latency)
+
+
+class StreamResult(NamedTuple):
+    key: str
+    results: List[Tuple[Optional[str], List[str], List[int], Hypothesis]]
+    is_final: bool
+    # The metrics of the stream, given with the final result
+    metrics: Optional[StreamMetrics] = None
+
+
+class _Stream:
+    def __init__(self, key: str, beam_search: BatchBeamSearchOnline):
+        self.key = key
+        self.beam_search = beam_search
+        self.frontend_states = None
+        self.encoder_states = None
+        # The samples not processed yet
+        self.waveform = torch.zeros(0)
+        self.n_fed = 0
+        self.n_consumed = 0
+        # (the number of the samples fed, time) of each feed()
+        self.arrivals = collections.deque()
+        self.is_final = False
+
+    def arrival_time(self) -> float:
+        """Return the arrival time of the last sample consumed."""
+        while self.arrivals[0][0] < self.n_consumed:
+            self.arrivals.popleft()
+        return self.arrivals[0][1]
+
+
+class MultiStreamSpeech2Text:
+    """Recognize several streams at once with Speech2TextStreaming.
+
+    Each stream keeps its own buffers and states, but the blocks of the streams
+    ready at each tick are processed together: the frontend and the encoder
+    are applied to the batch of the streams having the inputs of the same shapes,
+    and the decoders and the language models of the beam searches are applied
+    to the batch of the hypotheses of the same lengths of all the streams.
+    The inputs of the streams are processed by "block_samples" samples,
+    so the results are the same as the ones of Speech2TextStreaming
+    fed by the chunks of "block_samples" samples.
+
+    Examples:
+        >>> engine = MultiStreamSpeech2Text(speech2text, block_samples=8192)
+        >>> engine.join("spk1")
+        >>> engine.join("spk2")
+        >>> engine.feed("spk1", chunk1)
+        >>> engine.feed("spk2", chunk2, is_final=True)
+        >>> for result in engine.step():
+        ...     print(result.key, result.results[0][0])
+
+    The metrics of a stream are kept in `metrics` while it is joined,
+    and `total_metrics` accumulates the ones of the streams which have left.
+
+    Args:
+        speech2text: Speech2TextStreaming having the models and the configuration.
+        block_samples: The number of the samples of the input processed at a time.
+
+    """
+
+    def __init__(self, speech2text: Speech2TextStreaming, block_samples: int):
+        assert check_argument_types()
+        assert block_samples > 0, block_samples
+        self.speech2text = speech2text
+        self.block_samples = block_samples
+        self.streams = {}
+        self.metrics = {}
+        self.total_metrics = StreamMetrics()
+
+    def join(self, key: str):
+        """Start a new stream."""
+        if key in self.streams:
+            raise RuntimeError(f"The stream {key} has already joined")
+        self.streams[key] = _Stream(key, self.speech2text.build_beam_search())
+        self.metrics[key] = StreamMetrics()
+
+    def leave(self, key: str) -> StreamMetrics:
+        """Stop the stream without waiting for the result.
+
+        Returns:
+            The metrics of the stream
+
+        """
+        del self.streams[key]
+        metrics = self.metrics.pop(key)
+        self.total_metrics.merge(metrics)
+        return metrics
+
+    def feed(
+        self,
+        key: str,
+        speech: Union[torch.Tensor, np.ndarray],
+        is_final: bool = False,
+    ):
+        """Append the input to the stream.
+
+        Args:
+            key: The name of the stream
+            speech: The input waveform (Nsamples,)
+            is_final: Whether it is the last input. The stream leaves
+                after the result of the whole input is returned by `step()`.
+
+        """
+        stream = self.streams[key]
+        if stream.is_final:
+            raise RuntimeError(f"The stream {key} has already been finished")
+        speech = torch.as_tensor(speech).to(getattr(torch, self.speech2text.dtype))
+        stream.waveform = torch.cat([stream.waveform.to(speech.dtype), speech])
+        stream.n_fed += len(speech)
+        stream.arrivals.append((stream.n_fed, time.perf_counter()))
+        stream.is_final = is_final
+        self.metrics[key].n_samples += len(speech)
+
+    def is_ready(self, key: str) -> bool:
+        """Return whether the stream has the input to process."""
+        stream = self.streams[key]
+        return stream.is_final or len(stream.waveform) >= self.block_samples
+
+    @torch.no_grad()
+    def step(self) -> List[StreamResult]:
+        """Process the next blocks of the ready streams.
+
+        Returns:
+            The results of the streams processed. The finished streams leave.
+
+        """
+        streams = [s for s in self.streams.values() if self.is_ready(s.key)]
+        if len(streams) == 0:
+            return []
+
+        # 1. Take the next input of each stream
+        speeches = []
+        finals = []
+        for stream in streams:
+            is_final = stream.is_final and len(stream.waveform) < self.block_samples
+            n = len(stream.waveform) if is_final else self.block_samples
+            speeches.append(stream.waveform[:n])
+            stream.waveform = stream.waveform[n:]
+            stream.n_consumed += n
+            finals.append(is_final)
+
+        # 2. Apply the frontend and the encoder to the final and the others
+        encs = [None] * len(streams)
+        for is_final in (False, True):
+            ids = [i for i, final in enumerate(finals) if final == is_final]
+            if len(ids) == 0:
+                continue
+            feats, frontend_states = self.speech2text.batch_apply_frontend(
+                [speeches[i] for i in ids],
+                [streams[i].frontend_states for i in ids],
+                is_final=is_final,
+            )
+            xs, encoder_states = self.speech2text.batch_encode(
+                feats, [streams[i].encoder_states for i in ids], is_final=is_final
+            )
+            for j, i in enumerate(ids):
+                streams[i].frontend_states = frontend_states[j]
+                streams[i].encoder_states = encoder_states[j]
+                encs[i] = xs[j]
+
+        # 3. Beam search
+        nbest_hyps = self._batch_beam_search(streams, encs, finals)
+
+        # 4. Scatter the results
+        ret = []
+        now = time.perf_counter()
+        for stream, nbest, is_final in zip(streams, nbest_hyps, finals):
+            self.metrics[stream.key].add_block(now - stream.arrival_time())
+            results = self.speech2text.assemble_hyps(nbest)
+            if is_final:
+                metrics = self.leave(stream.key)
+                ret.append(StreamResult(stream.key, results, True, metrics))
+            else:
+                ret.append(StreamResult(stream.key, results, False))
+        return ret
+
+    def _batch_beam_search(
+        self,
+        streams: List[_Stream],
+        encs: List[torch.Tensor],
+        finals: List[bool],
+    ) -> List[List[Hypothesis]]:
+        # The generators yield the features to search for the running hypotheses
+        # and return the N-best results
+        results = [None] * len(streams)
+        pending = []
+
+        def _advance(i, steps, best=None):
+            try:
+                h = next(steps) if best is None else steps.send(best)
+                pending.append((i, steps, h))
+            except StopIteration as e:
+                results[i] = e.value
+
+        for i, (stream, enc, is_final) in enumerate(zip(streams, encs, finals)):
+            steps = stream.beam_search.forward_steps(
+                x=enc,
+                maxlenratio=self.speech2text.maxlenratio,
+                minlenratio=self.speech2text.minlenratio,
+                is_final=is_final,
+            )
+            _advance(i, steps)
+
+        while len(pending) > 0:
+            bests = self._batch_search(
+                [streams[i].beam_search for i, _, _ in pending],
+                [h for _, _, h in pending],
+            )
+            prev_pending, pending = pending, []
+            for (i, steps, _), best in zip(prev_pending, bests):
+                _advance(i, steps, best)
+        return results
+
+    def _batch_search(
+        self, beam_searches: List[BatchBeamSearchOnline], hs: List[torch.Tensor]
+    ) -> List[BatchHypothesis]:
+        """Search the next tokens of several streams.
+
+        The full scorers, e.g. the decoder and the language model, are applied to
+        the hypotheses of all the streams at once, and the partial scorers, e.g.
+        the CTC prefix scorers having the probabilities of each stream,
+        are applied to each stream.
+
+        """
+        if len(beam_searches) == 1 or beam_searches[0].decoder_text_length_limit > 0:
+            # The prefixes cut by decoder_text_length_limit are scored by each
+            return [
+                beam_search.search(beam_search.running_hyps, h)
+                for beam_search, h in zip(beam_searches, hs)
+            ]
+
+        hyps = [beam_search.running_hyps for beam_search in beam_searches]
+        sizes = [len(hyp) for hyp in hyps]
+        scores = [dict() for _ in hyps]
+        states = [dict() for _ in hyps]
+        for k, d in beam_searches[0].full_scorers.items():
+            for ids in _group_scorer_states(hyps, k):
+                group_sizes = [sizes[i] for i in ids]
+                repeats = torch.tensor(group_sizes, device=hs[0].device)
+                xs = pad_list([hs[i] for i in ids], 0.0)
+                xs_lens = torch.tensor([hs[i].size(0) for i in ids], device=xs.device)
+                # The prefixes are padded if the states are KVCache
+                ys = pad_list(
+                    [y for i in ids for y in hyps[i].yseq], beam_searches[0].eos
+                )
+                group_scores, group_states = d.batch_score_padded(
+                    ys,
+                    _cat_scorer_states([hyps[i].states[k] for i in ids]),
+                    xs.repeat_interleave(repeats, dim=0),
+                    xs_lens.repeat_interleave(repeats),
+                )
+                for i, score, state in zip(
+                    ids,
+                    torch.split(group_scores, group_sizes),
+                    _split_scorer_states(group_states, group_sizes),
+                ):
+                    scores[i][k] = score
+                    states[i][k] = state
+
+        return [
+            beam_search.search_with_full_scores(hyp, h, score, state)
+            for beam_search, hyp, h, score, state in zip(
+                beam_searches, hyps, hs, scores, states
+            )
+        ]
+
+
 def inference(
     output_dir: str,
     maxlenratio: float,
@@ -339,10 +974,14 @@ def inference(
     disable_repetition_detection: bool,
     encoded_feat_length_limit: int,
     decoder_text_length_limit: int,
+    num_streams: int,
+    incremental_frontend: bool,
 ):
     assert check_argument_types()
     if batch_size > 1:
         raise NotImplementedError("batch decoding is not implemented")
+    if num_streams > 0 and sim_chunk_length == 0:
+        raise ValueError("--sim_chunk_length is required for --num_streams")
     if word_lm_train_config is not None:
         raise NotImplementedError("Word LM is not implemented")
     if ngpu > 1:
@@ -381,6 +1020,7 @@ def inference(
         disable_repetition_detection=disable_repetition_detection,
         decoder_text_length_limit=decoder_text_length_limit,
         encoded_feat_length_limit=encoded_feat_length_limit,
+        incremental_frontend=incremental_frontend,
     )
 
     # 3. Build data-iterator
@@ -397,39 +1037,17 @@ def inference(
     )
 
     # 7 .Start for-loop
+    if num_streams > 0:
+        results_iter = _multi_stream_results(
+            speech2text, loader, num_streams, sim_chunk_length
+        )
+    else:
+        results_iter = _single_stream_results(
+            speech2text, loader, sim_chunk_length, nbest
+        )
     # FIXME(kamo): The output format should be discussed about
     with DatadirWriter(output_dir) as writer:
-        for keys, batch in loader:
-            assert isinstance(batch, dict), type(batch)
-            assert all(isinstance(s, str) for s in keys), keys
-            _bs = len(next(iter(batch.values())))
-            assert len(keys) == _bs, f"{len(keys)} != {_bs}"
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
-            assert len(batch.keys()) == 1
-
-            try:
-                if sim_chunk_length == 0:
-                    # N-best list of (text, token, token_int, hyp_object)
-                    results = speech2text(**batch)
-                else:
-                    speech = batch["speech"]
-                    for i in range(len(speech) // sim_chunk_length):
-                        speech2text(
-                            speech=speech[
-                                i * sim_chunk_length : (i + 1) * sim_chunk_length
-                            ],
-                            is_final=False,
-                        )
-                    results = speech2text(
-                        speech[(i + 1) * sim_chunk_length : len(speech)], is_final=True
-                    )
-            except TooShortUttError as e:
-                logging.warning(f"Utterance {keys} {e}")
-                hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
-                results = [[" ", ["<space>"], [2], hyp]] * nbest
-
-            # Only supporting batch_size==1
-            key = keys[0]
+        for key, results in results_iter:
             for n, (text, token, token_int, hyp) in zip(range(1, nbest + 1), results):
                 # Create a directory: outdir/{n}best_recog
                 ibest_writer = writer[f"{n}best_recog"]
@@ -443,6 +1061,107 @@ def inference(
                     ibest_writer["text"][key] = text
 
 
+def _iter_speech(loader) -> Iterator[Tuple[str, torch.Tensor]]:
+    for keys, batch in loader:
+        assert isinstance(batch, dict), type(batch)
+        assert all(isinstance(s, str) for s in keys), keys
+        _bs = len(next(iter(batch.values())))
+        assert len(keys) == _bs, f"{len(keys)} != {_bs}"
+        batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
+        assert len(batch.keys()) == 1
+
+        # Only supporting batch_size==1
+        yield keys[0], batch["speech"]
+
+
+def _single_stream_results(
+    speech2text: Speech2TextStreaming, loader, sim_chunk_length: int, nbest: int
+):
+    start_time = time.perf_counter()
+    n_samples = 0
+    for key, speech in _iter_speech(loader):
+        n_samples += len(speech)
+        try:
+            if sim_chunk_length == 0:
+                # N-best list of (text, token, token_int, hyp_object)
+                results = speech2text(speech)
+            else:
+                for i in range(len(speech) // sim_chunk_length):
+                    speech2text(
+                        speech=speech[
+                            i * sim_chunk_length : (i + 1) * sim_chunk_length
+                        ],
+                        is_final=False,
+                    )
+                results = speech2text(
+                    speech[(i + 1) * sim_chunk_length : len(speech)], is_final=True
+                )
+        except TooShortUttError as e:
+            logging.warning(f"Utterance {key} {e}")
+            hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
+            results = [[" ", ["<space>"], [2], hyp]] * nbest
+        yield key, results
+
+    elapsed = time.perf_counter() - start_time
+    logging.info(
+        f"Throughput of the single stream: {n_samples / elapsed:.1f} samples/sec"
+    )
+
+
+def _multi_stream_results(
+    speech2text: Speech2TextStreaming, loader, num_streams: int, sim_chunk_length: int
+):
+    """Recognize the utterances as concurrent streams by MultiStreamSpeech2Text.
+
+    Up to "num_streams" utterances are fed by "sim_chunk_length" samples
+    at each tick, and the next utterance joins when one of them finishes.
+
+    """
+    engine = MultiStreamSpeech2Text(speech2text, block_samples=sim_chunk_length)
+    utterances = _iter_speech(loader)
+    # The inputs and the positions of the streams being fed
+    inputs = {}
+    start_time = time.perf_counter()
+    n_samples = 0
+    n_ticks = 0
+    while True:
+        while len(engine.streams) < num_streams:
+            try:
+                key, speech = next(utterances)
+            except StopIteration:
+                break
+            engine.join(key)
+            inputs[key] = [speech, 0]
+            n_samples += len(speech)
+        if len(engine.streams) == 0:
+            break
+
+        for key, (speech, pos) in list(inputs.items()):
+            chunk = speech[pos : pos + sim_chunk_length]
+            engine.feed(key, chunk, is_final=pos + len(chunk) >= len(speech))
+            if pos + len(chunk) >= len(speech):
+                del inputs[key]
+            else:
+                inputs[key][1] += len(chunk)
+
+        for result in engine.step():
+            if result.is_final:
+                yield result.key, result.results
+        n_ticks += 1
+
+    elapsed = time.perf_counter() - start_time
+    metrics = engine.total_metrics
+    logging.info(
+        f"Throughput of {num_streams} streams: {n_samples / elapsed:.1f} samples/sec "
+        f"({n_ticks} ticks)"
+    )
+    if metrics.n_blocks > 0:
+        logging.info(
+            f"Latency per block: mean={metrics.mean_latency:.4f}s, "
+            f"max={metrics.max_latency:.4f}s"
+        )
+
+
 def get_parser():
     parser = config_argparse.ArgumentParser(
         description="ASR Decoding",
@@ -496,6 +1215,20 @@ def get_parser():
         help="The length of one chunk, to which speech will be "
         "divided for evalution of streaming processing.",
     )
+    group.add_argument(
+        "--num_streams",
+        type=int,
+        default=0,
+        help="If > 0, the utterances are recognized as the concurrent streams "
+        "of sim_chunk_length samples at once, and the throughput is reported.",
+    )
+    group.add_argument(
+        "--incremental_frontend",
+        type=str2bool,
+        default=False,
+        help="Compute each STFT frame only once for the streaming input, "
+        "keeping the overlapping samples of the frames for the next chunk",
+    )
 
     group = parser.add_argument_group("The model configuration related")
     group.add_argument("--asr_train_config", type=str, required=True)
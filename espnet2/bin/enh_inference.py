@@ -29,6 +29,7 @@ from espnet2.torch_utils.device_funcs import to_device
 from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
 from espnet2.train.abs_espnet_model import AbsESPnetModel
 from espnet2.utils import config_argparse
+from espnet2.utils.types import int_or_none
 from espnet2.utils.types import str2bool
 from espnet2.utils.types import str2triple_str
 from espnet2.utils.types import str_or_none
@@ -116,8 +117,16 @@ class SeparateSpeech:
         device: str = "cpu",
         dtype: str = "float32",
         enh_s2t_task: bool = False,
+        segment_batch_size: Optional[int] = None,
+        segment_window: str = "hann",
     ):
         assert check_argument_types()
+        if segment_batch_size is not None and segment_batch_size <= 0:
+            raise ValueError(
+                f"segment_batch_size must be a positive integer: {segment_batch_size}"
+            )
+        if segment_window not in ("hann", "rect"):
+            raise ValueError(f"segment_window must be hann or rect: {segment_window}")
 
         task = EnhancementTask if not enh_s2t_task else EnhS2TTask
 
@@ -170,6 +179,9 @@ class SeparateSpeech:
         self.normalize_segment_scale = normalize_segment_scale
         self.normalize_output_wav = normalize_output_wav
         self.show_progressbar = show_progressbar
+        # If not None, the segments are processed in mini-batches
+        self.segment_batch_size = segment_batch_size
+        self.segment_window = segment_window
 
         self.num_spk = enh_model.num_spk
         task = "enhancement" if self.num_spk == 1 else "separation"
@@ -192,6 +204,12 @@ class SeparateSpeech:
                     segment_size, hop_size
                 )
             )
+            if segment_batch_size is not None:
+                logging.info(
+                    "Process {} segments at once with {} window".format(
+                        segment_batch_size, segment_window
+                    )
+                )
         else:
             logging.info("Perform direct speech %s on the input" % task)
 
@@ -226,7 +244,14 @@ class SeparateSpeech:
         speech_mix = to_device(speech_mix, device=self.device)
         lengths = to_device(lengths, device=self.device)
 
-        if self.segmenting and lengths[0] > self.segment_size * fs:
+        if (
+            self.segmenting
+            and self.segment_batch_size is not None
+            and lengths[0] > self.segment_size * fs
+        ):
+            # Segment-wise speech enhancement/separation in mini-batches
+            waves = torch.unbind(self.batch_segment_wise(speech_mix, fs), dim=0)
+        elif self.segmenting and lengths[0] > self.segment_size * fs:
             # Segment-wise speech enhancement/separation
             overlap_length = int(np.round(fs * (self.segment_size - self.hop_size)))
             num_segments = int(
@@ -326,6 +351,123 @@ class SeparateSpeech:
 
         return waves
 
+    @torch.no_grad()
+    def batch_segment_wise(self, speech_mix: torch.Tensor, fs: int) -> torch.Tensor:
+        """Segment-wise enhancement/separation processing segments in mini-batches.
+
+        The input is split into the overlapping segments at once, and the
+        segments are processed by the model in mini-batches of
+        segment_batch_size. The permutations between the adjacent segments are
+        calculated at once and accumulated, and then the segments are
+        overlap-added with the window.
+
+        Args:
+            speech_mix (torch.Tensor): (Batch, Nsamples [, Channels])
+            fs (int): sample rate
+        Returns:
+            waves (torch.Tensor): (num_spk, Batch, Nsamples)
+        """
+        batch_size, num_samples = speech_mix.shape[:2]
+        T = int(self.segment_size * fs)
+        hop_length = int(np.round(self.hop_size * fs))
+        overlap_length = T - hop_length
+        num_segments = int(np.ceil(max(num_samples - T, 0) / hop_length)) + 1
+        padded_length = (num_segments - 1) * hop_length + T
+
+        # a. Split into segments: (num_segments, Batch, T [, Channels])
+        pad = [0, padded_length - num_samples]
+        if speech_mix.dim() > 2:
+            pad = [0, 0] + pad
+        segments = torch.nn.functional.pad(speech_mix, pad).unfold(1, T, hop_length)
+        segments = segments.transpose(0, 1)
+        if segments.dim() > 3:
+            # (num_segments, Batch, Channels, T) -> (num_segments, Batch, T, Channels)
+            segments = segments.transpose(2, 3)
+        # The number of valid samples in each segment: (num_segments,)
+        seg_lengths = (
+            num_samples
+            - torch.arange(num_segments, device=speech_mix.device) * hop_length
+        ).clamp(max=T)
+
+        # b. Enhancement/Separation Forward in mini-batches
+        enh_segments = []
+        range_ = trange if self.show_progressbar else range
+        for i in range_(0, num_segments, self.segment_batch_size):
+            speech_seg = segments[i : i + self.segment_batch_size]
+            n = speech_seg.size(0)
+            speech_seg = speech_seg.reshape(n * batch_size, *speech_seg.shape[2:])
+            lengths_seg = speech_seg.new_full(
+                [n * batch_size], dtype=torch.long, fill_value=T
+            )
+            feats, f_lens = self.enh_model.encoder(speech_seg, lengths_seg)
+            feats, _, _ = self.enh_model.separator(feats, f_lens)
+            processed_wav = torch.stack(
+                [self.enh_model.decoder(f, lengths_seg)[0][:, :T] for f in feats],
+                dim=1,
+            )
+            enh_segments.append(processed_wav.view(n, batch_size, self.num_spk, T))
+        # (num_segments, Batch, num_spk, T)
+        enh_segments = torch.cat(enh_segments, dim=0)
+
+        if self.normalize_segment_scale:
+            # normalize the scale to match the input mixture scale
+            mask = torch.arange(T, device=speech_mix.device) < seg_lengths[:, None]
+            mask = mask[:, None, :].to(enh_segments.dtype)
+            if segments.dim() > 3:
+                # multi-channel speech
+                segments = segments[..., self.ref_channel]
+            num = seg_lengths[:, None].to(enh_segments.dtype)
+            mix_energy = torch.sqrt((segments.pow(2) * mask).sum(dim=-1) / num)
+            enh_energy = torch.sqrt(
+                (enh_segments.sum(dim=2).pow(2) * mask).sum(dim=-1) / num
+            )
+            enh_segments = enh_segments * (mix_energy / enh_energy)[..., None, None]
+
+        # c. Align the permutations of all the segments
+        if self.num_spk > 1 and num_segments > 1 and overlap_length > 0:
+            # permutations between adjacent segments: (num_segments - 1, Batch, num_spk)
+            perm = self.cal_permumation(
+                [
+                    w.reshape(-1, overlap_length)
+                    for w in enh_segments[:-1, :, :, hop_length:].unbind(2)
+                ],
+                [
+                    w.reshape(-1, overlap_length)
+                    for w in enh_segments[1:, :, :, :overlap_length].unbind(2)
+                ],
+                criterion="si_snr",
+            ).view(num_segments - 1, batch_size, self.num_spk)
+            # permutations relative to the first segment
+            perms = [torch.arange(self.num_spk, device=perm.device).expand_as(perm[0])]
+            for p in perm:
+                perms.append(p.gather(1, perms[-1]))
+            perms = torch.stack(perms).to(enh_segments.device)
+            enh_segments = enh_segments.gather(
+                2, perms[..., None].expand(-1, -1, -1, T)
+            )
+
+        # d. Overlap-add the segments
+        if self.segment_window == "hann":
+            # Exclude the zeros on both ends
+            window = torch.hann_window(T + 2, periodic=False)[1:-1]
+        else:
+            window = torch.ones(T)
+        window = window.to(device=enh_segments.device, dtype=enh_segments.dtype)
+        # (Batch * num_spk, T, num_segments)
+        frames = (enh_segments * window).permute(1, 2, 3, 0)
+        frames = frames.reshape(batch_size * self.num_spk, T, num_segments)
+        fold_kwargs = dict(
+            output_size=(1, padded_length),
+            kernel_size=(1, T),
+            stride=(1, hop_length),
+        )
+        waves = torch.nn.functional.fold(frames, **fold_kwargs)
+        norm = torch.nn.functional.fold(
+            window[None, :, None].expand(1, T, num_segments), **fold_kwargs
+        )
+        waves = (waves / norm)[..., :num_samples]
+        return waves.view(batch_size, self.num_spk, num_samples).transpose(0, 1)
+
     @torch.no_grad()
     def cal_permumation(self, ref_wavs, enh_wavs, criterion="si_snr"):
         """Calculate the permutation between seaprated streams in two adjacent segments.
@@ -406,6 +548,8 @@ def inference(
     ref_channel: Optional[int],
     normalize_output_wav: bool,
     enh_s2t_task: bool,
+    segment_batch_size: Optional[int],
+    segment_window: str,
 ):
     assert check_argument_types()
     if batch_size > 1:
@@ -440,6 +584,8 @@ def inference(
         device=device,
         dtype=dtype,
         enh_s2t_task=enh_s2t_task,
+        segment_batch_size=segment_batch_size,
+        segment_window=segment_window,
     )
     separate_speech = SeparateSpeech.from_pretrained(
         model_tag=model_tag,
@@ -603,6 +749,20 @@ def get_parser():
         default=False,
         help="Whether to normalize the energy of the separated streams in each segment",
     )
+    group.add_argument(
+        "--segment_batch_size",
+        type=int_or_none,
+        default=None,
+        help="If not None, the segments are processed in mini-batches of this size "
+        "and overlap-added at once with --segment_window, instead of one by one",
+    )
+    group.add_argument(
+        "--segment_window",
+        type=str,
+        default="hann",
+        choices=["hann", "rect"],
+        help="The window for overlap-adding the segments with --segment_batch_size",
+    )
     group.add_argument(
         "--show_progressbar",
         type=str2bool,
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import logging
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import torch
+from typeguard import check_argument_types
+
+from espnet.nets.pytorch_backend.nets_utils import pad_list
+from espnet.utils.cli_utils import get_commandline_args
+from espnet2.fileio.datadir_writer import DatadirWriter
+from espnet2.fileio.read_text import read_2column_text
+from espnet2.tasks.lm import LMTask
+from espnet2.text.token_id_converter import TokenIDConverter
+from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
+from espnet2.utils import config_argparse
+
+
+class LMScorer:
+    """Compute the log-probabilities of many token sequences by LM.
+
+    The duplicated sequences and the sequences which are the prefixes of
+    the others are not forwarded: the LM is forwarded only for the longest
+    sequences, and the log-probability of each prefix is taken from
+    the token and <eos> log-probabilities at its positions. The sequences
+    are sorted by length and packed into mini-batches of at most
+    "batch_bins" tokens, which are forwarded by "num_workers" threads
+    on the replicas of the model for each device.
+
+    Examples:
+        >>> scorer = LMScorer("lm_config.yml", "lm.pth")
+        >>> scorer.score([[3, 5, 8], [3, 5], [3, 5, 8]])
+        array([-12.1, -7.3, -12.1])
+
+    """
+
+    def __init__(
+        self,
+        train_config: Union[Path, str],
+        model_file: Union[Path, str] = None,
+        device: str = "cpu",
+        dtype: str = "float32",
+        batch_bins: int = 10000,
+        num_workers: int = 1,
+        ngpu: int = 0,
+    ):
+        assert check_argument_types()
+        assert batch_bins > 0, batch_bins
+        assert num_workers > 0, num_workers
+
+        model, train_args = LMTask.build_model_from_file(
+            train_config, model_file, device
+        )
+        model.to(dtype=getattr(torch, dtype)).eval()
+        if ngpu > 1:
+            models = [model] + [
+                copy.deepcopy(model).to(f"cuda:{i}") for i in range(1, ngpu)
+            ]
+        else:
+            models = [model]
+
+        self.model = model
+        self.models = models
+        self.train_args = train_args
+        self.converter = TokenIDConverter(token_list=train_args.token_list)
+        self.batch_bins = batch_bins
+        self.num_workers = num_workers
+
+    def score(self, token_ids: Sequence[Sequence[int]]) -> np.ndarray:
+        """Compute the log-probabilities of the sequences including <eos>.
+
+        Args:
+            token_ids: The token ids of each sequence without <sos>/<eos>
+        Returns:
+            The log-probability of each sequence (N,)
+
+        """
+        seqs = [tuple(int(t) for t in ids) for ids in token_ids]
+        leaves, leaf_ids = _find_leaves(seqs)
+        batches = self._make_batches([len(leaf) for leaf in leaves])
+
+        def _forward(args):
+            i, ids = args
+            model = self.models[i % len(self.models)]
+            with torch.no_grad():
+                return self._forward_batch(model, [leaves[j] for j in ids])
+
+        if self.num_workers > 1:
+            with ThreadPoolExecutor(self.num_workers) as executor:
+                outputs = list(executor.map(_forward, enumerate(batches)))
+        else:
+            outputs = [_forward(args) for args in enumerate(batches)]
+
+        # cum_logp: The log-probability of the prefixes of each leaf
+        # eos_logp: The log-probability of <eos> after the prefixes of each leaf
+        cum_logp = [None] * len(leaves)
+        eos_logp = [None] * len(leaves)
+        for ids, (cum, eos) in zip(batches, outputs):
+            for j, i in enumerate(ids):
+                cum_logp[i] = cum[j]
+                eos_logp[i] = eos[j]
+
+        scores = np.empty(len(seqs), dtype=np.float64)
+        for n, (seq, i) in enumerate(zip(seqs, leaf_ids)):
+            scores[n] = cum_logp[i][len(seq)] + eos_logp[i][len(seq)]
+        return scores
+
+    def _make_batches(self, lengths: List[int]) -> List[List[int]]:
+        # Sort by length and make the batches having "batch_bins" tokens at most
+        batches = []
+        batch = []
+        for i in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+            # The length of the first one is the max in the batch
+            maxlen = lengths[batch[0]] + 1 if len(batch) > 0 else lengths[i] + 1
+            if len(batch) > 0 and (len(batch) + 1) * maxlen > self.batch_bins:
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if len(batch) > 0:
+            batches.append(batch)
+        return batches
+
+    def _forward_batch(
+        self, model, seqs: List[Tuple[int, ...]]
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        device = next(model.parameters()).device
+        # text: (B, L) padded with 0 as the collate_fn of LMTask
+        text = pad_list([torch.tensor(seq, dtype=torch.long) for seq in seqs], 0)
+        # x: (B, L + 1) '<sos> w1 w2 w3' as ESPnetLanguageModel.nll
+        x = torch.nn.functional.pad(text, [1, 0], "constant", model.eos).to(device)
+        y, _ = model.lm(x, None)
+        # logp: (B, L + 1, NVocab)
+        logp = torch.log_softmax(y.float(), dim=-1)
+        token_logp = logp[:, :-1].gather(2, x[:, 1:].unsqueeze(2))
+        cum_logp = torch.nn.functional.pad(token_logp.squeeze(2).cumsum(dim=1), [1, 0])
+        eos_logp = logp[:, :, model.eos]
+        cum_logp = cum_logp.double().cpu().numpy()
+        eos_logp = eos_logp.double().cpu().numpy()
+        return (
+            [c[: len(seq) + 1] for c, seq in zip(cum_logp, seqs)],
+            [e[: len(seq) + 1] for e, seq in zip(eos_logp, seqs)],
+        )
+
+
+def _find_leaves(
+    seqs: List[Tuple[int, ...]]
+) -> Tuple[List[Tuple[int, ...]], List[int]]:
+    """Find the sequences which are not the prefixes of the others.
+
+    Args:
+        seqs: The sequences
+    Returns:
+        The leaf sequences and the index of the leaf having each sequence
+        as the prefix
+
+    """
+    # The nodes of the trie: [children, the index of a leaf through the node]
+    root = [{}, None]
+    leaves = []
+    leaf_ids = [None] * len(seqs)
+    for n in sorted(range(len(seqs)), key=lambda n: -len(seqs[n])):
+        node = root
+        for t in seqs[n]:
+            if t not in node[0]:
+                node = None
+                break
+            node = node[0][t]
+        if node is not None and node[1] is not None:
+            # The prefix of a longer sequence or the duplicated one
+            leaf_ids[n] = node[1]
+            continue
+
+        i = len(leaves)
+        leaves.append(seqs[n])
+        leaf_ids[n] = i
+        node = root
+        if node[1] is None:
+            node[1] = i
+        for t in seqs[n]:
+            node = node[0].setdefault(t, [{}, i])
+    return leaves, leaf_ids
+
+
+def _parse_score(value: str) -> float:
+    # e.g. "-12.3", "tensor(-12.3)", "tensor(-12.3, device='cuda:0')"
+    m = re.fullmatch(r"tensor\(([^,)]+).*\)", value.strip())
+    if m is not None:
+        value = m.group(1)
+    return float(value)
+
+
+def read_nbest(nbest_dir: Union[Path, str]) -> Dict[str, List[Dict[str, str]]]:
+    """Read the n-best lists written by asr_inference.py.
+
+    Examples:
+        nbest_dir/1best_recog/token:
+            key1 a b c
+        nbest_dir/1best_recog/score:
+            key1 tensor(-3.0)
+
+        >>> read_nbest("nbest_dir")
+        {'key1': [{'token': 'a b c', 'score': 'tensor(-3.0)', ...}, ...]}
+
+    """
+    assert check_argument_types()
+    nbest_dirs = {}
+    for p in Path(nbest_dir).iterdir():
+        m = re.fullmatch(r"(\d+)best_recog", p.name)
+        if m is not None and (p / "token").exists():
+            nbest_dirs[int(m.group(1))] = p
+    if len(nbest_dirs) == 0:
+        raise RuntimeError(f"No *best_recog/token in {nbest_dir}")
+
+    nbest = {}
+    for n in sorted(nbest_dirs):
+        fields = {
+            p.name: read_2column_text(p)
+            for p in nbest_dirs[n].iterdir()
+            if p.is_file() and not p.name.startswith(".")
+        }
+        for key in fields["token"]:
+            nbest.setdefault(key, []).append(
+                {k: v[key] for k, v in fields.items() if key in v}
+            )
+    return nbest
+
+
+def rescore(
+    output_dir: str,
+    dtype: str,
+    ngpu: int,
+    seed: int,
+    num_workers: int,
+    log_level: Union[int, str],
+    nbest_dir: str,
+    train_config: Optional[str],
+    model_file: Optional[str],
+    lm_weight: float,
+    penalty: float,
+    batch_bins: int,
+):
+    assert check_argument_types()
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s (%(module)s:%(lineno)d) %(levelname)s: %(message)s",
+    )
+
+    if ngpu >= 1:
+        device = "cuda"
+    else:
+        device = "cpu"
+
+    # 1. Set random-seed
+    set_all_random_seed(seed)
+
+    # 2. Build LM scorer
+    scorer = LMScorer(
+        train_config=train_config,
+        model_file=model_file,
+        device=device,
+        dtype=dtype,
+        batch_bins=batch_bins,
+        num_workers=num_workers,
+        ngpu=ngpu,
+    )
+    logging.info(f"Model:\n{scorer.model}")
+
+    # 3. Read n-best lists and score all the hypotheses at once
+    nbest = read_nbest(nbest_dir)
+    hyps = [hyp for key in nbest for hyp in nbest[key]]
+    token_ids = [scorer.converter.tokens2ids(hyp["token"].split()) for hyp in hyps]
+    start_time = time.perf_counter()
+    lm_scores = scorer.score(token_ids)
+    elapsed = time.perf_counter() - start_time
+    ntokens = sum(len(ids) + 1 for ids in token_ids)
+    logging.info(
+        f"Scored {len(hyps)} hypotheses ({ntokens} tokens) in {elapsed:.2f}s: "
+        f"{ntokens / max(elapsed, 1e-10):.1f} tokens/sec"
+    )
+    logging.info(f"PPL={np.exp(-lm_scores.sum() / max(ntokens, 1))}")
+
+    # 4. Write the n-best lists sorted by the interpolated scores
+    with DatadirWriter(output_dir) as writer:
+        offset = 0
+        for key, key_hyps in nbest.items():
+            results = []
+            for hyp in key_hyps:
+                length = len(token_ids[offset]) + 1
+                lm_score = float(lm_scores[offset])
+                asr_score = _parse_score(hyp["score"])
+                score = asr_score + lm_weight * lm_score + penalty * length
+                results.append((score, asr_score, lm_score, hyp))
+                offset += 1
+            results.sort(key=lambda x: -x[0])
+
+            for n, (score, asr_score, lm_score, hyp) in enumerate(results, 1):
+                # Create a directory: outdir/{n}best_recog
+                ibest_writer = writer[f"{n}best_recog"]
+
+                # Write the result to each file
+                for name, value in hyp.items():
+                    if name not in ("score", "asr_score", "lm_score"):
+                        ibest_writer[name][key] = value
+                ibest_writer["score"][key] = str(score)
+                ibest_writer["asr_score"][key] = str(asr_score)
+                ibest_writer["lm_score"][key] = str(lm_score)
+
+
+def get_parser():
+    parser = config_argparse.ArgumentParser(
+        description="Rescore N-best lists by LM",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+
+    # Note(kamo): Use '_' instead of '-' as separator.
+    # '-' is confusing if written in yaml.
+    parser.add_argument(
+        "--log_level",
+        type=lambda x: x.upper(),
+        default="INFO",
+        choices=("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"),
+        help="The verbose level of logging",
+    )
+
+    parser.add_argument("--output_dir", type=str, required=True)
+    parser.add_argument(
+        "--ngpu",
+        type=int,
+        default=0,
+        help="The number of gpus. 0 indicates CPU mode",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--dtype",
+        default="float32",
+        choices=["float16", "float32", "float64"],
+        help="Data type",
+    )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=1,
+        help="The number of threads forwarding the mini-batches",
+    )
+    parser.add_argument(
+        "--batch_bins",
+        type=int,
+        default=10000,
+        help="The maximum number of tokens in a mini-batch including padding",
+    )
+
+    group = parser.add_argument_group("Input data related")
+    group.add_argument(
+        "--nbest_dir",
+        type=str,
+        required=True,
+        help="The output directory of asr_inference.py having *best_recog/token "
+        "and *best_recog/score",
+    )
+
+    group = parser.add_argument_group("The model configuration related")
+    group.add_argument("--train_config", type=str)
+    group.add_argument("--model_file", type=str)
+
+    group = parser.add_argument_group("Rescoring related")
+    group.add_argument(
+        "--lm_weight",
+        type=float,
+        default=1.0,
+        help="The weight of the LM score added to the score of the N-best lists",
+    )
+    group.add_argument(
+        "--penalty",
+        type=float,
+        default=0.0,
+        help="Insertion penalty for each token including <eos>",
+    )
+
+    return parser
+
+
+def main(cmd=None):
+    print(get_commandline_args(), file=sys.stderr)
+    parser = get_parser()
+    args = parser.parse_args(cmd)
+    kwargs = vars(args)
+    kwargs.pop("config", None)
+    rescore(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+from pathlib import Path
+import sys
+
+from espnet.utils.cli_utils import get_commandline_args
+from espnet2.fileio.packed_archive import PackedArchiveWriter
+from espnet2.train.dataset import DATA_TYPES
+from espnet2.train.dataset import ESPnetDataset
+
+
+def pack_feats(
+    input_scp: str,
+    input_type: str,
+    output_dir: str,
+    name: str,
+    float_dtype: str,
+    log_level: str,
+):
+    """Convert the features of any data type into a packed feature archive.
+
+    Writes "<output_dir>/<name>.pack" and "<output_dir>/<name>.scp",
+    and the scp file can be used with the "packed" data type.
+
+    """
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s (%(module)s:%(lineno)d) %(levelname)s: %(message)s",
+    )
+    dataset = ESPnetDataset([(input_scp, "feats", input_type)], float_dtype=float_dtype)
+    output_dir = Path(output_dir)
+    with PackedArchiveWriter(
+        output_dir / f"{name}.pack", output_dir / f"{name}.scp"
+    ) as writer:
+        for i, key in enumerate(dataset.loader_dict["feats"], 1):
+            _, data = dataset[key]
+            writer[key] = data["feats"]
+            if i % 1000 == 0:
+                logging.info(f"Processed {i} utterances")
+        logging.info(f"Wrote {len(writer.data)} arrays: {writer.datafile}")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Convert features into a packed feature archive",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--log_level",
+        type=lambda x: x.upper(),
+        default="INFO",
+        choices=("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"),
+        help="The verbose level of logging",
+    )
+
+    parser.add_argument("--input_scp", required=True, help="Input scp file")
+    parser.add_argument(
+        "--input_type",
+        default="kaldi_ark",
+        choices=list(DATA_TYPES),
+        help="Data type of the input scp file",
+    )
+    parser.add_argument("--output_dir", required=True, help="Output directory")
+    parser.add_argument(
+        "--name", default="feats", help="Output name of the archive and the scp"
+    )
+    parser.add_argument(
+        "--float_dtype",
+        default="float32",
+        choices=["float16", "float32", "float64"],
+        help="Data type of floating point features",
+    )
+    return parser
+
+
+def main(cmd=None):
+    print(get_commandline_args(), file=sys.stderr)
+    parser = get_parser()
+    args = parser.parse_args(cmd)
+    kwargs = vars(args)
+    pack_feats(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
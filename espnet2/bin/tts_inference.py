@@ -3,6 +3,7 @@
 """Script to run the inference of text-to-speeech model."""
 
 import argparse
+import itertools
 import logging
 import shutil
 import sys
@@ -12,6 +13,8 @@ from distutils.version import LooseVersion
 from pathlib import Path
 from typing import Any
 from typing import Dict
+from typing import Iterator
+from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -23,6 +26,7 @@ import torch
 
 from typeguard import check_argument_types
 
+from espnet.nets.pytorch_backend.nets_utils import pad_list
 from espnet.utils.cli_utils import get_commandline_args
 from espnet2.fileio.npy_scp import NpyScpWriter
 from espnet2.gan_tts.vits import VITS
@@ -34,6 +38,10 @@ from espnet2.tts.fastspeech2 import FastSpeech2
 from espnet2.tts.tacotron2 import Tacotron2
 from espnet2.tts.transformer import Transformer
 from espnet2.tts.utils import DurationCalculator
+from espnet2.tts.utils.batching import bucket_by_length
+from espnet2.tts.utils.batching import concat_vocode
+from espnet2.tts.utils.streaming import estimate_vocoder_geometry
+from espnet2.tts.utils.streaming import overlapped_chunks
 from espnet2.utils import config_argparse
 from espnet2.utils.types import str2bool
 from espnet2.utils.types import str2triple_str
@@ -115,6 +123,9 @@ class Text2Speech:
         self.seed = seed
         self.always_fix_seed = always_fix_seed
         self.vocoder = None
+        # The upsampling factor and the receptive field of the vocoder
+        # for stream() and batch()
+        self.vocoder_geometry = None
         self.prefer_normalized_feats = prefer_normalized_feats
         if self.tts.require_vocoder:
             vocoder = TTSTask.build_vocoder_from_file(
@@ -167,6 +178,246 @@ class Text2Speech:
         """Run text-to-speech."""
         assert check_argument_types()
 
+        batch, cfg = self._prepare_inputs(
+            text,
+            speech=speech,
+            durations=durations,
+            spembs=spembs,
+            sids=sids,
+            lids=lids,
+            decode_conf=decode_conf,
+        )
+
+        # inference
+        if self.always_fix_seed:
+            set_all_random_seed(self.seed)
+        output_dict = self.model.inference(**batch, **cfg)
+
+        # calculate additional metrics
+        if output_dict.get("att_w") is not None:
+            duration, focus_rate = self.duration_calculator(output_dict["att_w"])
+            output_dict.update(duration=duration, focus_rate=focus_rate)
+
+        # apply vocoder (mel-to-wav)
+        if self.vocoder is not None:
+            if (
+                self.prefer_normalized_feats
+                or output_dict.get("feat_gen_denorm") is None
+            ):
+                input_feat = output_dict["feat_gen"]
+            else:
+                input_feat = output_dict["feat_gen_denorm"]
+            wav = self.vocoder(input_feat)
+            output_dict.update(wav=wav)
+
+        return output_dict
+
+    @torch.no_grad()
+    def stream(
+        self,
+        text: Union[str, torch.Tensor, np.ndarray],
+        speech: Union[torch.Tensor, np.ndarray] = None,
+        spembs: Union[torch.Tensor, np.ndarray] = None,
+        sids: Union[torch.Tensor, np.ndarray] = None,
+        lids: Union[torch.Tensor, np.ndarray] = None,
+        decode_conf: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 32,
+        vocoder_context: Optional[int] = None,
+    ) -> Iterator[torch.Tensor]:
+        """Run text-to-speech and yield the waveform chunk by chunk.
+
+        The features are generated chunk by chunk, e.g. during the decoding of
+        the autoregressive models, and each chunk is vocoded with the overlapping
+        frames of the receptive field of the vocoder, so the first chunk is
+        available before the whole utterance is synthesized.
+        The receptive field is estimated at the first call if not given.
+
+        Examples:
+            >>> for wav in text2speech.stream("Hello, World"):
+            ...     play(wav)
+
+        Args:
+            chunk_size: The number of the frames of a chunk.
+            vocoder_context: The number of the overlapping frames on each side
+                of a chunk for the vocoder.
+
+        Returns:
+            Iterator[Tensor]: Chunks of the waveform (T_chunk_wav,).
+
+        """
+        assert check_argument_types()
+        if self.vocoder is None or not hasattr(self.model, "inference_stream"):
+            # e.g. text-to-wav models
+            output_dict = self(
+                text,
+                speech=speech,
+                spembs=spembs,
+                sids=sids,
+                lids=lids,
+                decode_conf=decode_conf,
+            )
+            if output_dict.get("wav") is None:
+                raise RuntimeError("Vocoder is not available")
+            yield output_dict["wav"]
+            return
+
+        batch, cfg = self._prepare_inputs(
+            text,
+            speech=speech,
+            spembs=spembs,
+            sids=sids,
+            lids=lids,
+            decode_conf=decode_conf,
+        )
+        if self.always_fix_seed:
+            set_all_random_seed(self.seed)
+        feats = (
+            chunk_dict["feat_gen"]
+            if self.prefer_normalized_feats or chunk_dict.get("feat_gen_denorm") is None
+            else chunk_dict["feat_gen_denorm"]
+            for chunk_dict in self.model.inference_stream(
+                **batch, chunk_size=chunk_size, **cfg
+            )
+        )
+        first_feat = next(feats)
+        upsample, context = self._get_vocoder_geometry(first_feat)
+        if vocoder_context is not None:
+            context = vocoder_context
+
+        yield from overlapped_chunks(
+            self.vocoder,
+            itertools.chain([first_feat], feats),
+            context,
+            chunk_size,
+            upsample,
+        )
+
+    @torch.no_grad()
+    def batch(
+        self,
+        text: Sequence[Union[str, torch.Tensor, np.ndarray]],
+        spembs: Optional[Sequence[Union[torch.Tensor, np.ndarray]]] = None,
+        sids: Optional[Sequence[Union[torch.Tensor, np.ndarray]]] = None,
+        lids: Optional[Sequence[Union[torch.Tensor, np.ndarray]]] = None,
+        decode_conf: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, torch.Tensor]]:
+        """Run text-to-speech for multiple texts in a batch.
+
+        The texts are padded and synthesized in a single forward pass
+        if the model supports batch inference, e.g. FastSpeech2 and VITS.
+        Otherwise, they are synthesized one by one.
+        The features are vocoded at once by concatenating them
+        with the gaps of the receptive field of the vocoder.
+
+        Examples:
+            >>> outputs = text2speech.batch(["Hello", "Hello, World"])
+            >>> wavs = [output["wav"] for output in outputs]
+
+        Returns:
+            List[Dict[str, Tensor]]: Output dicts of the texts as __call__.
+
+        """
+        assert check_argument_types()
+        if len(text) == 0:
+            return []
+        args = [
+            dict(
+                spembs=None if spembs is None else spembs[i],
+                sids=None if sids is None else sids[i],
+                lids=None if lids is None else lids[i],
+            )
+            for i in range(len(text))
+        ]
+        if self.use_speech or not hasattr(self.tts, "batch_inference"):
+            # e.g. autoregressive models
+            return [
+                self(t, decode_conf=decode_conf, **kwargs)
+                for t, kwargs in zip(text, args)
+            ]
+
+        inputs = [
+            self._prepare_inputs(t, decode_conf=decode_conf, **kwargs)
+            for t, kwargs in zip(text, args)
+        ]
+        cfg = inputs[0][1]
+        batch = dict(
+            text=pad_list([x["text"] for x, _ in inputs], 0),
+            text_lengths=torch.tensor(
+                [len(x["text"]) for x, _ in inputs], device=self.device
+            ),
+        )
+        for key in ("spembs", "sids", "lids"):
+            if key in inputs[0][0]:
+                batch[key] = torch.stack([x[key] for x, _ in inputs])
+
+        # inference
+        if self.always_fix_seed:
+            set_all_random_seed(self.seed)
+        batch_output_dict = self.model.batch_inference(**batch, **cfg)
+
+        # split into the outputs of the texts
+        output_dicts = [{} for _ in text]
+        for key, value in batch_output_dict.items():
+            if key.endswith("_lengths"):
+                continue
+            lengths = batch_output_dict.get(f"{key}_lengths")
+            for i, output_dict in enumerate(output_dicts):
+                if lengths is None:
+                    output_dict[key] = value[i]
+                elif lengths.dim() == 1:
+                    output_dict[key] = value[i, : lengths[i]]
+                else:
+                    output_dict[key] = value[i][
+                        tuple(slice(0, length) for length in lengths[i])
+                    ]
+
+        # calculate additional metrics
+        for output_dict in output_dicts:
+            if output_dict.get("att_w") is not None:
+                duration, focus_rate = self.duration_calculator(output_dict["att_w"])
+                output_dict.update(duration=duration, focus_rate=focus_rate)
+
+        # apply vocoder (mel-to-wav)
+        if self.vocoder is not None:
+            if (
+                self.prefer_normalized_feats
+                or output_dicts[0].get("feat_gen_denorm") is None
+            ):
+                input_feats = [d["feat_gen"] for d in output_dicts]
+            else:
+                input_feats = [d["feat_gen_denorm"] for d in output_dicts]
+            upsample, context = self._get_vocoder_geometry(input_feats[0])
+            wavs = concat_vocode(self.vocoder, input_feats, context, upsample)
+            for output_dict, wav in zip(output_dicts, wavs):
+                output_dict.update(wav=wav)
+
+        return output_dicts
+
+    def _get_vocoder_geometry(self, feat: torch.Tensor) -> Tuple[int, int]:
+        """Return the upsampling factor and the receptive field of the vocoder."""
+        if self.vocoder_geometry is None:
+            self.vocoder_geometry = estimate_vocoder_geometry(
+                self.vocoder,
+                feat.size(-1),
+                device=feat.device,
+                dtype=feat.dtype,
+            )
+            logging.info(
+                "Upsampling factor and receptive field of the vocoder: "
+                f"{self.vocoder_geometry}"
+            )
+        return self.vocoder_geometry
+
+    def _prepare_inputs(
+        self,
+        text: Union[str, torch.Tensor, np.ndarray],
+        speech: Union[torch.Tensor, np.ndarray] = None,
+        durations: Union[torch.Tensor, np.ndarray] = None,
+        spembs: Union[torch.Tensor, np.ndarray] = None,
+        sids: Union[torch.Tensor, np.ndarray] = None,
+        lids: Union[torch.Tensor, np.ndarray] = None,
+        decode_conf: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Dict[str, torch.Tensor], Dict[str, Any]]:
         # check inputs
         if self.use_speech and speech is None:
             raise RuntimeError("Missing required argument: 'speech'")
@@ -199,29 +450,7 @@ class Text2Speech:
             cfg = self.decode_conf.copy()
             cfg.update(decode_conf)
 
-        # inference
-        if self.always_fix_seed:
-            set_all_random_seed(self.seed)
-        output_dict = self.model.inference(**batch, **cfg)
-
-        # calculate additional metrics
-        if output_dict.get("att_w") is not None:
-            duration, focus_rate = self.duration_calculator(output_dict["att_w"])
-            output_dict.update(duration=duration, focus_rate=focus_rate)
-
-        # apply vocoder (mel-to-wav)
-        if self.vocoder is not None:
-            if (
-                self.prefer_normalized_feats
-                or output_dict.get("feat_gen_denorm") is None
-            ):
-                input_feat = output_dict["feat_gen"]
-            else:
-                input_feat = output_dict["feat_gen_denorm"]
-            wav = self.vocoder(input_feat)
-            output_dict.update(wav=wav)
-
-        return output_dict
+        return batch, cfg
 
     @property
     def fs(self) -> Optional[int]:
@@ -343,11 +572,12 @@ def inference(
     vocoder_config: Optional[str],
     vocoder_file: Optional[str],
     vocoder_tag: Optional[str],
+    streaming: bool = False,
+    streaming_chunk_size: int = 32,
+    bucket_window_size: int = 32,
 ):
     """Run text-to-speech inference."""
     assert check_argument_types()
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
     logging.basicConfig(
@@ -398,7 +628,7 @@ def inference(
     loader = TTSTask.build_streaming_iterator(
         data_path_and_name_and_type,
         dtype=dtype,
-        batch_size=batch_size,
+        batch_size=1,
         key_file=key_file,
         num_workers=num_workers,
         preprocess_fn=TTSTask.build_preprocess_fn(text2speech.train_args, False),
@@ -407,6 +637,12 @@ def inference(
         inference=True,
     )
 
+    if streaming:
+        _streaming_inference(
+            text2speech, loader, Path(output_dir), streaming_chunk_size
+        )
+        return
+
     # 6. Start for-loop
     output_dir = Path(output_dir)
     (output_dir / "norm").mkdir(parents=True, exist_ok=True)
@@ -437,27 +673,16 @@ def inference(
     ) as duration_writer, open(
         output_dir / "focus_rates/focus_rates", "w"
     ) as focus_rate_writer:
-        for idx, (keys, batch) in enumerate(loader, 1):
-            assert isinstance(batch, dict), type(batch)
-            assert all(isinstance(s, str) for s in keys), keys
-            _bs = len(next(iter(batch.values())))
-            assert _bs == 1, _bs
-
-            # Change to single sequence and remove *_length
-            # because inference() requires 1-seq, not mini-batch.
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
-
-            start_time = time.perf_counter()
-            output_dict = text2speech(**batch)
-
-            key = keys[0]
+        for key, batch, output_dict, elapsed in _synthesize(
+            text2speech, loader, batch_size, bucket_window_size
+        ):
             insize = next(iter(batch.values())).size(0) + 1
             if output_dict.get("feat_gen") is not None:
                 # standard text2mel model case
                 feat_gen = output_dict["feat_gen"]
                 logging.info(
                     "inference speed = {:.1f} frames / sec.".format(
-                        int(feat_gen.size(0)) / (time.perf_counter() - start_time)
+                        int(feat_gen.size(0)) / elapsed
                     )
                 )
                 logging.info(f"{key} (size:{insize}->{feat_gen.size(0)})")
@@ -475,7 +700,7 @@ def inference(
                 wav = output_dict["wav"]
                 logging.info(
                     "inference speed = {:.1f} points / sec.".format(
-                        int(wav.size(0)) / (time.perf_counter() - start_time)
+                        int(wav.size(0)) / elapsed
                     )
                 )
                 logging.info(f"{key} (size:{insize}->{wav.size(0)})")
@@ -568,6 +793,141 @@ def inference(
         shutil.rmtree(output_dir / "wav")
 
 
+def _synthesize(
+    text2speech: Text2Speech,
+    loader,
+    batch_size: int,
+    bucket_window_size: int,
+) -> Iterator[Tuple[str, Dict[str, torch.Tensor], Dict[str, Any], float]]:
+    """Synthesize the utterances and yield the keys, inputs, outputs and times.
+
+    If batch_size > 1, the utterances in a window of "bucket_window_size"
+    batches are sorted by the text lengths and synthesized in batches,
+    and the outputs are yielded in the original order.
+    The elapsed time of a batch is divided equally among the utterances.
+
+    """
+
+    def _items():
+        for keys, batch in loader:
+            assert isinstance(batch, dict), type(batch)
+            assert all(isinstance(s, str) for s in keys), keys
+            _bs = len(next(iter(batch.values())))
+            assert _bs == 1, _bs
+
+            # Change to single sequence and remove *_length
+            # because inference() requires 1-seq, not mini-batch.
+            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
+            yield keys[0], batch
+
+    items = _items()
+    if batch_size > 1 and text2speech.use_speech:
+        logging.warning(
+            "Batch synthesis doesn't support teacher forcing and GST. "
+            "The utterances are synthesized one by one."
+        )
+        batch_size = 1
+    if batch_size == 1:
+        for key, batch in items:
+            start_time = time.perf_counter()
+            output_dict = text2speech(**batch)
+            yield key, batch, output_dict, time.perf_counter() - start_time
+        return
+
+    while True:
+        window = list(itertools.islice(items, batch_size * bucket_window_size))
+        if len(window) == 0:
+            break
+        outputs = [None] * len(window)
+        lengths = [len(batch["text"]) for _, batch in window]
+        for indices in bucket_by_length(lengths, batch_size):
+            batches = [window[i][1] for i in indices]
+            start_time = time.perf_counter()
+            output_dicts = text2speech.batch(
+                [batch["text"] for batch in batches],
+                **{
+                    name: [batch[name] for batch in batches]
+                    for name in ("spembs", "sids", "lids")
+                    if name in batches[0]
+                },
+            )
+            elapsed = (time.perf_counter() - start_time) / len(indices)
+            for i, output_dict in zip(indices, output_dicts):
+                outputs[i] = (window[i][0], window[i][1], output_dict, elapsed)
+        yield from outputs
+
+
+def _streaming_inference(
+    text2speech: Text2Speech,
+    loader,
+    output_dir: Path,
+    chunk_size: int,
+):
+    """Synthesize the waveforms by Text2Speech.stream() and measure the latency."""
+    (output_dir / "wav").mkdir(parents=True, exist_ok=True)
+    (output_dir / "latency").mkdir(parents=True, exist_ok=True)
+    if (
+        text2speech.vocoder is not None
+        and text2speech.vocoder_geometry is None
+        and hasattr(text2speech.tts, "odim")
+    ):
+        # Exclude the estimation from the latency of the first utterance
+        text2speech.vocoder_geometry = estimate_vocoder_geometry(
+            text2speech.vocoder,
+            text2speech.tts.odim,
+            device=text2speech.device,
+            dtype=getattr(torch, text2speech.dtype),
+        )
+    first_chunk_times = []
+    total_time = 0.0
+    total_duration = 0.0
+    with open(output_dir / "latency/latency", "w") as latency_writer:
+        for keys, batch in loader:
+            _bs = len(next(iter(batch.values())))
+            assert _bs == 1, _bs
+            batch = {
+                k: v[0]
+                for k, v in batch.items()
+                if not k.endswith("_lengths") and k != "durations"
+            }
+            key = keys[0]
+
+            start_time = time.perf_counter()
+            wavs = []
+            for wav in text2speech.stream(**batch, chunk_size=chunk_size):
+                if len(wavs) == 0:
+                    first_chunk_time = time.perf_counter() - start_time
+                wavs.append(wav)
+            elapsed = time.perf_counter() - start_time
+            wav = torch.cat(wavs)
+            duration = wav.size(0) / text2speech.fs
+
+            first_chunk_times.append(first_chunk_time)
+            total_time += elapsed
+            total_duration += duration
+            logging.info(
+                f"{key}: time to first chunk = {first_chunk_time:.3f} sec, "
+                f"RTF = {elapsed / duration:.3f}, #chunks = {len(wavs)}"
+            )
+            latency_writer.write(
+                f"{key} {first_chunk_time:.5f} {elapsed / duration:.5f}\n"
+            )
+            sf.write(
+                f"{output_dir}/wav/{key}.wav",
+                wav.cpu().numpy(),
+                text2speech.fs,
+                "PCM_16",
+            )
+
+    if len(first_chunk_times) > 0:
+        logging.info(
+            "Average time to first chunk = "
+            f"{np.mean(first_chunk_times):.3f} sec, "
+            f"90th percentile = {np.percentile(first_chunk_times, 90):.3f} sec, "
+            f"RTF = {total_time / total_duration:.3f}"
+        )
+
+
 def get_parser():
     """Get argument parser."""
     parser = config_argparse.ArgumentParser(
@@ -619,7 +979,16 @@ def get_parser():
         "--batch_size",
         type=int,
         default=1,
-        help="The batch size for inference",
+        help="The batch size for inference. If > 1, the texts are synthesized "
+        "in padded batches for the models supporting batch inference, "
+        "e.g. FastSpeech2 and VITS",
+    )
+    parser.add_argument(
+        "--bucket_window_size",
+        type=int,
+        default=32,
+        help="The number of the batches in a window, where the texts are sorted "
+        "by the lengths to make the batches of similar lengths",
     )
 
     group = parser.add_argument_group("Input data related")
@@ -725,6 +1094,21 @@ def get_parser():
         help="Whether to always fix seed",
     )
 
+    group = parser.add_argument_group("Streaming related")
+    group.add_argument(
+        "--streaming",
+        type=str2bool,
+        default=False,
+        help="Synthesize the waveform chunk by chunk, and report the time to "
+        "the first chunk and the real-time factor. Only the waveforms are written",
+    )
+    group.add_argument(
+        "--streaming_chunk_size",
+        type=int,
+        default=32,
+        help="The number of the frames of a chunk in streaming synthesis",
+    )
+
     group = parser.add_argument_group("Vocoder related")
     group.add_argument(
         "--vocoder_config",
@@ -3,7 +3,6 @@
 
 from contextlib import contextmanager
 from distutils.version import LooseVersion
-from itertools import permutations
 from typing import Dict
 from typing import Optional
 from typing import Tuple
@@ -18,6 +17,7 @@ from espnet2.asr.frontend.abs_frontend import AbsFrontend
 from espnet2.asr.specaug.abs_specaug import AbsSpecAug
 from espnet2.diar.attractor.abs_attractor import AbsAttractor
 from espnet2.diar.decoder.abs_decoder import AbsDecoder
+from espnet2.enh.loss.wrappers.pit_solver import solve_permutation
 from espnet2.layers.abs_normalize import AbsNormalize
 from espnet2.torch_utils.device_funcs import force_gatherable
 from espnet2.train.abs_espnet_model import AbsESPnetModel
@@ -51,6 +51,7 @@ class ESPnetDiarizationModel(AbsESPnetModel):
         decoder: AbsDecoder,
         attractor: Optional[AbsAttractor],
         attractor_weight: float = 1.0,
+        perm_search: str = "exhaustive",
     ):
         assert check_argument_types()
 
@@ -62,6 +63,7 @@ class ESPnetDiarizationModel(AbsESPnetModel):
         self.specaug = specaug
         self.label_aggregator = label_aggregator
         self.attractor_weight = attractor_weight
+        self.perm_search = perm_search
         self.attractor = attractor
         self.decoder = decoder
 
@@ -137,11 +139,9 @@ class ESPnetDiarizationModel(AbsESPnetModel):
 
         if self.attractor is None:
             loss_pit, loss_att = None, None
-            loss, perm_idx, perm_list, label_perm = self.pit_loss(
-                pred, spk_labels, encoder_out_lens
-            )
+            loss, perm, label_perm = self.pit_loss(pred, spk_labels, encoder_out_lens)
         else:
-            loss_pit, perm_idx, perm_list, label_perm = self.pit_loss(
+            loss_pit, perm, label_perm = self.pit_loss(
                 pred, spk_labels, encoder_out_lens
             )
             loss_att = self.attractor_loss(att_prob, spk_labels)
@@ -261,33 +261,26 @@ class ESPnetDiarizationModel(AbsESPnetModel):
             feats, feats_lengths = speech, speech_lengths
         return feats, feats_lengths
 
-    def pit_loss_single_permute(self, pred, label, length):
-        bce_loss = torch.nn.BCEWithLogitsLoss(reduction="none")
-        mask = self.create_length_mask(length, label.size(1), label.size(2))
-        loss = bce_loss(pred, label)
-        loss = loss * mask
-        loss = torch.sum(torch.mean(loss, dim=2), dim=1)
-        loss = torch.unsqueeze(loss, dim=1)
-        return loss
-
     def pit_loss(self, pred, label, lengths):
         # Note (jiatong): Credit to https://github.com/hitachi-speech/EEND
+        # The loss is separable over the pairs of the output and the speaker,
+        # so the best permutation is found from the pairwise losses
         num_output = label.size(2)
-        permute_list = [np.array(p) for p in permutations(range(num_output))]
-        loss_list = []
-        for p in permute_list:
-            label_perm = label[:, :, p]
-            loss_perm = self.pit_loss_single_permute(pred, label_perm, lengths)
-            loss_list.append(loss_perm)
-        loss = torch.cat(loss_list, dim=1)
-        min_loss, min_idx = torch.min(loss, dim=1)
+        bce_loss = torch.nn.BCEWithLogitsLoss(reduction="none")
+        mask = self.create_length_mask(lengths, label.size(1), 1).unsqueeze(3)
+        # (Batch, Length, num_output, num_output)
+        loss = bce_loss(
+            pred.unsqueeze(3).expand(-1, -1, -1, num_output),
+            label.unsqueeze(2).expand(-1, -1, num_output, -1),
+        )
+        pairwise_loss = torch.sum(loss * mask, dim=1) / num_output
+        min_loss, perm = solve_permutation(pairwise_loss, self.perm_search)
         loss = torch.sum(min_loss) / torch.sum(lengths.float())
-        batch_size = len(min_idx)
-        label_list = []
-        for i in range(batch_size):
-            label_list.append(label[i, :, permute_list[min_idx[i]]].data.cpu().numpy())
-        label_permute = torch.from_numpy(np.array(label_list)).float()
-        return loss, min_idx, permute_list, label_permute
+        # (Batch, Length, num_output)
+        label_permute = label.gather(
+            2, perm.unsqueeze(1).expand(-1, label.size(1), -1)
+        ).float()
+        return loss, perm, label_permute
 
     def create_length_mask(self, length, max_len, num_output):
         batch_size = len(length)
@@ -11,6 +11,7 @@ class MultiLayerPITSolver(AbsLossWrapper):
         criterion: AbsEnhLoss,
         weight=1.0,
         independent_perm=True,
+        perm_search="exhaustive",
     ):
         """Multi-Layer Permutation Invariant Training Solver.
 
@@ -27,12 +28,13 @@ class MultiLayerPITSolver(AbsLossWrapper):
                 inherited.
                 Note: You should be careful about the ordering of loss
                 wrappers defined in the yaml config, if this argument is False.
+            perm_search (str): "exhaustive" or "hungarian". See PITSolver.
         """
         super().__init__()
         self.criterion = criterion
         self.weight = weight
         self.independent_perm = independent_perm
-        self.solver = PITSolver(criterion, weight, independent_perm)
+        self.solver = PITSolver(criterion, weight, independent_perm, perm_search)
 
     def forward(self, ref, infs, others={}):
         """Permutation invariant training solver.
@@ -1,14 +1,69 @@
 from collections import defaultdict
 from itertools import permutations
+from typing import Tuple
 
+import numpy as np
+from scipy.optimize import linear_sum_assignment
 import torch
 
 from espnet2.enh.loss.criterions.abs_loss import AbsEnhLoss
 from espnet2.enh.loss.wrappers.abs_wrapper import AbsLossWrapper
 
 
+def solve_permutation(
+    pairwise_losses: torch.Tensor, perm_search: str = "exhaustive"
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Find the permutations minimizing the sum of the pairwise losses.
+
+    Args:
+        pairwise_losses (torch.Tensor): (batch, n_spk, n_spk)
+            pairwise_losses[b, s, t] is the loss between the s-th reference
+            and the t-th inference
+        perm_search (str): "exhaustive" or "hungarian"
+            "exhaustive" evaluates all the n_spk! permutations, and
+            "hungarian" solves the assignment problem in O(n_spk^3)
+            by the Hungarian algorithm. Both give the minimum sum,
+            but they may give different permutations if there are ties.
+
+    Returns:
+        loss (torch.Tensor): (batch,) the sum of the losses with the best permutation
+        perm (torch.Tensor): (batch, n_spk) the best permutation,
+            where the s-th reference is assigned to the perm[b, s]-th inference
+    """
+    batch, num_spk, _ = pairwise_losses.shape
+    device = pairwise_losses.device
+    if perm_search == "exhaustive":
+        all_permutations = torch.tensor(
+            list(permutations(range(num_spk))), device=device, dtype=torch.long
+        )
+        # (batch, n_spk!)
+        losses = sum(
+            pairwise_losses[:, s, all_permutations[:, s]] for s in range(num_spk)
+        )
+        loss, perm_ = torch.min(losses, dim=1)
+        perm = torch.index_select(all_permutations, 0, perm_)
+    elif perm_search == "hungarian":
+        cost = pairwise_losses.detach().cpu().double().numpy()
+        perm = torch.from_numpy(
+            np.stack([linear_sum_assignment(c)[1] for c in cost])
+        ).to(device=device, dtype=torch.long)
+        loss = sum(
+            pairwise_losses[:, s].gather(1, perm[:, s : s + 1]).squeeze(1)
+            for s in range(num_spk)
+        )
+    else:
+        raise ValueError(f"Unsupported perm_search: {perm_search}")
+    return loss, perm
+
+
 class PITSolver(AbsLossWrapper):
-    def __init__(self, criterion: AbsEnhLoss, weight=1.0, independent_perm=True):
+    def __init__(
+        self,
+        criterion: AbsEnhLoss,
+        weight=1.0,
+        independent_perm=True,
+        perm_search="exhaustive",
+    ):
         """Permutation Invariant Training Solver.
 
         Args:
@@ -21,11 +76,17 @@ class PITSolver(AbsLossWrapper):
                 inherited.
                 NOTE (wangyou): You should be careful about the ordering of loss
                     wrappers defined in the yaml config, if this argument is False.
+            perm_search (str): How to find the best permutation from the
+                n_spk x n_spk pairwise losses, "exhaustive" or "hungarian".
+                "hungarian" is recommended for many speakers.
         """
         super().__init__()
+        if perm_search not in ("exhaustive", "hungarian"):
+            raise ValueError(f"Unsupported perm_search: {perm_search}")
         self.criterion = criterion
         self.weight = weight
         self.independent_perm = independent_perm
+        self.perm_search = perm_search
 
     def forward(self, ref, inf, others={}):
         """PITSolver forward.
@@ -52,37 +113,32 @@ class PITSolver(AbsLossWrapper):
                 stats[k].append(v)
             return ret
 
-        def pair_loss(permutation):
-            return sum(
-                [
-                    pre_hook(self.criterion, ref[s], inf[t])
-                    for s, t in enumerate(permutation)
-                ]
-            ) / len(permutation)
-
         if self.independent_perm or perm is None:
             # computate permuatation independently
-            device = ref[0].device
-            all_permutations = list(permutations(range(num_spk)))
-            losses = torch.stack([pair_loss(p) for p in all_permutations], dim=1)
-            loss, perm_ = torch.min(losses, dim=1)
-            perm = torch.index_select(
-                torch.tensor(all_permutations, device=device, dtype=torch.long),
-                0,
-                perm_,
+            # The PIT loss is the mean of the losses of the assigned pairs,
+            # so the criterion is computed only for the n_spk x n_spk pairs
+            pair_stats = defaultdict(lambda: [[] for _ in range(num_spk)])
+            pairwise_losses = []
+            for s in range(num_spk):
+                for t in range(num_spk):
+                    pairwise_losses.append(self.criterion(ref[s], inf[t]))
+                    for k, v in getattr(self.criterion, "stats", {}).items():
+                        pair_stats[k][s].append(v)
+            # (B, num_spk, num_spk)
+            pairwise_losses = torch.stack(pairwise_losses, dim=1).view(
+                -1, num_spk, num_spk
             )
-            # remove stats from unused permutations
-            for k, v in stats.items():
-                # (B, len(all_permutations), ...)
-                new_v = torch.stack(v, dim=1)
-                if new_v.dim() > 2:
-                    shapes = [1 for _ in range(new_v.dim() - 2)]
-                    perm0 = perm_.view(perm_.shape[0], 1, *shapes).expand(
-                        -1, -1, *new_v.shape[2:]
-                    )
-                else:
-                    perm0 = perm_.unsqueeze(1)
-                stats[k] = new_v.gather(1, perm0.to(device=new_v.device)).unbind(1)
+            loss, perm = solve_permutation(pairwise_losses, self.perm_search)
+            loss = loss / num_spk
+            # remove stats from unused pairs
+            for k, v in pair_stats.items():
+                for s in range(num_spk):
+                    # (B, num_spk, ...)
+                    new_v = torch.stack(v[s], dim=1)
+                    perm0 = perm[:, s].to(device=new_v.device)
+                    perm0 = perm0.view(-1, 1, *[1 for _ in range(new_v.dim() - 2)])
+                    perm0 = perm0.expand(-1, -1, *new_v.shape[2:])
+                    stats[k].append(new_v.gather(1, perm0).squeeze(1))
         else:
             loss = torch.tensor(
                 [
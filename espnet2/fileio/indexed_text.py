@@ -0,0 +1,483 @@
+"""Memory-mapped on-disk indices of 2-column text files.
+
+``read_2column_text`` and ``load_num_sequence_text`` build a dict of python
+strings for every line, which is slow and takes a lot of memory
+for a corpus of millions of utterances, and the dict is built
+by every DDP rank and every DataLoader worker.
+
+The readers in this module build an index file next to the text file once,
+and the index is reused by the following runs as long as the text file
+is not modified. The index file holds the sorted keys and the byte offsets
+of the values, and it is memory-mapped, so the pages are shared
+by all the processes on a node via the page cache.
+
+Index file format:
+    MAGIC
+    Length of the header (8 bytes, little endian)
+    Header (json): The size and mtime of the text file,
+        and the dtype, shape and offset of each array
+    Arrays aligned to 64 bytes:
+        keys: The sorted keys (n,)
+        offsets: The byte offsets of the values in the sorted order (n,)
+        lengths: The byte lengths of the values in the sorted order (n,)
+        line_order: The sorted indices of the keys in the file order (n,)
+        numbers: The numbers of the values in the sorted order padded by 0
+            (n, max_width) only for the number sequence index
+        widths: The number of numbers of the values in the sorted order (n,)
+            only for the number sequence index
+
+"""
+import collections.abc
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import kaldiio
+import numpy as np
+from typeguard import check_argument_types
+
+from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.utils.feats_stager import flock
+
+MAGIC = b"ESPNETIDX1\n"
+ALIGNMENT = 64
+
+NUMBER_LOADER_TYPES = {
+    "text_int": (" ", np.int64),
+    "text_float": (" ", np.float64),
+    "csv_int": (",", np.int64),
+    "csv_float": (",", np.float64),
+}
+
+
+def get_index_path(path: Union[Path, str], loader_type: Optional[str] = None) -> Path:
+    """Return the path of the index file of the text file.
+
+    The index is placed next to the text file. If the directory is not writable,
+    it's placed in the temporary directory instead.
+
+    """
+    path = Path(path)
+    suffix = ".idx" if loader_type is None else f".{loader_type}.idx"
+    if os.access(path.parent, os.W_OK):
+        return path.with_name(path.name + suffix)
+    digest = hashlib.sha1(str(path.resolve()).encode()).hexdigest()
+    return Path(tempfile.gettempdir()) / "espnet_text_index" / (digest + suffix)
+
+
+def _source_stat(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def build_text_index(
+    path: Union[Path, str],
+    index_path: Union[Path, str],
+    loader_type: Optional[str] = None,
+):
+    """Build the index file of the 2-column text file.
+
+    Args:
+        path: The text file
+        index_path: The index file to be written
+        loader_type: "text_int", "text_float", "csv_int", or "csv_float"
+            to parse the values as number sequences
+
+    """
+    assert check_argument_types()
+    path = Path(path)
+    index_path = Path(index_path)
+    if loader_type is not None and loader_type not in NUMBER_LOADER_TYPES:
+        raise ValueError(f"Not supported loader_type={loader_type}")
+    size, mtime_ns = _source_stat(path)
+
+    keys = []
+    offsets = []
+    lengths = []
+    numbers = []
+    pos = 0
+    with path.open("rb") as f:
+        for linenum, line in enumerate(f, 1):
+            stripped = line.rstrip()
+            sps = stripped.split(maxsplit=1)
+            if len(sps) == 0:
+                pos += len(line)
+                continue
+            keys.append(sps[0])
+            if len(sps) == 1:
+                offsets.append(pos + len(stripped))
+                lengths.append(0)
+            else:
+                offsets.append(pos + len(stripped) - len(sps[1]))
+                lengths.append(len(sps[1]))
+            if loader_type is not None:
+                delimiter, dtype = NUMBER_LOADER_TYPES[loader_type]
+                try:
+                    numbers.append([dtype(i) for i in sps[1].decode().split(delimiter)])
+                except (IndexError, ValueError):
+                    logging.error(f'Error happened with path="{path}:{linenum}"')
+                    raise
+            pos += len(line)
+
+    n = len(keys)
+    keys = np.array(keys, dtype=f"S{max(map(len, keys), default=1)}")
+    sorted_ids = np.argsort(keys, kind="stable")
+    keys = keys[sorted_ids]
+    dups = np.nonzero(keys[1:] == keys[:-1])[0]
+    if len(dups) > 0:
+        raise RuntimeError(f"{keys[dups[0]].decode()} is duplicated ({path})")
+    line_order = np.empty(n, dtype=np.int64)
+    line_order[sorted_ids] = np.arange(n)
+
+    arrays = dict(
+        keys=keys,
+        offsets=np.array(offsets, dtype=np.int64)[sorted_ids],
+        lengths=np.array(lengths, dtype=np.int64)[sorted_ids],
+        line_order=line_order,
+    )
+    if loader_type is not None:
+        dtype = NUMBER_LOADER_TYPES[loader_type][1]
+        widths = np.array([len(v) for v in numbers], dtype=np.int64)
+        padded = np.zeros((n, max(widths, default=0)), dtype=dtype)
+        for i, v in enumerate(numbers):
+            padded[i, : len(v)] = v
+        arrays["numbers"] = padded[sorted_ids]
+        arrays["widths"] = widths[sorted_ids]
+
+    # Decide the layout: The header length is fixed by padding the header
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = dict(
+        source_size=size,
+        source_mtime_ns=mtime_ns,
+        loader_type=loader_type,
+        arrays=layout,
+    )
+    header_bytes = json.dumps(header).encode()
+    data_start = len(MAGIC) + 8 + len(header_bytes)
+    data_start = -(-data_start // ALIGNMENT) * ALIGNMENT
+    header_bytes = header_bytes.ljust(data_start - len(MAGIC) - 8)
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_name(f"{index_path.name}.tmp.{os.getpid()}")
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name][2])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, index_path)
+
+
+def _read_header(index_path: Path) -> Optional[Tuple[dict, int]]:
+    try:
+        with index_path.open("rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(length).decode())
+    except (FileNotFoundError, ValueError):
+        return None
+    return header, len(MAGIC) + 8 + length
+
+
+def load_text_index(
+    path: Union[Path, str],
+    loader_type: Optional[str] = None,
+    index_path: Union[Path, str] = None,
+) -> Dict[str, np.ndarray]:
+    """Return the memory-mapped arrays of the index of the text file.
+
+    The index is built if it doesn't exist or the text file is modified.
+    The processes sharing the index build it only once by holding a flock.
+
+    """
+    assert check_argument_types()
+    path = Path(path)
+    if index_path is None:
+        index_path = get_index_path(path, loader_type)
+    index_path = Path(index_path)
+
+    def _is_fresh(header):
+        return (
+            header is not None
+            and [header[0]["source_size"], header[0]["source_mtime_ns"]]
+            == list(_source_stat(path))
+            and header[0]["loader_type"] == loader_type
+        )
+
+    header = _read_header(index_path)
+    if not _is_fresh(header):
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with flock(index_path.with_name(index_path.name + ".lock")):
+            # Another process may have built it while waiting for the lock
+            header = _read_header(index_path)
+            if not _is_fresh(header):
+                logging.info(f"Building the index of {path}: {index_path}")
+                build_text_index(path, index_path, loader_type)
+                header = _read_header(index_path)
+
+    header, data_start = header
+    arrays = {}
+    for name, (dtype, shape, offset) in header["arrays"].items():
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(
+                index_path,
+                dtype=dtype,
+                mode="r",
+                offset=data_start + offset,
+                shape=tuple(shape),
+            )
+    return arrays
+
+
+class IndexedTextReader(collections.abc.Mapping):
+    """Lazy reader of a 2-column text file via the memory-mapped index.
+
+    The keys are iterated in the order of the file as ``read_2column_text``.
+
+    Examples:
+        wav.scp:
+            key1 /some/path/a.wav
+            key2 /some/path/b.wav
+
+        >>> reader = IndexedTextReader('wav.scp')
+        >>> reader['key1']
+        '/some/path/a.wav'
+
+    """
+
+    loader_type = None
+
+    def __init__(self, fname: Union[Path, str], index_path: Union[Path, str] = None):
+        assert check_argument_types()
+        self.fname = Path(fname)
+        self.index_path = index_path
+        self._open()
+
+    def _open(self):
+        self.index = load_text_index(self.fname, self.loader_type, self.index_path)
+        self.keys_array = self.index["keys"]
+        self._text = None
+
+    def __getstate__(self):
+        # Don't pickle the memory-mapped arrays, e.g. for spawned DataLoader workers
+        state = self.__dict__.copy()
+        for k in ("index", "keys_array", "_text"):
+            del state[k]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}("{self.fname}")'
+
+    @property
+    def text(self) -> np.ndarray:
+        if self._text is None:
+            if os.path.getsize(self.fname) == 0:
+                self._text = np.zeros(0, dtype=np.uint8)
+            else:
+                self._text = np.memmap(self.fname, dtype=np.uint8, mode="r")
+        return self._text
+
+    def find(self, key: str) -> int:
+        """Return the position of the key in the sorted keys."""
+        k = key.encode()
+        i = int(np.searchsorted(self.keys_array, k))
+        if i == len(self.keys_array) or self.keys_array[i] != k:
+            raise KeyError(key)
+        return i
+
+    def find_all(self, keys: Sequence[str]) -> np.ndarray:
+        """Return the positions of the keys in the sorted keys at once."""
+        k = np.array([key.encode() for key in keys])
+        if len(k) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if len(self.keys_array) == 0:
+            raise KeyError(keys[0])
+        i = np.searchsorted(self.keys_array, k)
+        found = np.minimum(i, len(self.keys_array) - 1)
+        missing = np.flatnonzero(self.keys_array[found] != k)
+        if len(missing) > 0:
+            raise KeyError(keys[missing[0]])
+        return i
+
+    def get_value(self, i: int):
+        offset = self.index["offsets"][i]
+        return self.text[offset : offset + self.index["lengths"][i]].tobytes().decode()
+
+    def get_values(self, ids: np.ndarray) -> List[str]:
+        """Return the values at the positions at once as strings."""
+        offsets = self.index["offsets"][ids]
+        lengths = self.index["lengths"][ids]
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        total = int(ends[-1]) if len(ends) > 0 else 0
+        # Gather the bytes of all the values by one fancy indexing
+        pos = np.repeat(offsets - starts, lengths) + np.arange(total)
+        buf = self.text[pos].tobytes()
+        return [buf[s:e].decode() for s, e in zip(starts.tolist(), ends.tolist())]
+
+    def __getitem__(self, key: str):
+        return self.get_value(self.find(key))
+
+    def __contains__(self, key) -> bool:
+        try:
+            self.find(key)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.keys_array)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in self.index["line_order"]:
+            yield self.keys_array[i].decode()
+
+    def items(self):
+        # Iterate without searching the keys
+        for i in self.index["line_order"]:
+            yield self.keys_array[i].decode(), self.get_value(i)
+
+
+class IndexedNumSequenceReader(IndexedTextReader):
+    """Lazy reader of a text file indicating sequences of number.
+
+    The numbers are parsed when the index is built,
+    and the values are returned as numpy arrays.
+
+    Examples:
+        shape:
+            key1 1330,80
+            key2 342,80
+
+        >>> reader = IndexedNumSequenceReader('shape', loader_type="csv_int")
+        >>> reader['key1']
+        array([1330,   80])
+
+    """
+
+    def __init__(
+        self,
+        fname: Union[Path, str],
+        loader_type: str = "csv_int",
+        index_path: Union[Path, str] = None,
+    ):
+        assert check_argument_types()
+        if loader_type not in NUMBER_LOADER_TYPES:
+            raise ValueError(f"Not supported loader_type={loader_type}")
+        self.loader_type = loader_type
+        super().__init__(fname, index_path)
+
+    def get_value(self, i: int) -> np.ndarray:
+        return np.array(self.index["numbers"][i, : self.index["widths"][i]])
+
+
+class IndexedKaldiArkReader(IndexedTextReader):
+    """Lazy reader of a scp file of kaldi ark files.
+
+    Examples:
+        feats.scp:
+            key1 /some/where/a.ark:12
+            key2 /some/where/a.ark:345
+
+        >>> reader = IndexedKaldiArkReader('feats.scp')
+        >>> array = reader['key1']
+
+    """
+
+    def get_value(self, i: int) -> np.ndarray:
+        return kaldiio.load_mat(super().get_value(i))
+
+
+def _pad_shapes(values: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    widths = np.array([len(v) for v in values], dtype=np.int64)
+    if len(values) > 0 and (widths == widths[0]).all():
+        return np.array(values, dtype=np.int64).reshape(len(values), -1), widths
+    shapes = np.zeros((len(values), max(widths, default=0)), dtype=np.int64)
+    for i, v in enumerate(values):
+        shapes[i, : len(v)] = v
+    return shapes, widths
+
+
+def load_sorted_shapes(
+    shape_files: Sequence[Union[Path, str]],
+    text_index: bool = False,
+    descending: bool = False,
+) -> Tuple[List[str], List[np.ndarray], List[np.ndarray]]:
+    """Read the shape files of the same keys and sort the keys by the lengths.
+
+    The keys are sorted by the first numbers of the first file,
+    keeping the order of the file for the same lengths
+    as ``sorted()`` of the dict given by ``load_num_sequence_text``.
+    With "text_index", the sorting is done with the arrays of the indices,
+    and the keys are decoded only in the sorted order.
+
+    Args:
+        shape_files: The files of the shapes, e.g. "uttA 100,80"
+        text_index: Read the files via the memory-mapped indices
+        descending: Sort the keys in descending order
+
+    Returns:
+        keys: The sorted keys
+        shapes: The shapes of each file in the order of the keys (N, max_width),
+            padded by 0
+        widths: The number of the numbers of each file in the order of the keys (N,)
+
+    """
+    assert check_argument_types()
+    if text_index:
+        readers = [
+            IndexedNumSequenceReader(s, loader_type="csv_int") for s in shape_files
+        ]
+        first = readers[0]
+        for s, r in zip(shape_files, readers):
+            if len(r) != len(first) or (r.keys_array != first.keys_array).any():
+                raise RuntimeError(
+                    f"keys are mismatched between {s} != {shape_files[0]}"
+                )
+        if len(first) == 0:
+            return [], [], []
+        # The positions in the sorted keys in the order of the file
+        order = np.asarray(first.index["line_order"])
+        lengths = first.index["numbers"][order, 0]
+        ids = order[np.argsort(-lengths if descending else lengths, kind="stable")]
+        keys = [k.decode() for k in first.keys_array[ids].tolist()]
+        shapes = [np.asarray(r.index["numbers"][ids]) for r in readers]
+        widths = [np.asarray(r.index["widths"][ids]) for r in readers]
+        return keys, shapes, widths
+
+    utt2shapes = [load_num_sequence_text(s, loader_type="csv_int") for s in shape_files]
+    first_utt2shape = utt2shapes[0]
+    for s, d in zip(shape_files, utt2shapes):
+        if set(d) != set(first_utt2shape):
+            raise RuntimeError(f"keys are mismatched between {s} != {shape_files[0]}")
+    keys = list(first_utt2shape)
+    if len(keys) == 0:
+        return [], [], []
+    shapes, widths = zip(*[_pad_shapes([d[k] for k in keys]) for d in utt2shapes])
+    lengths = shapes[0][:, 0]
+    perm = np.argsort(-lengths if descending else lengths, kind="stable")
+    keys = [keys[i] for i in perm.tolist()]
+    return keys, [s[perm] for s in shapes], [w[perm] for w in widths]
@@ -0,0 +1,155 @@
+import collections.abc
+from pathlib import Path
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+from typeguard import check_argument_types
+
+from espnet2.fileio.indexed_text import IndexedTextReader
+
+# The arrays are aligned in the data file for page-cache friendly reads
+ALIGNMENT = 64
+
+
+def parse_packed_entry(value: str) -> Tuple[str, int, np.dtype, Tuple[int, ...]]:
+    """Parse an entry of the index file.
+
+    Examples:
+        >>> parse_packed_entry("/some/where/feats.pack:128:<f4:100,80")
+        ('/some/where/feats.pack', 128, dtype('float32'), (100, 80))
+
+    """
+    path, offset, dtype, shape = value.rsplit(":", maxsplit=3)
+    shape = tuple(int(s) for s in shape.split(",")) if shape != "" else ()
+    return path, int(offset), np.dtype(dtype), shape
+
+
+class PackedArchiveWriter:
+    """Writer class for a packed feature archive.
+
+    The arrays are written into one contiguous data file,
+    and the index file describes the path, the byte offset, the dtype,
+    and the shape of each array.
+
+    Examples:
+        feats.scp:
+            key1 /some/where/feats.pack:0:<f4:100,80
+            key2 /some/where/feats.pack:32000:<f4:50,80
+            ...
+
+        >>> writer = PackedArchiveWriter('./data/feats.pack', './data/feats.scp')
+        >>> writer['aa'] = numpy_array
+        >>> writer['bb'] = numpy_array
+
+    """
+
+    def __init__(self, datafile: Union[Path, str], scpfile: Union[Path, str]):
+        assert check_argument_types()
+        datafile = Path(datafile)
+        datafile.parent.mkdir(parents=True, exist_ok=True)
+        scpfile = Path(scpfile)
+        scpfile.parent.mkdir(parents=True, exist_ok=True)
+        # Write the absolute path so that index files can be concatenated
+        self.datafile = datafile.resolve()
+        self.fdata = datafile.open("wb")
+        self.fscp = scpfile.open("w", encoding="utf-8")
+        self.offset = 0
+
+        self.data = {}
+
+    def get_path(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        assert isinstance(value, np.ndarray), type(value)
+        if value.dtype == object:
+            raise TypeError(f"Object arrays are not supported: {key}")
+        value = np.ascontiguousarray(value)
+        padding = -self.offset % ALIGNMENT
+        if padding > 0:
+            self.fdata.write(b"\0" * padding)
+            self.offset += padding
+        self.fdata.write(value.tobytes())
+
+        entry = "{}:{}:{}:{}".format(
+            self.datafile,
+            self.offset,
+            value.dtype.str,
+            ",".join(map(str, value.shape)),
+        )
+        self.fscp.write(f"{key} {entry}\n")
+        self.offset += value.nbytes
+
+        # Store the entry
+        self.data[key] = entry
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.fdata.close()
+        self.fscp.close()
+
+
+class PackedArchiveReader(collections.abc.Mapping):
+    """Reader class for a packed feature archive.
+
+    The data files are memory-mapped and the arrays are returned as read-only
+    views of them without copying, so the pages are shared via the page cache
+    by all the processes, e.g. DataLoader workers and DDP ranks, on a node.
+    The index file is read via the memory-mapped index of IndexedTextReader.
+
+    Examples:
+        feats.scp:
+            key1 /some/where/feats.pack:0:<f4:100,80
+            key2 /some/where/feats.pack:32000:<f4:50,80
+            ...
+
+        >>> reader = PackedArchiveReader('feats.scp')
+        >>> array = reader['key1']
+
+    """
+
+    def __init__(self, fname: Union[Path, str]):
+        assert check_argument_types()
+        self.fname = Path(fname)
+        self.index = IndexedTextReader(fname)
+        self.memmaps = {}
+
+    def __getstate__(self):
+        # Don't pickle the memory-maps
+        state = self.__dict__.copy()
+        state["memmaps"] = {}
+        return state
+
+    def get_path(self, key):
+        return self.index[key]
+
+    def get_memmap(self, path: str) -> np.memmap:
+        if path not in self.memmaps:
+            self.memmaps[path] = np.memmap(path, dtype=np.uint8, mode="r")
+        return self.memmaps[path]
+
+    def __getitem__(self, key) -> np.ndarray:
+        path, offset, dtype, shape = parse_packed_entry(self.index[key])
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes == 0:
+            return np.zeros(shape, dtype=dtype)
+        buf = self.get_memmap(path)[offset : offset + nbytes]
+        return np.ndarray(shape, dtype=dtype, buffer=buf)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def keys(self):
+        return self.index.keys()
@@ -0,0 +1,68 @@
+import collections.abc
+import os
+from pathlib import Path
+from typing import Union
+
+import kaldiio
+import numpy as np
+from typeguard import check_argument_types
+
+from espnet2.fileio.read_text import read_2column_text
+
+# The file in the staging directory listing the source of each staged ark file
+SOURCES_FILE = "ark_sources"
+
+
+class StagedArkScpReader(collections.abc.Mapping):
+    """Reader class for a scp file of ark files which are being staged.
+
+    The scp file points to the staged ark files, and the ark files which are
+    not staged yet are read from their sources listed in "ark_sources"
+    in the same directory. An ark file is staged by renaming it atomically,
+    so it's complete if exists.
+
+    Examples:
+        feats.scp:
+            key1 /local/dir/a.ark:12
+            key2 /local/dir/a.ark:345
+            key3 /local/dir/b.ark:12
+            ...
+        ark_sources:
+            a.ark /some/where/a.ark
+            b.ark /some/where/b.ark
+            ...
+
+        >>> reader = StagedArkScpReader('/local/dir/feats.scp')
+        >>> array = reader['key1']
+
+    """
+
+    def __init__(self, fname: Union[Path, str]):
+        assert check_argument_types()
+        self.fname = Path(fname)
+        self.data = read_2column_text(fname)
+        self.sources = read_2column_text(self.fname.parent / SOURCES_FILE)
+        self.staged = set()
+
+    def get_path(self, key):
+        path, offset = self.data[key].rsplit(":", maxsplit=1)
+        if path not in self.staged:
+            if not os.path.exists(path):
+                return f"{self.sources[Path(path).name]}:{offset}"
+            self.staged.add(path)
+        return self.data[key]
+
+    def __getitem__(self, key) -> np.ndarray:
+        return kaldiio.load_mat(self.get_path(key))
+
+    def __contains__(self, item):
+        return item in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def keys(self):
+        return self.data.keys()
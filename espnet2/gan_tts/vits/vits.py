@@ -609,3 +609,64 @@ class VITS(AbsGANTTS):
                 max_len=max_len,
             )
         return dict(wav=wav.view(-1), att_w=att_w[0], duration=dur[0])
+
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        sids: Optional[torch.Tensor] = None,
+        spembs: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        noise_scale: float = 0.667,
+        noise_scale_dur: float = 0.8,
+        alpha: float = 1.0,
+        max_len: Optional[int] = None,
+    ) -> Dict[str, torch.Tensor]:
+        """Run inference for a batch of texts.
+
+        Args:
+            text (Tensor): Text index tensor (B, T_text).
+            text_lengths (Tensor): Text length tensor (B,).
+            sids (Tensor): Speaker index tensor (B, 1).
+            spembs (Optional[Tensor]): Speaker embedding tensor (B, spk_embed_dim).
+            lids (Tensor): Language index tensor (B, 1).
+            noise_scale (float): Noise scale value for flow.
+            noise_scale_dur (float): Noise scale value for duration predictor.
+            alpha (float): Alpha parameter to control the speed of generated speech.
+            max_len (Optional[int]): Maximum length.
+
+        Returns:
+            Dict[str, Tensor]:
+                * wav (Tensor): Generated waveform tensor (B, T_wav).
+                * wav_lengths (Tensor): Waveform length tensor (B,).
+                * att_w (Tensor): Monotonic attention weight tensor
+                    (B, T_feats, T_text).
+                * att_w_lengths (Tensor): Attention weight length tensor (B, 2).
+                * duration (Tensor): Predicted duration tensor (B, T_text).
+                * duration_lengths (Tensor): Duration length tensor (B,).
+
+        """
+        text = text[:, : text_lengths.max()]
+        wav, att_w, dur = self.generator.inference(
+            text=text,
+            text_lengths=text_lengths,
+            sids=sids,
+            spembs=spembs,
+            lids=lids,
+            noise_scale=noise_scale,
+            noise_scale_dur=noise_scale_dur,
+            alpha=alpha,
+            max_len=max_len,
+        )
+        feats_lengths = torch.clamp_min(dur.sum(1), 1).long()
+        wav_lengths = feats_lengths * self.generator.upsample_factor
+        if max_len is not None:
+            wav_lengths.clamp_(max=max_len * self.generator.upsample_factor)
+        return dict(
+            wav=wav,
+            wav_lengths=wav_lengths,
+            att_w=att_w,
+            att_w_lengths=torch.stack([feats_lengths, text_lengths], dim=1),
+            duration=dur,
+            duration_lengths=text_lengths,
+        )
@@ -1,9 +1,26 @@
 from abc import ABC
 from abc import abstractmethod
 from typing import Iterator
+from typing import Optional
 
 
 class AbsIterFactory(ABC):
     @abstractmethod
     def build_iter(self, epoch: int, shuffle: bool = None) -> Iterator:
         raise NotImplementedError
+
+    def state_dict(self, num_iters: int) -> Optional[dict]:
+        """Return the state of the last built iterator after num_iters mini-batches.
+
+        The state is given to load_state_dict() to resume the iterator of the epoch
+        from the middle. It must be the same in all the processes of distributed
+        training. None means that the iterator can't be resumed.
+
+        """
+        return None
+
+    def load_state_dict(self, state: dict):
+        """Make the next build_iter() for the epoch skip the consumed mini-batches."""
+        raise NotImplementedError(
+            f"{type(self).__name__} doesn't support resuming an epoch"
+        )
@@ -3,12 +3,14 @@ from typing import Any
 from typing import Dict
 from typing import Iterator
 from typing import List
+from typing import Optional
 from typing import Sequence
 from typing import Tuple
 from typing import Union
 
 import numpy as np
 import torch
+from torch.utils.data.dataloader import default_collate
 from typeguard import check_argument_types
 
 from espnet2.iterators.abs_iter_factory import AbsIterFactory
@@ -33,6 +35,10 @@ class ChunkIterFactory(AbsIterFactory):
       because IterFactory doesn't be given to the length information.
     - Since the first reason, "num_iters_per_epoch" can't be implemented
       for this iterator. Instead of it, "num_samples_per_epoch" is implemented.
+    - The iterator can be resumed from the middle of an epoch by state_dict() and
+      load_state_dict(). The state has the number of the consumed samples,
+      the random state, and the start frames of the cached chunks,
+      so only the samples of the cached chunks are loaded again at resuming.
 
     """
 
@@ -93,42 +99,140 @@ class ChunkIterFactory(AbsIterFactory):
         self.seed = seed
         self.shuffle = shuffle
 
+        self.tracker = None
+        self.resume_state = None
+
+    def state_dict(self, num_iters: int) -> Optional[dict]:
+        if (
+            torch.distributed.is_available()
+            and torch.distributed.is_initialized()
+            and torch.distributed.get_world_size() > 1
+        ):
+            # The samples and the cached chunks are different in each process
+            return None
+        tracker = self.tracker
+        # The state is taken from the suspended generator,
+        # so the mini-batches must not be read ahead of the consumer.
+        assert tracker["num_iters"] == num_iters, (tracker["num_iters"], num_iters)
+
+        pending = tracker["pending"]
+        caches = []
+        for i, W in enumerate(tracker["id_lists"]):
+            if tracker["final"]:
+                # The chunks of the flushed lengths are discarded
+                if i < tracker["num_flushed"]:
+                    continue
+                caches.append((W, tracker["id_lists"][W], tracker["start_lists"][W]))
+            elif pending is not None and W == pending[0]:
+                # The chunks are in the pending list. Keep only the order here.
+                caches.append((W, [], []))
+            else:
+                caches.append((W, tracker["id_lists"][W], tracker["start_lists"][W]))
+        return {
+            "epoch": tracker["epoch"],
+            "num_samples": tracker["num_samples"],
+            "rng": tracker["rng"].get_state(),
+            "caches": [(W, list(ids), list(starts)) for W, ids, starts in caches],
+            "pending": None
+            if pending is None
+            else (pending[0], list(pending[1]), list(pending[2])),
+            "final": tracker["final"],
+        }
+
+    def load_state_dict(self, state: dict):
+        self.resume_state = state
+
     def build_iter(
         self,
         epoch: int,
         shuffle: bool = None,
     ) -> Iterator[Tuple[List[str], Dict[str, torch.Tensor]]]:
-        per_sample_loader = self.per_sample_iter_factory.build_iter(epoch, shuffle)
-
         if shuffle is None:
             shuffle = self.shuffle
-        state = np.random.RandomState(epoch + self.seed)
+        # The state of the iterator after the yielded mini-batches
+        tracker = dict(
+            epoch=epoch,
+            num_iters=0,
+            num_samples=0,
+            rng=np.random.RandomState(epoch + self.seed),
+            # The ids and the start frames of the cached chunks
+            id_lists={},
+            start_lists={},
+            pending=None,
+            final=False,
+            num_flushed=0,
+        )
+
+        resume_state, self.resume_state = self.resume_state, None
+        if resume_state is not None and resume_state["epoch"] != epoch:
+            logging.warning(
+                f"The iterator state of {resume_state['epoch']}epoch "
+                f"is ignored for {epoch}epoch"
+            )
+            resume_state = None
+        if resume_state is not None:
+            tracker["rng"].set_state(resume_state["rng"])
+            tracker["num_samples"] = resume_state["num_samples"]
+            tracker["pending"] = resume_state["pending"]
+            tracker["final"] = resume_state["final"]
+            for W, id_list, start_list in resume_state["caches"]:
+                tracker["id_lists"][W] = id_list
+                tracker["start_lists"][W] = start_list
+            # Skip the consumed samples
+            self.per_sample_iter_factory.load_state_dict(
+                {"epoch": epoch, "num_iters": resume_state["num_samples"]}
+            )
+
+        self.tracker = tracker
+        return self._iterate(tracker, shuffle)
+
+    def _iterate(
+        self, tracker: Dict[str, Any], shuffle: bool
+    ) -> Iterator[Tuple[List[str], Dict[str, torch.Tensor]]]:
+        epoch = tracker["epoch"]
+        state = tracker["rng"]
 
         # NOTE(kamo):
         #   This iterator supports multiple chunk lengths and
         #   keep chunks for each lengths here until collecting specified numbers
         cache_chunks_dict = {}
-        cache_id_list_dict = {}
+        cache_id_list_dict = tracker["id_lists"]
+        cache_start_list_dict = tracker["start_lists"]
+
+        # Restore the cached chunks of the resumed iterator
+        samples = {}
+        for W in cache_id_list_dict:
+            cache_chunks_dict[W] = self._load_chunks(
+                W, cache_id_list_dict[W], cache_start_list_dict[W], samples
+            )
+        if tracker["pending"] is not None:
+            W, id_list, start_list = tracker["pending"]
+            # The pending chunks were already shuffled
+            (
+                cache_id_list,
+                cache_start_list,
+                cache_chunks,
+            ) = yield from self._generate_mini_batches(
+                tracker,
+                W,
+                id_list,
+                start_list,
+                self._load_chunks(W, id_list, start_list, samples),
+                False,
+                state,
+            )
+            tracker["pending"] = None
+            if not tracker["final"]:
+                cache_id_list_dict[W] = cache_id_list
+                cache_start_list_dict[W] = cache_start_list
+                cache_chunks_dict[W] = cache_chunks
+        del samples
+
+        per_sample_loader = self.per_sample_iter_factory.build_iter(epoch, shuffle)
+
         for ids, batch in per_sample_loader:
-            # Must be per-sample-loader
-            assert len(ids) == 1, f"Must be per-sample-loader: {len(ids)}"
-            assert all(len(x) == 1 for x in batch.values())
-
-            # Get keys of sequence data
-            sequence_keys = []
-            for key in batch:
-                if key + "_lengths" in batch:
-                    sequence_keys.append(key)
-            # Remove lengths data and get the first sample
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
-            id_ = ids[0]
-
-            for key in sequence_keys:
-                if len(batch[key]) != len(batch[sequence_keys[0]]):
-                    raise RuntimeError(
-                        f"All sequences must has same length: "
-                        f"{len(batch[key])} != {len(batch[sequence_keys[0]])}"
-                    )
+            tracker["num_samples"] += 1
+            id_, batch, sequence_keys = self._split_sample(ids, batch)
 
             L = len(batch[sequence_keys[0]])
             # Select chunk length
@@ -142,6 +246,7 @@ class ChunkIterFactory(AbsIterFactory):
 
             W = int(state.choice(chunk_lengths, 1))
             cache_id_list = cache_id_list_dict.setdefault(W, [])
+            cache_start_list = cache_start_list_dict.setdefault(W, [])
             cache_chunks = cache_chunks_dict.setdefault(W, {})
 
             # Shift width to the next chunk
@@ -165,33 +270,102 @@ class ChunkIterFactory(AbsIterFactory):
                     # If not sequence, use whole data instead of chunk
                     cache_chunks[k] += [v for _ in range(N)]
             cache_id_list += [id_ for _ in range(N)]
+            cache_start_list += [Z + i * S for i in range(N)]
 
             if len(cache_id_list) > self.num_cache_chunks:
-                cache_id_list, cache_chunks = yield from self._generate_mini_batches(
+                (
+                    cache_id_list,
+                    cache_start_list,
+                    cache_chunks,
+                ) = yield from self._generate_mini_batches(
+                    tracker,
+                    W,
                     cache_id_list,
+                    cache_start_list,
                     cache_chunks,
                     shuffle,
                     state,
                 )
+                tracker["pending"] = None
 
             cache_id_list_dict[W] = cache_id_list
+            cache_start_list_dict[W] = cache_start_list
             cache_chunks_dict[W] = cache_chunks
 
         else:
-            for W in cache_id_list_dict:
+            tracker["final"] = True
+            for i, W in enumerate(cache_id_list_dict):
+                tracker["num_flushed"] = i + 1
                 cache_id_list = cache_id_list_dict.setdefault(W, [])
+                cache_start_list = cache_start_list_dict.setdefault(W, [])
                 cache_chunks = cache_chunks_dict.setdefault(W, {})
 
                 yield from self._generate_mini_batches(
+                    tracker,
+                    W,
                     cache_id_list,
+                    cache_start_list,
                     cache_chunks,
                     shuffle,
                     state,
                 )
 
+    def _split_sample(
+        self, ids: List[str], batch: Dict[str, torch.Tensor]
+    ) -> Tuple[str, Dict[str, torch.Tensor], List[str]]:
+        # Must be per-sample-loader
+        assert len(ids) == 1, f"Must be per-sample-loader: {len(ids)}"
+        assert all(len(x) == 1 for x in batch.values())
+
+        # Get keys of sequence data
+        sequence_keys = []
+        for key in batch:
+            if key + "_lengths" in batch:
+                sequence_keys.append(key)
+        # Remove lengths data and get the first sample
+        batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
+        id_ = ids[0]
+
+        for key in sequence_keys:
+            if len(batch[key]) != len(batch[sequence_keys[0]]):
+                raise RuntimeError(
+                    f"All sequences must has same length: "
+                    f"{len(batch[key])} != {len(batch[sequence_keys[0]])}"
+                )
+        return id_, batch, sequence_keys
+
+    def _load_chunks(
+        self,
+        W: int,
+        id_list: List[str],
+        start_list: List[int],
+        samples: Dict[str, Tuple[Dict[str, torch.Tensor], List[str]]],
+    ) -> Dict[str, List[torch.Tensor]]:
+        """Load the chunks of the samples again to restore the cache."""
+        factory = self.per_sample_iter_factory
+        collate_fn = (
+            factory.collate_fn if factory.collate_fn is not None else default_collate
+        )
+        chunks = {}
+        for id_, start in zip(id_list, start_list):
+            if id_ not in samples:
+                _, batch, sequence_keys = self._split_sample(
+                    *collate_fn([factory.dataset[id_]])
+                )
+                samples[id_] = batch, sequence_keys
+            batch, sequence_keys = samples[id_]
+            for k, v in batch.items():
+                chunks.setdefault(k, []).append(
+                    v[start : start + W] if k in sequence_keys else v
+                )
+        return chunks
+
     def _generate_mini_batches(
         self,
+        tracker: Dict[str, Any],
+        W: int,
         id_list: List[str],
+        start_list: List[int],
         batches: Dict[str, List[torch.Tensor]],
         shuffle: bool,
         state: np.random.RandomState,
@@ -201,15 +375,20 @@ class ChunkIterFactory(AbsIterFactory):
             state.shuffle(indices)
             batches = {k: [v[i] for i in indices] for k, v in batches.items()}
             id_list = [id_list[i] for i in indices]
+            start_list = [start_list[i] for i in indices]
 
         bs = self.batch_size
         while len(id_list) >= bs:
             # Make mini-batch and yield
-            yield (
+            mini_batch = (
                 id_list[:bs],
                 {k: torch.stack(v[:bs], 0) for k, v in batches.items()},
             )
             id_list = id_list[bs:]
+            start_list = start_list[bs:]
             batches = {k: v[bs:] for k, v in batches.items()}
+            tracker["pending"] = (W, id_list, start_list)
+            tracker["num_iters"] += 1
+            yield mini_batch
 
-        return id_list, batches
+        return id_list, start_list, batches
@@ -0,0 +1,141 @@
+"""Iterable wrapper prefetching the items to the device."""
+from queue import Empty
+from queue import Full
+from queue import Queue
+import threading
+from typing import Iterable
+from typing import Union
+
+import torch
+from typeguard import check_argument_types
+
+from espnet2.torch_utils.device_funcs import record_stream
+from espnet2.torch_utils.device_funcs import to_device
+
+_END = object()
+
+
+class PrefetchIterable:
+    """Iterable reading the next items in a thread and sending them to the device.
+
+    The items are read from the iterable and copied to the device by
+    a background thread up to "depth" items ahead of the consumer,
+    so the loading of the next mini-batches, e.g. the collation in the main
+    process, and the host-to-device copies are overlapped with the computation
+    of the current mini-batch. For CUDA, the tensors are pinned and copied
+    by another stream with non_blocking=True, and the current stream of
+    the consumer waits for the copy of an item when it is yielded.
+
+    Examples:
+        >>> iterator = PrefetchIterable(iter_factory.build_iter(epoch), "cuda")
+        >>> for keys, batch in iterator:
+        ...     # batch is on the GPU
+        ...     model(**batch)
+
+    Args:
+        iterable: Iterable of the items, e.g. (keys, batch) of the mini-batches.
+        device: The device to send the tensors of the items.
+        depth: The number of the items prefetched ahead of the consumer.
+        barrier_interval: If > 0, the items after every "barrier_interval" items
+            are not read until the consumer requests them. The state of
+            the iterable at the barriers is consistent with the consumed items,
+            e.g. for ChunkIterFactory.state_dict() at mid-epoch checkpoints.
+
+    """
+
+    def __init__(
+        self,
+        iterable: Iterable,
+        device: Union[str, torch.device],
+        depth: int = 2,
+        barrier_interval: int = 0,
+    ):
+        assert check_argument_types()
+        assert depth > 0, depth
+        self.iterable = iterable
+        self.device = torch.device(device)
+        self.depth = depth
+        self.barrier_interval = barrier_interval
+
+    def __len__(self):
+        return len(self.iterable)
+
+    def __iter__(self):
+        if self.device.type == "cuda":
+            stream = torch.cuda.Stream(self.device)
+        else:
+            stream = None
+        queue = Queue(maxsize=self.depth)
+        cond = threading.Condition()
+        stop = threading.Event()
+        # The number of the items requested by the consumer
+        num_requested = 0
+
+        def _put(x) -> bool:
+            while not stop.is_set():
+                try:
+                    queue.put(x, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def _produce():
+            try:
+                num_read = 0
+                for item in self.iterable:
+                    num_read += 1
+                    if stream is not None:
+                        with torch.cuda.stream(stream):
+                            item = to_device(item, self.device, non_blocking=True)
+                            event = stream.record_event()
+                    else:
+                        item = to_device(item, self.device)
+                        event = None
+                    if not _put((item, event)):
+                        return
+
+                    if (
+                        self.barrier_interval > 0
+                        and num_read % self.barrier_interval == 0
+                    ):
+                        with cond:
+                            cond.wait_for(
+                                lambda: num_requested > num_read or stop.is_set()
+                            )
+                        if stop.is_set():
+                            return
+            except BaseException as e:
+                _put((_END, e))
+                return
+            _put((_END, None))
+
+        thread = threading.Thread(target=_produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                with cond:
+                    num_requested += 1
+                    cond.notify_all()
+                item, event = queue.get()
+                if item is _END:
+                    if event is not None:
+                        # The error in the thread
+                        raise event
+                    break
+                if event is not None:
+                    current_stream = torch.cuda.current_stream(self.device)
+                    current_stream.wait_event(event)
+                    record_stream(item, current_stream)
+                yield item
+        finally:
+            stop.set()
+            with cond:
+                cond.notify_all()
+            # Unblock the thread putting an item and wait for it
+            while thread.is_alive():
+                try:
+                    queue.get(timeout=0.1)
+                except Empty:
+                    pass
+            thread.join()
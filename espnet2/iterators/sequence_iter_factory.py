@@ -1,3 +1,4 @@
+import logging
 from typing import Any
 from typing import Sequence
 from typing import Union
@@ -32,6 +33,8 @@ class SequenceIterFactory(AbsIterFactory):
       guarantees reproducibility when resuming from middle of training process.
     - Enable to restrict the number of samples for one epoch. This features
       controls the interval number between training and evaluation.
+    - The iterator can be resumed from the middle of an epoch by state_dict() and
+      load_state_dict(). The consumed mini-batches are skipped without loading.
 
     """
 
@@ -65,6 +68,17 @@ class SequenceIterFactory(AbsIterFactory):
         # https://discuss.pytorch.org/t/what-is-the-disadvantage-of-using-pin-memory/1702
         self.pin_memory = pin_memory
 
+        # The epoch and the number of the skipped mini-batches of the last iterator
+        self.epoch = None
+        self.start = 0
+        self.resume_state = None
+
+    def state_dict(self, num_iters: int) -> dict:
+        return {"epoch": self.epoch, "num_iters": self.start + num_iters}
+
+    def load_state_dict(self, state: dict):
+        self.resume_state = state
+
     def build_iter(self, epoch: int, shuffle: bool = None) -> DataLoader:
         if shuffle is None:
             shuffle = self.shuffle
@@ -131,6 +145,24 @@ class SequenceIterFactory(AbsIterFactory):
             if shuffle:
                 np.random.RandomState(epoch + self.seed).shuffle(batches)
 
+        self.epoch = epoch
+        self.start = 0
+        if self.resume_state is not None:
+            state, self.resume_state = self.resume_state, None
+            if state["epoch"] == epoch:
+                self.start = state["num_iters"]
+                batches = batches[self.start :]
+                logging.info(f"Skipped {self.start} mini-batches of {epoch}epoch")
+            else:
+                logging.warning(
+                    f"The iterator state of {state['epoch']}epoch "
+                    f"is ignored for {epoch}epoch"
+                )
+
+        if hasattr(self.collate_fn, "set_epoch"):
+            # e.g. The random augmentation in the collate_fn
+            self.collate_fn.set_epoch(epoch)
+
         # For backward compatibility for pytorch DataLoader
         if self.collate_fn is not None:
             kwargs = dict(collate_fn=self.collate_fn)
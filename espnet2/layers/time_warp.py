@@ -4,6 +4,10 @@ import torch
 from espnet.nets.pytorch_backend.nets_utils import pad_list
 
 DEFAULT_TIME_WARP_MODE = "bicubic"
+# The interpolate modes supported by batch_time_warp()
+BATCH_TIME_WARP_MODES = ("bicubic", "bilinear", "nearest")
+# The coefficient of the cubic convolution used by torch.nn.functional.interpolate
+_CUBIC_A = -0.75
 
 
 def time_warp(x: torch.Tensor, window: int = 80, mode: str = DEFAULT_TIME_WARP_MODE):
@@ -46,6 +50,148 @@ def time_warp(x: torch.Tensor, window: int = 80, mode: str = DEFAULT_TIME_WARP_M
     return x.view(*org_size)
 
 
+def batch_time_warp(
+    x: torch.Tensor,
+    x_lengths: torch.Tensor,
+    window: int = 80,
+    mode: str = DEFAULT_TIME_WARP_MODE,
+):
+    """Time warping of each utterance in a batch of different lengths at once.
+
+    The center and the warped position are drawn for each utterance
+    in the same ranges as time_warp() within its length, and each output
+    frame is interpolated from the neighboring input frames gathered by
+    the indices and the weights of torch.nn.functional.interpolate.
+
+    Args:
+        x: (Batch, Time, Freq)
+        x_lengths: (Batch,)
+        window: time warp parameter
+        mode: Interpolate mode, "bicubic", "bilinear" or "nearest"
+    Returns:
+        (Batch, max(x_lengths), Freq), where the padded frames are zero
+    """
+    if mode not in BATCH_TIME_WARP_MODES:
+        raise ValueError(f"mode must be one of {BATCH_TIME_WARP_MODES}: {mode}")
+
+    lengths = x_lengths.to(x.device)
+    center, warped = _draw_warp(lengths, window)
+    return _batch_warp(x, lengths, center, warped, mode)
+
+
+def _draw_warp(lengths: torch.Tensor, window: int):
+    """Draw the center and the warped position of each utterance.
+
+    Args:
+        lengths: (Batch,)
+        window: time warp parameter
+    Returns:
+        center: (Batch,), warped: (Batch,)
+    """
+    center = torch.rand(lengths.size(0), device=lengths.device)
+    warped = torch.rand(lengths.size(0), device=lengths.device)
+    # center: [window, length - window)
+    span = (lengths - 2 * window).clamp(min=1)
+    center = window + torch.min((center * span).long(), span - 1)
+    # warped: [center - window, center + window) + 1
+    warped = center - window + (warped * 2 * window).long() + 1
+    # The utterances too short to warp are kept as they are
+    is_warped = lengths - window > window
+    center = torch.where(is_warped, center, lengths)
+    warped = torch.where(is_warped, warped, lengths)
+    return center, warped
+
+
+def _batch_warp(
+    x: torch.Tensor,
+    lengths: torch.Tensor,
+    center: torch.Tensor,
+    warped: torch.Tensor,
+    mode: str,
+):
+    """Resize x[:center] to warped frames and x[center:] to the rest.
+
+    Args:
+        x: (Batch, Time, Freq)
+        lengths: (Batch,)
+        center: (Batch,)
+        warped: (Batch,)
+        mode: Interpolate mode
+    Returns:
+        (Batch, max(lengths), Freq)
+    """
+    maxlen = int(lengths.max())
+    dtype = torch.float64 if x.dtype == torch.float64 else torch.float32
+    x = x[:, :maxlen]
+
+    # dst: (Batch, Time) The output positions
+    dst = torch.arange(maxlen, device=x.device)[None, :].expand(x.size(0), -1)
+    lengths, center, warped = lengths[:, None], center[:, None], warped[:, None]
+    is_left = dst < warped
+    # The input and the output ranges of the segment of each output frame
+    in_start = torch.where(is_left, torch.zeros_like(center), center)
+    in_size = torch.where(is_left, center, lengths - center).clamp(min=1)
+    out_size = torch.where(is_left, warped, lengths - warped).clamp(min=1)
+    dst = dst - torch.where(is_left, torch.zeros_like(warped), warped)
+    # align_corners=False
+    scale = in_size.to(dtype) / out_size.to(dtype)
+
+    if mode == "nearest":
+        # The scale of float32 is used also for float64 as interpolate
+        src = torch.floor(dst.float() * scale.float()).long()
+        indices = torch.min(src, in_size - 1)[..., None]
+        weights = torch.ones_like(indices, dtype=dtype)
+    elif mode == "bilinear":
+        src = (scale * (dst.to(dtype) + 0.5) - 0.5).clamp(min=0.0)
+        i0 = src.long()
+        lambda1 = src - i0.to(dtype)
+        indices = torch.stack([i0, i0 + (i0 < in_size - 1).long()], dim=-1)
+        weights = torch.stack([1.0 - lambda1, lambda1], dim=-1)
+    else:
+        src = scale * (dst.to(dtype) + 0.5) - 0.5
+        i0 = torch.floor(src)
+        t = src - i0
+        indices = i0.long()[..., None] + torch.arange(-1, 3, device=x.device)
+        indices = torch.min(indices, in_size[..., None] - 1).clamp(min=0)
+        weights = torch.stack(
+            [
+                _cubic_convolution2(t + 1.0),
+                _cubic_convolution1(t),
+                _cubic_convolution1(1.0 - t),
+                _cubic_convolution2(2.0 - t),
+            ],
+            dim=-1,
+        )
+
+    # indices, weights: (Batch, Time, Taps)
+    indices = (indices + in_start[..., None]).clamp(max=maxlen - 1)
+    # Select the whole frames from x: (Batch * Time, Freq)
+    indices = indices + maxlen * torch.arange(x.size(0), device=x.device)[:, None, None]
+    weights = weights.to(x.dtype)
+    x = x.reshape(-1, x.size(2))
+    y = None
+    for k in range(indices.size(-1)):
+        frames = x.index_select(0, indices[..., k].reshape(-1)).view(
+            weights.size(0), maxlen, x.size(1)
+        )
+        if y is None:
+            y = frames * weights[..., k : k + 1]
+        else:
+            y.addcmul_(frames, weights[..., k : k + 1])
+    is_pad = torch.arange(maxlen, device=x.device)[None, :] >= lengths
+    return y.masked_fill_(is_pad[..., None], 0.0)
+
+
+def _cubic_convolution1(x: torch.Tensor) -> torch.Tensor:
+    # The weight for |x| <= 1
+    return ((_CUBIC_A + 2) * x - (_CUBIC_A + 3)) * x * x + 1
+
+
+def _cubic_convolution2(x: torch.Tensor) -> torch.Tensor:
+    # The weight for 1 < |x| < 2
+    return ((_CUBIC_A * x - 5 * _CUBIC_A) * x + 8 * _CUBIC_A) * x - 4 * _CUBIC_A
+
+
 class TimeWarp(torch.nn.Module):
     """Time warping using torch.interpolate.
 
@@ -73,6 +219,8 @@ class TimeWarp(torch.nn.Module):
         if x_lengths is None or all(le == x_lengths[0] for le in x_lengths):
             # Note that applying same warping for each sample
             y = time_warp(x, window=self.window, mode=self.mode)
+        elif x.dim() == 3 and self.mode in BATCH_TIME_WARP_MODES:
+            y = batch_time_warp(x, x_lengths, window=self.window, mode=self.mode)
         else:
             # FIXME(kamo): I have no idea to batchify Timewarp
             ys = []
@@ -15,6 +15,8 @@ from typeguard import check_argument_types
 
 from espnet2.fileio.datadir_writer import DatadirWriter
 from espnet2.fileio.npy_scp import NpyScpWriter
+from espnet2.fileio.packed_archive import PackedArchiveWriter
+from espnet2.iterators.prefetch_iterable import PrefetchIterable
 from espnet2.torch_utils.device_funcs import to_device
 from espnet2.torch_utils.forward_adaptor import ForwardAdaptor
 from espnet2.train.abs_espnet_model import AbsESPnetModel
@@ -29,6 +31,8 @@ def collect_stats(
     ngpu: Optional[int],
     log_interval: Optional[int],
     write_collected_feats: bool,
+    collected_feats_format: str = "npy",
+    prefetch_depth: int = 0,
 ) -> None:
     """Perform on collect_stats mode.
 
@@ -36,11 +40,23 @@ def collect_stats(
     and gathering statistics.
     This method is used before executing train().
 
+    Args:
+        collected_feats_format: "npy" writes a npy file per utterance and
+            "packed" writes a packed feature archive per feature and mode.
+        prefetch_depth: The number of the mini-batches prefetched to the device
+            by a background thread. 0 disables it.
+
     """
     assert check_argument_types()
+    if collected_feats_format not in ("npy", "packed"):
+        raise ValueError(
+            f"collected_feats_format must be npy or packed: {collected_feats_format}"
+        )
 
     npy_scp_writers = {}
     for itr, mode in zip([train_iter, valid_iter], ["train", "valid"]):
+        if prefetch_depth > 0:
+            itr = PrefetchIterable(itr, "cuda" if ngpu > 0 else "cpu", prefetch_depth)
         if log_interval is None:
             try:
                 log_interval = max(len(itr) // 20, 10)
@@ -103,18 +119,28 @@ def collect_stats(
 
                         # 4. [Option] Write derived features as npy format file.
                         if write_collected_feats:
-                            # Instantiate NpyScpWriter for the first iteration
+                            # Instantiate the writer for the first iteration
                             if (key, mode) not in npy_scp_writers:
                                 p = output_dir / mode / "collect_feats"
-                                npy_scp_writers[(key, mode)] = NpyScpWriter(
-                                    p / f"data_{key}", p / f"{key}.scp"
-                                )
-                            # Save array as npy file
+                                if collected_feats_format == "packed":
+                                    writer = PackedArchiveWriter(
+                                        p / f"data_{key}.pack", p / f"{key}.scp"
+                                    )
+                                else:
+                                    writer = NpyScpWriter(
+                                        p / f"data_{key}", p / f"{key}.scp"
+                                    )
+                                npy_scp_writers[(key, mode)] = writer
+                            # Save array
                             npy_scp_writers[(key, mode)][uttid] = seq
 
                 if iiter % log_interval == 0:
                     logging.info(f"Niter: {iiter}")
 
+        for writer in npy_scp_writers.values():
+            writer.close()
+        npy_scp_writers.clear()
+
         for key in sum_dict:
             np.savez(
                 output_dir / mode / f"{key}_stats.npz",
@@ -86,6 +86,7 @@ def build_batch_sampler(
     fold_lengths: Sequence[int] = (),
     padding: bool = True,
     utt2category_file: str = None,
+    text_index: bool = False,
 ) -> AbsSampler:
     """Helper function to instantiate BatchSampler.
 
@@ -102,6 +103,9 @@ def build_batch_sampler(
         fold_lengths: Used for "folded" mode
         padding: Whether sequences are input as a padded tensor or not.
             used for "numel" mode
+        text_index: Read the shape files via the memory-mapped indices
+            instead of loading them into dicts.
+            See espnet2/fileio/indexed_text.py
     """
     assert check_argument_types()
     if len(shape_files) == 0:
@@ -109,7 +113,10 @@ def build_batch_sampler(
 
     if type == "unsorted":
         retval = UnsortedBatchSampler(
-            batch_size=batch_size, key_file=shape_files[0], drop_last=drop_last
+            batch_size=batch_size,
+            key_file=shape_files[0],
+            drop_last=drop_last,
+            text_index=text_index,
         )
 
     elif type == "sorted":
@@ -119,6 +126,7 @@ def build_batch_sampler(
             sort_in_batch=sort_in_batch,
             sort_batch=sort_batch,
             drop_last=drop_last,
+            text_index=text_index,
         )
 
     elif type == "folded":
@@ -137,6 +145,7 @@ def build_batch_sampler(
             drop_last=drop_last,
             min_batch_size=min_batch_size,
             utt2category_file=utt2category_file,
+            text_index=text_index,
         )
 
     elif type == "numel":
@@ -148,6 +157,7 @@ def build_batch_sampler(
             drop_last=drop_last,
             padding=padding,
             min_batch_size=min_batch_size,
+            text_index=text_index,
         )
 
     elif type == "length":
@@ -159,6 +169,7 @@ def build_batch_sampler(
             drop_last=drop_last,
             padding=padding,
             min_batch_size=min_batch_size,
+            text_index=text_index,
         )
 
     else:
@@ -6,7 +6,8 @@ from typing import Union
 
 from typeguard import check_argument_types
 
-from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.fileio.indexed_text import IndexedTextReader
+from espnet2.fileio.indexed_text import load_sorted_shapes
 from espnet2.fileio.read_text import read_2column_text
 from espnet2.samplers.abs_sampler import AbsSampler
 
@@ -22,6 +23,7 @@ class FoldedBatchSampler(AbsSampler):
         sort_batch: str = "ascending",
         drop_last: bool = False,
         utt2category_file: str = None,
+        text_index: bool = False,
     ):
         assert check_argument_types()
         assert batch_size > 0
@@ -43,35 +45,40 @@ class FoldedBatchSampler(AbsSampler):
         # utt2shape: (Length, ...)
         #    uttA 100,...
         #    uttB 201,...
-        utt2shapes = [
-            load_num_sequence_text(s, loader_type="csv_int") for s in shape_files
-        ]
-
-        first_utt2shape = utt2shapes[0]
-        for s, d in zip(shape_files, utt2shapes):
-            if set(d) != set(first_utt2shape):
-                raise RuntimeError(
-                    f"keys are mismatched between {s} != {shape_files[0]}"
-                )
-
         # Sort samples in ascending order
         # (shape order should be like (Length, Dim))
-        keys = sorted(first_utt2shape, key=lambda k: first_utt2shape[k][0])
+        keys, shapes, _ = load_sorted_shapes(shape_files, text_index=text_index)
         if len(keys) == 0:
             raise RuntimeError(f"0 lines found: {shape_files[0]}")
+        lengths = [sh[:, 0].tolist() for sh in shapes]
 
+        # category2utt: The indices of the keys of each category
         category2utt = {}
         if utt2category_file is not None:
-            utt2category = read_2column_text(utt2category_file)
-            if set(utt2category) != set(first_utt2shape):
+            if text_index:
+                utt2category = IndexedTextReader(utt2category_file)
+                try:
+                    # Look up the keys at once instead of one by one
+                    ids = utt2category.find_all(keys)
+                    matched = len(utt2category) == len(keys)
+                except KeyError:
+                    matched = False
+            else:
+                utt2category = read_2column_text(utt2category_file)
+                matched = set(utt2category) == set(keys)
+            if not matched:
                 raise RuntimeError(
                     "keys are mismatched between "
                     f"{utt2category_file} != {shape_files[0]}"
                 )
-            for k in keys:
-                category2utt.setdefault(utt2category[k], []).append(k)
+            if text_index:
+                categories = utt2category.get_values(ids)
+            else:
+                categories = [utt2category[k] for k in keys]
+            for i, c in enumerate(categories):
+                category2utt.setdefault(c, []).append(i)
         else:
-            category2utt["default_category"] = keys
+            category2utt["default_category"] = list(range(len(keys)))
 
         # we need this as it will be accessed in build_iter() and eventually
         # passed to the model where we will access the category ID of the
@@ -79,13 +86,13 @@ class FoldedBatchSampler(AbsSampler):
         self.batch_categories = []  # empty list in case utt2category_file is None
         self.batch_list = []
         for d, v in category2utt.items():
-            category_keys = v
+            category_keys = [keys[i] for i in v]
             # Decide batch-sizes
             start = 0
             batch_sizes = []
             while True:
-                k = category_keys[start]
-                factor = max(int(d[k][0] / m) for d, m in zip(utt2shapes, fold_lengths))
+                i = v[start]
+                factor = max(int(sh[i] / m) for sh, m in zip(lengths, fold_lengths))
                 bs = max(min_batch_size, int(batch_size / (1 + factor)))
                 if self.drop_last and start + bs > len(category_keys):
                     # This if-block avoids 0-batches
@@ -5,7 +5,7 @@ from typing import Union
 
 from typeguard import check_argument_types
 
-from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.fileio.indexed_text import load_sorted_shapes
 from espnet2.samplers.abs_sampler import AbsSampler
 
 
@@ -19,6 +19,7 @@ class LengthBatchSampler(AbsSampler):
         sort_batch: str = "ascending",
         drop_last: bool = False,
         padding: bool = True,
+        text_index: bool = False,
     ):
         assert check_argument_types()
         assert batch_bins > 0
@@ -40,44 +41,37 @@ class LengthBatchSampler(AbsSampler):
         # utt2shape: (Length, ...)
         #    uttA 100,...
         #    uttB 201,...
-        utt2shapes = [
-            load_num_sequence_text(s, loader_type="csv_int") for s in shape_files
-        ]
-
-        first_utt2shape = utt2shapes[0]
-        for s, d in zip(shape_files, utt2shapes):
-            if set(d) != set(first_utt2shape):
-                raise RuntimeError(
-                    f"keys are mismatched between {s} != {shape_files[0]}"
-                )
-
         # Sort samples in ascending order
         # (shape order should be like (Length, Dim))
-        keys = sorted(first_utt2shape, key=lambda k: first_utt2shape[k][0])
+        keys, shapes, _ = load_sorted_shapes(shape_files, text_index=text_index)
         if len(keys) == 0:
             raise RuntimeError(f"0 lines found: {shape_files[0]}")
+        lengths = [sh[:, 0].tolist() for sh in shapes]
 
         # Decide batch-sizes
         batch_sizes = []
-        current_batch_keys = []
-        for key in keys:
-            current_batch_keys.append(key)
+        current_batch_size = 0
+        current_bins = 0
+        for i in range(len(keys)):
+            current_batch_size += 1
             # shape: (Length, dim1, dim2, ...)
             if padding:
                 # bins = bs x max_length
-                bins = sum(len(current_batch_keys) * sh[key][0] for sh in utt2shapes)
+                bins = sum(current_batch_size * sh[i] for sh in lengths)
             else:
                 # bins = sum of lengths
-                bins = sum(d[k][0] for k in current_batch_keys for d in utt2shapes)
+                current_bins += sum(sh[i] for sh in lengths)
+                bins = current_bins
 
-            if bins > batch_bins and len(current_batch_keys) >= min_batch_size:
-                batch_sizes.append(len(current_batch_keys))
-                current_batch_keys = []
+            if bins > batch_bins and current_batch_size >= min_batch_size:
+                batch_sizes.append(current_batch_size)
+                current_batch_size = 0
+                current_bins = 0
         else:
-            if len(current_batch_keys) != 0 and (
+            if current_batch_size != 0 and (
                 not self.drop_last or len(batch_sizes) == 0
             ):
-                batch_sizes.append(len(current_batch_keys))
+                batch_sizes.append(current_batch_size)
 
         if len(batch_sizes) == 0:
             # Maybe we can't reach here
@@ -6,7 +6,7 @@ from typing import Union
 import numpy as np
 from typeguard import check_argument_types
 
-from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.fileio.indexed_text import load_sorted_shapes
 from espnet2.samplers.abs_sampler import AbsSampler
 
 
@@ -20,6 +20,7 @@ class NumElementsBatchSampler(AbsSampler):
         sort_batch: str = "ascending",
         drop_last: bool = False,
         padding: bool = True,
+        text_index: bool = False,
     ):
         assert check_argument_types()
         assert batch_bins > 0
@@ -41,59 +42,55 @@ class NumElementsBatchSampler(AbsSampler):
         # utt2shape: (Length, ...)
         #    uttA 100,...
         #    uttB 201,...
-        utt2shapes = [
-            load_num_sequence_text(s, loader_type="csv_int") for s in shape_files
-        ]
-
-        first_utt2shape = utt2shapes[0]
-        for s, d in zip(shape_files, utt2shapes):
-            if set(d) != set(first_utt2shape):
-                raise RuntimeError(
-                    f"keys are mismatched between {s} != {shape_files[0]}"
-                )
-
         # Sort samples in ascending order
         # (shape order should be like (Length, Dim))
-        keys = sorted(first_utt2shape, key=lambda k: first_utt2shape[k][0])
+        keys, shapes, widths = load_sorted_shapes(shape_files, text_index=text_index)
         if len(keys) == 0:
             raise RuntimeError(f"0 lines found: {shape_files[0]}")
+        lengths = [sh[:, 0].tolist() for sh in shapes]
         if padding:
             # If padding case, the feat-dim must be same over whole corpus,
             # therefore the first sample is referred
-            feat_dims = [np.prod(d[keys[0]][1:]) for d in utt2shapes]
+            for s, sh, w in zip(shape_files, shapes, widths):
+                if (w != w[0]).any() or (sh[:, 1:] != sh[0, 1:]).any():
+                    raise RuntimeError(
+                        "If padding=True, the "
+                        f"feature dimension must be unified: {s}",
+                    )
+            feat_dims = [np.prod(sh[0, 1 : w[0]]) for sh, w in zip(shapes, widths)]
+            numels = None
         else:
             feat_dims = None
+            # The number of the elements of each sample
+            numels = [
+                np.where(np.arange(sh.shape[1]) < w[:, None], sh, 1).prod(1).tolist()
+                for sh, w in zip(shapes, widths)
+            ]
 
         # Decide batch-sizes
         batch_sizes = []
-        current_batch_keys = []
-        for key in keys:
-            current_batch_keys.append(key)
+        current_batch_size = 0
+        current_bins = 0
+        for i in range(len(keys)):
+            current_batch_size += 1
             # shape: (Length, dim1, dim2, ...)
             if padding:
-                for d, s in zip(utt2shapes, shape_files):
-                    if tuple(d[key][1:]) != tuple(d[keys[0]][1:]):
-                        raise RuntimeError(
-                            "If padding=True, the "
-                            f"feature dimension must be unified: {s}",
-                        )
                 bins = sum(
-                    len(current_batch_keys) * sh[key][0] * d
-                    for sh, d in zip(utt2shapes, feat_dims)
+                    current_batch_size * sh[i] * d for sh, d in zip(lengths, feat_dims)
                 )
             else:
-                bins = sum(
-                    np.prod(d[k]) for k in current_batch_keys for d in utt2shapes
-                )
+                current_bins += sum(n[i] for n in numels)
+                bins = current_bins
 
-            if bins > batch_bins and len(current_batch_keys) >= min_batch_size:
-                batch_sizes.append(len(current_batch_keys))
-                current_batch_keys = []
+            if bins > batch_bins and current_batch_size >= min_batch_size:
+                batch_sizes.append(current_batch_size)
+                current_batch_size = 0
+                current_bins = 0
         else:
-            if len(current_batch_keys) != 0 and (
+            if current_batch_size != 0 and (
                 not self.drop_last or len(batch_sizes) == 0
             ):
-                batch_sizes.append(len(current_batch_keys))
+                batch_sizes.append(current_batch_size)
 
         if len(batch_sizes) == 0:
             # Maybe we can't reach here
@@ -4,7 +4,7 @@ from typing import Tuple
 
 from typeguard import check_argument_types
 
-from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.fileio.indexed_text import load_sorted_shapes
 from espnet2.samplers.abs_sampler import AbsSampler
 
 
@@ -16,6 +16,7 @@ class SortedBatchSampler(AbsSampler):
         shape_file:
         sort_in_batch: 'descending', 'ascending' or None.
         sort_batch:
+        text_index: Read the file via the memory-mapped index
     """
 
     def __init__(
@@ -25,6 +26,7 @@ class SortedBatchSampler(AbsSampler):
         sort_in_batch: str = "descending",
         sort_batch: str = "ascending",
         drop_last: bool = False,
+        text_index: bool = False,
     ):
         assert check_argument_types()
         assert batch_size > 0
@@ -37,18 +39,17 @@ class SortedBatchSampler(AbsSampler):
         # utt2shape: (Length, ...)
         #    uttA 100,...
         #    uttB 201,...
-        utt2shape = load_num_sequence_text(shape_file, loader_type="csv_int")
-        if sort_in_batch == "descending":
-            # Sort samples in descending order (required by RNN)
-            keys = sorted(utt2shape, key=lambda k: -utt2shape[k][0])
-        elif sort_in_batch == "ascending":
-            # Sort samples in ascending order
-            keys = sorted(utt2shape, key=lambda k: utt2shape[k][0])
-        else:
+        if sort_in_batch not in ("ascending", "descending"):
             raise ValueError(
                 f"sort_in_batch must be either one of "
                 f"ascending, descending, or None: {sort_in_batch}"
             )
+        # Sort samples in descending order (required by RNN) or ascending order
+        keys, _, _ = load_sorted_shapes(
+            [shape_file],
+            text_index=text_index,
+            descending=sort_in_batch == "descending",
+        )
         if len(keys) == 0:
             raise RuntimeError(f"0 lines found: {shape_file}")
 
@@ -4,6 +4,7 @@ from typing import Tuple
 
 from typeguard import check_argument_types
 
+from espnet2.fileio.indexed_text import IndexedTextReader
 from espnet2.fileio.read_text import read_2column_text
 from espnet2.samplers.abs_sampler import AbsSampler
 
@@ -19,6 +20,7 @@ class UnsortedBatchSampler(AbsSampler):
     Args:
         batch_size:
         key_file:
+        text_index: Read the files via the memory-mapped indices
     """
 
     def __init__(
@@ -27,6 +29,7 @@ class UnsortedBatchSampler(AbsSampler):
         key_file: str,
         drop_last: bool = False,
         utt2category_file: str = None,
+        text_index: bool = False,
     ):
         assert check_argument_types()
         assert batch_size > 0
@@ -37,7 +40,8 @@ class UnsortedBatchSampler(AbsSampler):
         # utt2shape:
         #    uttA <anything is o.k>
         #    uttB <anything is o.k>
-        utt2any = read_2column_text(key_file)
+        loader = IndexedTextReader if text_index else read_2column_text
+        utt2any = loader(key_file)
         if len(utt2any) == 0:
             logging.warning(f"{key_file} is empty")
         # In this case the, the first column in only used
@@ -47,7 +51,7 @@ class UnsortedBatchSampler(AbsSampler):
 
         category2utt = {}
         if utt2category_file is not None:
-            utt2category = read_2column_text(utt2category_file)
+            utt2category = loader(utt2category_file)
             if set(utt2category) != set(keys):
                 raise RuntimeError(
                     f"keys are mismatched between {utt2category_file} != {key_file}"
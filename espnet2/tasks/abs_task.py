@@ -4,16 +4,12 @@ import functools
 import logging
 import os
 import random
-import shutil
 import string
 import sys
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from datetime import datetime
 from distutils.version import LooseVersion
-from glob import glob
 from pathlib import Path, PurePath
-from time import time
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import humanfriendly
@@ -29,6 +25,7 @@ from torch.utils.data import DataLoader
 from typeguard import check_argument_types, check_return_type
 
 from espnet2.fileio.read_text import read_2column_text
+from espnet2.fileio.staged_ark_scp import SOURCES_FILE
 from espnet2.iterators.abs_iter_factory import AbsIterFactory
 from espnet2.iterators.chunk_iter_factory import ChunkIterFactory
 from espnet2.iterators.multiple_iter_factory import MultipleIterFactory
@@ -58,6 +55,7 @@ from espnet2.train.iterable_dataset import IterableESPnetDataset
 from espnet2.train.trainer import Trainer
 from espnet2.utils import config_argparse
 from espnet2.utils.build_dataclass import build_dataclass
+from espnet2.utils.feats_stager import FeatsStager
 from espnet2.utils.get_default_kwargs import get_default_kwargs
 from espnet2.utils.nested_dict_action import NestedDictAction
 from espnet2.utils.types import (
@@ -159,6 +157,13 @@ optim_classes = {k.lower(): v for k, v in optim_classes.items()}
 scheduler_classes = {k.lower(): v for k, v in scheduler_classes.items()}
 
 
+def _write_atomically(path: Path, lines: List[str]):
+    tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
 @dataclass
 class IteratorOptions:
     preprocess_fn: callable
@@ -310,6 +315,27 @@ any disk IO bottlenecks.",
             action="store_true",
             help="Recopies the feats to dir, even if they are present",
         )
+        group.add_argument(
+            "--copy_feats_num_workers",
+            default=4,
+            type=int,
+            help="The number of threads to copy the feats with --copy_feats_to_dir",
+        )
+        group.add_argument(
+            "--copy_feats_check",
+            default="size_mtime",
+            type=str,
+            choices=["size_mtime", "checksum"],
+            help="How to check that the feats present in --copy_feats_to_dir "
+            "are up to date",
+        )
+        group.add_argument(
+            "--copy_feats_background",
+            default=False,
+            type=str2bool,
+            help="Start training while copying the feats with --copy_feats_to_dir. "
+            "The feats not copied yet are read from the original paths",
+        )
 
         group.add_argument(
             "--safe_gpu",
@@ -366,6 +392,15 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             default=1,
             help="The number of workers used for DataLoader",
         )
+        group.add_argument(
+            "--prefetch_depth",
+            type=int,
+            default=0,
+            help="The number of mini-batches read and sent to the device "
+            "by a background thread ahead of the training. "
+            "The copies to CUDA are performed with pinned memory on another stream. "
+            "0 disables it",
+        )
         group.add_argument(
             "--num_att_plot",
             type=int,
@@ -452,6 +487,16 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             type=str2bool,
             help="Enable sharded training provided by fairscale",
         )
+        group.add_argument(
+            "--lazy_dist_sync",
+            default=False,
+            type=str2bool,
+            help="Avoid synchronizing the processes at every training iteration: "
+            "The iteration count of each epoch is decided at first "
+            "as the fewest ones of all the processes, and the stats are averaged "
+            "over the processes only at every log_interval. Note that the loss "
+            "is normalized by the weight of each process in this mode",
+        )
 
         group = parser.add_argument_group("cudnn mode related")
         group.add_argument(
@@ -486,6 +531,15 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             default=False,
             help='Write the output features from the model when "collect stats" mode',
         )
+        group.add_argument(
+            "--collected_feats_format",
+            type=str,
+            default="npy",
+            choices=["npy", "packed"],
+            help="The format of the collected feats. "
+            '"npy" writes a npy file per utterance and "packed" writes them into '
+            'a memory-mapped archive which can be read by "packed" data type',
+        )
 
         group = parser.add_argument_group("Trainer related")
         group.add_argument(
@@ -547,6 +601,24 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             default=0,
             help="The epoch interval to apply model averaging and save nbest models",
         )
+        group.add_argument(
+            "--async_checkpoint",
+            type=str2bool,
+            default=False,
+            help="Write the checkpoints in a background thread after copying them "
+            "to CPU memory. checkpoint.pth refers to the model file of the epoch "
+            "instead of including the model weights",
+        )
+        group.add_argument(
+            "--checkpoint_interval",
+            type=int,
+            default=0,
+            help="Save checkpoint.pth every the number iterations in each epoch "
+            "in addition to the end of each epoch. 0 disables it. "
+            "It must be a multiple of accum_grad. The training is resumed from "
+            "the middle of the epoch if the iterator supports it, "
+            "e.g. --iterator_type sequence or chunk",
+        )
         group.add_argument(
             "--grad_clip",
             type=float,
@@ -570,7 +642,8 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             "--accum_grad",
             type=int,
             default=1,
-            help="The number of gradient accumulation",
+            help="The number of gradient accumulation. In distributed training, "
+            "the gradients are all-reduced only at the last micro-batch",
         )
         group.add_argument(
             "--no_forward_run",
@@ -731,6 +804,15 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
 
         group.add_argument("--train_shape_file", type=str, action="append", default=[])
         group.add_argument("--valid_shape_file", type=str, action="append", default=[])
+        group.add_argument(
+            "--use_text_index",
+            type=str2bool,
+            default=False,
+            help="Read the shape files and utt2category files via memory-mapped "
+            "indices instead of loading them into dicts. The index is built "
+            "next to each file at the first time and reused by the following runs. "
+            "This reduces the start-up time and the memory for a large corpus.",
+        )
 
         group = parser.add_argument_group("Sequence iterator related")
         _batch_type_help = ""
@@ -840,6 +922,24 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             default=0.0,
             help="The maximum cache size for data loader. e.g. 10MB, 20GB.",
         )
+        group.add_argument(
+            "--cache_type",
+            type=str,
+            default="sized_dict",
+            choices=["sized_dict", "shared_memory"],
+            help="The backend of the cache for data loader. "
+            "'shared_memory' stores arrays in shared memory with eviction and "
+            "'sized_dict' uses multiprocessing.Manager and stops caching when full. "
+            "This option is valid only if --max_cache_size > 0",
+        )
+        group.add_argument(
+            "--cache_policy",
+            type=str,
+            default="lru",
+            choices=["lru", "clock"],
+            help="The eviction policy of the cache for data loader. "
+            "This option is valid only if --cache_type shared_memory",
+        )
         group.add_argument(
             "--max_cache_fd",
             type=int,
@@ -896,15 +996,20 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
     def copy_feats_to_dir(cls, args: argparse.Namespace) -> None:
         """Copies feats to the given dir (eg: /tmp/ in local machine
         or /mnt/ssd/), and updates the  path in feats.scp,
-        train_data_path_and_name_and_type ..."""
+        train_data_path_and_name_and_type ...
+
+        The ark files are copied in parallel, and the ones which are already
+        present and up to date are not copied again, so an interrupted
+        copying can be resumed. With --copy_feats_background true,
+        the training starts immediately and the ark files which are not copied
+        yet are read from their original paths."""
 
         user = os.environ.get("USER", "unk")
 
         base_dir = Path(args.copy_feats_to_dir) / user
         base_dir.mkdir(parents=True, exist_ok=True)
 
-        #  dict where key is local feat dir, value is empty lock file indicating reading
-        args.local_feat_dirs = {}
+        args.feats_stagers = []
 
         for i, tupl in enumerate(args.train_data_path_and_name_and_type):
             _path, _name, _type = tupl
@@ -913,15 +1018,14 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             if _name == "speech" and _type == "kaldi_ark":
 
                 sub_dir = base_dir / set_path.parent.name
-                sub_dir.mkdir(parents=True, exist_ok=True)
-                logging.info("Created directory {:s}".format(str(sub_dir)))
-
-                now = datetime.now()
-                time_str = now.strftime("%H%M%S_%f")
-                lock_fname = sub_dir / f"read_lock_{time_str}"
-                open(lock_fname, "w").close()
-                args.local_feat_dirs[sub_dir] = lock_fname
-                logging.info("Created read_lock file: {:s}".format(str(lock_fname)))
+                stager = FeatsStager(
+                    sub_dir,
+                    num_workers=args.copy_feats_num_workers,
+                    check=args.copy_feats_check,
+                    recopy=args.recopy,
+                )
+                stager.acquire()
+                args.feats_stagers.append(stager)
 
                 logging.info(
                     f"Copying {_type} feats to local feat dir: " + str(sub_dir)
@@ -929,7 +1033,7 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
 
                 data = read_2column_text(_path)
 
-                uniq_ark = {}  # {utt_id: [src_path, tgt_path], ...}
+                uniq_ark = {}  # {ark_base: [src_path, tgt_path], ...}
 
                 new_data = []
                 for utt_id, ark_line in data.items():
@@ -942,72 +1046,42 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
 
                     if ark_base not in uniq_ark:
                         uniq_ark[ark_base] = [src_ark_path, str(new_ark_path)]
-
-                n_copied = 1
-                stime = time()
-                for ark_base, (src_path, tgt_path) in uniq_ark.items():
-                    # one ark file contains feats to many utts
-                    if (os.path.exists(new_ark_path) is False) or (args.recopy is True):
-                        shutil.copyfile(src_path, tgt_path)
-                        logging.info(
-                            "{:4d}/{:4d} Copied: {:s} -> {:s}".format(
-                                n_copied,
-                                len(uniq_ark),
-                                src_path,
-                                tgt_path,
-                            )
-                        )
-                    else:
-                        logging.info(
-                            "{:s} already present. Not copying it again.".format(
-                                tgt_path
-                            )
+                    elif uniq_ark[ark_base][0] != src_ark_path:
+                        raise RuntimeError(
+                            f"{_path}: ark files have the same name: "
+                            f"{uniq_ark[ark_base][0]}, {src_ark_path}"
                         )
-                    n_copied += 1
-
-                logging.info(
-                    "Copying done in {:.2f} minutes".format((time() - stime) / 60.0)
-                )
-                new_feats_scp_file = sub_dir / "feats.scp"
 
                 if Path(set_path.parent, "utt2category").exists():
                     utt2category_file = str(Path(set_path.parent, "utt2category"))
                     tgt_utt2cat_file = sub_dir / "utt2category"
-                    shutil.copyfile(utt2category_file, str(tgt_utt2cat_file))
-                    logging.info(
-                        "Copied: {:s} -> {:s}".format(
-                            utt2category_file, str(tgt_utt2cat_file)
-                        )
-                    )
+                    stager.copy(utt2category_file, str(tgt_utt2cat_file))
 
-                with open(new_feats_scp_file, "w") as fpw:
-                    fpw.write("\n".join(new_data) + "\n")
+                # NOTE: The other jobs sharing sub_dir may be reading these files
+                new_feats_scp_file = sub_dir / "feats.scp"
+                _write_atomically(new_feats_scp_file, new_data)
+                _write_atomically(
+                    sub_dir / SOURCES_FILE,
+                    [f"{k} {v[0]}" for k, v in uniq_ark.items()],
+                )
+
+                stager.stage(
+                    list(uniq_ark.values()), background=args.copy_feats_background
+                )
 
                 args.train_data_path_and_name_and_type[i] = (
                     str(new_feats_scp_file),
                     _name,
-                    _type,
+                    "kaldi_ark_staged" if args.copy_feats_background else _type,
                 )
 
     @classmethod
     def remove_temp_feats_dir(cls, args: argparse.Namespace) -> None:
-        """Remove local feats dir where feats were copied"""
-
-        for local_feat_dir, lock_fname in args.local_feat_dirs.items():
-            if os.path.exists(lock_fname):
-                # remove the read_lock file created by this job
-                os.remove(lock_fname)
-                logging.info("Removed lock file: " + str(lock_fname))
-                lock_files = glob(str(local_feat_dir) + "/read_lock_*")
-                if len(lock_files) == 0:
-                    shutil.rmtree(str(local_feat_dir))
-                    logging.info("Removed local feat dir : " + str(local_feat_dir))
-                else:
-                    logging.info(
-                        "Not removing local feat dir {:s}. {:d} other read_lock file(s) were found.".format(
-                            str(local_feat_dir), len(lock_files)
-                        )
-                    )
+        """Remove local feats dir where feats were copied
+        unless the other jobs are using it"""
+
+        for stager in args.feats_stagers:
+            stager.release()
 
     @classmethod
     def build_optimizers(
@@ -1386,6 +1460,8 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
                 ngpu=args.ngpu,
                 log_interval=args.log_interval,
                 write_collected_feats=args.write_collected_feats,
+                collected_feats_format=args.collected_feats_format,
+                prefetch_depth=args.prefetch_depth,
             )
         else:
             # 6. Loads pre-trained model
@@ -1656,6 +1732,8 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             preprocess=iter_options.preprocess_fn,
             max_cache_size=iter_options.max_cache_size,
             max_cache_fd=iter_options.max_cache_fd,
+            cache_type=args.cache_type,
+            cache_policy=args.cache_policy,
         )
         cls.check_task_requirements(
             dataset, args.allow_variable_data_keys, train=iter_options.train
@@ -1685,6 +1763,7 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             if iter_options.distributed
             else 1,
             utt2category_file=utt2category_file,
+            text_index=args.use_text_index,
         )
 
         batches = list(batch_sampler)
@@ -1737,6 +1816,8 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
             preprocess=iter_options.preprocess_fn,
             max_cache_size=iter_options.max_cache_size,
             max_cache_fd=iter_options.max_cache_fd,
+            cache_type=args.cache_type,
+            cache_policy=args.cache_policy,
         )
         cls.check_task_requirements(
             dataset, args.allow_variable_data_keys, train=iter_options.train
@@ -1747,7 +1828,9 @@ When using this option, other ways to set CUDA_VISIBLE_DEVICES must not be used.
         else:
             key_file = iter_options.shape_files[0]
 
-        batch_sampler = UnsortedBatchSampler(batch_size=1, key_file=key_file)
+        batch_sampler = UnsortedBatchSampler(
+            batch_size=1, key_file=key_file, text_index=args.use_text_index
+        )
         batches = list(batch_sampler)
         if iter_options.num_batches is not None:
             batches = batches[: iter_options.num_batches]
@@ -65,6 +65,7 @@ from espnet2.tasks.abs_task import AbsTask
 from espnet2.text.phoneme_tokenizer import g2p_choices
 from espnet2.torch_utils.initialize import initialize
 from espnet2.train.abs_espnet_model import AbsESPnetModel
+from espnet2.train.batch_augmentor import BatchAugmentor
 from espnet2.train.class_choices import ClassChoices
 from espnet2.train.collate_fn import CommonCollateFn
 from espnet2.train.preprocessor import CommonPreprocessor
@@ -317,6 +318,14 @@ class ASRTask(AbsTask):
             default="13_15",
             help="The range of noise decibel level.",
         )
+        parser.add_argument(
+            "--batch_augment",
+            type=str2bool,
+            default=False,
+            help="Apply the RIR convolution and the noise adding to the padded "
+            "mini-batches after the collation instead of each utterance in "
+            "the preprocessor. The RIR and noise files are kept in memory",
+        )
 
         for class_choices in cls.class_choices_list:
             # Append --<name> and --<name>_conf.
@@ -331,8 +340,21 @@ class ASRTask(AbsTask):
         Tuple[List[str], Dict[str, torch.Tensor]],
     ]:
         assert check_argument_types()
+        if train and getattr(args, "batch_augment", False):
+            augmentor = BatchAugmentor(
+                rir_scp=args.rir_scp,
+                rir_apply_prob=args.rir_apply_prob,
+                noise_scp=args.noise_scp,
+                noise_apply_prob=args.noise_apply_prob,
+                noise_db_range=args.noise_db_range,
+                seed=args.seed,
+            )
+        else:
+            augmentor = None
         # NOTE(kamo): int value = 0 is reserved by CTC-blank symbol
-        return CommonCollateFn(float_pad_value=0.0, int_pad_value=-1)
+        return CommonCollateFn(
+            float_pad_value=0.0, int_pad_value=-1, augmentor=augmentor
+        )
 
     @classmethod
     def build_preprocess_fn(
@@ -340,6 +362,8 @@ class ASRTask(AbsTask):
     ) -> Optional[Callable[[str, Dict[str, np.array]], Dict[str, np.ndarray]]]:
         assert check_argument_types()
         if args.use_preprocessor:
+            # The augmentation is applied by the collate_fn instead
+            batch_augment = getattr(args, "batch_augment", False)
             retval = CommonPreprocessor(
                 train=train,
                 token_type=args.token_type,
@@ -350,11 +374,15 @@ class ASRTask(AbsTask):
                 input_token_list_ftype=args.input_token_list_ftype,
                 g2p_type=args.g2p,
                 # NOTE(kamo): Check attribute existence for backward compatibility
-                rir_scp=args.rir_scp if hasattr(args, "rir_scp") else None,
+                rir_scp=args.rir_scp
+                if hasattr(args, "rir_scp") and not batch_augment
+                else None,
                 rir_apply_prob=args.rir_apply_prob
                 if hasattr(args, "rir_apply_prob")
                 else 1.0,
-                noise_scp=args.noise_scp if hasattr(args, "noise_scp") else None,
+                noise_scp=args.noise_scp
+                if hasattr(args, "noise_scp") and not batch_augment
+                else None,
                 noise_apply_prob=args.noise_apply_prob
                 if hasattr(args, "noise_apply_prob")
                 else 1.0,
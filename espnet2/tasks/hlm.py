@@ -296,6 +296,8 @@ class HLMTask(AbsTask):
             preprocess=iter_options.preprocess_fn,
             max_cache_size=iter_options.max_cache_size,
             max_cache_fd=iter_options.max_cache_fd,
+            cache_type=args.cache_type,
+            cache_policy=args.cache_policy,
             preserve_lid=True,
             lid2int=args.lid2int,
         )
@@ -6,7 +6,14 @@ import torch
 
 
 def to_device(data, device=None, dtype=None, non_blocking=False, copy=False):
-    """Change the device of object recursively"""
+    """Change the device of object recursively
+
+    If non_blocking=True, the CPU tensors are pinned before the copy to CUDA,
+    so the copy is asynchronous with respect to the host.
+    Note that the copied tensors must not be used by the other CUDA streams
+    until the copy is finished, e.g. via torch.cuda.Stream.wait_stream().
+
+    """
     if isinstance(data, dict):
         return {
             k: to_device(v, device, dtype, non_blocking, copy) for k, v in data.items()
@@ -28,11 +35,41 @@ def to_device(data, device=None, dtype=None, non_blocking=False, copy=False):
     elif isinstance(data, np.ndarray):
         return to_device(torch.from_numpy(data), device, dtype, non_blocking, copy)
     elif isinstance(data, torch.Tensor):
+        if (
+            non_blocking
+            and device is not None
+            and torch.device(device).type == "cuda"
+            and data.device.type == "cpu"
+            and not data.is_pinned()
+        ):
+            # The copy from the pageable memory blocks the host
+            data = data.pin_memory()
         return data.to(device, dtype, non_blocking, copy)
     else:
         return data
 
 
+def record_stream(data, stream: "torch.cuda.Stream"):
+    """Mark the CUDA tensors of object recursively as used by the stream
+
+    This is needed for the tensors allocated in a stream and used in another
+    stream, so that their memory is not reused until the work queued
+    on the stream is finished.
+
+    """
+    if isinstance(data, dict):
+        for v in data.values():
+            record_stream(v, stream)
+    elif dataclasses.is_dataclass(data) and not isinstance(data, type):
+        for field in dataclasses.fields(data):
+            record_stream(getattr(data, field.name), stream)
+    elif isinstance(data, (list, tuple)):
+        for v in data:
+            record_stream(v, stream)
+    elif isinstance(data, torch.Tensor) and data.is_cuda:
+        data.record_stream(stream)
+
+
 def force_gatherable(data, device):
     """Change object to gatherable in torch.nn.DataParallel recursively
 
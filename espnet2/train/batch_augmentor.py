@@ -0,0 +1,342 @@
+"""Waveform augmentation applied to padded mini-batches."""
+from distutils.version import LooseVersion
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+import zlib
+
+import numpy as np
+import soundfile
+import torch
+from typeguard import check_argument_types
+
+is_torch_1_7_plus = LooseVersion(torch.__version__) >= LooseVersion("1.7")
+if is_torch_1_7_plus:
+    import torch.fft
+
+
+def read_scp_paths(scp: str) -> List[str]:
+    """Read the paths of "<key> <path>" or "<path>" lines."""
+    paths = []
+    with open(scp, "r", encoding="utf-8") as f:
+        for line in f:
+            sps = line.strip().split(None, 1)
+            if len(sps) == 1:
+                paths.append(sps[0])
+            elif len(sps) == 2:
+                paths.append(sps[1])
+    return paths
+
+
+def fft_convolve(x: torch.Tensor, h: torch.Tensor) -> torch.Tensor:
+    """Convolve the signals with the filters along the last axis via FFT.
+
+    Args:
+        x: Signals (..., T)
+        h: Filters (..., L), broadcastable to x except for the last axis
+    Returns:
+        The first T samples of the full convolution (..., T)
+
+    """
+    n = x.size(-1) + h.size(-1) - 1
+    # The power of 2 is the fastest size for FFT
+    n_fft = 1 << (n - 1).bit_length()
+    if is_torch_1_7_plus:
+        y = torch.fft.irfft(
+            torch.fft.rfft(x, n=n_fft) * torch.fft.rfft(h, n=n_fft), n=n_fft
+        )
+    else:
+        # X, H: (..., F, 2)
+        X = torch.rfft(torch.nn.functional.pad(x, (0, n_fft - x.size(-1))), 1)
+        H = torch.rfft(torch.nn.functional.pad(h, (0, n_fft - h.size(-1))), 1)
+        Y = torch.stack(
+            [
+                X[..., 0] * H[..., 0] - X[..., 1] * H[..., 1],
+                X[..., 0] * H[..., 1] + X[..., 1] * H[..., 0],
+            ],
+            dim=-1,
+        )
+        y = torch.irfft(Y, 1, signal_sizes=(n_fft,))
+    return y[..., : x.size(-1)]
+
+
+def non_silence_power(
+    x: torch.Tensor,
+    lengths: torch.Tensor,
+    threshold: float = 0.01,
+    frame_length: int = 1024,
+    frame_shift: int = 512,
+) -> torch.Tensor:
+    """Calculate the power of the non-silence region of the padded signals.
+
+    The region is detected by the same way as
+    espnet2.train.preprocessor.detect_non_silence() for each signal.
+
+    Args:
+        x: Padded signals (B, C, T)
+        lengths: (B,)
+    Returns:
+        power: (B,)
+
+    """
+    B, C, T = x.size()
+    arange = torch.arange(T, device=x.device)
+    mask = (arange[None, :] < lengths[:, None])[:, None, :]
+    x = x.masked_fill(~mask, 0.0)
+
+    # The number of the frames of each signal padded to an integer number of frames
+    num_frames = (
+        torch.ceil((lengths - frame_length).clamp(min=0).float() / frame_shift).long()
+        + 1
+    )
+    max_frames = int(num_frames.max())
+    pad = (max_frames - 1) * frame_shift + frame_length - T
+    if pad > 0:
+        x_pad = torch.nn.functional.pad(x, (0, pad))
+    else:
+        x_pad = x[..., : (max_frames - 1) * frame_shift + frame_length]
+    # power: (B, C, F)
+    power = (x_pad.unfold(-1, frame_length, frame_shift) ** 2).mean(-1)
+    frame_mask = (
+        torch.arange(max_frames, device=x.device)[None, :] < num_frames[:, None]
+    )[:, None, :]
+    power = power.masked_fill(~frame_mask, 0.0)
+    # mean_power: (B, C, 1)
+    mean_power = power.sum(-1, keepdim=True) / num_frames[:, None, None]
+    detect = power / mean_power.clamp(min=1e-30) > threshold
+    # Regard the whole signal as non-silence if too short or all zero
+    all_true = (lengths < frame_length)[:, None, None] | (mean_power == 0.0).all(
+        1, keepdim=True
+    )
+    detect = detect | all_true
+
+    # The samples after the last frame belong to the last frame
+    index = torch.arange(
+        (T + frame_shift - 1) // frame_shift, device=x.device
+    ).repeat_interleave(frame_shift)
+    index = torch.min(index[None, :T], (num_frames - 1)[:, None])
+    detect = detect.gather(-1, index[:, None, :].expand(B, C, T)) & mask
+    count = detect.sum((1, 2)).clamp(min=1)
+    return (x**2 * detect).sum((1, 2)) / count
+
+
+class BatchAugmentor:
+    """Convolve RIRs and add noises to the padded waveforms of a mini-batch.
+
+    This is the batched counterpart of the augmentation of CommonPreprocessor.
+    The RIRs are convolved with all the utterances of a mini-batch at once
+    by FFT in float32, and the RIR and noise files are read only once
+    in each process, e.g. each DataLoader worker, and kept in memory.
+    The random choices for each utterance are decided by the random generator
+    seeded with the seed, the epoch, and the utterance ID, so they don't depend on
+    the composition of the mini-batches and the workers.
+
+    Examples:
+        >>> augmentor = BatchAugmentor(rir_scp="data/rirs.scp", seed=0)
+        >>> collate_fn = CommonCollateFn(augmentor=augmentor)
+        >>> collate_fn.set_epoch(epoch)
+        >>> uttids, batch = collate_fn([dataset[key] for key in keys])
+
+    Args:
+        rir_scp: The file of the paths of the RIR files.
+        rir_apply_prob: The probability for applying RIR convolution.
+        noise_scp: The file of the paths of the noise files.
+        noise_apply_prob: The probability applying noise adding.
+        noise_db_range: The range of SNR in dB, e.g. "3_10" -> [3dB, 10dB].
+        speech_name: The name of the waveforms in the mini-batch.
+        seed: The seed of the random choices.
+
+    """
+
+    def __init__(
+        self,
+        rir_scp: Optional[str] = None,
+        rir_apply_prob: float = 1.0,
+        noise_scp: Optional[str] = None,
+        noise_apply_prob: float = 1.0,
+        noise_db_range: str = "3_10",
+        speech_name: str = "speech",
+        seed: int = 0,
+    ):
+        assert check_argument_types()
+        self.rir_paths = read_scp_paths(rir_scp) if rir_scp is not None else None
+        self.rir_apply_prob = rir_apply_prob
+        self.noise_paths = read_scp_paths(noise_scp) if noise_scp is not None else None
+        self.noise_apply_prob = noise_apply_prob
+        sps = noise_db_range.split("_")
+        if len(sps) == 1:
+            self.noise_db_low = self.noise_db_high = float(sps[0])
+        elif len(sps) == 2:
+            self.noise_db_low, self.noise_db_high = float(sps[0]), float(sps[1])
+        else:
+            raise ValueError(
+                f"Format error: '{noise_db_range}' e.g. -3_4 -> [-3db,4db]"
+            )
+        self.speech_name = speech_name
+        self.seed = seed
+        self.epoch = 0
+
+        # The waveforms (C, T) of the files loaded at the first mini-batch
+        self._rirs = None
+        self._noises = None
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}("
+            f"num_rirs={len(self.rir_paths or [])}, "
+            f"rir_apply_prob={self.rir_apply_prob}, "
+            f"num_noises={len(self.noise_paths or [])}, "
+            f"noise_apply_prob={self.noise_apply_prob}, "
+            f"noise_db_range={self.noise_db_low}_{self.noise_db_high})"
+        )
+
+    def __getstate__(self):
+        # Don't send the loaded waveforms to the spawned workers
+        state = self.__dict__.copy()
+        state["_rirs"] = None
+        state["_noises"] = None
+        return state
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    @staticmethod
+    def _load(paths: Sequence[str]) -> List[np.ndarray]:
+        # (T, C) -> (C, T)
+        return [
+            np.ascontiguousarray(
+                soundfile.read(p, dtype=np.float32, always_2d=True)[0].T
+            )
+            for p in paths
+        ]
+
+    def _rng(self, uttid: str) -> np.random.RandomState:
+        key = f"{self.seed}_{self.epoch}_{uttid}".encode("utf-8")
+        return np.random.RandomState(zlib.crc32(key))
+
+    @staticmethod
+    def _match_channels(x: np.ndarray, num_channels: int, path: str) -> np.ndarray:
+        if x.shape[0] == num_channels:
+            return x
+        if x.shape[0] == 1:
+            return np.broadcast_to(x, (num_channels, x.shape[1]))
+        raise ValueError(
+            f"The number of the channels of {path} is {x.shape[0]}, "
+            f"but the speech has {num_channels} channels"
+        )
+
+    def __call__(
+        self, uttids: Sequence[str], batch: Dict[str, torch.Tensor]
+    ) -> Dict[str, torch.Tensor]:
+        """Augment the waveforms of the mini-batch.
+
+        Args:
+            uttids: The utterance IDs of the mini-batch.
+            batch: The mini-batch having the padded waveforms (B, T) or (B, T, C)
+                and their lengths.
+
+        Returns:
+            The mini-batch with the augmented waveforms of the same shape.
+
+        """
+        if self.speech_name not in batch or (
+            self.rir_paths is None and self.noise_paths is None
+        ):
+            return batch
+        if self.rir_paths is not None and self._rirs is None:
+            self._rirs = self._load(self.rir_paths)
+        if self.noise_paths is not None and self._noises is None:
+            self._noises = self._load(self.noise_paths)
+
+        speech = batch[self.speech_name]
+        lengths = batch[self.speech_name + "_lengths"]
+        # x: (B, C, T)
+        if speech.dim() == 2:
+            x = speech[:, None, :]
+        else:
+            x = speech.transpose(1, 2)
+        x = x.float()
+        B, C, T = x.size()
+        mask = (torch.arange(T, device=x.device)[None, :] < lengths[:, None])[
+            :, None, :
+        ]
+        x = x.masked_fill(~mask, 0.0)
+        power = non_silence_power(x, lengths)
+
+        # Decide the random choices in the same order as CommonPreprocessor
+        rirs = [None] * B
+        noises = [None] * B
+        noise_dbs = np.zeros(B, dtype=np.float32)
+        for b, uttid in enumerate(uttids):
+            rng = self._rng(uttid)
+            if (
+                self.rir_paths is not None
+                and self.rir_apply_prob >= rng.random_sample()
+            ):
+                i = rng.randint(len(self._rirs))
+                rirs[b] = self._match_channels(self._rirs[i], C, self.rir_paths[i])
+            if (
+                self.noise_paths is not None
+                and self.noise_apply_prob >= rng.random_sample()
+            ):
+                i = rng.randint(len(self._noises))
+                noise_dbs[b] = rng.uniform(self.noise_db_low, self.noise_db_high)
+                noise = self._match_channels(self._noises[i], C, self.noise_paths[i])
+                nsamples = int(lengths[b])
+                frames = noise.shape[1]
+                if frames == nsamples:
+                    pass
+                elif frames < nsamples:
+                    # Repeat noise
+                    offset = rng.randint(0, nsamples - frames)
+                    noise = np.pad(
+                        noise, [(0, 0), (offset, nsamples - frames - offset)], "wrap"
+                    )
+                else:
+                    offset = rng.randint(0, frames - nsamples)
+                    noise = noise[:, offset : offset + nsamples]
+                noises[b] = noise
+
+        # 1. Convolve RIR
+        indices = [b for b in range(B) if rirs[b] is not None]
+        if len(indices) > 0:
+            h = np.zeros(
+                (len(indices), C, max(rirs[b].shape[1] for b in indices)),
+                dtype=np.float32,
+            )
+            for i, b in enumerate(indices):
+                h[i, :, : rirs[b].shape[1]] = rirs[b]
+            index = torch.tensor(indices, device=x.device)
+            y = fft_convolve(x[index], torch.from_numpy(h).to(x.device))
+            y = y.masked_fill(~mask[index], 0.0)
+            # Reverse mean power to the original power
+            power2 = non_silence_power(y, lengths[index])
+            y = y * torch.sqrt(power[index] / power2.clamp(min=1e-10))[:, None, None]
+            x = x.index_copy(0, index, y)
+
+        # 2. Add Noise
+        indices = [b for b in range(B) if noises[b] is not None]
+        if len(indices) > 0:
+            n = np.zeros((len(indices), C, T), dtype=np.float32)
+            for i, b in enumerate(indices):
+                n[i, :, : noises[b].shape[1]] = noises[b]
+            index = torch.tensor(indices, device=x.device)
+            n = torch.from_numpy(n).to(x.device)
+            noise_power = (n**2).sum((1, 2)) / (C * lengths[index])
+            scale = (
+                torch.from_numpy(10 ** (-noise_dbs[indices] / 20)).to(x.device)
+                * torch.sqrt(power[index])
+                / torch.sqrt(noise_power.clamp(min=1e-10))
+            )
+            x = x.index_add(0, index, scale[:, None, None] * n)
+
+        ma = x.abs().view(B, -1).max(1)[0].clamp(min=1.0)
+        x = x / ma[:, None, None]
+
+        if speech.dim() == 2:
+            x = x[:, 0, :]
+        else:
+            x = x.transpose(1, 2)
+        batch[self.speech_name] = x.to(speech.dtype)
+        return batch
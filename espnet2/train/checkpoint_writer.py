@@ -0,0 +1,178 @@
+"""Checkpoint writer module."""
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import os
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+import torch
+from typeguard import check_argument_types
+
+
+def save_atomic(obj: Any, path: Union[Path, str]):
+    """Save the object via a temporary file, so the file is always complete."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    try:
+        torch.save(obj, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+
+
+def _remove(path: Union[Path, str]):
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+
+
+class CheckpointWriter:
+    """Writer of checkpoints in a background thread.
+
+    At save(), the tensors of the object are copied to CPU memory,
+    which is pinned if CUDA is available, and the copies are serialized
+    by the background thread while the training goes on.
+    The buffers of the copies are reused by the next save() of the same key
+    after waiting for the previous writing with them.
+    The files are written to temporary files and renamed,
+    so the existing checkpoints are never broken by interrupted writing.
+
+    Examples:
+        >>> writer = CheckpointWriter()
+        >>> writer.save(model.state_dict(), "exp/1epoch.pth", key="model")
+        >>> # The model can be updated here
+        >>> writer.wait()
+
+    Args:
+        async_write: If False, write the files in save() without copying
+        pin_memory: Use the pinned memory for the copies.
+            If None, it's used if CUDA is available.
+
+    """
+
+    def __init__(self, async_write: bool = True, pin_memory: Optional[bool] = None):
+        assert check_argument_types()
+        if pin_memory is None:
+            pin_memory = torch.cuda.is_available()
+        self.async_write = async_write
+        self.pin_memory = pin_memory
+
+        self.executor = ThreadPoolExecutor(max_workers=1) if async_write else None
+        self.futures: Dict[str, Future] = {}
+        self.buffers: Dict[str, List[torch.Tensor]] = {}
+
+    def snapshot(self, obj: Any, key: str = None) -> Any:
+        """Copy the object recursively with its tensors in CPU memory.
+
+        Args:
+            obj: The object, e.g. a state_dict
+            key: The key of the buffers to reuse
+
+        """
+        buffers = self.buffers.get(key, [])
+        new_buffers = []
+        memo = {}
+        use_cuda = False
+
+        def _copy(o):
+            nonlocal use_cuda
+            if isinstance(o, torch.Tensor):
+                # Keep the sharing of the tensors, e.g. tied weights
+                if id(o) in memo:
+                    return memo[id(o)]
+                i = len(new_buffers)
+                if (
+                    i < len(buffers)
+                    and buffers[i].size() == o.size()
+                    and buffers[i].dtype == o.dtype
+                ):
+                    buf = buffers[i]
+                else:
+                    buf = torch.empty(
+                        o.size(),
+                        dtype=o.dtype,
+                        pin_memory=self.pin_memory and o.is_cuda,
+                    )
+                use_cuda |= o.is_cuda
+                buf.copy_(o.detach(), non_blocking=True)
+                new_buffers.append(buf)
+                memo[id(o)] = buf
+                return buf
+            elif isinstance(o, dict):
+                retval = type(o)((k, _copy(v)) for k, v in o.items())
+                if hasattr(o, "_metadata"):
+                    # e.g. The versions of the modules in state_dict()
+                    retval._metadata = copy.deepcopy(o._metadata)
+                return retval
+            elif isinstance(o, (list, tuple)) and type(o) in (list, tuple):
+                return type(o)(_copy(v) for v in o)
+            else:
+                return copy.deepcopy(o)
+
+        retval = _copy(obj)
+        if use_cuda:
+            torch.cuda.synchronize()
+        if key is not None:
+            self.buffers[key] = new_buffers
+        return retval
+
+    def save(self, obj: Any, path: Union[Path, str], key: str = None):
+        """Save the object to the file.
+
+        Args:
+            obj: The object to save by torch.save()
+            path: The output file
+            key: The key of the buffers of the copies, e.g. "model" for
+                the model files of all epochs. If None, the path is used.
+
+        """
+        if not self.async_write:
+            save_atomic(obj, path)
+            return
+
+        if key is None:
+            key = str(path)
+        # Wait for the previous writing using the buffers
+        self._wait(key)
+        obj = self.snapshot(obj, key)
+        self.futures[key] = self.executor.submit(save_atomic, obj, path)
+
+    def remove(self, path: Union[Path, str]):
+        """Remove the file after all the writing requested before it.
+
+        The checkpoints being written may refer to the file,
+        so it's kept until they are completed.
+
+        """
+        if not self.async_write:
+            _remove(path)
+            return
+        key = f"remove:{path}"
+        self._wait(key)
+        self.futures[key] = self.executor.submit(_remove, path)
+
+    def _wait(self, key: str):
+        future = self.futures.pop(key, None)
+        if future is not None:
+            future.result()
+
+    def wait(self):
+        """Wait for all the writing, and raise the error of them if any."""
+        for key in list(self.futures):
+            self._wait(key)
+
+    def close(self):
+        """Wait for all the writing and shut down the thread."""
+        if self.executor is not None:
+            try:
+                self.wait()
+            finally:
+                self.executor.shutdown()
+                self.executor = None
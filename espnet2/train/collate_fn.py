@@ -1,6 +1,9 @@
+from typing import Callable
 from typing import Collection
 from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Sequence
 from typing import Tuple
 from typing import Union
 
@@ -20,11 +23,20 @@ class CommonCollateFn:
         float_pad_value: Union[float, int] = 0.0,
         int_pad_value: int = -32768,
         not_sequence: Collection[str] = (),
+        augmentor: Optional[
+            Callable[[Sequence[str], Dict[str, torch.Tensor]], Dict[str, torch.Tensor]]
+        ] = None,
     ):
         assert check_argument_types()
         self.float_pad_value = float_pad_value
         self.int_pad_value = int_pad_value
         self.not_sequence = set(not_sequence)
+        self.augmentor = augmentor
+
+    def set_epoch(self, epoch: int):
+        """Set the epoch of the random augmentation of the mini-batches."""
+        if self.augmentor is not None and hasattr(self.augmentor, "set_epoch"):
+            self.augmentor.set_epoch(epoch)
 
     def __repr__(self):
         return (
@@ -35,12 +47,17 @@ class CommonCollateFn:
     def __call__(
         self, data: Collection[Tuple[str, Dict[str, np.ndarray]]]
     ) -> Tuple[List[str], Dict[str, torch.Tensor]]:
-        return common_collate_fn(
+        uttids, batch = common_collate_fn(
             data,
             float_pad_value=self.float_pad_value,
             int_pad_value=self.int_pad_value,
             not_sequence=self.not_sequence,
         )
+        if self.augmentor is not None:
+            # uttids is (uttids, lid) in multilingual mode
+            keys = uttids[0] if isinstance(uttids, tuple) else uttids
+            batch = self.augmentor(keys, batch)
+        return uttids, batch
 
 
 def common_collate_fn(
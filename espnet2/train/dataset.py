@@ -25,13 +25,18 @@ from torch.utils.data.dataset import Dataset
 from typeguard import check_argument_types
 from typeguard import check_return_type
 
+from espnet2.fileio.indexed_text import IndexedKaldiArkReader
+from espnet2.fileio.indexed_text import IndexedTextReader
 from espnet2.fileio.npy_scp import NpyScpReader
+from espnet2.fileio.packed_archive import PackedArchiveReader
 from espnet2.fileio.rand_gen_dataset import FloatRandomGenerateDataset
 from espnet2.fileio.rand_gen_dataset import IntRandomGenerateDataset
+from espnet2.fileio.staged_ark_scp import StagedArkScpReader
 from espnet2.fileio.read_text import load_num_sequence_text
 from espnet2.fileio.read_text import read_2column_text
 from espnet2.fileio.rttm import RttmReader
 from espnet2.fileio.sound_scp import SoundScpReader
+from espnet2.utils.shared_memory_cache import SharedMemoryCache
 from espnet2.utils.sized_dict import SizedDict
 
 
@@ -127,6 +132,16 @@ def kaldi_loader(path, float_dtype=None, max_cache_fd: int = 0):
     return AdapterForSoundScpReader(loader, float_dtype)
 
 
+def indexed_kaldi_loader(path, float_dtype=None):
+    loader = IndexedKaldiArkReader(path)
+    return AdapterForSoundScpReader(loader, float_dtype)
+
+
+def staged_kaldi_loader(path, float_dtype=None):
+    loader = StagedArkScpReader(path)
+    return AdapterForSoundScpReader(loader, float_dtype)
+
+
 def rand_int_loader(filepath, loader_type):
     # e.g. rand_int_3_10
     try:
@@ -146,6 +161,28 @@ DATA_TYPES = {
         "   utterance_id_b b.wav\n"
         "   ...",
     ),
+    # NOTE: The types are matched by prefix, so these must precede "kaldi_ark"
+    "kaldi_ark_indexed": dict(
+        func=indexed_kaldi_loader,
+        kwargs=[],
+        help="Kaldi-ark file type read via a memory-mapped index of the scp file, "
+        "which is built next to it at the first time and shared by the processes."
+        "\n\n"
+        "   utterance_id_A /some/where/a.ark:123\n"
+        "   utterance_id_B /some/where/a.ark:456\n"
+        "   ...",
+    ),
+    "kaldi_ark_staged": dict(
+        func=staged_kaldi_loader,
+        kwargs=[],
+        help="Kaldi-ark file type whose ark files are being copied "
+        "to a local directory. The ark files not copied yet are read from "
+        "the sources listed in 'ark_sources' in the same directory."
+        "\n\n"
+        "   utterance_id_A /local/dir/a.ark:123\n"
+        "   utterance_id_B /local/dir/a.ark:456\n"
+        "   ...",
+    ),
     "kaldi_ark": dict(
         func=kaldi_loader,
         kwargs=["max_cache_fd"],
@@ -164,6 +201,18 @@ DATA_TYPES = {
         "   utterance_id_B /some/where/b.npy\n"
         "   ...",
     ),
+    "packed": dict(
+        func=PackedArchiveReader,
+        kwargs=[],
+        help="Packed feature archive, in which the arrays are written into "
+        "a data file and read as zero-copy views of its memory-map. "
+        "The value is 'path:offset:dtype:shape'. "
+        "Use espnet2.bin.pack_feats to convert the other types."
+        "\n\n"
+        "   utterance_id_A /some/where/feats.pack:0:<f4:100,80\n"
+        "   utterance_id_B /some/where/feats.pack:32000:<f4:50,80\n"
+        "   ...",
+    ),
     "text_int": dict(
         func=functools.partial(load_num_sequence_text, loader_type="text_int"),
         kwargs=[],
@@ -204,6 +253,16 @@ DATA_TYPES = {
         "   utterance_id_B 3.,3.12,1.1\n"
         "   ...",
     ),
+    "text_indexed": dict(
+        func=IndexedTextReader,
+        kwargs=[],
+        help="Return text as is via a memory-mapped index of the file, "
+        "which is built next to it at the first time and shared by the processes."
+        "\n\n"
+        "   utterance_id_A hello world\n"
+        "   utterance_id_B foo bar\n"
+        "   ...",
+    ),
     "text": dict(
         func=read_2column_text,
         kwargs=[],
@@ -293,6 +352,8 @@ class ESPnetDataset(AbsDataset):
         int_dtype: str = "long",
         max_cache_size: Union[float, int, str] = 0.0,
         max_cache_fd: int = 0,
+        cache_type: str = "sized_dict",
+        cache_policy: str = "lru",
     ):
         assert check_argument_types()
         if len(path_name_type_list) == 0:
@@ -324,10 +385,18 @@ class ESPnetDataset(AbsDataset):
         if isinstance(max_cache_size, str):
             max_cache_size = humanfriendly.parse_size(max_cache_size)
         self.max_cache_size = max_cache_size
-        if max_cache_size > 0:
+        if max_cache_size <= 0:
+            self.cache = None
+        elif cache_type == "sized_dict" or not np.isfinite(max_cache_size):
             self.cache = SizedDict(shared=True)
+        elif cache_type == "shared_memory":
+            self.cache = SharedMemoryCache(
+                keys=self.loader_dict[path_name_type_list[0][1]],
+                max_size=max_cache_size,
+                policy=cache_policy,
+            )
         else:
-            self.cache = None
+            raise ValueError(f"Not supported: cache_type={cache_type}")
 
     def _build_loader(
         self, path: str, loader_type: str
@@ -386,7 +455,8 @@ class ESPnetDataset(AbsDataset):
         _mes += "("
         for name, (path, _type) in self.debug_info.items():
             _mes += f'\n  {name}: {{"path": "{path}", "type": "{_type}"}}'
-        _mes += f"\n  preprocess: {self.preprocess})"
+        _mes += f"\n  preprocess: {self.preprocess}"
+        _mes += f"\n  cache: {self.cache})"
         return _mes
 
     def __getitem__(
@@ -399,9 +469,10 @@ class ESPnetDataset(AbsDataset):
             d = next(iter(self.loader_dict.values()))
             uid = list(d)[uid]
 
-        if self.cache is not None and uid in self.cache:
-            data = self.cache[uid]
-            return uid, data
+        if self.cache is not None:
+            data = self.cache.get(uid)
+            if data is not None:
+                return uid, data
 
         data = {}
         # 1. Load data from each loaders
@@ -458,7 +529,10 @@ class ESPnetDataset(AbsDataset):
                 raise NotImplementedError(f"Not supported dtype: {value.dtype}")
             data[name] = value
 
-        if self.cache is not None and self.cache.size < self.max_cache_size:
+        if isinstance(self.cache, SharedMemoryCache):
+            # Evicting the old entries if necessary
+            self.cache[uid] = data
+        elif self.cache is not None and self.cache.size < self.max_cache_size:
             self.cache[uid] = data
 
         retval = uid, data
@@ -120,6 +120,10 @@ class GANTrainer(Trainer):
             raise NotImplementedError(
                 "grad_noise is not supported in GAN-based training."
             )
+        if distributed and options.lazy_dist_sync:
+            raise NotImplementedError(
+                "lazy_dist_sync is not supported in GAN-based training."
+            )
 
         if log_interval is None:
             try:
@@ -23,6 +23,9 @@ from typeguard import check_argument_types
 from typeguard import check_return_type
 
 
+if torch.distributed.is_available():
+    from torch.distributed import ReduceOp
+
 Num = Union[float, int, complex, torch.Tensor, np.ndarray]
 
 
@@ -134,6 +137,7 @@ class SubReporter:
         self.total_count = total_count
         self.count = 0
         self._seen_keys_in_the_step = set()
+        self._reduced_count = 0
 
     def get_total_count(self) -> int:
         """Returns the number of iterations over all epochs."""
@@ -257,6 +261,47 @@ class SubReporter:
         d["iteration"] = self.total_count
         wandb.log(d)
 
+    def all_reduce(self, device: Union[torch.device, str] = "cpu") -> None:
+        """Average the weighted stats over the processes.
+
+        The weighted stats registered since the last call are summed up over
+        the processes by a single all_reduce() of a flattened tensor,
+        and replaced with the weighted averages and the summed weights,
+        i.e. the stats become the same as averaging them at every step.
+        All the processes must call this method at the same step.
+
+        Args:
+            device: The device of the tensor to reduce, e.g. "cuda" for NCCL
+
+        """
+        if self._finished:
+            raise RuntimeError("Already finished")
+        start = self._reduced_count
+        self._reduced_count = self.count
+        keys = sorted(
+            k for k, v in self.stats.items() if isinstance(v[0], WeightedAverage)
+        )
+        if start == self.count or len(keys) == 0:
+            return
+
+        # values: (2, K, N) of the weighted sums and the weights
+        values = np.array(
+            [[(v.value, v.weight) for v in self.stats[k][start:]] for k in keys],
+            dtype=np.float64,
+        ).transpose(2, 0, 1)
+        with np.errstate(invalid="ignore"):
+            values[0] = np.where(values[1] == 0, 0.0, values[0] * values[1])
+        values = torch.from_numpy(values).to(device)
+        torch.distributed.all_reduce(values, op=ReduceOp.SUM)
+        value_sum, weight = values.cpu().numpy()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.where(weight == 0, np.nan, value_sum / weight)
+        for k, vs, ws in zip(keys, value, weight):
+            self.stats[k][start:] = [
+                WeightedAverage(float(v), float(w)) for v, w in zip(vs, ws)
+            ]
+
     def finished(self) -> None:
         self._finished = True
 
@@ -1,12 +1,14 @@
 """Trainer module."""
 import argparse
 from contextlib import contextmanager
+from contextlib import nullcontext
 import dataclasses
 from dataclasses import is_dataclass
 from distutils.version import LooseVersion
 import logging
 from pathlib import Path
 import time
+from typing import Callable
 from typing import Dict
 from typing import Iterable
 from typing import List
@@ -23,6 +25,7 @@ import torch.optim
 from typeguard import check_argument_types
 
 from espnet2.iterators.abs_iter_factory import AbsIterFactory
+from espnet2.iterators.prefetch_iterable import PrefetchIterable
 from espnet2.main_funcs.average_nbest_models import average_nbest_models
 from espnet2.main_funcs.calculate_all_attentions import calculate_all_attentions
 from espnet2.schedulers.abs_scheduler import AbsBatchStepScheduler
@@ -34,6 +37,7 @@ from espnet2.torch_utils.device_funcs import to_device
 from espnet2.torch_utils.recursive_op import recursive_average
 from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
 from espnet2.train.abs_espnet_model import AbsESPnetModel
+from espnet2.train.checkpoint_writer import CheckpointWriter
 from espnet2.train.distributed_utils import DistributedOption
 from espnet2.train.reporter import Reporter
 from espnet2.train.reporter import SubReporter
@@ -59,6 +63,42 @@ except ImportError:
     fairscale = None
 
 
+class IntervalCallbackIterable:
+    """Iterable calling the function every the number of items.
+
+    The function is called with the number of the yielded items
+    when the next item is requested, i.e. after the items are processed.
+
+    """
+
+    def __init__(self, iterable: Iterable, interval: int, fn: Callable[[int], None]):
+        self.iterable = iterable
+        self.interval = interval
+        self.fn = fn
+
+    def __len__(self):
+        return len(self.iterable)
+
+    def __iter__(self):
+        try:
+            num_items = len(self.iterable)
+        except TypeError:
+            num_items = None
+        iterator = iter(self.iterable)
+        i = 0
+        while True:
+            # Call the function before reading the next item, so the state
+            # of the iterable at the call is consistent with the yielded items
+            if i > 0 and i % self.interval == 0 and i != num_items:
+                self.fn(i)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            i += 1
+            yield item
+
+
 @dataclasses.dataclass
 class TrainerOptions:
     ngpu: int
@@ -86,6 +126,10 @@ class TrainerOptions:
     val_scheduler_criterion: Sequence[str]
     unused_parameters: bool
     wandb_model_log_interval: int
+    lazy_dist_sync: bool
+    async_checkpoint: bool
+    checkpoint_interval: int
+    prefetch_depth: int
 
 
 class Trainer:
@@ -134,12 +178,18 @@ class Trainer:
         schedulers: Sequence[Optional[AbsScheduler]],
         scaler: Optional[GradScaler],
         ngpu: int = 0,
+        train_iter_factory: Optional[AbsIterFactory] = None,
     ):
-        states = torch.load(
-            checkpoint,
-            map_location=f"cuda:{torch.cuda.current_device()}" if ngpu > 0 else "cpu",
-        )
-        model.load_state_dict(states["model"])
+        map_location = f"cuda:{torch.cuda.current_device()}" if ngpu > 0 else "cpu"
+        states = torch.load(checkpoint, map_location=map_location)
+        if isinstance(states["model"], str):
+            # The model file shared with the checkpoint
+            model_states = torch.load(
+                Path(checkpoint).parent / states["model"], map_location=map_location
+            )
+        else:
+            model_states = states["model"]
+        model.load_state_dict(model_states)
         reporter.load_state_dict(states["reporter"])
         for optimizer, state in zip(optimizers, states["optimizers"]):
             optimizer.load_state_dict(state)
@@ -152,8 +202,49 @@ class Trainer:
             else:
                 scaler.load_state_dict(states["scaler"])
 
+        if states.get("iterator") is not None and train_iter_factory is not None:
+            # Resume the epoch from the middle
+            train_iter_factory.load_state_dict(states["iterator"])
+
         logging.info(f"The training was resumed using {checkpoint}")
 
+    @staticmethod
+    def save_checkpoint(
+        checkpoint_writer: CheckpointWriter,
+        checkpoint: Union[str, Path],
+        model: Union[torch.nn.Module, str],
+        reporter_state: dict,
+        optimizers: Sequence[torch.optim.Optimizer],
+        schedulers: Sequence[Optional[AbsScheduler]],
+        scaler: Optional[GradScaler],
+        iterator_state: Optional[dict] = None,
+        key: str = None,
+    ):
+        """Save the checkpoint for resume().
+
+        Args:
+            model: The model, or the name of the model file in the same directory
+                to share the weights with it
+            reporter_state: The state_dict of Reporter
+            iterator_state: The state of the training iterator in the epoch
+            key: The key of the buffers of CheckpointWriter
+
+        """
+        checkpoint_writer.save(
+            {
+                "model": model if isinstance(model, str) else model.state_dict(),
+                "reporter": reporter_state,
+                "optimizers": [o.state_dict() for o in optimizers],
+                "schedulers": [
+                    s.state_dict() if s is not None else None for s in schedulers
+                ],
+                "scaler": scaler.state_dict() if scaler is not None else None,
+                "iterator": iterator_state,
+            },
+            checkpoint,
+            key=key,
+        )
+
     @classmethod
     def run(
         cls,
@@ -180,6 +271,18 @@ class Trainer:
                 trainer_options.keep_nbest_models = [1]
             keep_nbest_models = trainer_options.keep_nbest_models
 
+        checkpoint_interval = trainer_options.checkpoint_interval
+        if checkpoint_interval > 0:
+            if checkpoint_interval % trainer_options.accum_grad != 0:
+                raise ValueError(
+                    "checkpoint_interval must be a multiple of accum_grad: "
+                    f"{checkpoint_interval} % {trainer_options.accum_grad} != 0"
+                )
+            if trainer_options.sharded_ddp:
+                raise NotImplementedError(
+                    "checkpoint_interval is not supported with sharded_ddp"
+                )
+
         output_dir = Path(trainer_options.output_dir)
         reporter = Reporter()
         if trainer_options.use_amp:
@@ -207,6 +310,7 @@ class Trainer:
                 reporter=reporter,
                 scaler=scaler,
                 ngpu=trainer_options.ngpu,
+                train_iter_factory=train_iter_factory,
             )
 
         start_epoch = reporter.get_epoch() + 1
@@ -260,6 +364,13 @@ class Trainer:
         else:
             train_summary_writer = None
 
+        if not distributed_option.distributed or distributed_option.dist_rank == 0:
+            checkpoint_writer = CheckpointWriter(
+                async_write=trainer_options.async_checkpoint
+            )
+        else:
+            checkpoint_writer = None
+
         start_time = time.perf_counter()
         for iepoch in range(start_epoch, trainer_options.max_epoch + 1):
             if iepoch != start_epoch:
@@ -279,13 +390,52 @@ class Trainer:
             set_all_random_seed(trainer_options.seed + iepoch)
 
             reporter.set_epoch(iepoch)
+            train_iter = train_iter_factory.build_iter(iepoch)
+            valid_iter = valid_iter_factory.build_iter(iepoch)
+            if trainer_options.prefetch_depth > 0:
+                device = "cuda" if trainer_options.ngpu > 0 else "cpu"
+                # The barriers keep the state of the iterator consistent
+                # with the consumed mini-batches at the mid-epoch checkpoints
+                train_iter = PrefetchIterable(
+                    train_iter,
+                    device,
+                    trainer_options.prefetch_depth,
+                    barrier_interval=checkpoint_interval,
+                )
+                valid_iter = PrefetchIterable(
+                    valid_iter, device, trainer_options.prefetch_depth
+                )
+            if checkpoint_interval > 0 and checkpoint_writer is not None:
+
+                def save_mid_epoch_checkpoint(num_iters: int, iepoch: int = iepoch):
+                    # The epoch is not finished yet
+                    reporter_state = dict(reporter.state_dict(), epoch=iepoch - 1)
+                    # The model is included in the checkpoint itself
+                    # to replace all the states at once
+                    cls.save_checkpoint(
+                        checkpoint_writer,
+                        output_dir / "checkpoint.pth",
+                        model,
+                        reporter_state,
+                        optimizers,
+                        schedulers,
+                        scaler,
+                        train_iter_factory.state_dict(num_iters),
+                        key="mid_epoch_checkpoint",
+                    )
+                    logging.info(f"Saved the checkpoint at {num_iters}iter")
+
+                train_iter = IntervalCallbackIterable(
+                    train_iter, checkpoint_interval, save_mid_epoch_checkpoint
+                )
+
             # 1. Train and validation for one-epoch
             with reporter.observe("train") as sub_reporter:
                 all_steps_are_invalid = cls.train_one_epoch(
                     model=dp_model,
                     optimizers=optimizers,
                     schedulers=schedulers,
-                    iterator=train_iter_factory.build_iter(iepoch),
+                    iterator=train_iter,
                     reporter=sub_reporter,
                     scaler=scaler,
                     summary_writer=train_summary_writer,
@@ -296,7 +446,7 @@ class Trainer:
             with reporter.observe("valid") as sub_reporter:
                 cls.validate_one_epoch(
                     model=dp_model,
-                    iterator=valid_iter_factory.build_iter(iepoch),
+                    iterator=valid_iter,
                     reporter=sub_reporter,
                     options=trainer_options,
                     distributed_option=distributed_option,
@@ -338,24 +488,32 @@ class Trainer:
                 if trainer_options.use_wandb:
                     reporter.wandb_log()
 
-                # 4. Save/Update the checkpoint
-                torch.save(
-                    {
-                        "model": model.state_dict(),
-                        "reporter": reporter.state_dict(),
-                        "optimizers": [o.state_dict() for o in optimizers],
-                        "schedulers": [
-                            s.state_dict() if s is not None else None
-                            for s in schedulers
-                        ],
-                        "scaler": scaler.state_dict() if scaler is not None else None,
-                    },
+                # 4. Save/Update the checkpoint and save the model
+                if trainer_options.async_checkpoint:
+                    # Write the model file first and share it with the checkpoint
+                    checkpoint_writer.save(
+                        model.state_dict(),
+                        output_dir / f"{iepoch}epoch.pth",
+                        key="model",
+                    )
+                    model_or_file = f"{iepoch}epoch.pth"
+                else:
+                    model_or_file = model
+                cls.save_checkpoint(
+                    checkpoint_writer,
                     output_dir / "checkpoint.pth",
+                    model_or_file,
+                    reporter.state_dict(),
+                    optimizers,
+                    schedulers,
+                    scaler,
                 )
+                if not trainer_options.async_checkpoint:
+                    checkpoint_writer.save(
+                        model.state_dict(), output_dir / f"{iepoch}epoch.pth"
+                    )
 
-                # 5. Save and log the model and update the link to the best model
-                torch.save(model.state_dict(), output_dir / f"{iepoch}epoch.pth")
-
+                # 5. Log the model and update the link to the best model
                 # Creates a sym link latest.pth -> {iepoch}epoch.pth
                 p = output_dir / "latest.pth"
                 if p.is_symlink() or p.exists():
@@ -388,6 +546,8 @@ class Trainer:
                 if log_model and trainer_options.use_wandb:
                     import wandb
 
+                    checkpoint_writer.wait()
+
                     logging.info("Logging Model on this epoch :::::")
                     artifact = wandb.Artifact(
                         name=f"model_{wandb.run.id}",
@@ -417,6 +577,7 @@ class Trainer:
                     trainer_options.nbest_averaging_interval > 0
                     and iepoch % trainer_options.nbest_averaging_interval == 0
                 ):
+                    checkpoint_writer.wait()
                     average_nbest_models(
                         reporter=reporter,
                         output_dir=output_dir,
@@ -428,7 +589,9 @@ class Trainer:
                 for e in range(1, iepoch):
                     p = output_dir / f"{e}epoch.pth"
                     if p.exists() and e not in nbests:
-                        p.unlink()
+                        # The previous checkpoint.pth may refer to the file
+                        # until the new one is written
+                        checkpoint_writer.remove(p)
                         _removed.append(str(p))
                 if len(_removed) != 0:
                     logging.info("The model files were removed: " + ", ".join(_removed))
@@ -455,6 +618,7 @@ class Trainer:
 
         # Generated n-best averaged model
         if not distributed_option.distributed or distributed_option.dist_rank == 0:
+            checkpoint_writer.close()
             average_nbest_models(
                 reporter=reporter,
                 output_dir=output_dir,
@@ -493,19 +657,43 @@ class Trainer:
             except TypeError:
                 log_interval = 100
 
+        no_sync_dp_types = (torch.nn.parallel.DistributedDataParallel,)
+        if fairscale is not None:
+            no_sync_dp_types += (fairscale.nn.data_parallel.ShardedDataParallel,)
+
         model.train()
         all_steps_are_invalid = True
         # [For distributed] Because iteration counts are not always equals between
         # processes, send stop-flag to the other processes if iterator is finished
         iterator_stop = torch.tensor(0).to("cuda" if ngpu > 0 else "cpu")
 
+        # [For distributed] The lazy mode avoids synchronizing at every iteration:
+        # The iteration count is decided at first as the fewest ones of
+        # all the processes, and the stats are averaged at every log_interval.
+        lazy_dist_sync = distributed and options.lazy_dist_sync
+        num_iters = None
+        if lazy_dist_sync:
+            try:
+                num_iters = torch.tensor(len(iterator)).to(iterator_stop.device)
+            except TypeError:
+                logging.warning(
+                    "The iterator doesn't have the length, so the stop-flag is "
+                    "sent at every iteration even in the lazy_dist_sync mode"
+                )
+            else:
+                torch.distributed.all_reduce(num_iters, ReduceOp.MIN)
+                num_iters = int(num_iters)
+
         start_time = time.perf_counter()
         for iiter, (utt_id, batch) in enumerate(
             reporter.measure_iter_time(iterator, "iter_time"), 1
         ):
             assert isinstance(batch, dict), type(batch)
 
-            if distributed:
+            if num_iters is not None:
+                if iiter > num_iters:
+                    break
+            elif distributed:
                 torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
                 if iterator_stop > 0:
                     break
@@ -522,7 +710,19 @@ class Trainer:
                 all_steps_are_invalid = False
                 continue
 
-            with autocast(scaler is not None):
+            # [For distributed] Skip the all-reduce of the gradients
+            # except for the last micro-batch of the gradient accumulation.
+            # DistributedDataParallel decides it in forward() and
+            # ShardedDataParallel does in backward(), so both are put in no_sync().
+            # The backward time without the all-reduce is reported separately.
+            if iiter % accum_grad != 0 and isinstance(model, no_sync_dp_types):
+                sync_context = model.no_sync
+                backward_key = "backward_nosync_time"
+            else:
+                sync_context = nullcontext
+                backward_key = "backward_time"
+
+            with autocast(scaler is not None), sync_context():
                 with reporter.measure_time("forward_time"):
                     retval = model(**batch)
 
@@ -567,11 +767,14 @@ class Trainer:
                     loss = (loss * weight.type(loss.dtype)).sum()
 
                     # if distributed, this method can also apply all_reduce()
-                    stats, weight = recursive_average(stats, weight, distributed)
+                    stats, weight = recursive_average(
+                        stats, weight, distributed and not lazy_dist_sync
+                    )
 
                     # Now weight is summation over all workers
+                    # (or over this worker in the lazy mode)
                     loss /= weight
-                if distributed:
+                if distributed and not lazy_dist_sync:
                     # NOTE(kamo): Multiply world_size because DistributedDataParallel
                     # automatically normalizes the gradient by world_size.
                     loss *= torch.distributed.get_world_size()
@@ -580,7 +783,7 @@ class Trainer:
 
             reporter.register(stats, weight)
 
-            with reporter.measure_time("backward_time"):
+            with reporter.measure_time(backward_key), sync_context():
                 if scaler is not None:
                     # Scales loss.  Calls backward() on scaled loss
                     # to create scaled gradients.
@@ -676,6 +879,8 @@ class Trainer:
             # NOTE(kamo): Call log_message() after next()
             reporter.next()
             if iiter % log_interval == 0:
+                if lazy_dist_sync:
+                    reporter.all_reduce("cuda" if ngpu > 0 else "cpu")
                 logging.info(reporter.log_message(-log_interval))
                 if summary_writer is not None:
                     reporter.tensorboard_add_scalar(summary_writer, -log_interval)
@@ -683,9 +888,11 @@ class Trainer:
                     reporter.wandb_log()
 
         else:
-            if distributed:
+            if distributed and num_iters is None:
                 iterator_stop.fill_(1)
                 torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
+        if lazy_dist_sync:
+            reporter.all_reduce("cuda" if ngpu > 0 else "cpu")
         return all_steps_are_invalid
 
     @classmethod
@@ -6,6 +6,7 @@
 from contextlib import contextmanager
 from distutils.version import LooseVersion
 from typing import Dict
+from typing import Iterator
 from typing import Optional
 from typing import Tuple
 
@@ -251,8 +252,158 @@ class ESPnetTTSModel(AbsESPnetModel):
             Dict[str, Tensor]: Dict of outputs.
 
         """
+        input_dict = self._prepare_inference_inputs(
+            text,
+            speech=speech,
+            spembs=spembs,
+            sids=sids,
+            lids=lids,
+            durations=durations,
+            pitch=pitch,
+            energy=energy,
+            use_teacher_forcing=decode_config["use_teacher_forcing"],
+        )
+        output_dict = self.tts.inference(**input_dict, **decode_config)
+
+        if self.normalize is not None and output_dict.get("feat_gen") is not None:
+            # NOTE: normalize.inverse is in-place operation
+            feat_gen_denorm = self.normalize.inverse(
+                output_dict["feat_gen"].clone()[None]
+            )[0][0]
+            output_dict.update(feat_gen_denorm=feat_gen_denorm)
+
+        return output_dict
+
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        **decode_config,
+    ) -> Dict[str, torch.Tensor]:
+        """Calculate the outputs of a batch and return them as a dict.
+
+        The TTS model must have "batch_inference", e.g. the non-autoregressive
+        models. The padded outputs are returned with their lengths
+        as "<name>_lengths".
+
+        Args:
+            text (Tensor): Text index tensor (B, T_text).
+            text_lengths (Tensor): Text length tensor (B,).
+            spembs (Optional[Tensor]): Speaker embedding tensor (B, D).
+            sids (Optional[Tensor]): Speaker ID tensor (B, 1).
+            lids (Optional[Tensor]): Language ID tensor (B, 1).
+
+        Returns:
+            Dict[str, Tensor]: Dict of outputs.
+
+        """
+        if not hasattr(self.tts, "batch_inference"):
+            raise NotImplementedError(
+                f"{type(self.tts).__name__} doesn't support batch inference"
+            )
+        if decode_config.pop("use_teacher_forcing", False) or getattr(
+            self.tts, "use_gst", False
+        ):
+            raise NotImplementedError(
+                "Teacher forcing and GST are not supported in batch inference"
+            )
+        input_dict = dict(text=text, text_lengths=text_lengths)
+        if spembs is not None:
+            input_dict.update(spembs=spembs)
+        if sids is not None:
+            input_dict.update(sids=sids)
+        if lids is not None:
+            input_dict.update(lids=lids)
+        output_dict = self.tts.batch_inference(**input_dict, **decode_config)
+
+        if self.normalize is not None and output_dict.get("feat_gen") is not None:
+            # NOTE: normalize.inverse is in-place operation
+            feat_gen_denorm = self.normalize.inverse(
+                output_dict["feat_gen"].clone(), output_dict["feat_gen_lengths"]
+            )[0]
+            output_dict.update(
+                feat_gen_denorm=feat_gen_denorm,
+                feat_gen_denorm_lengths=output_dict["feat_gen_lengths"],
+            )
+
+        return output_dict
+
+    def inference_stream(
+        self,
+        text: torch.Tensor,
+        speech: Optional[torch.Tensor] = None,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        chunk_size: int = 16,
+        **decode_config,
+    ) -> Iterator[Dict[str, torch.Tensor]]:
+        """Calculate features chunk by chunk and yield them as dicts.
+
+        The features are generated incrementally if the TTS model has
+        "inference_stream", e.g. the autoregressive models. Otherwise,
+        the features generated by "inference" are split into chunks.
+
+        Args:
+            text (Tensor): Text index tensor (T_text).
+            speech (Tensor): Speech waveform tensor (T_wav).
+            spembs (Optional[Tensor]): Speaker embedding tensor (D,).
+            sids (Optional[Tensor]): Speaker ID tensor (1,).
+            lids (Optional[Tensor]): Language ID tensor (1,).
+            chunk_size (int): The number of the frames of a chunk.
+
+        Returns:
+            Iterator[Dict[str, Tensor]]: Dicts of the chunks of "feat_gen" and
+                "feat_gen_denorm" (T_chunk, odim).
+
+        """
+        use_teacher_forcing = decode_config.pop("use_teacher_forcing", False)
+        if use_teacher_forcing:
+            raise NotImplementedError("Teacher forcing is not supported in streaming")
+        input_dict = self._prepare_inference_inputs(
+            text,
+            speech=speech,
+            spembs=spembs,
+            sids=sids,
+            lids=lids,
+            use_teacher_forcing=False,
+        )
+
+        if hasattr(self.tts, "inference_stream"):
+            chunks = self.tts.inference_stream(
+                **input_dict, chunk_size=chunk_size, **decode_config
+            )
+        else:
+            output_dict = self.tts.inference(
+                **input_dict, use_teacher_forcing=False, **decode_config
+            )
+            chunks = output_dict["feat_gen"].split(chunk_size)
+
+        for feat_gen in chunks:
+            chunk_dict = dict(feat_gen=feat_gen)
+            if self.normalize is not None:
+                # NOTE: normalize.inverse is in-place operation
+                feat_gen_denorm = self.normalize.inverse(feat_gen.clone()[None])[0][0]
+                chunk_dict.update(feat_gen_denorm=feat_gen_denorm)
+            yield chunk_dict
+
+    def _prepare_inference_inputs(
+        self,
+        text: torch.Tensor,
+        speech: Optional[torch.Tensor] = None,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        durations: Optional[torch.Tensor] = None,
+        pitch: Optional[torch.Tensor] = None,
+        energy: Optional[torch.Tensor] = None,
+        use_teacher_forcing: bool = False,
+    ) -> Dict[str, torch.Tensor]:
         input_dict = dict(text=text)
-        if decode_config["use_teacher_forcing"] or getattr(self.tts, "use_gst", False):
+        if use_teacher_forcing or getattr(self.tts, "use_gst", False):
             if speech is None:
                 raise RuntimeError("missing required argument: 'speech'")
             if self.feats_extract is not None:
@@ -266,7 +417,7 @@ class ESPnetTTSModel(AbsESPnetModel):
             if self.tts.require_raw_speech:
                 input_dict.update(speech=speech)
 
-        if decode_config["use_teacher_forcing"]:
+        if use_teacher_forcing:
             if durations is not None:
                 input_dict.update(durations=durations)
 
@@ -299,13 +450,4 @@ class ESPnetTTSModel(AbsESPnetModel):
         if lids is not None:
             input_dict.update(lids=lids)
 
-        output_dict = self.tts.inference(**input_dict, **decode_config)
-
-        if self.normalize is not None and output_dict.get("feat_gen") is not None:
-            # NOTE: normalize.inverse is in-place operation
-            feat_gen_denorm = self.normalize.inverse(
-                output_dict["feat_gen"].clone()[None]
-            )[0][0]
-            output_dict.update(feat_gen_denorm=feat_gen_denorm)
-
-        return output_dict
+        return input_dict
@@ -661,6 +661,11 @@ class FastSpeech2(AbsTTS):
 
         if is_inference:
             d_outs = self.duration_predictor.inference(hs, d_masks)  # (B, T_text)
+            if xs.size(0) > 1:
+                # fill the all 0 durations with 1 in batch inference
+                # as the length regulator does for a single sequence
+                zero_masks = d_outs.sum(dim=1).eq(0)
+                d_outs[zero_masks] = (~d_masks[zero_masks]).long()
             # use prediction in inference
             p_embs = self.pitch_embed(p_outs.transpose(1, 2)).transpose(1, 2)
             e_embs = self.energy_embed(e_outs.transpose(1, 2)).transpose(1, 2)
@@ -681,6 +686,9 @@ class FastSpeech2(AbsTTS):
             else:
                 olens_in = olens
             h_masks = self._source_mask(olens_in)
+        elif is_inference and xs.size(0) > 1:
+            # mask the padded frames of the shorter sequences in batch inference
+            h_masks = self._source_mask(self._regulated_lengths(d_outs, alpha))
         else:
             h_masks = None
         zs, _ = self.decoder(hs, h_masks)  # (B, T_feats, adim)
@@ -781,6 +789,71 @@ class FastSpeech2(AbsTTS):
             energy=e_outs[0],
         )
 
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        alpha: float = 1.0,
+    ) -> Dict[str, torch.Tensor]:
+        """Generate the sequences of features given a batch of texts.
+
+        The padded part of the shorter sequences is masked in the attention,
+        but the convolutions near the end of them can see the padded part,
+        so the outputs can slightly differ from those of inference().
+
+        Args:
+            text (LongTensor): Batch of padded token ids (B, T_text).
+            text_lengths (LongTensor): Batch of lengths of each input (B,).
+            spembs (Optional[Tensor]): Batch of speaker embeddings (B, spk_embed_dim).
+            sids (Optional[Tensor]): Batch of speaker IDs (B, 1).
+            lids (Optional[Tensor]): Batch of language IDs (B, 1).
+            alpha (float): Alpha to control the speed.
+
+        Returns:
+            Dict[str, Tensor]: Output dict including the following items:
+                * feat_gen (Tensor): Batch of padded features (B, T_feats, odim).
+                * feat_gen_lengths (LongTensor): Lengths of the features (B,).
+                * duration (Tensor): Batch of padded durations (B, T_text + 1).
+                * duration_lengths (LongTensor): Lengths of the durations (B,).
+                * pitch (Tensor): Batch of padded pitch (B, T_text + 1, 1).
+                * pitch_lengths (LongTensor): Lengths of the pitch (B,).
+                * energy (Tensor): Batch of padded energy (B, T_text + 1, 1).
+                * energy_lengths (LongTensor): Lengths of the energy (B,).
+
+        """
+        text = text[:, : text_lengths.max()]
+
+        # add eos at the last of sequence
+        xs = F.pad(text, [0, 1], "constant", self.padding_idx)
+        for i, l in enumerate(text_lengths):
+            xs[i, l] = self.eos
+        ilens = text_lengths + 1
+
+        _, outs, d_outs, p_outs, e_outs = self._forward(
+            xs,
+            ilens,
+            spembs=spembs,
+            sids=sids,
+            lids=lids,
+            is_inference=True,
+            alpha=alpha,
+        )  # (B, T_feats, odim)
+        olens = self._regulated_lengths(d_outs, alpha) * self.reduction_factor
+
+        return dict(
+            feat_gen=outs,
+            feat_gen_lengths=olens,
+            duration=d_outs,
+            duration_lengths=ilens,
+            pitch=p_outs,
+            pitch_lengths=ilens,
+            energy=e_outs,
+            energy_lengths=ilens,
+        )
+
     def _integrate_with_spk_embed(
         self, hs: torch.Tensor, spembs: torch.Tensor
     ) -> torch.Tensor:
@@ -828,6 +901,25 @@ class FastSpeech2(AbsTTS):
         x_masks = make_non_pad_mask(ilens).to(next(self.parameters()).device)
         return x_masks.unsqueeze(-2)
 
+    @staticmethod
+    def _regulated_lengths(ds: torch.Tensor, alpha: float = 1.0) -> torch.Tensor:
+        """Calculate the lengths of the outputs of the length regulator.
+
+        Args:
+            ds (LongTensor): Batch of durations (B, T_text).
+            alpha (float): Alpha to control the speed.
+
+        Returns:
+            LongTensor: Batch of the lengths (B,).
+
+        """
+        if alpha != 1.0:
+            ds = torch.round(ds.float() * alpha).long()
+        if ds.sum() == 0:
+            # the length regulator fills the durations with 1 in this case
+            return ds.new_full([ds.size(0)], ds.size(1))
+        return ds.sum(dim=1)
+
     def _reset_parameters(
         self, init_type: str, init_enc_alpha: float, init_dec_alpha: float
     ):
@@ -6,6 +6,7 @@
 import logging
 
 from typing import Dict
+from typing import Iterator
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -26,6 +27,8 @@ from espnet.nets.pytorch_backend.tacotron2.encoder import Encoder
 from espnet2.torch_utils.device_funcs import force_gatherable
 from espnet2.tts.abs_tts import AbsTTS
 from espnet2.tts.gst.style_encoder import StyleEncoder
+from espnet2.tts.utils.streaming import conv_receptive_field
+from espnet2.tts.utils.streaming import overlapped_chunks
 
 
 class Tacotron2(AbsTTS):
@@ -479,6 +482,96 @@ class Tacotron2(AbsTTS):
             return dict(feat_gen=outs[0], att_w=att_ws[0])
 
         # inference
+        h = self._encode_for_inference(x, y, spemb, sids, lids)
+        out, prob, att_w = self.dec.inference(
+            h,
+            threshold=threshold,
+            minlenratio=minlenratio,
+            maxlenratio=maxlenratio,
+            use_att_constraint=use_att_constraint,
+            backward_window=backward_window,
+            forward_window=forward_window,
+        )
+
+        return dict(feat_gen=out, prob=prob, att_w=att_w)
+
+    def inference_stream(
+        self,
+        text: torch.Tensor,
+        feats: Optional[torch.Tensor] = None,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        threshold: float = 0.5,
+        minlenratio: float = 0.0,
+        maxlenratio: float = 10.0,
+        use_att_constraint: bool = False,
+        backward_window: int = 1,
+        forward_window: int = 3,
+        chunk_size: int = 16,
+    ) -> Iterator[torch.Tensor]:
+        """Generate the sequence of features chunk by chunk.
+
+        The chunks are yielded during the decoding as soon as the frames
+        in the receptive field of the postnet are decoded, and
+        the concatenation of them equals to "feat_gen" of inference().
+
+        Args:
+            text (LongTensor): Input sequence of characters (T_text,).
+            feats (Optional[Tensor]): Feature sequence to extract style (N, idim).
+            spembs (Optional[Tensor]): Speaker embedding (spk_embed_dim,).
+            sids (Optional[Tensor]): Speaker ID (1,).
+            lids (Optional[Tensor]): Language ID (1,).
+            threshold (float): Threshold in inference.
+            minlenratio (float): Minimum length ratio in inference.
+            maxlenratio (float): Maximum length ratio in inference.
+            use_att_constraint (bool): Whether to apply attention constraint.
+            backward_window (int): Backward window in attention constraint.
+            forward_window (int): Forward window in attention constraint.
+            chunk_size (int): The number of the frames of a chunk.
+
+        Returns:
+            Iterator[Tensor]: Chunks of the output features (T_chunk, odim).
+
+        """
+        # add eos at the last of sequence
+        x = F.pad(text, [0, 1], "constant", self.eos)
+        h = self._encode_for_inference(x, feats, spembs, sids, lids)
+        steps = (
+            out[0].transpose(0, 1)  # (1, odim, r) -> (r, odim)
+            for out, _, _ in self.dec.inference_steps(
+                h,
+                threshold=threshold,
+                minlenratio=minlenratio,
+                maxlenratio=maxlenratio,
+                use_att_constraint=use_att_constraint,
+                backward_window=backward_window,
+                forward_window=forward_window,
+            )
+        )
+
+        def _apply_postnet(outs: torch.Tensor) -> torch.Tensor:
+            if self.dec.postnet is not None:
+                outs = outs + self.dec.postnet(outs.transpose(0, 1)[None])[0].t()
+            if self.output_activation_fn is not None:
+                outs = self.output_activation_fn(outs)
+            return outs
+
+        context = (
+            conv_receptive_field(self.dec.postnet)
+            if self.dec.postnet is not None
+            else 0
+        )
+        yield from overlapped_chunks(_apply_postnet, steps, context, chunk_size)
+
+    def _encode_for_inference(
+        self,
+        x: torch.Tensor,
+        y: Optional[torch.Tensor],
+        spemb: Optional[torch.Tensor],
+        sids: Optional[torch.Tensor],
+        lids: Optional[torch.Tensor],
+    ) -> torch.Tensor:
         h = self.enc.inference(x)
         if self.use_gst:
             style_emb = self.gst(y.unsqueeze(0))
@@ -492,17 +585,7 @@ class Tacotron2(AbsTTS):
         if self.spk_embed_dim is not None:
             hs, spembs = h.unsqueeze(0), spemb.unsqueeze(0)
             h = self._integrate_with_spk_embed(hs, spembs)[0]
-        out, prob, att_w = self.dec.inference(
-            h,
-            threshold=threshold,
-            minlenratio=minlenratio,
-            maxlenratio=maxlenratio,
-            use_att_constraint=use_att_constraint,
-            backward_window=backward_window,
-            forward_window=forward_window,
-        )
-
-        return dict(feat_gen=out, prob=prob, att_w=att_w)
+        return h
 
     def _integrate_with_spk_embed(
         self, hs: torch.Tensor, spembs: torch.Tensor
@@ -4,6 +4,8 @@
 """Transformer-TTS related modules."""
 
 from typing import Dict
+from typing import Iterator
+from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -30,6 +32,8 @@ from espnet2.torch_utils.device_funcs import force_gatherable
 from espnet2.torch_utils.initialize import initialize
 from espnet2.tts.abs_tts import AbsTTS
 from espnet2.tts.gst.style_encoder import StyleEncoder
+from espnet2.tts.utils.streaming import conv_receptive_field
+from espnet2.tts.utils.streaming import overlapped_chunks
 
 
 class Transformer(AbsTTS):
@@ -677,6 +681,96 @@ class Transformer(AbsTTS):
 
             return dict(feat_gen=outs[0], att_w=att_ws[0])
 
+        hs = self._encode_for_inference(x, y, spemb, sids, lids)
+
+        outs, probs = [], []
+        for idx, (out, prob, att_ws_) in enumerate(
+            self._inference_steps(x, hs, threshold, minlenratio, maxlenratio), 1
+        ):
+            outs += [out]  # [(r, odim), ...]
+            probs += [prob]  # [(r), ...]
+            if idx == 1:
+                att_ws = att_ws_
+            else:
+                # [(#heads, l, T), ...]
+                att_ws = [
+                    torch.cat([att_w, att_w_], dim=1)
+                    for att_w, att_w_ in zip(att_ws, att_ws_)
+                ]
+
+        outs = (
+            torch.cat(outs, dim=0).unsqueeze(0).transpose(1, 2)
+        )  # (T_feats, odim) -> (1, T_feats, odim) -> (1, odim, T_feats)
+        if self.postnet is not None:
+            outs = outs + self.postnet(outs)  # (1, odim, T_feats)
+        outs = outs.transpose(2, 1).squeeze(0)  # (T_feats, odim)
+        probs = torch.cat(probs, dim=0)
+
+        # concatenate attention weights -> (#layers, #heads, T_feats, T_text)
+        att_ws = torch.stack(att_ws, dim=0)
+
+        return dict(feat_gen=outs, prob=probs, att_w=att_ws)
+
+    def inference_stream(
+        self,
+        text: torch.Tensor,
+        feats: Optional[torch.Tensor] = None,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        threshold: float = 0.5,
+        minlenratio: float = 0.0,
+        maxlenratio: float = 10.0,
+        chunk_size: int = 16,
+    ) -> Iterator[torch.Tensor]:
+        """Generate the sequence of features chunk by chunk.
+
+        The chunks are yielded during the decoding as soon as the frames
+        in the receptive field of the postnet are decoded, and
+        the concatenation of them equals to "feat_gen" of inference().
+
+        Args:
+            text (LongTensor): Input sequence of characters (T_text,).
+            feats (Optional[Tensor]): Feature sequence to extract style embedding
+                (T_feats', idim).
+            spembs (Optional[Tensor]): Speaker embedding (spk_embed_dim,).
+            sids (Optional[Tensor]): Speaker ID (1,).
+            lids (Optional[Tensor]): Language ID (1,).
+            threshold (float): Threshold in inference.
+            minlenratio (float): Minimum length ratio in inference.
+            maxlenratio (float): Maximum length ratio in inference.
+            chunk_size (int): The number of the frames of a chunk.
+
+        Returns:
+            Iterator[Tensor]: Chunks of the output features (T_chunk, odim).
+
+        """
+        # add eos at the last of sequence
+        x = F.pad(text, [0, 1], "constant", self.eos)
+        hs = self._encode_for_inference(x, feats, spembs, sids, lids)
+        steps = (
+            out
+            for out, _, _ in self._inference_steps(
+                x, hs, threshold, minlenratio, maxlenratio
+            )
+        )
+
+        def _apply_postnet(outs: torch.Tensor) -> torch.Tensor:
+            if self.postnet is None:
+                return outs
+            return outs + self.postnet(outs.transpose(0, 1)[None])[0].t()
+
+        context = conv_receptive_field(self.postnet) if self.postnet is not None else 0
+        yield from overlapped_chunks(_apply_postnet, steps, context, chunk_size)
+
+    def _encode_for_inference(
+        self,
+        x: torch.Tensor,
+        y: Optional[torch.Tensor],
+        spemb: Optional[torch.Tensor],
+        sids: Optional[torch.Tensor],
+        lids: Optional[torch.Tensor],
+    ) -> torch.Tensor:
         # forward encoder
         xs = x.unsqueeze(0)
         hs, _ = self.encoder(xs, None)
@@ -699,6 +793,24 @@ class Transformer(AbsTTS):
             spembs = spemb.unsqueeze(0)
             hs = self._integrate_with_spk_embed(hs, spembs)
 
+        return hs
+
+    def _inference_steps(
+        self,
+        x: torch.Tensor,
+        hs: torch.Tensor,
+        threshold: float,
+        minlenratio: float,
+        maxlenratio: float,
+    ) -> Iterator[Tuple[torch.Tensor, torch.Tensor, List[torch.Tensor]]]:
+        """Decode the features step by step before the postnet.
+
+        Yields:
+            Tensor: Output features of the step (r, odim).
+            Tensor: Stop probabilities of the step (r,).
+            List[Tensor]: Source attention weights of the step [(#heads, 1, T), ...].
+
+        """
         # set limits of length
         maxlen = int(hs.size(1) * maxlenratio / self.reduction_factor)
         minlen = int(hs.size(1) * minlenratio / self.reduction_factor)
@@ -706,7 +818,6 @@ class Transformer(AbsTTS):
         # initialize
         idx = 0
         ys = hs.new_zeros(1, 1, self.odim)
-        outs, probs = [], []
 
         # forward decoder step-by-step
         z_cache = self.decoder.init_state(x)
@@ -719,14 +830,12 @@ class Transformer(AbsTTS):
             z, z_cache = self.decoder.forward_one_step(
                 ys, y_masks, hs, cache=z_cache
             )  # (B, adim)
-            outs += [
-                self.feat_out(z).view(self.reduction_factor, self.odim)
-            ]  # [(r, odim), ...]
-            probs += [torch.sigmoid(self.prob_out(z))[0]]  # [(r), ...]
+            out = self.feat_out(z).view(self.reduction_factor, self.odim)  # (r, odim)
+            prob = torch.sigmoid(self.prob_out(z))[0]  # (r)
 
             # update next inputs
             ys = torch.cat(
-                (ys, outs[-1][-1].view(1, 1, self.odim)), dim=1
+                (ys, out[-1].view(1, 1, self.odim)), dim=1
             )  # (1, idx + 1, odim)
 
             # get attention weights
@@ -734,34 +843,15 @@ class Transformer(AbsTTS):
             for name, m in self.named_modules():
                 if isinstance(m, MultiHeadedAttention) and "src" in name:
                     att_ws_ += [m.attn[0, :, -1].unsqueeze(1)]  # [(#heads, 1, T),...]
-            if idx == 1:
-                att_ws = att_ws_
-            else:
-                # [(#heads, l, T), ...]
-                att_ws = [
-                    torch.cat([att_w, att_w_], dim=1)
-                    for att_w, att_w_ in zip(att_ws, att_ws_)
-                ]
+            yield out, prob, att_ws_
 
             # check whether to finish generation
-            if int(sum(probs[-1] >= threshold)) > 0 or idx >= maxlen:
+            if int(sum(prob >= threshold)) > 0 or idx >= maxlen:
                 # check mininum length
                 if idx < minlen:
                     continue
-                outs = (
-                    torch.cat(outs, dim=0).unsqueeze(0).transpose(1, 2)
-                )  # (T_feats, odim) -> (1, T_feats, odim) -> (1, odim, T_feats)
-                if self.postnet is not None:
-                    outs = outs + self.postnet(outs)  # (1, odim, T_feats)
-                outs = outs.transpose(2, 1).squeeze(0)  # (T_feats, odim)
-                probs = torch.cat(probs, dim=0)
                 break
 
-        # concatenate attention weights -> (#layers, #heads, T_feats, T_text)
-        att_ws = torch.stack(att_ws, dim=0)
-
-        return dict(feat_gen=outs, prob=probs, att_w=att_ws)
-
     def _add_first_frame_and_remove_last_frame(self, ys: torch.Tensor) -> torch.Tensor:
         ys_in = torch.cat(
             [ys.new_zeros((ys.shape[0], 1, ys.shape[2])), ys[:, :-1]], dim=1
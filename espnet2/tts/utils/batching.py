@@ -0,0 +1,74 @@
+"""Utilities for batch synthesis of multiple texts."""
+
+from typing import Callable
+from typing import List
+from typing import Sequence
+
+import torch
+
+
+def bucket_by_length(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """Group the indices of the inputs of similar lengths into batches.
+
+    The inputs are sorted by the lengths in descending order and split into
+    batches, so the padding in each batch is minimized.
+
+    Examples:
+        >>> bucket_by_length([3, 10, 4, 9, 5], batch_size=2)
+        [[1, 3], [4, 2], [0]]
+
+    Args:
+        lengths: Lengths of the inputs.
+        batch_size: The maximum number of the inputs in a batch.
+
+    Returns:
+        List of the batches of the indices.
+
+    """
+    assert batch_size > 0, batch_size
+    indices = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    return [indices[i : i + batch_size] for i in range(0, len(indices), batch_size)]
+
+
+def concat_vocode(
+    vocoder: Callable[[torch.Tensor], torch.Tensor],
+    feats: Sequence[torch.Tensor],
+    context: int,
+    upsample: int,
+) -> List[torch.Tensor]:
+    """Vocode the feature sequences at once by concatenating them.
+
+    The sequences are concatenated with the zero frames of "context" after each
+    of them, so a sequence is not affected by the others if the receptive field
+    of the vocoder is within "context" frames on each side. Unlike padding
+    to the longest sequence, the computation for the padded frames is not wasted,
+    and any vocoder converting a single sequence can be used.
+
+    Args:
+        vocoder: Function converting features (T_feats, odim) into waveform (T_wav,).
+        feats: Sequence of the features (T_feats, odim).
+        context: The number of the frames of the gaps between the sequences.
+        upsample: The number of the samples per frame.
+
+    Returns:
+        List of the waveforms (T_wav,).
+
+    """
+    if len(feats) == 0:
+        return []
+    gap = feats[0].new_zeros(context, feats[0].size(1))
+    xs = []
+    starts = []
+    offset = 0
+    for feat in feats:
+        starts.append(offset)
+        xs += [feat, gap]
+        offset += feat.size(0) + context
+    wav = vocoder(torch.cat(xs, dim=0)).view(-1)
+    # The difference of the length from T_feats * upsample, e.g. -n_shift
+    # for Griffin-Lim, which is applied to each waveform
+    length_offset = min(wav.size(0) - offset * upsample, context * upsample)
+    return [
+        wav[start * upsample : (start + feat.size(0)) * upsample + length_offset]
+        for start, feat in zip(starts, feats)
+    ]
@@ -0,0 +1,160 @@
+"""Utilities for streaming synthesis with chunk-wise processing."""
+
+import logging
+import math
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Tuple
+
+import numpy as np
+import torch
+
+from espnet2.utils.griffin_lim import Spectrogram2Waveform
+
+
+def conv_receptive_field(module: torch.nn.Module) -> int:
+    """Return the number of the frames on each side seen by the stacked 1D convs.
+
+    Examples:
+        >>> # Tacotron2 postnet with 5 layers of kernel size 5
+        >>> conv_receptive_field(postnet)
+        10
+
+    """
+    return sum(
+        (m.kernel_size[0] - 1) // 2 * m.dilation[0]
+        for m in module.modules()
+        if isinstance(m, torch.nn.Conv1d)
+    )
+
+
+@torch.no_grad()
+def estimate_vocoder_geometry(
+    vocoder: Callable[[torch.Tensor], torch.Tensor],
+    odim: int,
+    device: str = "cpu",
+    dtype: torch.dtype = torch.float32,
+    max_frames: int = 1024,
+) -> Tuple[int, int]:
+    """Estimate the upsampling factor and the receptive field of the vocoder.
+
+    The vocoder is applied to a silent feature sequence and the same sequence
+    with an impulse at the center frame, and the receptive field is
+    the range of the samples changed by the impulse.
+    The random generators are reset for each run
+    for the vocoders using random noise, e.g. ParallelWaveGAN.
+
+    Args:
+        vocoder: Function converting features (T_feats, odim) into waveform (T_wav,).
+        odim: Dimension of the features.
+        device: Device of the features.
+        dtype: Data type of the features.
+        max_frames: Maximum length of the features for the estimation.
+
+    Returns:
+        int: The number of the samples per frame.
+        int: The number of the frames on each side affecting a frame.
+
+    """
+    if isinstance(vocoder, Spectrogram2Waveform):
+        # Griffin-Lim starts from random phases, so the receptive field can't be
+        # measured. Each iteration spreads a frame to the frames in the window.
+        params = vocoder.params
+        win_frames = math.ceil(params["n_fft"] / params["n_shift"])
+        return params["n_shift"], params["n_iter"] * win_frames
+
+    def _run(x):
+        np_state = np.random.get_state()
+        with torch.random.fork_rng(devices=[]):
+            torch.manual_seed(0)
+            np.random.seed(0)
+            y = vocoder(x)
+        np.random.set_state(np_state)
+        if isinstance(y, np.ndarray):
+            y = torch.from_numpy(y)
+        return y.view(-1).float()
+
+    num_frames = 64
+    while True:
+        x = torch.zeros(num_frames, odim, device=device, dtype=dtype)
+        y = _run(x)
+        upsample = _run(torch.zeros(num_frames + 1, odim, device=device, dtype=dtype))
+        upsample = upsample.size(0) - y.size(0)
+        x[num_frames // 2] = 1.0
+        diff = (_run(x) - y).abs()
+        changed = torch.nonzero(diff > diff.max() * 1e-5).view(-1)
+        if len(changed) == 0:
+            # The vocoder doesn't use the features, e.g. a dummy
+            return upsample, 0
+        first, last = int(changed[0]), int(changed[-1])
+        if first > 0 and last < y.size(0) - 1:
+            break
+        if num_frames >= max_frames:
+            logging.warning(
+                "The receptive field of the vocoder is larger than "
+                f"{max_frames // 2} frames. It's limited."
+            )
+            break
+        num_frames *= 2
+
+    center = num_frames // 2 * upsample
+    context = max(center - first, last - center - upsample + 1)
+    return upsample, math.ceil(context / upsample)
+
+
+def overlapped_chunks(
+    fn: Callable[[torch.Tensor], torch.Tensor],
+    frames: Iterable[torch.Tensor],
+    context: int,
+    chunk_size: int,
+    upsample: int = 1,
+) -> Iterator[torch.Tensor]:
+    """Apply the function to the streamed frames chunk by chunk.
+
+    Each chunk is processed with the overlapping frames on both sides,
+    and the outputs for the overlapping frames are discarded.
+    If the receptive field of the function is within "context" frames
+    on each side, the concatenation of the outputs equals to fn(all frames),
+    e.g. the convolutions of a postnet or a GAN vocoder.
+
+    Args:
+        fn: Function converting (T, D) into (T * upsample + offset, ...),
+            where offset is a constant not depending on T.
+        frames: Iterable of the frame chunks (T_chunk, D).
+        context: The number of the overlapping frames on each side.
+        chunk_size: The number of the frames of an output chunk.
+            Chunks are emitted when the frames of chunk_size + context are
+            available after the emitted ones.
+        upsample: The number of the outputs for a frame.
+
+    Returns:
+        Iterator of the output chunks (T_chunk * upsample, ...).
+
+    """
+    assert chunk_size > 0, chunk_size
+    xs = None
+    # The index of xs[0] and the number of the emitted frames
+    offset = 0
+    emitted = 0
+
+    def _apply(begin: int, end: int, last: bool):
+        start = max(offset, begin - context)
+        stop = offset + xs.size(0) if last else min(offset + xs.size(0), end + context)
+        ys = fn(xs[start - offset : stop - offset])
+        if last:
+            return ys[(begin - start) * upsample :]
+        return ys[(begin - start) * upsample : (end - start) * upsample]
+
+    for x in frames:
+        xs = x if xs is None else torch.cat([xs, x], dim=0)
+        while offset + xs.size(0) - context - emitted >= chunk_size:
+            yield _apply(emitted, emitted + chunk_size, False)
+            emitted += chunk_size
+            # Discard the frames not used any more
+            start = max(offset, emitted - context)
+            xs = xs[start - offset :]
+            offset = start
+
+    if xs is not None and offset + xs.size(0) > emitted:
+        yield _apply(emitted, offset + xs.size(0), True)
@@ -0,0 +1,268 @@
+"""Staging of feature files to a local directory."""
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import logging
+import os
+from pathlib import Path
+import shutil
+import socket
+import threading
+from time import time
+from typing import List
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from typeguard import check_argument_types
+
+
+def file_checksum(path: Union[Path, str], chunk_size: int = 1024 * 1024) -> str:
+    """Return the md5 checksum of the file."""
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+@contextmanager
+def flock(path: Union[Path, str]):
+    """Hold the exclusive flock of the file."""
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class FeatsStager:
+    """Copy feature files to a local directory in parallel like rsync.
+
+    - The files are copied by a thread pool.
+    - The files whose copies are up to date are skipped, which is checked by
+      the size and the modification time or by the checksum.
+    - A file is copied to a temporary file and then renamed, so a staged file
+      is always complete.
+    - The jobs sharing the directory (e.g. several trainings on a node)
+      register themselves as holders of it under flock,
+      and the last one removes the directory. The holders which don't exist
+      any more on the node are ignored.
+
+    Examples:
+        >>> stager = FeatsStager("/tmp/user/train")
+        >>> stager.acquire()
+        >>> stager.stage([("/some/where/a.ark", "/tmp/user/train/a.ark")])
+        >>> stager.release()
+
+    Args:
+        local_dir: The directory to stage the files
+        num_workers: The number of copying threads
+        check: "size_mtime" or "checksum"
+        recopy: Copy the files even if they are up to date
+
+    """
+
+    def __init__(
+        self,
+        local_dir: Union[Path, str],
+        num_workers: int = 4,
+        check: str = "size_mtime",
+        recopy: bool = False,
+    ):
+        assert check_argument_types()
+        if check not in ("size_mtime", "checksum"):
+            raise ValueError(f"check must be size_mtime or checksum: {check}")
+        self.local_dir = Path(local_dir)
+        self.num_workers = num_workers
+        self.check = check
+        self.recopy = recopy
+
+        self.lock_file = self.local_dir.parent / f".{self.local_dir.name}.lock"
+        self.holders_file = self.local_dir.parent / f".{self.local_dir.name}.holders"
+        self.holder = f"{socket.gethostname()} {os.getpid()}"
+        self.acquired = False
+
+        self.executor = None
+        self.futures = []
+        self.n_done = 0
+        self.n_copied = 0
+        self.counter_lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(local_dir={self.local_dir}, "
+            f"num_workers={self.num_workers}, check={self.check}, "
+            f"recopy={self.recopy})"
+        )
+
+    def _read_holders(self) -> List[str]:
+        if not self.holders_file.exists():
+            return []
+        hostname = socket.gethostname()
+        holders = []
+        for line in self.holders_file.read_text().splitlines():
+            if line.strip() == "":
+                continue
+            host, pid = line.split()
+            if host == hostname:
+                try:
+                    os.kill(int(pid), 0)
+                except ProcessLookupError:
+                    logging.warning(
+                        f"Ignore the dead holder of {self.local_dir}: {pid}"
+                    )
+                    continue
+                except PermissionError:
+                    pass
+            holders.append(line)
+        return holders
+
+    def _write_holders(self, holders: List[str]):
+        tmp = self.holders_file.with_name(self.holders_file.name + f".{os.getpid()}")
+        tmp.write_text("".join(f"{h}\n" for h in holders))
+        os.replace(tmp, self.holders_file)
+
+    def acquire(self):
+        """Create the directory and register this process as a holder of it."""
+        self.local_dir.parent.mkdir(parents=True, exist_ok=True)
+        with flock(self.lock_file):
+            holders = self._read_holders()
+            if self.holder not in holders:
+                holders.append(self.holder)
+            self._write_holders(holders)
+            self.local_dir.mkdir(parents=True, exist_ok=True)
+        self.acquired = True
+        logging.info(f"{self.local_dir} is held by {len(holders)} job(s)")
+
+    def release(self) -> bool:
+        """Unregister this process and remove the directory if it's the last one.
+
+        Returns:
+            bool: Whether the directory was removed
+
+        """
+        self.close(cancel=True)
+        if not self.acquired:
+            return False
+        self.acquired = False
+        with flock(self.lock_file):
+            holders = [h for h in self._read_holders() if h != self.holder]
+            if len(holders) > 0:
+                self._write_holders(holders)
+                logging.info(
+                    f"Not removing local feat dir {self.local_dir}. "
+                    f"{len(holders)} other job(s) are using it."
+                )
+                return False
+            shutil.rmtree(self.local_dir, ignore_errors=True)
+            self.holders_file.unlink()
+            logging.info(f"Removed local feat dir: {self.local_dir}")
+            return True
+
+    def is_up_to_date(self, src: Union[Path, str], tgt: Union[Path, str]) -> bool:
+        """Return whether tgt is a copy of src."""
+        try:
+            tgt_stat = os.stat(tgt)
+        except FileNotFoundError:
+            return False
+        src_stat = os.stat(src)
+        if src_stat.st_size != tgt_stat.st_size:
+            return False
+        if self.check == "size_mtime":
+            return int(src_stat.st_mtime) == int(tgt_stat.st_mtime)
+        else:
+            return file_checksum(src) == file_checksum(tgt)
+
+    def copy(self, src: Union[Path, str], tgt: Union[Path, str]) -> bool:
+        """Copy src to tgt atomically unless tgt is up to date.
+
+        Returns:
+            bool: Whether the file was copied
+
+        """
+        tgt = str(tgt)
+        # Serialize the jobs staging the same file
+        with flock(tgt + ".lock"):
+            if not self.recopy and self.is_up_to_date(src, tgt):
+                copied = False
+            else:
+                tmp = f"{tgt}.tmp.{os.getpid()}.{threading.get_ident()}"
+                try:
+                    shutil.copy2(src, tmp)
+                    os.replace(tmp, tgt)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+                copied = True
+
+        with self.counter_lock:
+            self.n_done += 1
+            self.n_copied += int(copied)
+            n_done = self.n_done
+        logging.info(
+            "{:4d}/{:4d} {:s}: {:s} -> {:s}".format(
+                n_done,
+                len(self.futures),
+                "Copied" if copied else "Up to date",
+                str(src),
+                tgt,
+            )
+        )
+        return copied
+
+    def stage(self, files: Sequence[Tuple[str, str]], background: bool = False):
+        """Copy the files by the thread pool.
+
+        Args:
+            files: The pairs of the source path and the target path
+            background: Return without waiting for the copies
+
+        """
+        assert self.executor is None, "stage() can be called only once"
+        self.stime = time()
+        self.executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        self.futures = [self.executor.submit(self.copy, s, t) for s, t in files]
+        if background:
+            for f in self.futures:
+                f.add_done_callback(self._log_error)
+        else:
+            self.wait()
+
+    @staticmethod
+    def _log_error(future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.warning(f"Failed to stage a file: {future.exception()}")
+
+    def done(self) -> bool:
+        """Return whether all the files are staged."""
+        return all(f.done() for f in self.futures)
+
+    def wait(self):
+        """Wait for all the copies, and raise the error of them if any."""
+        for f in as_completed(self.futures):
+            f.result()
+        logging.info(
+            "Staged {:d} files ({:d} copied) in {:.2f} minutes".format(
+                len(self.futures), self.n_copied, (time() - self.stime) / 60.0
+            )
+        )
+
+    def close(self, cancel: bool = False):
+        """Shut down the thread pool.
+
+        Args:
+            cancel: Cancel the pending copies instead of waiting for them
+
+        """
+        if self.executor is None:
+            return
+        if cancel:
+            for f in self.futures:
+                f.cancel()
+        self.executor.shutdown(wait=True)
+        self.executor = None
@@ -0,0 +1,403 @@
+import collections.abc
+import math
+import multiprocessing
+import os
+import pickle
+import weakref
+from multiprocessing import shared_memory
+from typing import Dict
+from typing import Iterable
+from typing import Union
+
+import humanfriendly
+import numpy as np
+from typeguard import check_argument_types
+
+_ALIGN = 64
+_HEADER_LEN_BYTES = 8
+
+# Indices of the shared counters
+_TICK = 0
+_HITS = 1
+_MISSES = 2
+_INSERTIONS = 3
+_EVICTIONS = 4
+_SKIPPED = 5
+_NUM_COUNTERS = 6
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _release(shms, owner_pid: int):
+    # Only the process which created the segments unlinks them:
+    # the forked DataLoader workers inherit this finalizer too.
+    for shm in shms:
+        try:
+            shm.close()
+        except BufferError:
+            # numpy views of the segment are still alive
+            pass
+        if os.getpid() == owner_pid:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedMemoryCache(collections.abc.MutableMapping):
+    """Evicting cache of numpy arrays in POSIX shared memory.
+
+    The cache is shared by all DataLoader workers (fork or spawn): the arrays
+    are stored as raw bytes in a shared arena and copied out of it,
+    so neither a manager process nor pickling of the arrays is involved.
+
+    The arena is managed by a slab allocator similar to memcached:
+    it is divided into pages of "page_size" bytes and each page is assigned
+    to a size class on demand and then carved into chunks of that class.
+    A value occupies one chunk of the smallest class fitting it.
+    When a class is full, a chunk of the same class is evicted
+    following "policy" ("lru" or "clock"), and if the class has no page yet,
+    a whole page is taken from another class.
+    Values bigger than "page_size" are not cached.
+
+    The keys must be given at construction time, so that the index is
+    a flat array in shared memory. A value is a dict of numpy arrays,
+    e.g. the output of ESPnetDataset. Non-ndarray items are pickled.
+
+    The returned arrays are copied while holding the lock,
+    so they are never overwritten by the insertions of the other workers.
+
+    Examples:
+        >>> cache = SharedMemoryCache(["utt1", "utt2"], max_size="1GB")
+        >>> cache["utt1"] = {"speech": np.zeros(16000, dtype=np.float32)}
+        >>> cache["utt1"]["speech"].shape
+        (16000,)
+        >>> cache.stats()
+        {'hits': 1, 'misses': 0, ...}
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        max_size: Union[int, float, str],
+        policy: str = "lru",
+        page_size: int = 4 * 1024 * 1024,
+        min_chunk_size: int = 64 * 1024,
+        growth_factor: float = 1.25,
+    ):
+        assert check_argument_types()
+        if isinstance(max_size, str):
+            max_size = humanfriendly.parse_size(max_size)
+        if policy not in ("lru", "clock"):
+            raise ValueError(f"policy must be lru or clock: {policy}")
+        if max_size <= 0 or not math.isfinite(max_size):
+            raise ValueError(f"max_size must be finite and positive: {max_size}")
+        if growth_factor <= 1.0:
+            raise ValueError(f"growth_factor must be > 1: {growth_factor}")
+
+        self.policy = policy
+        self.page_size = _align(min(int(page_size), int(max_size)))
+        self.num_pages = max(int(max_size) // self.page_size, 1)
+        self.max_size = self.page_size * self.num_pages
+
+        # Size classes: [min_chunk_size, ..., page_size]
+        chunk_sizes = []
+        size = _align(min(min_chunk_size, self.page_size))
+        while size < self.page_size:
+            chunk_sizes.append(size)
+            size = _align(int(size * growth_factor))
+        chunk_sizes.append(self.page_size)
+        self.chunk_sizes = np.array(chunk_sizes, dtype=np.int64)
+        self.chunks_per_page = self.page_size // self.chunk_sizes
+        self.max_chunks_per_page = int(self.chunks_per_page[0])
+
+        self.key2index = {k: i for i, k in enumerate(keys)}
+        self.index2key = list(self.key2index)
+
+        # Layout of the metadata segment
+        num_keys = max(len(self.index2key), 1)
+        self._meta_layout = [
+            ("counters", np.int64, (_NUM_COUNTERS,)),
+            ("clock_hands", np.int64, (len(self.chunk_sizes),)),
+            ("page_class", np.int32, (self.num_pages,)),
+            ("owner", np.int32, (self.num_pages, self.max_chunks_per_page)),
+            ("stamp", np.int64, (self.num_pages, self.max_chunks_per_page)),
+            ("nbytes", np.int64, (self.num_pages, self.max_chunks_per_page)),
+            ("location", np.int64, (num_keys,)),
+        ]
+        meta_size = sum(
+            _align(np.dtype(t).itemsize * int(np.prod(s)))
+            for _, t, s in self._meta_layout
+        )
+        self._meta_shm = shared_memory.SharedMemory(create=True, size=meta_size)
+        self._data_shm = shared_memory.SharedMemory(create=True, size=self.max_size)
+        self._attach()
+
+        self.counters[:] = 0
+        self.clock_hands[:] = 0
+        self.page_class[:] = -1
+        self.owner[:] = -1
+        self.stamp[:] = 0
+        self.nbytes[:] = 0
+        self.location[:] = -1
+
+        # A lock from "spawn" context can be pickled for spawned workers
+        # and also inherited by forked workers
+        self._lock = multiprocessing.get_context("spawn").Lock()
+        self._finalizer = weakref.finalize(
+            self, _release, [self._meta_shm, self._data_shm], os.getpid()
+        )
+
+    def _attach(self):
+        offset = 0
+        for name, dtype, shape in self._meta_layout:
+            array = np.ndarray(
+                shape, dtype=dtype, buffer=self._meta_shm.buf, offset=offset
+            )
+            setattr(self, name, array)
+            offset += _align(np.dtype(dtype).itemsize * int(np.prod(shape)))
+        self._arena = np.ndarray(
+            (self.max_size,), dtype=np.uint8, buffer=self._data_shm.buf
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name, _, _ in self._meta_layout:
+            del state[name]
+        del state["_arena"]
+        del state["_finalizer"]
+        state["_meta_shm"] = self._meta_shm.name
+        state["_data_shm"] = self._data_shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._meta_shm = shared_memory.SharedMemory(name=state["_meta_shm"])
+        self._data_shm = shared_memory.SharedMemory(name=state["_data_shm"])
+        self._attach()
+        # Attached processes never unlink the segments
+        self._finalizer = weakref.finalize(
+            self, _release, [self._meta_shm, self._data_shm], -1
+        )
+
+    def close(self):
+        """Release the shared memory segments"""
+        for name, _, _ in self._meta_layout:
+            setattr(self, name, None)
+        self._arena = None
+        self._finalizer()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(max_size={self.max_size}, "
+            f"page_size={self.page_size}, policy={self.policy})"
+        )
+
+    # Mapping interface
+    def __len__(self) -> int:
+        return int((self.location >= 0).sum())
+
+    def __iter__(self):
+        for i in np.flatnonzero(self.location >= 0):
+            yield self.index2key[i]
+
+    def __contains__(self, key) -> bool:
+        index = self.key2index.get(key)
+        return index is not None and self.location[index] >= 0
+
+    def __getitem__(self, key: str) -> Dict[str, np.ndarray]:
+        index = self.key2index.get(key)
+        with self._lock:
+            loc = -1 if index is None else int(self.location[index])
+            if loc < 0:
+                self.counters[_MISSES] += 1
+                raise KeyError(key)
+            self.counters[_HITS] += 1
+            self._touch(loc)
+            start = self._offset(loc)
+            header_len = int(
+                self._arena[start : start + _HEADER_LEN_BYTES].view(np.uint64)[0]
+            )
+            header_start = start + _HEADER_LEN_BYTES
+            header = pickle.loads(
+                self._arena[header_start : header_start + header_len].tobytes()
+            )
+
+            # Copy the arrays before the chunk is released to the other workers
+            start += _align(_HEADER_LEN_BYTES + header_len)
+            retval = {}
+            for name, (is_array, *info) in header.items():
+                if is_array:
+                    dtype, shape, offset, nbytes = info
+                    retval[name] = (
+                        self._arena[start + offset : start + offset + nbytes]
+                        .view(dtype)
+                        .reshape(shape)
+                        .copy()
+                    )
+                else:
+                    retval[name] = info[0]
+        return retval
+
+    def __setitem__(self, key: str, value: Dict[str, np.ndarray]):
+        index = self.key2index.get(key)
+        if index is None:
+            raise KeyError(f"Not registered key: {key}")
+
+        # 1. Make the header: The offsets are relative to the data region
+        arrays = {}
+        header = {}
+        offset = 0
+        for name, v in value.items():
+            if isinstance(v, np.ndarray) and v.dtype.kind != "O":
+                v = np.ascontiguousarray(v)
+                arrays[name] = v
+                header[name] = (True, v.dtype.str, v.shape, offset, v.nbytes)
+                offset = _align(offset + v.nbytes)
+            else:
+                header[name] = (False, v)
+        header_bytes = pickle.dumps(header)
+        data_offset = _align(_HEADER_LEN_BYTES + len(header_bytes))
+        total = data_offset + offset
+
+        # 2. Allocate a chunk
+        with self._lock:
+            if total > self.page_size:
+                self.counters[_SKIPPED] += 1
+                return
+            if self.location[index] >= 0:
+                self._free(int(self.location[index]))
+            klass = int(np.searchsorted(self.chunk_sizes, total))
+            loc = self._allocate(klass)
+            page, slot = divmod(loc, self.max_chunks_per_page)
+            self.owner[page, slot] = index
+            self.nbytes[page, slot] = total
+            self.location[index] = loc
+            self.counters[_INSERTIONS] += 1
+            if self.policy == "lru":
+                self._touch(loc)
+
+            # 3. Copy the data into the chunk
+            start = self._offset(loc)
+            self._arena[start : start + _HEADER_LEN_BYTES] = np.array(
+                [len(header_bytes)], dtype=np.uint64
+            ).view(np.uint8)
+            header_start = start + _HEADER_LEN_BYTES
+            self._arena[
+                header_start : header_start + len(header_bytes)
+            ] = np.frombuffer(header_bytes, dtype=np.uint8)
+            start += data_offset
+            for name, v in arrays.items():
+                _, _, _, offset, nbytes = header[name]
+                self._arena[start + offset : start + offset + nbytes] = v.reshape(
+                    -1
+                ).view(np.uint8)
+
+    def __delitem__(self, key: str):
+        index = self.key2index.get(key)
+        with self._lock:
+            if index is None or self.location[index] < 0:
+                raise KeyError(key)
+            self._free(int(self.location[index]))
+
+    @property
+    def size(self) -> int:
+        """The total bytes of the cached entries"""
+        return int(self.nbytes.sum())
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        hits = int(self.counters[_HITS])
+        misses = int(self.counters[_MISSES])
+        return dict(
+            hits=hits,
+            misses=misses,
+            hit_rate=hits / max(hits + misses, 1),
+            insertions=int(self.counters[_INSERTIONS]),
+            evictions=int(self.counters[_EVICTIONS]),
+            skipped=int(self.counters[_SKIPPED]),
+            entries=len(self),
+            size=self.size,
+        )
+
+    # Allocator: The following methods must be called with the lock
+    def _offset(self, loc: int) -> int:
+        page, slot = divmod(loc, self.max_chunks_per_page)
+        klass = self.page_class[page]
+        return page * self.page_size + slot * int(self.chunk_sizes[klass])
+
+    def _touch(self, loc: int):
+        page, slot = divmod(loc, self.max_chunks_per_page)
+        if self.policy == "lru":
+            self.counters[_TICK] += 1
+            self.stamp[page, slot] = self.counters[_TICK]
+        else:
+            self.stamp[page, slot] = 1
+
+    def _free(self, loc: int):
+        page, slot = divmod(loc, self.max_chunks_per_page)
+        self.location[self.owner[page, slot]] = -1
+        self.owner[page, slot] = -1
+        self.nbytes[page, slot] = 0
+        self.stamp[page, slot] = 0
+
+    def _allocate(self, klass: int) -> int:
+        cpp = int(self.chunks_per_page[klass])
+        pages = np.flatnonzero(self.page_class == klass)
+
+        # 1. A free chunk in the pages of this class
+        if len(pages) > 0:
+            owner = self.owner[pages, :cpp]
+            free = np.flatnonzero(owner.reshape(-1) < 0)
+            if len(free) > 0:
+                page, slot = divmod(int(free[0]), cpp)
+                return int(pages[page]) * self.max_chunks_per_page + slot
+
+        # 2. An unassigned page
+        free_pages = np.flatnonzero(self.page_class < 0)
+        if len(free_pages) > 0:
+            page = int(free_pages[0])
+            self.page_class[page] = klass
+            return page * self.max_chunks_per_page
+
+        # 3. Evict a chunk of this class
+        if len(pages) > 0:
+            page, slot = self._select_victim(pages, cpp, klass)
+            self.counters[_EVICTIONS] += 1
+            self._free(page * self.max_chunks_per_page + slot)
+            return page * self.max_chunks_per_page + slot
+
+        # 4. Take over a page from another class
+        stamp = np.where(self.owner >= 0, self.stamp, 0)
+        if self.policy == "lru":
+            score = stamp.max(axis=1)
+        else:
+            score = stamp.sum(axis=1)
+        page = int(np.argmin(score))
+        for slot in np.flatnonzero(self.owner[page] >= 0):
+            self.counters[_EVICTIONS] += 1
+            self._free(page * self.max_chunks_per_page + int(slot))
+        self.page_class[page] = klass
+        return page * self.max_chunks_per_page
+
+    def _select_victim(self, pages: np.ndarray, cpp: int, klass: int):
+        # stamp: (NPage x Chunk,)
+        stamp = self.stamp[pages, :cpp].reshape(-1)
+        if self.policy == "lru":
+            i = int(np.argmin(stamp))
+        else:
+            # CLOCK: Sweep from the hand, giving a second chance
+            # to the chunks referenced after their insertion.
+            n = len(stamp)
+            hand = int(self.clock_hands[klass]) % n
+            order = np.roll(np.arange(n), -hand)
+            unreferenced = np.flatnonzero(stamp[order] == 0)
+            k = int(unreferenced[0]) if len(unreferenced) > 0 else 0
+            swept = order[:k] if len(unreferenced) > 0 else order
+            page_idx, slot_idx = np.divmod(swept, cpp)
+            self.stamp[pages[page_idx], slot_idx] = 0
+            i = int(order[k])
+            self.clock_hands[klass] = (i + 1) % n
+        page, slot = divmod(i, cpp)
+        return int(pages[page]), slot
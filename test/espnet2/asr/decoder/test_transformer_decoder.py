@@ -4,6 +4,7 @@ import torch
 from espnet.nets.batch_beam_search import BatchBeamSearch
 from espnet.nets.batch_beam_search_online_sim import BatchBeamSearchOnlineSim
 from espnet.nets.beam_search import BeamSearch
+from espnet.nets.pytorch_backend.transformer.kv_cache import KVCache
 from espnet.nets.scorers.ctc import CTCPrefixScorer
 from espnet2.asr.ctc import CTC
 from espnet2.asr.decoder.transformer_decoder import (
@@ -258,3 +259,143 @@ def test_TransformerDecoder_batch_beam_search_online(
             maxlenratio=0.0,
             minlenratio=0.0,
         )
+
+
+@pytest.mark.parametrize("normalize_before", [True, False])
+@pytest.mark.parametrize("concat_after", [True, False])
+def test_TransformerDecoder_batch_score_kv_cache(normalize_before, concat_after):
+    vocab_size = 6
+    encoder_output_size = 8
+    decoder = TransformerDecoder(
+        vocab_size=vocab_size,
+        encoder_output_size=encoder_output_size,
+        normalize_before=normalize_before,
+        concat_after=concat_after,
+        linear_units=10,
+        num_blocks=2,
+    )
+    decoder.eval()
+
+    n_batch = 3
+    xs = torch.randn(n_batch, 10, encoder_output_size)
+    ys = torch.randint(0, vocab_size, (n_batch, 5))
+    with torch.no_grad():
+        decoder.use_kv_cache = False
+        state = [None] * n_batch
+        kv_state = [None] * n_batch
+        for i in range(1, ys.size(1) + 1):
+            decoder.use_kv_cache = False
+            logp, state = decoder.batch_score(ys[:, :i], state, xs)
+            decoder.use_kv_cache = True
+            kv_logp, kv_state = decoder.batch_score(ys[:, :i], kv_state, xs)
+            torch.testing.assert_close(logp, kv_logp)
+            assert kv_state.length == i
+
+        # Prefill the cache for the whole prefix at once
+        kv_logp, _ = decoder.batch_score(ys, [None] * n_batch, xs)
+        torch.testing.assert_close(logp, kv_logp)
+
+        # Reorder the hypotheses
+        ids = torch.tensor([2, 2, 0])
+        ys2 = torch.cat([ys[ids], ys[ids, -1:]], dim=1)
+        logp, _ = decoder.batch_score(
+            ys2, decoder.batch_select_state(state, ids), xs[ids]
+        )
+        kv_logp, _ = decoder.batch_score(
+            ys2, decoder.batch_select_state(kv_state, ids), xs[ids]
+        )
+        torch.testing.assert_close(logp, kv_logp)
+
+        # A list of the states for each hypothesis
+        kv_logp, _ = decoder.batch_score(
+            ys2, [decoder.select_state(kv_state, int(i)) for i in ids], xs[ids]
+        )
+        torch.testing.assert_close(logp, kv_logp)
+
+
+def test_TransformerDecoder_batch_beam_search_kv_cache():
+    token_list = ["<blank>", "a", "b", "c", "unk", "<eos>"]
+    vocab_size = len(token_list)
+    encoder_output_size = 4
+
+    decoder = TransformerDecoder(
+        vocab_size=vocab_size,
+        encoder_output_size=encoder_output_size,
+        linear_units=10,
+    )
+    decoder.eval()
+    beam = BatchBeamSearch(
+        beam_size=3,
+        vocab_size=vocab_size,
+        weights={"test": 1.0},
+        scorers={"test": decoder},
+        token_list=token_list,
+        sos=vocab_size - 1,
+        eos=vocab_size - 1,
+        pre_beam_score_key=None,
+    )
+
+    enc = torch.randn(10, encoder_output_size)
+    with torch.no_grad():
+        decoder.use_kv_cache = False
+        nbest = beam(x=enc, maxlenratio=0.0, minlenratio=0.0)
+        decoder.use_kv_cache = True
+        kv_nbest = beam(x=enc, maxlenratio=0.0, minlenratio=0.0)
+    assert len(nbest) == len(kv_nbest)
+    for hyp, kv_hyp in zip(nbest, kv_nbest):
+        assert hyp.yseq.tolist() == kv_hyp.yseq.tolist()
+        torch.testing.assert_close(hyp.score, kv_hyp.score)
+
+
+@pytest.mark.parametrize("use_kv_cache", [True, False])
+def test_TransformerDecoder_batch_score_padded(use_kv_cache):
+    vocab_size = 6
+    encoder_output_size = 8
+    decoder = TransformerDecoder(
+        vocab_size=vocab_size,
+        encoder_output_size=encoder_output_size,
+        linear_units=10,
+        num_blocks=2,
+    )
+    decoder.use_kv_cache = use_kv_cache
+    decoder.eval()
+
+    xs_lens = torch.tensor([10, 4])
+    xs = torch.randn(2, 10, encoder_output_size)
+    ys = torch.randint(0, vocab_size, (2, 3))
+    with torch.no_grad():
+        logp, _ = decoder.batch_score_padded(ys, [None, None], xs, xs_lens)
+        for b in range(2):
+            expected, _ = decoder.batch_score(
+                ys[b : b + 1], [None], xs[b : b + 1, : xs_lens[b]]
+            )
+            torch.testing.assert_close(logp[b : b + 1], expected)
+
+
+def test_TransformerDecoder_batch_score_kv_cache_different_lengths():
+    vocab_size = 6
+    encoder_output_size = 8
+    decoder = TransformerDecoder(
+        vocab_size=vocab_size,
+        encoder_output_size=encoder_output_size,
+        linear_units=10,
+        num_blocks=2,
+    )
+    decoder.eval()
+
+    xs = torch.randn(2, 10, encoder_output_size)
+    ys = [torch.randint(0, vocab_size, (1, n)) for n in [3, 6]]
+    with torch.no_grad():
+        caches = []
+        for b, y in enumerate(ys):
+            _, state = decoder.batch_score(y[:, :-1], [None], xs[b : b + 1])
+            caches.append(state)
+        # The prefixes of the different lengths are scored at once
+        ys_pad = torch.full((2, 6), vocab_size - 1, dtype=torch.long)
+        for b, y in enumerate(ys):
+            ys_pad[b, : y.size(1)] = y
+        logp, state = decoder.batch_score(ys_pad, KVCache.cat(caches), xs)
+        assert state.length.tolist() == [3, 6]
+        for b, y in enumerate(ys):
+            expected, _ = decoder.batch_score(y, [None], xs[b : b + 1])
+            torch.testing.assert_close(logp[b : b + 1], expected)
@@ -50,3 +50,52 @@ def test_Encoder_output_size():
 def test_Encoder_invalid_type():
     with pytest.raises(ValueError):
         ContextualBlockTransformerEncoder(20, input_layer="fff")
+
+
+def _stack_states(states_list):
+    stacked = {}
+    for k in states_list[0]:
+        values = [s[k] for s in states_list]
+        if k == "n_processed_blocks":
+            stacked[k] = torch.tensor(values)
+        else:
+            stacked[k] = None if values[0] is None else torch.cat(values)
+    return stacked
+
+
+@pytest.mark.parametrize("is_final", [True, False])
+def test_Encoder_forward_infer_batch(is_final):
+    encoder = ContextualBlockTransformerEncoder(
+        20, output_size=40, input_layer="linear", block_size=8, hop_size=4, look_ahead=2
+    )
+    encoder.eval()
+    x = torch.randn(2, 20, 20)
+    lens = torch.LongTensor([20, 20])
+    with torch.no_grad():
+        # The first blocks of the streams
+        ys, _, states = encoder(x, lens, None, is_final=False, infer_mode=True)
+        states_list = []
+        for b in range(2):
+            y, _, s = encoder(
+                x[b : b + 1], lens[b : b + 1], None, is_final=False, infer_mode=True
+            )
+            torch.testing.assert_close(y, ys[b : b + 1])
+            states_list.append(s)
+        assert states["n_processed_blocks"] > 0
+
+        # The streams at the different positions
+        states_list[1]["n_processed_blocks"] += 3
+        ys, _, states = encoder(
+            x, lens, _stack_states(states_list), is_final=is_final, infer_mode=True
+        )
+        for b in range(2):
+            y, _, s = encoder(
+                x[b : b + 1],
+                lens[b : b + 1],
+                states_list[b],
+                is_final=is_final,
+                infer_mode=True,
+            )
+            torch.testing.assert_close(y, ys[b : b + 1])
+            if not is_final:
+                assert s["n_processed_blocks"] == int(states["n_processed_blocks"][b])
@@ -5,6 +5,7 @@ from espnet2.asr.ctc import CTC
 from espnet2.asr.decoder.mlm_decoder import MLMDecoder
 from espnet2.asr.encoder.conformer_encoder import ConformerEncoder
 from espnet2.asr.encoder.transformer_encoder import TransformerEncoder
+from espnet2.asr.maskctc_model import ctc_collapse
 from espnet2.asr.maskctc_model import MaskCTCInference
 from espnet2.asr.maskctc_model import MaskCTCModel
 
@@ -75,3 +76,52 @@ def test_maskctc(
             enc_out=torch.randn(2, 4),
         )
         s2t(**inputs)
+
+
+def test_ctc_collapse():
+    ctc_ids = torch.tensor([[0, 2, 2, 0, 0, 3, 3, 3], [4, 4, 0, 4, 1, 1, 9, 9]])
+    ctc_probs = torch.tensor(
+        [
+            [0.9, 0.2, 0.7, 0.5, 0.6, 0.3, 0.1, 0.8],
+            [0.4, 0.6, 0.9, 0.3, 0.5, 0.2, 0.1, 0.1],
+        ]
+    )
+    y_hat, probs_hat, n_runs = ctc_collapse(ctc_probs, ctc_ids, torch.tensor([8, 6]))
+    assert n_runs.tolist() == [4, 4]
+    assert y_hat.tolist() == [[0, 2, 0, 3], [4, 0, 4, 1]]
+    torch.testing.assert_close(
+        probs_hat, torch.tensor([[0.9, 0.7, 0.6, 0.8], [0.6, 0.9, 0.3, 0.5]])
+    )
+
+
+@pytest.mark.parametrize("n_iterations", [0, 2, 10])
+@pytest.mark.parametrize("threshold_probability", [0.3, 0.9])
+def test_maskctc_batch_forward(n_iterations, threshold_probability):
+    torch.manual_seed(0)
+    vocab_size = 5
+    enc_out = 4
+    model = MaskCTCModel(
+        vocab_size,
+        token_list=["<blank>", "<unk>", "a", "i", "<eos>"],
+        frontend=None,
+        specaug=None,
+        normalize=None,
+        preencoder=None,
+        encoder=TransformerEncoder(20, output_size=enc_out, num_blocks=1),
+        postencoder=None,
+        decoder=MLMDecoder(vocab_size, enc_out, linear_units=4, num_blocks=2),
+        ctc=CTC(odim=vocab_size, encoder_output_size=enc_out),
+    )
+    model.eval()
+    s2t = MaskCTCInference(
+        asr_model=model,
+        n_iterations=n_iterations,
+        threshold_probability=threshold_probability,
+    )
+
+    with torch.no_grad():
+        enc_out = torch.randn(4, 30, enc_out) * 3
+        enc_out_lens = torch.tensor([30, 12, 1, 25])
+        hyps = s2t.batch_forward(enc_out, enc_out_lens)
+        for e, e_len, hyp in zip(enc_out, enc_out_lens, hyps):
+            assert hyp.yseq.tolist() == s2t(e[:e_len]).yseq.tolist()
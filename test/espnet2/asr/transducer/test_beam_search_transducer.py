@@ -16,6 +16,8 @@ from espnet2.lm.seq_rnn_lm import SequentialRNNLM
         {"search_type": "default", "score_norm": False, "nbest": 4},
         {"search_type": "alsd", "u_max": 20},
         {"search_type": "tsd", "max_sym_exp": 3},
+        {"search_type": "batch_tsd", "max_sym_exp": 3, "lm": None},
+        {"search_type": "batch_tsd", "max_sym_exp": 3},
         {"search_type": "nsc", "nstep": 2, "lm": None},
         {"search_type": "nsc", "nstep": 2},
         {"search_type": "maes", "nstep": 2, "lm": None},
@@ -51,3 +53,42 @@ def test_transducer_beam_search(rnn_type, search_params):
 
     with torch.no_grad():
         _ = beam(enc_out)
+
+
+@pytest.mark.parametrize("rnn_type", ["lstm", "gru"])
+@pytest.mark.parametrize("use_lm", [False, True])
+@pytest.mark.parametrize("vocab_size, beam_size", [(4, 2), (10, 4)])
+def test_batch_time_sync_decoding_equal(rnn_type, use_lm, vocab_size, beam_size):
+    torch.manual_seed(0)
+    encoder_output_size = 4
+    decoder_output_size = 8
+
+    decoder = TransducerDecoder(
+        vocab_size, hidden_size=decoder_output_size, rnn_type=rnn_type
+    )
+    joint_net = JointNetwork(
+        vocab_size, encoder_output_size, decoder_output_size, joint_space_size=8
+    )
+    lm = SequentialRNNLM(vocab_size, rnn_type="lstm") if use_lm else None
+
+    enc_out = 3 * torch.randn(20, encoder_output_size)
+
+    nbest_hyps = {}
+    for search_type in ["tsd", "batch_tsd"]:
+        beam = BeamSearchTransducer(
+            decoder,
+            joint_net,
+            beam_size=beam_size,
+            lm=lm,
+            search_type=search_type,
+            max_sym_exp=3,
+            score_norm=False,
+            nbest=beam_size,
+        )
+        with torch.no_grad():
+            nbest_hyps[search_type] = beam(enc_out)
+
+    assert len(nbest_hyps["tsd"]) == len(nbest_hyps["batch_tsd"])
+    for hyp, batch_hyp in zip(nbest_hyps["tsd"], nbest_hyps["batch_tsd"]):
+        assert hyp.yseq == batch_hyp.yseq
+        assert float(hyp.score) == pytest.approx(batch_hyp.score, abs=1e-4)
@@ -0,0 +1,104 @@
+import gc
+
+import torch
+
+from espnet2.asr.transducer.beam_search_transducer import Hypothesis
+from espnet2.asr.transducer.prefix_cache import PrefixTrieCache
+from espnet2.asr.transducer.transducer_decoder import TransducerDecoder
+
+
+def test_PrefixTrieCache_find():
+    cache = PrefixTrieCache()
+    root = cache.root
+    node = cache.find([0, 1, 2])
+    assert node.depth == 3
+    assert cache.find([0, 1, 2]) is node
+    assert cache.find([0, 1, 2], hint=root.children[0]) is node
+    assert cache.find([0, 1, 2, 3], hint=node) is node.children[3]
+    assert cache.find([0, 1], hint=node) is root.children[0].children[1]
+
+
+def test_PrefixTrieCache_hit_miss():
+    cache = PrefixTrieCache()
+    hyp = Hypothesis(score=0.0, yseq=[0], dec_state=None)
+
+    node = cache.get_node(hyp)
+    assert hyp.cache_node is node
+    cache.set_value(node, (torch.zeros(1, 4), torch.zeros(2, 1, 4)))
+
+    new_hyp = Hypothesis(
+        score=0.0, yseq=hyp.yseq + [1], dec_state=None, cache_node=hyp.cache_node
+    )
+    assert cache.get_node(new_hyp) is node.children[1]
+    assert cache.get_node(hyp) is node
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["num_bytes"] == 12 * 4
+
+
+def test_PrefixTrieCache_eviction():
+    cache = PrefixTrieCache()
+    hyp = Hypothesis(score=0.0, yseq=[0], dec_state=None)
+    node = cache.get_node(hyp)
+    cache.set_value(node, (torch.zeros(1, 4), None))
+
+    hyps = [
+        Hypothesis(score=0.0, yseq=[0, k], dec_state=None, cache_node=node)
+        for k in range(1, 4)
+    ]
+    for h in hyps:
+        cache.get_node(h)
+    del h, node
+    # The root is held only weakly
+    assert cache.num_nodes == 4
+
+    # The pruned hypotheses free the nodes except the ones of the beam
+    hyp = hyps[0]
+    del hyps
+    gc.collect()
+    assert cache.num_nodes == 1
+    assert cache.num_bytes == 0
+    assert cache.max_num_nodes == 4
+
+    # The ancestors of the remaining hypothesis are no longer cached
+    assert cache.find([0, 1]) is not hyp.cache_node
+
+
+def test_TransducerDecoder_prefix_cache_score():
+    decoder = TransducerDecoder(10, rnn_type="lstm")
+    batch_state = decoder.init_state(3)
+    hyps = [
+        Hypothesis(
+            score=0.0, yseq=[0, k], dec_state=decoder.select_state(batch_state, k)
+        )
+        for k in range(3)
+    ]
+
+    cache = PrefixTrieCache()
+    dec_out, _, _ = decoder.batch_score(hyps, batch_state, cache, False)
+    dec_out_dict, _, _ = decoder.batch_score(hyps, batch_state, {}, False)
+    assert torch.allclose(dec_out, dec_out_dict)
+    assert cache.misses == 3
+
+    # Scored again from the cache
+    dec_out_cached, _, _ = decoder.batch_score(hyps, batch_state, cache, False)
+    assert cache.hits == 3
+    assert torch.equal(dec_out, dec_out_cached)
+
+
+def test_TransducerDecoder_prefix_cache_greedy():
+    decoder = TransducerDecoder(10, rnn_type="gru")
+    hyp = Hypothesis(score=0.0, yseq=[0], dec_state=decoder.init_state(1))
+
+    cache = PrefixTrieCache()
+    dec_out, state, _ = decoder.score(hyp, cache)
+    assert torch.equal(decoder.score(hyp, cache)[0], dec_out)
+
+    hyp.yseq.append(1)
+    hyp.dec_state = state
+    _ = decoder.score(hyp, cache)
+    assert hyp.cache_node.depth == 2
+    assert cache.hits == 1
+    assert cache.misses == 2
@@ -121,6 +121,32 @@ def test_Speech2Text_streaming(asr_config_file_streaming, lm_config_file):
         assert isinstance(hyp, Hypothesis)
 
 
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize("use_transformer", [True, False])
+def test_Speech2Text_batch_decode(
+    asr_config_file, asr_config_file_streaming, lm_config_file, use_transformer
+):
+    speech2text = Speech2Text(
+        asr_train_config=asr_config_file_streaming
+        if use_transformer
+        else asr_config_file,
+        lm_train_config=lm_config_file,
+        beam_size=2,
+        nbest=2,
+        batch_size=2,
+    )
+    speech = np.random.randn(2, 16000)
+    results_list = speech2text.batch_decode(speech, np.array([16000, 16000]))
+    assert len(results_list) == 2
+    for s, results in zip(speech, results_list):
+        expected = speech2text(s)
+        assert len(results) == len(expected)
+        for (text, token, token_int, hyp), e in zip(results, expected):
+            assert isinstance(text, str)
+            assert isinstance(hyp, Hypothesis)
+            assert token_int == e[2]
+
+
 @pytest.fixture()
 def enh_asr_config_file(tmp_path: Path, token_list):
     # Write default configuration file
@@ -66,3 +66,22 @@ def test_Speech2Text(asr_config_file):
         assert isinstance(token[0], str)
         assert isinstance(token_int[0], int)
         assert isinstance(hyp, Hypothesis)
+
+
+@pytest.mark.execution_timeout(10)
+def test_Speech2Text_batch_decode(asr_config_file):
+    speech2text = Speech2Text(asr_train_config=asr_config_file)
+    speech = np.random.randn(3, 20000).astype(np.float32)
+    results_list = speech2text.batch_decode(speech, np.array([20000] * 3))
+    assert len(results_list) == 3
+    for x, results in zip(speech, results_list):
+        desired = speech2text(x)
+        assert results[0][2] == desired[0][2]
+
+    # The padded frames are ignored
+    results_list = speech2text.batch_decode(speech, np.array([20000, 15000, 8000]))
+    for (text, token, token_int, hyp), length in zip(
+        [results[0] for results in results_list], [20000, 15000, 8000]
+    ):
+        assert isinstance(hyp, Hypothesis)
+        assert len(token_int) <= length // 512 + 1
@@ -0,0 +1,197 @@
+from argparse import ArgumentParser
+from pathlib import Path
+import string
+
+import numpy as np
+import pytest
+import torch
+
+from espnet2.bin.asr_inference_streaming import get_parser
+from espnet2.bin.asr_inference_streaming import main
+from espnet2.bin.asr_inference_streaming import MultiStreamSpeech2Text
+from espnet2.bin.asr_inference_streaming import Speech2TextStreaming
+from espnet2.tasks.asr import ASRTask
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ArgumentParser)
+
+
+def test_main():
+    with pytest.raises(SystemExit):
+        main()
+
+
+@pytest.fixture()
+def token_list(tmp_path: Path):
+    with (tmp_path / "tokens.txt").open("w") as f:
+        f.write("<blank>\n")
+        for c in string.ascii_letters:
+            f.write(f"{c}\n")
+        f.write("<unk>\n")
+        f.write("<sos/eos>\n")
+    return tmp_path / "tokens.txt"
+
+
+@pytest.fixture()
+def asr_config_file(tmp_path: Path, token_list):
+    # Write default configuration file
+    ASRTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "asr"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--encoder",
+            "contextual_block_transformer",
+            "--encoder_conf",
+            "block_size=40",
+            "--encoder_conf",
+            "hop_size=16",
+            "--encoder_conf",
+            "look_ahead=16",
+            "--encoder_conf",
+            "output_size=16",
+            "--encoder_conf",
+            "linear_units=32",
+            "--encoder_conf",
+            "num_blocks=2",
+            "--decoder",
+            "transformer",
+            "--decoder_conf",
+            "linear_units=32",
+            "--decoder_conf",
+            "num_blocks=1",
+        ]
+    )
+    return tmp_path / "asr" / "config.yaml"
+
+
+def _single_stream(speech2text, speech, block_samples):
+    n = len(speech) // block_samples
+    for i in range(n):
+        speech2text(speech[i * block_samples : (i + 1) * block_samples], is_final=False)
+    return speech2text(speech[n * block_samples :], is_final=True)
+
+
+@pytest.mark.parametrize("incremental_frontend", [False, True])
+@pytest.mark.parametrize("chunk_length", [100, 1000, 4096])
+def test_Speech2TextStreaming_apply_frontend(
+    asr_config_file, incremental_frontend, chunk_length
+):
+    if not incremental_frontend and chunk_length < 384:
+        pytest.skip("The chunk is shorter than the overlap of the frames")
+    speech2text = Speech2TextStreaming(
+        asr_train_config=asr_config_file, incremental_frontend=incremental_frontend
+    )
+    # The features of the chunks are normalized separately
+    speech2text.asr_model.normalize = None
+    speech = torch.randn(10000)
+    desired, _ = speech2text.asr_model._extract_feats(
+        speech[None], torch.tensor([len(speech)])
+    )
+
+    feats = []
+    states = None
+    for i in range(0, len(speech), chunk_length):
+        is_final = i + chunk_length >= len(speech)
+        x, x_lengths, states = speech2text.apply_frontend(
+            speech[i : i + chunk_length], states, is_final=is_final
+        )
+        assert x_lengths.tolist() == [x.size(1)]
+        feats.append(x)
+    np.testing.assert_allclose(
+        torch.cat(feats, dim=1).numpy(), desired.numpy(), atol=1e-5
+    )
+
+
+def test_Speech2TextStreaming_incremental_frontend(asr_config_file):
+    speech2text = Speech2TextStreaming(
+        asr_train_config=asr_config_file, beam_size=1, incremental_frontend=True
+    )
+    speech = np.random.randn(5000).astype(np.float32)
+    # No frames are extracted from the first chunk
+    speech2text(speech[:100], is_final=False)
+    results = _single_stream(speech2text, speech[100:], 1024)
+    for text, token, token_int, hyp in results:
+        assert isinstance(token_int, list)
+
+
+@pytest.mark.execution_timeout(20)
+@pytest.mark.parametrize("incremental_frontend", [False, True])
+def test_MultiStreamSpeech2Text(asr_config_file, incremental_frontend):
+    speech2text = Speech2TextStreaming(
+        asr_train_config=asr_config_file,
+        beam_size=2,
+        ctc_weight=0.3,
+        incremental_frontend=incremental_frontend,
+    )
+    block_samples = 4096
+    rng = np.random.RandomState(0)
+    speeches = {
+        f"utt{i}": rng.randn(n).astype(np.float32)
+        for i, n in enumerate([30000, 16384, 3000])
+    }
+    desired = {
+        k: _single_stream(speech2text, v, block_samples) for k, v in speeches.items()
+    }
+
+    engine = MultiStreamSpeech2Text(speech2text, block_samples=block_samples)
+    engine.join("utt0")
+    engine.join("utt1")
+    engine.join("aborted")
+    results = {}
+    metrics = {}
+    pos = {k: 0 for k in speeches}
+    n_ticks = 0
+    while len(engine.streams) > 0:
+        if n_ticks == 2:
+            # Join and leave in the middle of the other streams
+            metrics["aborted"] = engine.leave("aborted")
+            engine.join("utt2")
+            assert "aborted" not in engine.streams
+            assert "aborted" not in engine.metrics
+        for key in list(engine.streams):
+            if key == "aborted":
+                engine.feed(key, rng.randn(block_samples))
+            elif not engine.streams[key].is_final:
+                speech = speeches[key]
+                chunk = speech[pos[key] : pos[key] + block_samples]
+                pos[key] += len(chunk)
+                engine.feed(key, chunk, is_final=pos[key] >= len(speech))
+        for result in engine.step():
+            if result.is_final:
+                results[result.key] = result.results
+                metrics[result.key] = result.metrics
+        n_ticks += 1
+
+    assert results.keys() == desired.keys()
+    for key, nbest in results.items():
+        text, token, token_int, hyp = nbest[0]
+        assert token_int == desired[key][0][2]
+        np.testing.assert_allclose(
+            float(hyp.score), float(desired[key][0][3].score), rtol=1e-4
+        )
+    assert engine.metrics == {}
+    assert metrics["utt0"].n_samples == len(speeches["utt0"])
+    assert metrics["utt0"].n_blocks == len(speeches["utt0"]) // block_samples + 1
+    assert 0 < metrics["utt0"].mean_latency <= metrics["utt0"].max_latency
+    total = engine.total_metrics
+    assert total.n_samples == sum(m.n_samples for m in metrics.values())
+    assert total.n_blocks == sum(m.n_blocks for m in metrics.values())
+    assert total.max_latency == max(m.max_latency for m in metrics.values())
+
+
+def test_MultiStreamSpeech2Text_feed_after_final(asr_config_file):
+    speech2text = Speech2TextStreaming(asr_train_config=asr_config_file, beam_size=1)
+    engine = MultiStreamSpeech2Text(speech2text, block_samples=4096)
+    engine.join("a")
+    with pytest.raises(RuntimeError):
+        engine.join("a")
+    engine.feed("a", np.zeros(100, dtype=np.float32), is_final=True)
+    with pytest.raises(RuntimeError):
+        engine.feed("a", np.zeros(100, dtype=np.float32))
@@ -1,7 +1,9 @@
 from argparse import ArgumentParser
 from pathlib import Path
 import string
+from types import SimpleNamespace
 
+import numpy as np
 import pytest
 import torch
 import yaml
@@ -68,6 +70,68 @@ def test_SeparateSpeech(
     separate_speech(wav, fs=8000)
 
 
+@pytest.mark.execution_timeout(5)
+@pytest.mark.parametrize("batch_size", [1, 2])
+@pytest.mark.parametrize("segment_window", ["hann", "rect"])
+@pytest.mark.parametrize("normalize_segment_scale", [False, True])
+def test_SeparateSpeech_segment_batch_size(
+    config_file, batch_size, segment_window, normalize_segment_scale
+):
+    wav = torch.rand(batch_size, 35000)
+    waves = []
+    for segment_batch_size in [1, 3, 100]:
+        separate_speech = SeparateSpeech(
+            train_config=config_file,
+            segment_size=2.4,
+            hop_size=0.8,
+            normalize_segment_scale=normalize_segment_scale,
+            segment_batch_size=segment_batch_size,
+            segment_window=segment_window,
+        )
+        waves.append(separate_speech(wav, fs=8000))
+        assert len(waves[-1]) == separate_speech.num_spk
+        assert waves[-1][0].shape == wav.shape
+    for w in waves[1:]:
+        for w1, w2 in zip(waves[0], w):
+            np.testing.assert_allclose(w1, w2, rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize("segment_window", ["hann", "rect"])
+def test_SeparateSpeech_batch_segment_wise_alignment(config_file, segment_window):
+    # Two sources given as two channels are "separated" with the order
+    # swapped randomly in each segment
+    separate_speech = SeparateSpeech(
+        train_config=config_file,
+        segment_size=0.5,
+        hop_size=0.2,
+        segment_batch_size=4,
+        segment_window=segment_window,
+    )
+
+    def separator(feats, f_lens):
+        swap = (feats[:, 0, 0] > 0)[:, None]
+        s1 = torch.where(swap, feats[..., 1], feats[..., 0])
+        s2 = torch.where(swap, feats[..., 0], feats[..., 1])
+        return [s1, s2], f_lens, {}
+
+    separate_speech.enh_model = SimpleNamespace(
+        encoder=lambda x, lens: (x, lens),
+        separator=separator,
+        decoder=lambda x, lens: (x, lens),
+    )
+    separate_speech.num_spk = 2
+    separate_speech.ref_channel = 0
+
+    sources = torch.randn(2, 10000, 2)
+    waves = separate_speech(sources, fs=8000)
+    for b in range(2):
+        out = np.stack([w[b] for w in waves], axis=-1)
+        ref = sources[b].numpy()
+        if not np.allclose(out, ref, atol=1e-5):
+            ref = ref[:, ::-1]
+        np.testing.assert_allclose(out, ref, atol=1e-5)
+
+
 @pytest.fixture()
 def enh_inference_config(tmp_path: Path):
     # Write default configuration file
@@ -0,0 +1,132 @@
+from argparse import ArgumentParser
+from pathlib import Path
+import string
+
+import numpy as np
+import pytest
+import torch
+
+from espnet2.bin.lm_rescore import _find_leaves
+from espnet2.bin.lm_rescore import get_parser
+from espnet2.bin.lm_rescore import LMScorer
+from espnet2.bin.lm_rescore import main
+from espnet2.bin.lm_rescore import read_nbest
+from espnet2.fileio.datadir_writer import DatadirWriter
+from espnet2.fileio.read_text import read_2column_text
+from espnet2.tasks.lm import LMTask
+from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ArgumentParser)
+
+
+def test_main():
+    with pytest.raises(SystemExit):
+        main()
+
+
+@pytest.fixture()
+def token_list(tmp_path: Path):
+    with (tmp_path / "tokens.txt").open("w") as f:
+        f.write("<blank>\n")
+        for c in string.ascii_letters:
+            f.write(f"{c}\n")
+        f.write("<unk>\n")
+        f.write("<sos/eos>\n")
+    return tmp_path / "tokens.txt"
+
+
+@pytest.fixture(params=["seq_rnn", "transformer"])
+def lm_config_file(request, tmp_path: Path, token_list):
+    # Write default configuration file
+    LMTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "lm"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--lm",
+            request.param,
+        ]
+    )
+    return tmp_path / "lm" / "config.yaml"
+
+
+def test_find_leaves():
+    seqs = [(1, 2, 3), (1, 2), (1, 2, 3), (1, 4), (), (5,)]
+    leaves, leaf_ids = _find_leaves(seqs)
+    assert sorted(leaves) == [(1, 2, 3), (1, 4), (5,)]
+    for seq, i in zip(seqs, leaf_ids):
+        assert leaves[i][: len(seq)] == seq
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_LMScorer(lm_config_file, num_workers):
+    scorer = LMScorer(
+        train_config=lm_config_file, batch_bins=10, num_workers=num_workers
+    )
+    seqs = [[3, 5, 8, 2], [3, 5], [3, 5, 8, 2], [3, 4], [], [9, 1, 1, 7, 7, 2], [1]]
+    scores = scorer.score(seqs)
+
+    text = torch.zeros(len(seqs), 6, dtype=torch.long)
+    for i, seq in enumerate(seqs):
+        text[i, : len(seq)] = torch.tensor(seq, dtype=torch.long)
+    text_lengths = torch.tensor([len(seq) for seq in seqs])
+    with torch.no_grad():
+        nll, _ = scorer.model.nll(text, text_lengths)
+    np.testing.assert_allclose(scores, -nll.sum(1).numpy(), rtol=1e-5, atol=1e-5)
+
+
+def test_rescore(lm_config_file, tmp_path: Path):
+    nbest = {
+        "utt1": [("a b c", -1.0), ("a b", -1.5), ("x", -10.0)],
+        "utt2": [("", "tensor(-2.0)"), ("c", "tensor(-2.5)")],
+    }
+    with DatadirWriter(tmp_path / "decode") as writer:
+        for key, hyps in nbest.items():
+            for n, (token, score) in enumerate(hyps, 1):
+                writer[f"{n}best_recog"]["token"][key] = token
+                writer[f"{n}best_recog"]["text"][key] = token.replace(" ", "")
+                writer[f"{n}best_recog"]["score"][key] = str(score)
+
+    lm_weight = 0.5
+    main(
+        cmd=[
+            "--output_dir",
+            str(tmp_path / "rescored"),
+            "--nbest_dir",
+            str(tmp_path / "decode"),
+            "--train_config",
+            str(lm_config_file),
+            "--lm_weight",
+            str(lm_weight),
+            "--penalty",
+            "0.1",
+        ]
+    )
+
+    # The same model as the one initialized in main()
+    set_all_random_seed(0)
+    scorer = LMScorer(train_config=lm_config_file)
+    rescored = read_nbest(tmp_path / "rescored")
+    assert rescored.keys() == nbest.keys()
+    for key, hyps in rescored.items():
+        assert len(hyps) == len(nbest[key])
+        scores = [float(hyp["score"]) for hyp in hyps]
+        assert scores == sorted(scores, reverse=True)
+        for hyp in hyps:
+            token = hyp["token"].split()
+            lm_score = scorer.score([scorer.converter.tokens2ids(token)])[0]
+            np.testing.assert_allclose(float(hyp["lm_score"]), lm_score, rtol=1e-5)
+            np.testing.assert_allclose(
+                float(hyp["score"]),
+                float(hyp["asr_score"]) + lm_weight * lm_score + 0.1 * (len(token) + 1),
+                rtol=1e-5,
+            )
+            assert hyp["text"] == "".join(token)
+    assert read_2column_text(tmp_path / "rescored" / "1best_recog" / "asr_score")
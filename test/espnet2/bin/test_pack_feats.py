@@ -0,0 +1,39 @@
+from argparse import ArgumentParser
+from pathlib import Path
+
+import kaldiio
+import numpy as np
+import pytest
+
+from espnet2.bin.pack_feats import get_parser
+from espnet2.bin.pack_feats import main
+from espnet2.fileio.packed_archive import PackedArchiveReader
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ArgumentParser)
+
+
+def test_main():
+    with pytest.raises(SystemExit):
+        main()
+
+
+def test_main_kaldi_ark(tmp_path: Path):
+    desired = {"a": np.random.randn(10, 3), "b": np.random.randn(5, 3)}
+    with kaldiio.WriteHelper(f"ark,scp:{tmp_path}/feats.ark,{tmp_path}/feats.scp") as f:
+        for k, v in desired.items():
+            f[k] = v
+    main(
+        [
+            "--input_scp",
+            str(tmp_path / "feats.scp"),
+            "--output_dir",
+            str(tmp_path / "packed"),
+        ]
+    )
+    target = PackedArchiveReader(tmp_path / "packed" / "feats.scp")
+    assert list(target) == list(desired)
+    for k, v in desired.items():
+        assert target[k].dtype == np.float32
+        np.testing.assert_allclose(target[k], v, rtol=1e-6)
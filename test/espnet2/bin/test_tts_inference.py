@@ -54,8 +54,63 @@ def config_file(tmp_path: Path, token_list):
     return tmp_path / "config.yaml"
 
 
+@pytest.fixture()
+def fastspeech2_config_file(tmp_path: Path, token_list):
+    # Write default configuration file
+    TTSTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "fastspeech2"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--cleaner",
+            "none",
+            "--g2p",
+            "none",
+            "--normalize",
+            "none",
+            "--tts",
+            "fastspeech2",
+        ]
+    )
+    return tmp_path / "fastspeech2" / "config.yaml"
+
+
 @pytest.mark.execution_timeout(5)
 def test_Text2Speech(config_file):
     text2speech = Text2Speech(train_config=config_file)
     text = "aiueo"
     text2speech(text)
+
+
+@pytest.mark.execution_timeout(20)
+def test_Text2Speech_stream(config_file):
+    text2speech = Text2Speech(train_config=config_file, maxlenratio=3.0)
+    chunks = list(text2speech.stream("aiueo", chunk_size=4))
+    assert len(chunks) > 0
+    assert text2speech.vocoder_geometry is not None
+
+
+@pytest.mark.execution_timeout(20)
+def test_Text2Speech_batch(fastspeech2_config_file):
+    text2speech = Text2Speech(train_config=fastspeech2_config_file)
+    texts = ["aiueo", "a", "aiueoaiueo"]
+    output_dicts = text2speech.batch(texts)
+    assert len(output_dicts) == len(texts)
+    for text, output_dict in zip(texts, output_dicts):
+        assert len(output_dict["duration"]) == len(text) + 1
+        assert len(output_dict["feat_gen"]) == output_dict["duration"].sum()
+        assert "wav" in output_dict
+    assert text2speech.batch([]) == []
+
+
+@pytest.mark.execution_timeout(20)
+def test_Text2Speech_batch_autoregressive(config_file):
+    text2speech = Text2Speech(train_config=config_file, maxlenratio=3.0)
+    output_dicts = text2speech.batch(["aiueo", "a"])
+    assert len(output_dicts) == 2
+    assert all("feat_gen" in output_dict for output_dict in output_dicts)
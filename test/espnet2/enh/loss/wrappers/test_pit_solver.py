@@ -1,3 +1,5 @@
+from itertools import permutations
+
 import pytest
 import torch
 import torch.nn.functional as F
@@ -5,6 +7,7 @@ import torch.nn.functional as F
 from espnet2.enh.loss.criterions.tf_domain import FrequencyDomainCrossEntropy
 from espnet2.enh.loss.criterions.tf_domain import FrequencyDomainL1
 from espnet2.enh.loss.wrappers.pit_solver import PITSolver
+from espnet2.enh.loss.wrappers.pit_solver import solve_permutation
 
 
 @pytest.mark.parametrize("num_spk", [1, 2, 3])
@@ -47,3 +50,58 @@ def test_PITSolver_tf_ce_forward(num_spk):
 
     solver = PITSolver(FrequencyDomainCrossEntropy(), independent_perm=False)
     loss, stats, others = solver(ref, inf, {"perm": perm})
+
+
+@pytest.mark.parametrize("num_spk", [1, 2, 3, 4])
+def test_PITSolver_perm_search(num_spk):
+
+    batch = 3
+    inf = [torch.rand(batch, 10, 100) for spk in range(num_spk)]
+    ref = [torch.rand(batch, 10, 100) for spk in range(num_spk)]
+    criterion = FrequencyDomainL1()
+
+    loss, stats, others = PITSolver(criterion, perm_search="exhaustive")(ref, inf)
+    loss2, stats2, others2 = PITSolver(criterion, perm_search="hungarian")(ref, inf)
+    assert others["perm"].equal(others2["perm"])
+    torch.testing.assert_close(loss, loss2)
+
+    # brute force
+    losses = torch.stack(
+        [
+            sum(criterion(ref[s], inf[t]) for s, t in enumerate(p)) / num_spk
+            for p in permutations(range(num_spk))
+        ],
+        dim=1,
+    )
+    torch.testing.assert_close(loss, losses.min(dim=1)[0].mean())
+
+
+def test_PITSolver_stats():
+
+    batch = 2
+    ncls = 10
+    ref = [torch.randint(0, ncls, (batch, 10)) for spk in range(3)]
+    inf = [torch.rand(batch, 10, ncls) for spk in range(3)]
+    criterion = FrequencyDomainCrossEntropy()
+    for perm_search in ["exhaustive", "hungarian"]:
+        loss, stats, others = PITSolver(criterion, perm_search=perm_search)(ref, inf)
+        perm = others["perm"]
+        acc = []
+        for b in range(batch):
+            for s, t in enumerate(perm[b]):
+                criterion(ref[s][b : b + 1], inf[t][b : b + 1])
+                acc.append(criterion.stats["acc"])
+        torch.testing.assert_close(stats["acc"], torch.cat(acc).mean())
+
+
+def test_solve_permutation():
+
+    pairwise_losses = torch.tensor(
+        [[[4.0, 1.0, 3.0], [2.0, 0.0, 5.0], [3.0, 2.0, 2.0]]]
+    )
+    for perm_search in ["exhaustive", "hungarian"]:
+        loss, perm = solve_permutation(pairwise_losses, perm_search)
+        assert perm.equal(torch.tensor([[1, 0, 2]]))
+        assert loss.equal(torch.tensor([5.0]))
+    with pytest.raises(ValueError):
+        solve_permutation(pairwise_losses, "foo")
@@ -0,0 +1,155 @@
+import os
+from pathlib import Path
+import pickle
+
+import kaldiio
+import numpy as np
+import pytest
+
+from espnet2.fileio.indexed_text import get_index_path
+from espnet2.fileio.indexed_text import IndexedKaldiArkReader
+from espnet2.fileio.indexed_text import IndexedNumSequenceReader
+from espnet2.fileio.indexed_text import IndexedTextReader
+from espnet2.fileio.indexed_text import load_sorted_shapes
+from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.fileio.read_text import read_2column_text
+
+
+def test_IndexedTextReader(tmp_path: Path):
+    p = tmp_path / "text"
+    p.write_text("uttB  hello  world \nuttA\nuttC foo bar\nあ い\n", encoding="utf-8")
+
+    desired = read_2column_text(p)
+    target = IndexedTextReader(p)
+    assert get_index_path(p).exists()
+    assert len(target) == len(desired)
+    assert list(target) == list(desired)
+    assert dict(target.items()) == desired
+    for k, v in desired.items():
+        assert k in target
+        assert target[k] == v
+    assert "uttD" not in target
+    with pytest.raises(KeyError):
+        target["uttD"]
+
+
+def test_IndexedTextReader_find_all(tmp_path: Path):
+    p = tmp_path / "text"
+    p.write_text("b 1\nc 2\na 3\n")
+    target = IndexedTextReader(p)
+    ids = target.find_all(["c", "a", "b"])
+    assert [target.get_value(i) for i in ids] == ["2", "3", "1"]
+    assert target.get_values(ids) == ["2", "3", "1"]
+    assert target.get_values(ids[:0]) == []
+    assert len(target.find_all([])) == 0
+    with pytest.raises(KeyError):
+        target.find_all(["a", "bb"])
+
+
+def test_IndexedTextReader_rebuild(tmp_path: Path):
+    p = tmp_path / "text"
+    p.write_text("a 1\nb 2\n")
+    assert IndexedTextReader(p)["b"] == "2"
+    mtime = os.stat(get_index_path(p)).st_mtime_ns
+
+    # Reuse the index
+    assert IndexedTextReader(p)["a"] == "1"
+    assert os.stat(get_index_path(p)).st_mtime_ns == mtime
+
+    # Rebuild the index for the modified file
+    p.write_text("a 1\nb 2\nc 300\n")
+    os.utime(p, ns=(mtime + 10**9, mtime + 10**9))
+    target = IndexedTextReader(p)
+    assert target["c"] == "300"
+    assert len(target) == 3
+
+
+def test_IndexedTextReader_empty(tmp_path: Path):
+    p = tmp_path / "text"
+    p.write_text("")
+    target = IndexedTextReader(p)
+    assert len(target) == 0
+    assert "a" not in target
+
+
+def test_IndexedTextReader_duplicated(tmp_path: Path):
+    p = tmp_path / "text"
+    p.write_text("a 1\nb 2\na 3\n")
+    with pytest.raises(RuntimeError):
+        IndexedTextReader(p)
+
+
+@pytest.mark.parametrize(
+    "loader_type, content",
+    [
+        ("text_int", "b 1 2 3\na 4\n"),
+        ("text_float", "b 1.5 2\na -4\n"),
+        ("csv_int", "b 100,80\na 4\n"),
+        ("csv_float", "b 1.5,2\na -4\n"),
+    ],
+)
+def test_IndexedNumSequenceReader(tmp_path: Path, loader_type, content):
+    p = tmp_path / "shape"
+    p.write_text(content)
+    desired = load_num_sequence_text(p, loader_type=loader_type)
+    target = IndexedNumSequenceReader(p, loader_type=loader_type)
+    assert list(target) == list(desired)
+    for k, v in desired.items():
+        np.testing.assert_array_equal(target[k], v)
+    for k, v in target.items():
+        np.testing.assert_array_equal(v, desired[k])
+
+
+def test_IndexedNumSequenceReader_invalid_loader_type(tmp_path: Path):
+    p = tmp_path / "shape"
+    p.write_text("a 1\n")
+    with pytest.raises(ValueError):
+        IndexedNumSequenceReader(p, loader_type="foo")
+
+
+def test_IndexedKaldiArkReader(tmp_path: Path):
+    desired = {"abc": np.random.randn(3, 2), "def": np.random.randn(5, 2)}
+    scp = tmp_path / "feats.scp"
+    kaldiio.save_ark(str(tmp_path / "feats.ark"), desired, scp=str(scp))
+    target = IndexedKaldiArkReader(scp)
+    for k in desired:
+        np.testing.assert_array_equal(target[k], desired[k])
+
+
+def test_IndexedNumSequenceReader_pickle(tmp_path: Path):
+    p = tmp_path / "shape"
+    p.write_text("a 1,2\nb 3\n")
+    target = pickle.loads(pickle.dumps(IndexedNumSequenceReader(p)))
+    np.testing.assert_array_equal(target["a"], [1, 2])
+    np.testing.assert_array_equal(target["b"], [3])
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_load_sorted_shapes(tmp_path: Path, descending):
+    p1 = tmp_path / "shape1"
+    p1.write_text("c 30,80\na 10,80\nd 30,80\nb 20\n")
+    p2 = tmp_path / "shape2"
+    p2.write_text("a 3\nb 5\nc 7\nd 1\n")
+    ascending = ["a", "b", "c", "d"]
+    desired = ["c", "d", "b", "a"] if descending else ascending
+    for text_index in [False, True]:
+        keys, shapes, widths = load_sorted_shapes(
+            [p1, p2], text_index=text_index, descending=descending
+        )
+        assert keys == desired
+        ids = [ascending.index(k) for k in keys]
+        np.testing.assert_array_equal(
+            shapes[0], np.array([[10, 80], [20, 0], [30, 80], [30, 80]])[ids]
+        )
+        np.testing.assert_array_equal(widths[0], np.array([2, 1, 2, 2])[ids])
+        np.testing.assert_array_equal(shapes[1][:, 0], np.array([3, 5, 7, 1])[ids])
+
+
+@pytest.mark.parametrize("text_index", [False, True])
+def test_load_sorted_shapes_mismatched(tmp_path: Path, text_index):
+    p1 = tmp_path / "shape1"
+    p1.write_text("a 1\nb 2\n")
+    p2 = tmp_path / "shape2"
+    p2.write_text("a 1\nc 2\n")
+    with pytest.raises(RuntimeError):
+        load_sorted_shapes([p1, p2], text_index=text_index)
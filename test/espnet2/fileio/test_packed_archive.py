@@ -0,0 +1,87 @@
+from pathlib import Path
+import pickle
+
+import numpy as np
+import pytest
+
+from espnet2.fileio.packed_archive import ALIGNMENT
+from espnet2.fileio.packed_archive import PackedArchiveReader
+from espnet2.fileio.packed_archive import PackedArchiveWriter
+from espnet2.fileio.packed_archive import parse_packed_entry
+
+
+def test_parse_packed_entry():
+    assert parse_packed_entry("/a:b/feats.pack:128:<f4:100,80") == (
+        "/a:b/feats.pack",
+        128,
+        np.dtype("float32"),
+        (100, 80),
+    )
+    assert parse_packed_entry("/feats.pack:0:<i8:") == (
+        "/feats.pack",
+        0,
+        np.dtype("int64"),
+        (),
+    )
+
+
+@pytest.fixture
+def desired():
+    return {
+        "abc": np.random.randn(10, 3).astype(np.float32),
+        "def": np.random.randn(7),
+        "ghi": np.random.randint(0, 10, (2, 3, 4)),
+        "empty": np.zeros((0, 3), dtype=np.float32),
+        "scalar": np.array(3.0),
+        "fortran": np.asfortranarray(np.random.randn(5, 3)),
+    }
+
+
+def test_PackedArchive(tmp_path: Path, desired):
+    with PackedArchiveWriter(tmp_path / "feats.pack", tmp_path / "feats.scp") as writer:
+        for k, v in desired.items():
+            writer[k] = v
+    target = PackedArchiveReader(tmp_path / "feats.scp")
+
+    for k in desired:
+        t = target[k]
+        d = desired[k]
+        assert t.dtype == d.dtype
+        np.testing.assert_array_equal(t, d)
+        path, offset, _, _ = parse_packed_entry(writer.get_path(k))
+        assert path == str((tmp_path / "feats.pack").resolve())
+        assert offset % ALIGNMENT == 0
+
+    assert len(target) == len(desired)
+    assert "abc" in target
+    assert "xyz" not in target
+    assert tuple(target) == tuple(desired)
+    assert target.get_path("abc") == writer.get_path("abc")
+
+
+def test_PackedArchiveReader_readonly_view(tmp_path: Path):
+    with PackedArchiveWriter(tmp_path / "feats.pack", tmp_path / "feats.scp") as writer:
+        writer["abc"] = np.random.randn(10, 3)
+    target = PackedArchiveReader(tmp_path / "feats.scp")
+    array = target["abc"]
+    assert not array.flags.writeable
+    assert isinstance(array.base, np.memmap)
+    with pytest.raises(ValueError):
+        array[0] = 0
+
+
+def test_PackedArchiveReader_pickle(tmp_path: Path, desired):
+    with PackedArchiveWriter(tmp_path / "feats.pack", tmp_path / "feats.scp") as writer:
+        for k, v in desired.items():
+            writer[k] = v
+    target = PackedArchiveReader(tmp_path / "feats.scp")
+    target["abc"]
+    target = pickle.loads(pickle.dumps(target))
+    for k in desired:
+        np.testing.assert_array_equal(target[k], desired[k])
+
+
+def test_PackedArchiveWriter_object_array(tmp_path: Path):
+    with PackedArchiveWriter(tmp_path / "feats.pack", tmp_path / "feats.scp") as writer:
+        with pytest.raises(TypeError):
+            writer["abc"] = np.array([None, "a"], dtype=object)
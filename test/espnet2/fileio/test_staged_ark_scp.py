@@ -0,0 +1,40 @@
+from pathlib import Path
+import shutil
+
+import kaldiio
+import numpy as np
+
+from espnet2.fileio.staged_ark_scp import SOURCES_FILE
+from espnet2.fileio.staged_ark_scp import StagedArkScpReader
+
+
+def test_StagedArkScpReader(tmp_path: Path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    desired = {"abc": np.random.randn(3, 2), "def": np.random.randn(5, 2)}
+    kaldiio.save_ark(str(src_dir / "a.ark"), desired, scp=str(src_dir / "feats.scp"))
+
+    local_dir = tmp_path / "local"
+    local_dir.mkdir()
+    with (local_dir / "feats.scp").open("w") as f:
+        for line in (src_dir / "feats.scp").read_text().splitlines():
+            key, path = line.split()
+            f.write(f"{key} {path.replace(str(src_dir), str(local_dir))}\n")
+    with (local_dir / SOURCES_FILE).open("w") as f:
+        f.write(f"a.ark {src_dir / 'a.ark'}\n")
+
+    target = StagedArkScpReader(local_dir / "feats.scp")
+    assert len(target) == len(desired)
+    assert "abc" in target
+    assert tuple(target.keys()) == tuple(desired)
+
+    # Not staged yet
+    assert target.get_path("abc").startswith(str(src_dir / "a.ark"))
+    for k in desired:
+        np.testing.assert_array_equal(target[k], desired[k])
+
+    # Staged
+    shutil.copyfile(src_dir / "a.ark", local_dir / "a.ark")
+    assert target.get_path("abc").startswith(str(local_dir / "a.ark"))
+    for k in desired:
+        np.testing.assert_array_equal(target[k], desired[k])
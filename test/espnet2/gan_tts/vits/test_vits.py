@@ -1038,3 +1038,78 @@ def test_multi_speaker_vits_is_trainable_and_decodable_on_gpu(
         inputs = {k: v.to(device) for k, v in inputs.items()}
         output_dict = model.inference(**inputs, use_teacher_forcing=True)
         assert output_dict["wav"].size(0) == inputs["feats"].size(0) * upsample_factor
+
+
+@pytest.mark.skipif(
+    LooseVersion(torch.__version__) < LooseVersion("1.4"),
+    reason="Pytorch >= 1.4 is required.",
+)
+@pytest.mark.skipif(
+    "1.6" in torch.__version__,
+    reason="Group conv in pytorch 1.6 has an issue. "
+    "See https://github.com/pytorch/pytorch/issues/42446.",
+)
+@pytest.mark.parametrize("spks, spk_embed_dim, langs", [(-1, -1, -1), (4, 5, 3)])
+def test_vits_batch_inference(spks, spk_embed_dim, langs):
+    idim = 10
+    odim = 5
+    gen_args = make_vits_generator_args()
+    gen_args["generator_params"]["spks"] = spks
+    gen_args["generator_params"]["langs"] = langs
+    gen_args["generator_params"]["spk_embed_dim"] = spk_embed_dim
+    gen_args["generator_params"]["global_channels"] = 8
+    model = VITS(
+        idim=idim,
+        odim=odim,
+        **gen_args,
+        **make_vits_discriminator_args(),
+        **make_vits_loss_args(),
+    )
+    upsample_factor = model.generator.upsample_factor
+    inputs = dict(text=torch.randint(1, idim, (3, 6)))
+    if spks > 0:
+        inputs["sids"] = torch.randint(0, spks, (3, 1))
+    if langs > 0:
+        inputs["lids"] = torch.randint(0, langs, (3, 1))
+    if spk_embed_dim > 0:
+        inputs["spembs"] = torch.randn(3, spk_embed_dim)
+    decode_config = dict(noise_scale=0.0, noise_scale_dur=0.0)
+
+    with torch.no_grad():
+        model.eval()
+
+        # the same lengths: equal to the outputs of inference()
+        text_lengths = torch.tensor([6, 6, 6], dtype=torch.long)
+        batch_output_dict = model.batch_inference(
+            text_lengths=text_lengths, **inputs, **decode_config
+        )
+        for i in range(3):
+            output_dict = model.inference(
+                **{k: v[i] for k, v in inputs.items()}, **decode_config
+            )
+            length = batch_output_dict["wav_lengths"][i]
+            torch.testing.assert_allclose(
+                batch_output_dict["wav"][i, :length], output_dict["wav"]
+            )
+
+        # the different lengths
+        text_lengths = torch.tensor([6, 4, 1], dtype=torch.long)
+        batch_output_dict = model.batch_inference(
+            text_lengths=text_lengths, **inputs, **decode_config
+        )
+        feats_lengths = batch_output_dict["att_w_lengths"][:, 0]
+        assert (batch_output_dict["att_w_lengths"][:, 1] == text_lengths).all()
+        assert (
+            batch_output_dict["wav_lengths"] == feats_lengths * upsample_factor
+        ).all()
+        for i in range(3):
+            # the durations are not affected by the padding
+            output_dict = model.inference(
+                text=inputs["text"][i, : text_lengths[i]],
+                **{k: v[i] for k, v in inputs.items() if k != "text"},
+                **decode_config,
+            )
+            torch.testing.assert_allclose(
+                batch_output_dict["duration"][i, : text_lengths[i]],
+                output_dict["duration"],
+            )
@@ -1,7 +1,10 @@
+import itertools
+
 from espnet2.iterators.chunk_iter_factory import ChunkIterFactory
 from espnet2.train.collate_fn import CommonCollateFn
 
 import numpy as np
+import pytest
 
 
 class Dataset:
@@ -30,3 +33,48 @@ def test_ChunkIterFactory():
     for key, batch in iter_factory.build_iter(0):
         for k, v in batch.items():
             assert v.shape == (2, 3)
+
+
+class CountingDataset:
+    def __init__(self, lengths):
+        self.data = {
+            f"utt{i}": np.arange(L * 2).reshape(L, 2) for i, L in enumerate(lengths)
+        }
+        self.count = 0
+
+    def __getitem__(self, item):
+        self.count += 1
+        return item, {"x": self.data[item], "y": np.array([len(self.data[item])])}
+
+
+def _to_list(iterator):
+    return [(ids, {k: v.tolist() for k, v in batch.items()}) for ids, batch in iterator]
+
+
+@pytest.mark.parametrize("shuffle", [True, False])
+@pytest.mark.parametrize("num_cache_chunks", [1, 4, 1024])
+def test_ChunkIterFactory_resume(shuffle, num_cache_chunks):
+    dataset = CountingDataset([7, 12, 3, 9, 15, 8, 11, 6, 10, 13])
+    iter_factory = ChunkIterFactory(
+        dataset=dataset,
+        batches=[[k] for k in dataset.data],
+        batch_size=2,
+        chunk_length="3-5",
+        num_cache_chunks=num_cache_chunks,
+        shuffle=shuffle,
+        collate_fn=CommonCollateFn(not_sequence=["y"]),
+    )
+    seq = _to_list(iter_factory.build_iter(3))
+    assert len(seq) > 0
+    for n in range(len(seq)):
+        it = iter_factory.build_iter(3)
+        assert _to_list(itertools.islice(it, n)) == seq[:n]
+        state = iter_factory.state_dict(n)
+
+        iter_factory.load_state_dict(state)
+        dataset.count = 0
+        assert _to_list(iter_factory.build_iter(3)) == seq[n:]
+        # The samples before the cached chunks are not loaded again
+        assert dataset.count <= len(dataset.data) - state["num_samples"] + sum(
+            len(set(ids)) for _, ids, _ in state["caches"]
+        ) + (0 if state["pending"] is None else len(set(state["pending"][1])))
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+import torch
+
+from espnet2.iterators.chunk_iter_factory import ChunkIterFactory
+from espnet2.iterators.prefetch_iterable import PrefetchIterable
+from espnet2.train.collate_fn import CommonCollateFn
+from espnet2.train.trainer import IntervalCallbackIterable
+from test.espnet2.iterators.test_chunk_iter_factory import CountingDataset
+
+
+def _items(n):
+    return [(str(i), {"x": torch.full((2,), i)}) for i in range(n)]
+
+
+@pytest.mark.parametrize("depth", [1, 3])
+def test_PrefetchIterable(depth):
+    items = _items(7)
+    it = PrefetchIterable(items, "cpu", depth=depth)
+    assert len(it) == 7
+    for (key, batch), (key2, batch2) in zip(it, items):
+        assert key == key2
+        assert torch.equal(batch["x"], batch2["x"])
+    assert len(list(it)) == 7
+
+
+def test_PrefetchIterable_raises_error_of_iterable():
+    def _gen():
+        yield from _items(2)
+        raise RuntimeError("broken")
+
+    it = PrefetchIterable(_gen(), "cpu")
+    with pytest.raises(RuntimeError, match="broken"):
+        list(it)
+
+
+def test_PrefetchIterable_break():
+    it = iter(PrefetchIterable(_items(100), "cpu", depth=2))
+    next(it)
+    it.close()
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Require cuda")
+def test_PrefetchIterable_cuda():
+    items = _items(5)
+    for (_, batch), (_, batch2) in zip(PrefetchIterable(items, "cuda"), items):
+        assert batch["x"].is_cuda
+        assert torch.equal(batch["x"].cpu(), batch2["x"])
+
+
+def test_PrefetchIterable_barrier():
+    dataset = CountingDataset([7, 12, 3, 9, 15, 8, 11, 6, 10, 13])
+    iter_factory = ChunkIterFactory(
+        dataset=dataset,
+        batches=[[k] for k in dataset.data],
+        batch_size=2,
+        chunk_length="3-5",
+        collate_fn=CommonCollateFn(not_sequence=["y"]),
+    )
+    num_items = len(list(iter_factory.build_iter(1)))
+
+    states = {}
+    it = IntervalCallbackIterable(
+        PrefetchIterable(iter_factory.build_iter(1), "cpu", 3, barrier_interval=4),
+        4,
+        lambda n: states.setdefault(n, iter_factory.state_dict(n)),
+    )
+    count = 0
+    for _ in it:
+        # Let the thread read ahead as far as possible
+        time.sleep(0.01)
+        count += 1
+    assert count == num_items
+    assert len(states) > 0
+    for n, state in states.items():
+        # The rest of the epoch from the checkpoint
+        iter_factory.load_state_dict(state)
+        assert len(list(iter_factory.build_iter(1))) == num_items - n
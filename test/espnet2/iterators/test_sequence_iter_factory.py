@@ -67,3 +67,36 @@ def test_SequenceIterFactory_deterministic(collate, num_iters_per_epoch):
     for i in range(1, 10):
         for v, v2 in zip(iter_factory.build_iter(i), iter_factory.build_iter(i)):
             assert (v == v2).all()
+
+
+@pytest.mark.parametrize("num_iters_per_epoch", [None, 3, 9])
+def test_SequenceIterFactory_resume(num_iters_per_epoch):
+    dataset = Dataset()
+    batches = [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]]
+    iter_factory = SequenceIterFactory(
+        dataset=dataset,
+        batches=batches,
+        num_iters_per_epoch=num_iters_per_epoch,
+        shuffle=True,
+        collate_fn=collate_func,
+    )
+    seq = [list(map(int, it)) for it in iter_factory.build_iter(2)]
+    for n in range(len(seq)):
+        it = iter_factory.build_iter(2)
+        for _, _ in zip(range(n), it):
+            pass
+        state = iter_factory.state_dict(n)
+
+        iter_factory.load_state_dict(state)
+        resumed = [list(map(int, it)) for it in iter_factory.build_iter(2)]
+        assert resumed == seq[n:]
+        # The offset of the resumed iterator is kept
+        assert iter_factory.state_dict(1)["num_iters"] == n + 1
+
+
+def test_SequenceIterFactory_resume_other_epoch():
+    iter_factory = SequenceIterFactory(
+        dataset=Dataset(), batches=[[0, 1], [2, 3]], collate_fn=collate_func
+    )
+    iter_factory.load_state_dict({"epoch": 1, "num_iters": 1})
+    assert len(list(iter_factory.build_iter(2))) == 2
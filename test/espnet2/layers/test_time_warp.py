@@ -1,6 +1,10 @@
+import numpy as np
 import pytest
 import torch
 
+from espnet2.layers.time_warp import _batch_warp
+from espnet2.layers.time_warp import _draw_warp
+from espnet2.layers.time_warp import batch_time_warp
 from espnet2.layers.time_warp import TimeWarp
 
 
@@ -19,3 +23,62 @@ def test_TimeWarp(x_lens, requires_grad):
 def test_TimeWarp_repr():
     time_warp = TimeWarp(window=10)
     print(time_warp)
+
+
+@pytest.mark.parametrize("mode", ["bicubic", "bilinear", "nearest"])
+def test_batch_warp(mode):
+    x = torch.randn(3, 50, 10, dtype=torch.float64)
+    lengths = torch.tensor([50, 40, 25])
+    center = torch.tensor([20, 10, 25])
+    warped = torch.tensor([24, 6, 25])
+    y = _batch_warp(x, lengths, center, warped, mode)
+    assert y.shape == (3, 50, 10)
+    for i in range(3):
+        # The same as time_warp() with the center and the warped position
+        x_i = x[i : i + 1, None, : lengths[i]]
+        kwargs = dict(mode=mode)
+        if mode != "nearest":
+            kwargs["align_corners"] = False
+        left = torch.nn.functional.interpolate(
+            x_i[:, :, : center[i]], (warped[i], 10), **kwargs
+        )
+        if center[i] < lengths[i]:
+            right = torch.nn.functional.interpolate(
+                x_i[:, :, center[i] :], (lengths[i] - warped[i], 10), **kwargs
+            )
+            left = torch.cat([left, right], dim=2)
+        desired = left[0, 0]
+        np.testing.assert_allclose(y[i, : lengths[i]], desired, atol=1e-10)
+        assert (y[i, lengths[i] :] == 0).all()
+
+
+def test_draw_warp():
+    torch.manual_seed(0)
+    window = 5
+    lengths = torch.tensor([100, 30, 11, 10] * 2000)
+    center, warped = _draw_warp(lengths, window)
+    for length in [100, 30]:
+        c = center[lengths == length]
+        w = warped[lengths == length]
+        # The same ranges as time_warp()
+        assert c.min() == window and c.max() == length - window - 1
+        assert ((w - c).min(), (w - c).max()) == (1 - window, window)
+        np.testing.assert_allclose(c.double().mean(), (length - 1) / 2, rtol=0.05)
+        np.testing.assert_allclose((w - c).double().mean(), 0.5, atol=0.2)
+    # Too short to warp
+    assert (center[lengths <= 2 * window] == lengths[lengths <= 2 * window]).all()
+    assert (warped[lengths <= 2 * window] == lengths[lengths <= 2 * window]).all()
+
+
+def test_batch_time_warp():
+    x = torch.randn(4, 60, 8, requires_grad=True)
+    x_lengths = torch.tensor([50, 60, 8, 35])
+    y = batch_time_warp(x, x_lengths, window=5)
+    assert y.shape == (4, 60, 8)
+    # The utterance too short to warp is kept
+    torch.testing.assert_close(y[2, :8], x[2, :8])
+    assert (y[0, 50:] == 0).all()
+    y.sum().backward()
+
+    with pytest.raises(ValueError):
+        batch_time_warp(x, x_lengths, mode="area")
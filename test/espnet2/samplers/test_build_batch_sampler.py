@@ -1,3 +1,6 @@
+import time
+
+import numpy as np
 import pytest
 
 from espnet2.samplers.build_batch_sampler import build_batch_sampler
@@ -59,3 +62,76 @@ def test_build_batch_sampler_invalid_fold_lengths(shape_files):
             fold_lengths=[800, 40, 100],
             type="seq",
         )
+
+
+@pytest.mark.parametrize("type", ["unsorted", "sorted", "folded", "length", "numel"])
+def test_build_batch_sampler_text_index(shape_files, type):
+    kwargs = dict(
+        batch_bins=60000,
+        batch_size=2,
+        shape_files=shape_files,
+        fold_lengths=[800, 40],
+        type=type,
+    )
+    desired = list(build_batch_sampler(**kwargs))
+    assert list(build_batch_sampler(text_index=True, **kwargs)) == desired
+
+
+@pytest.mark.parametrize("padding", [True, False])
+@pytest.mark.parametrize("type", ["sorted", "folded", "length", "numel"])
+def test_build_batch_sampler_text_index_shuffled(tmp_path, type, padding):
+    rng = np.random.RandomState(0)
+    keys = [f"utt{i}" for i in rng.permutation(50)]
+    shape_files = [str(tmp_path / "shape1.txt"), str(tmp_path / "shape2.txt")]
+    with open(shape_files[0], "w") as f1, open(shape_files[1], "w") as f2:
+        for k in keys:
+            # The same lengths are included to check the order of them
+            f1.write(f"{k} {rng.randint(5) * 100},80\n")
+            f2.write(f"{k} {rng.randint(1, 50)},30\n")
+    utt2category_file = tmp_path / "utt2category"
+    with utt2category_file.open("w") as f:
+        for k in keys:
+            f.write(f"{k} {rng.randint(3)}\n")
+
+    kwargs = dict(
+        batch_bins=6000,
+        batch_size=4,
+        shape_files=shape_files,
+        fold_lengths=[300, 40],
+        type=type,
+        padding=padding,
+    )
+    if type == "folded":
+        kwargs["utt2category_file"] = str(utt2category_file)
+    desired = build_batch_sampler(**kwargs)
+    target = build_batch_sampler(text_index=True, **kwargs)
+    assert list(target) == list(desired)
+    if type == "folded":
+        assert target.batch_categories == desired.batch_categories
+
+
+def test_build_batch_sampler_text_index_faster(tmp_path):
+    rng = np.random.RandomState(0)
+    shape_file = tmp_path / "shape.txt"
+    with shape_file.open("w") as f:
+        for i, n in enumerate(rng.randint(100, 3000, 50000)):
+            f.write(f"utt{i:06d} {n},80\n")
+    kwargs = dict(
+        batch_bins=100000,
+        batch_size=32,
+        shape_files=[str(shape_file)],
+        fold_lengths=[800],
+        type="numel",
+    )
+    # Build the index file beforehand
+    build_batch_sampler(text_index=True, **kwargs)
+
+    def _time(text_index):
+        elapsed = []
+        for _ in range(2):
+            start = time.perf_counter()
+            build_batch_sampler(text_index=text_index, **kwargs)
+            elapsed.append(time.perf_counter() - start)
+        return min(elapsed)
+
+    assert _time(True) < _time(False)
@@ -5,6 +5,7 @@ import pytest
 import torch
 
 from espnet2.torch_utils.device_funcs import force_gatherable
+from espnet2.torch_utils.device_funcs import record_stream
 from espnet2.torch_utils.device_funcs import to_device
 
 x = torch.tensor(10)
@@ -34,6 +35,25 @@ def test_to_device_cuda():
     assert obj2["a"][0].device == torch.device("cuda:0")
 
 
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Require cuda")
+def test_to_device_cuda_non_blocking():
+    obj = {"a": [torch.arange(10)]}
+    stream = torch.cuda.Stream()
+    with torch.cuda.stream(stream):
+        obj2 = to_device(obj, "cuda", non_blocking=True)
+    torch.cuda.current_stream().wait_stream(stream)
+    record_stream(obj2, torch.cuda.current_stream())
+    assert torch.equal(obj2["a"][0].cpu(), obj["a"][0])
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [x, (x,), [x], {"x": [x]}, Data(x), Named(x), 23, None],
+)
+def test_record_stream_ignores_cpu_tensors(obj):
+    record_stream(obj, None)
+
+
 @pytest.mark.parametrize(
     "obj",
     [x, x.numpy(), (x,), [x], {"x": x}, {x}, Data(x), Named(x), 23, 3.0, None],
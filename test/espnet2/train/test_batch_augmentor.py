@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+import scipy.signal
+import soundfile
+import torch
+
+from espnet2.train.batch_augmentor import BatchAugmentor
+from espnet2.train.batch_augmentor import fft_convolve
+from espnet2.train.batch_augmentor import non_silence_power
+from espnet2.train.collate_fn import CommonCollateFn
+from espnet2.train.preprocessor import detect_non_silence
+
+
+@pytest.fixture()
+def rir_scp(tmp_path: Path):
+    rng = np.random.RandomState(0)
+    p = tmp_path / "rirs.scp"
+    with p.open("w") as f:
+        for i in range(3):
+            rir = rng.randn(300 + 100 * i).astype(np.float32)
+            rir *= np.exp(-np.arange(len(rir)) / 50)
+            soundfile.write(tmp_path / f"rir{i}.wav", rir, 16000, subtype="FLOAT")
+            f.write(f"rir{i} {tmp_path / f'rir{i}.wav'}\n")
+    return str(p)
+
+
+@pytest.fixture()
+def noise_scp(tmp_path: Path):
+    rng = np.random.RandomState(1)
+    p = tmp_path / "noises.scp"
+    with p.open("w") as f:
+        for i, n in enumerate([1000, 5000]):
+            noise = rng.randn(n).astype(np.float32) * 0.1
+            soundfile.write(tmp_path / f"noise{i}.wav", noise, 16000, subtype="FLOAT")
+            f.write(f"{tmp_path / f'noise{i}.wav'}\n")
+    return str(p)
+
+
+def _data(lengths, seed=0):
+    rng = np.random.RandomState(seed)
+    return [
+        (f"utt{i}", {"speech": (rng.randn(n) * 0.1).astype(np.float32)})
+        for i, n in enumerate(lengths)
+    ]
+
+
+def test_fft_convolve():
+    x = torch.randn(2, 3, 100)
+    h = torch.randn(2, 1, 30)
+    y = fft_convolve(x, h)
+    for i in range(2):
+        for c in range(3):
+            desired = np.convolve(x[i, c].numpy(), h[i, 0].numpy())[:100]
+            np.testing.assert_allclose(y[i, c].numpy(), desired, atol=1e-4)
+
+
+@pytest.mark.parametrize("length", [500, 1024, 3000, 4700])
+def test_non_silence_power(length):
+    x = np.random.randn(2, length).astype(np.float32)
+    x[:, : length // 3] *= 1e-3
+    desired = (x[detect_non_silence(x)] ** 2).mean()
+    # Padded with non-zero values, which must be ignored
+    xs = torch.ones(1, 2, 5000)
+    xs[0, :, :length] = torch.from_numpy(x)
+    power = non_silence_power(xs, torch.tensor([length]))
+    np.testing.assert_allclose(power.numpy(), [desired], rtol=1e-4)
+
+
+def test_BatchAugmentor_rir(rir_scp):
+    augmentor = BatchAugmentor(rir_scp=rir_scp, seed=3)
+    data = _data([2000, 4000, 3000])
+    uttids, batch = CommonCollateFn(augmentor=augmentor)(
+        [(k, dict(v)) for k, v in data]
+    )
+    assert batch["speech"].shape == (3, 4000)
+    rirs = augmentor._rirs
+    for i, (k, d) in enumerate(data):
+        # The reference of CommonPreprocessor with the same RIR
+        rng = augmentor._rng(k)
+        rng.random_sample()
+        rir = rirs[rng.randint(len(rirs))]
+        speech = d["speech"][None].astype(np.float64)
+        power = (speech[detect_non_silence(speech)] ** 2).mean()
+        y = scipy.signal.convolve(speech, rir, mode="full")[:, : speech.shape[1]]
+        power2 = (y[detect_non_silence(y)] ** 2).mean()
+        y = np.sqrt(power / max(power2, 1e-10)) * y
+        y = y / max(np.abs(y).max(), 1.0)
+        n = len(d["speech"])
+        np.testing.assert_allclose(batch["speech"][i, :n].numpy(), y[0], atol=1e-4)
+        assert (batch["speech"][i, n:] == 0).all()
+
+
+def test_BatchAugmentor_noise(noise_scp):
+    augmentor = BatchAugmentor(noise_scp=noise_scp, noise_db_range="5", seed=0)
+    data = _data([2000, 8000])
+    _, batch = CommonCollateFn(augmentor=augmentor)([(k, dict(v)) for k, v in data])
+    for i, (_, d) in enumerate(data):
+        speech = d["speech"]
+        n = len(speech)
+        noise = batch["speech"][i, :n].numpy() - speech
+        power = (speech[detect_non_silence(speech)] ** 2).mean()
+        snr = 10 * np.log10(power / (noise**2).mean())
+        np.testing.assert_allclose(snr, 5.0, atol=1e-3)
+
+
+def test_BatchAugmentor_multi_channel(rir_scp, noise_scp):
+    augmentor = BatchAugmentor(rir_scp=rir_scp, noise_scp=noise_scp)
+    data = [("a", {"speech": np.random.randn(3000, 2).astype(np.float32)})]
+    _, batch = CommonCollateFn(augmentor=augmentor)(data)
+    assert batch["speech"].shape == (1, 3000, 2)
+
+
+def test_BatchAugmentor_reproducible(rir_scp, noise_scp):
+    def _run(data, epoch):
+        collate_fn = CommonCollateFn(
+            augmentor=BatchAugmentor(rir_scp=rir_scp, noise_scp=noise_scp)
+        )
+        collate_fn.set_epoch(epoch)
+        _, batch = collate_fn([(k, dict(v)) for k, v in data])
+        return batch["speech"]
+
+    data = _data([2000, 3000, 2500])
+    speech = _run(data, 1)
+    # The result of each utterance doesn't depend on the other utterances
+    speech2 = _run(data[1:2], 1)
+    np.testing.assert_allclose(speech[1].numpy(), speech2[0].numpy(), atol=1e-5)
+    assert not torch.allclose(_run(data, 2)[1], speech[1])
+
+
+def test_BatchAugmentor_without_files():
+    data = _data([100, 200])
+    _, batch = CommonCollateFn(augmentor=BatchAugmentor())(data)
+    np.testing.assert_array_equal(batch["speech"][1].numpy(), data[1][1]["speech"])
@@ -0,0 +1,164 @@
+from pathlib import Path
+
+import pytest
+import torch
+
+from espnet2.iterators.sequence_iter_factory import SequenceIterFactory
+from espnet2.train.checkpoint_writer import CheckpointWriter
+from espnet2.train.checkpoint_writer import save_atomic
+from espnet2.train.reporter import Reporter
+from espnet2.train.trainer import IntervalCallbackIterable
+from espnet2.train.trainer import Trainer
+
+
+def test_save_atomic(tmp_path: Path):
+    save_atomic({"a": torch.ones(3)}, tmp_path / "a.pth")
+    assert torch.equal(torch.load(tmp_path / "a.pth")["a"], torch.ones(3))
+    assert list(tmp_path.iterdir()) == [tmp_path / "a.pth"]
+
+
+def test_save_atomic_error(tmp_path: Path):
+    save_atomic(1, tmp_path / "a.pth")
+    with pytest.raises(Exception):
+        save_atomic(lambda: None, tmp_path / "a.pth")
+    # The previous file is kept
+    assert torch.load(tmp_path / "a.pth") == 1
+    assert list(tmp_path.iterdir()) == [tmp_path / "a.pth"]
+
+
+@pytest.mark.parametrize("async_write", [True, False])
+def test_CheckpointWriter_save(tmp_path: Path, async_write):
+    model = torch.nn.Linear(2, 3)
+    optimizer = torch.optim.Adam(model.parameters())
+    model(torch.randn(1, 2)).sum().backward()
+    optimizer.step()
+
+    writer = CheckpointWriter(async_write=async_write)
+    states = {"model": model.state_dict(), "optimizer": optimizer.state_dict()}
+    writer.save(states, tmp_path / "checkpoint.pth")
+    weight = model.weight.detach().clone()
+    # The saved values are not affected by the update after save()
+    with torch.no_grad():
+        model.weight.add_(1.0)
+    writer.close()
+
+    loaded = torch.load(tmp_path / "checkpoint.pth")
+    assert torch.equal(loaded["model"]["weight"], weight)
+    assert loaded["optimizer"]["param_groups"] == states["optimizer"]["param_groups"]
+    model.load_state_dict(loaded["model"])
+    optimizer.load_state_dict(loaded["optimizer"])
+
+
+def test_CheckpointWriter_snapshot():
+    writer = CheckpointWriter()
+    weight = torch.randn(2, 3)
+    model = torch.nn.Linear(3, 2)
+    obj = {"a": [weight, (weight, 1)], "b": "c", "model": model.state_dict()}
+    copied = writer.snapshot(obj, key="x")
+    assert copied["a"][0] is not weight
+    assert copied["a"][0] is copied["a"][1][0]
+    assert torch.equal(copied["a"][0], weight)
+    assert copied["a"][1][1] == 1 and copied["b"] == "c"
+    assert hasattr(copied["model"], "_metadata")
+
+    # The buffers are reused
+    copied2 = writer.snapshot(obj, key="x")
+    assert copied2["a"][0] is copied["a"][0]
+
+
+def test_CheckpointWriter_reuse_key(tmp_path: Path):
+    writer = CheckpointWriter()
+    for i in range(3):
+        writer.save({"a": torch.full((3,), float(i))}, tmp_path / f"{i}.pth", key="a")
+    writer.close()
+    assert len(writer.buffers) == 1
+    for i in range(3):
+        assert torch.equal(torch.load(tmp_path / f"{i}.pth")["a"], torch.full((3,), i))
+
+
+def test_IntervalCallbackIterable():
+    called = []
+    it = IntervalCallbackIterable(range(7), 3, called.append)
+    assert len(it) == 7
+    assert list(it) == list(range(7))
+    assert called == [3, 6]
+
+
+@pytest.mark.parametrize("async_write", [True, False])
+def test_Trainer_save_checkpoint_and_resume(tmp_path: Path, async_write):
+    model = torch.nn.Linear(2, 3)
+    optimizer = torch.optim.SGD(model.parameters(), lr=1.0)
+    reporter = Reporter()
+    reporter.set_epoch(1)
+
+    writer = CheckpointWriter(async_write=async_write)
+    writer.save(model.state_dict(), tmp_path / "1epoch.pth", key="model")
+    Trainer.save_checkpoint(
+        writer,
+        tmp_path / "checkpoint.pth",
+        "1epoch.pth",
+        reporter.state_dict(),
+        [optimizer],
+        [None],
+        None,
+    )
+    writer.close()
+
+    model2 = torch.nn.Linear(2, 3)
+    reporter2 = Reporter()
+    Trainer.resume(
+        tmp_path / "checkpoint.pth",
+        model2,
+        reporter2,
+        [torch.optim.SGD(model2.parameters(), lr=1.0)],
+        [None],
+        None,
+    )
+    assert torch.equal(model2.weight, model.weight)
+    assert reporter2.get_epoch() == 1
+
+
+def test_Trainer_resume_iterator(tmp_path: Path):
+    model = torch.nn.Linear(2, 3)
+    iter_factory = SequenceIterFactory(
+        dataset=list(range(10)), batches=[[0, 1], [2, 3], [4, 5]]
+    )
+    list(iter_factory.build_iter(2))
+
+    writer = CheckpointWriter(async_write=False)
+    Trainer.save_checkpoint(
+        writer,
+        tmp_path / "checkpoint.pth",
+        model,
+        Reporter().state_dict(),
+        [],
+        [],
+        None,
+        iter_factory.state_dict(2),
+    )
+    writer.close()
+
+    iter_factory2 = SequenceIterFactory(
+        dataset=list(range(10)), batches=[[0, 1], [2, 3], [4, 5]]
+    )
+    Trainer.resume(
+        tmp_path / "checkpoint.pth",
+        model,
+        Reporter(),
+        [],
+        [],
+        None,
+        train_iter_factory=iter_factory2,
+    )
+    assert [b.tolist() for b in iter_factory2.build_iter(2)] == [[4, 5]]
+
+
+@pytest.mark.parametrize("async_write", [True, False])
+def test_CheckpointWriter_remove(tmp_path: Path, async_write):
+    writer = CheckpointWriter(async_write=async_write)
+    writer.save({"a": torch.ones(3)}, tmp_path / "a.pth", key="a")
+    # Removed after the writing requested before
+    writer.remove(tmp_path / "a.pth")
+    writer.remove(tmp_path / "b.pth")
+    writer.close()
+    assert list(tmp_path.iterdir()) == []
@@ -1,9 +1,14 @@
+from pathlib import Path
+
 import h5py
 import kaldiio
 import numpy as np
 import pytest
 
 from espnet2.fileio.npy_scp import NpyScpWriter
+from espnet2.fileio.packed_archive import PackedArchiveWriter
+from espnet2.fileio.staged_ark_scp import SOURCES_FILE
+from espnet2.fileio.staged_ark_scp import StagedArkScpReader
 from espnet2.fileio.sound_scp import SoundScpWriter
 from espnet2.train.dataset import ESPnetDataset
 
@@ -78,6 +83,29 @@ def test_ESPnetDataset_feats_scp(
     )
 
 
+def test_ESPnetDataset_kaldi_ark_staged(feats_scp, tmp_path):
+    local_dir = tmp_path / "local"
+    local_dir.mkdir()
+    with open(feats_scp) as f, (local_dir / "feats.scp").open("w") as fw:
+        for line in f:
+            key, path = line.split()
+            fw.write(f"{key} {local_dir / Path(path).name}\n")
+    with (local_dir / SOURCES_FILE).open("w") as f:
+        f.write(f"feats.ark {tmp_path / 'feats.ark'}\n")
+
+    dataset = ESPnetDataset(
+        path_name_type_list=[
+            (str(local_dir / "feats.scp"), "data2", "kaldi_ark_staged")
+        ],
+        preprocess=preprocess,
+    )
+    assert isinstance(dataset.loader_dict["data2"].loader, StagedArkScpReader)
+
+    # The ark file is not staged yet
+    _, data = dataset["a"]
+    assert data["data2"].shape == (100, 80)
+
+
 @pytest.fixture
 def npy_scp(tmp_path):
     p = tmp_path / "npy.scp"
@@ -106,6 +134,29 @@ def test_ESPnetDataset_npy_scp(npy_scp):
     )
 
 
+@pytest.fixture
+def packed_scp(tmp_path):
+    p = tmp_path / "packed.scp"
+    with PackedArchiveWriter(tmp_path / "feats.pack", p) as w:
+        w["a"] = np.random.randn(100, 80)
+        w["b"] = np.random.randn(150, 80)
+    return str(p)
+
+
+def test_ESPnetDataset_packed(packed_scp):
+    dataset = ESPnetDataset(
+        path_name_type_list=[(packed_scp, "data3", "packed")],
+        preprocess=preprocess,
+    )
+
+    _, data = dataset["a"]
+    assert data["data3"].shape == (100, 80)
+    assert data["data3"].dtype == np.float32
+
+    _, data = dataset["b"]
+    assert data["data3"].shape == (150, 80)
+
+
 @pytest.fixture
 def h5file_1(tmp_path):
     p = tmp_path / "file.h5"
@@ -289,3 +340,20 @@ def test_ESPnetDataset_csv_int(csv_int):
 
     _, data = dataset["b"]
     assert tuple(data["data8"]) == (2, 3, 4)
+
+
+@pytest.mark.parametrize("cache_type", ["shared_memory", "sized_dict"])
+def test_ESPnetDataset_cache(feats_scp, cache_type):
+    dataset = ESPnetDataset(
+        path_name_type_list=[(feats_scp, "data2", "kaldi_ark")],
+        preprocess=preprocess,
+        max_cache_size="10MB",
+        cache_type=cache_type,
+    )
+
+    _, data = dataset["a"]
+    _, data2 = dataset["a"]
+    np.testing.assert_array_equal(data["data2"], data2["data2"])
+    assert "a" in dataset.cache
+    if cache_type == "shared_memory":
+        assert dataset.cache.stats()["hits"] == 1
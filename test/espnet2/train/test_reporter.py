@@ -459,3 +459,35 @@ def test_measure_iter_time():
     with reporter.observe("train", 2) as sub:
         for _ in sub.measure_iter_time(range(3), "foo"):
             sub.next()
+
+
+@pytest.fixture()
+def dist_process_group(tmp_path):
+    torch.distributed.init_process_group(
+        backend="gloo", init_method=f"file://{tmp_path}/init", world_size=1, rank=0
+    )
+    yield
+    torch.distributed.destroy_process_group()
+
+
+def test_all_reduce(dist_process_group):
+    reporter = Reporter()
+    with reporter.observe("train", 1) as sub:
+        sub.register({"a": 0.1, "b": 2.0}, 2)
+        sub.register({"time_a": 0.5})
+        sub.next()
+        sub.register({"a": 0.3}, 6)
+        sub.register({"time_a": 1.5})
+        sub.next()
+        sub.all_reduce()
+        message = sub.log_message()
+        assert "a=0.250" in message and "b=2.000" in message
+
+        sub.register({"a": np.inf, "b": 1.0}, 4)
+        sub.next()
+        sub.all_reduce()
+        # The reduced steps are kept
+        sub.all_reduce()
+    np.testing.assert_allclose(reporter.get_value("train", "a"), 0.25)
+    np.testing.assert_allclose(reporter.get_value("train", "b"), 4.0 / 3.0)
+    np.testing.assert_allclose(reporter.get_value("train", "time_a"), 1.0)
@@ -1,6 +1,7 @@
 import pytest
 import torch
 
+from espnet.nets.pytorch_backend.nets_utils import make_pad_mask
 from espnet2.tts.fastspeech2 import FastSpeech2
 
 
@@ -115,3 +116,59 @@ def test_fastspeech2(
         inputs.update(pitch=torch.tensor([2, 2, 0], dtype=torch.float).unsqueeze(-1))
         inputs.update(energy=torch.tensor([2, 2, 0], dtype=torch.float).unsqueeze(-1))
         model.inference(**inputs, use_teacher_forcing=True)
+
+
+@pytest.mark.parametrize("reduction_factor", [1, 3])
+@pytest.mark.parametrize("spk_embed_dim, spks", [(None, -1), (2, 5)])
+def test_fastspeech2_batch_inference(reduction_factor, spk_embed_dim, spks):
+    model = FastSpeech2(
+        idim=10,
+        odim=5,
+        adim=4,
+        aheads=2,
+        elayers=1,
+        eunits=4,
+        dlayers=1,
+        dunits=4,
+        postnet_layers=1,
+        postnet_chans=4,
+        postnet_filts=5,
+        reduction_factor=reduction_factor,
+        duration_predictor_layers=2,
+        duration_predictor_chans=4,
+        energy_predictor_layers=2,
+        energy_predictor_chans=4,
+        pitch_predictor_layers=2,
+        pitch_predictor_chans=4,
+        spks=spks,
+        spk_embed_dim=spk_embed_dim,
+    )
+    # avoid the durations of all 0
+    torch.nn.init.constant_(model.duration_predictor.linear.bias, 1.0)
+    inputs = dict(text=torch.randint(1, 9, (3, 4)))
+    if spk_embed_dim is not None:
+        inputs.update(spembs=torch.randn(3, spk_embed_dim))
+    if spks > 0:
+        inputs.update(sids=torch.randint(0, spks, (3, 1)))
+
+    with torch.no_grad():
+        model.eval()
+
+        # the same lengths: equal to the outputs of inference()
+        text_lengths = torch.tensor([4, 4, 4], dtype=torch.long)
+        batch_output_dict = model.batch_inference(text_lengths=text_lengths, **inputs)
+        for i in range(3):
+            output_dict = model.inference(**{k: v[i] for k, v in inputs.items()})
+            for key, value in output_dict.items():
+                length = batch_output_dict[f"{key}_lengths"][i]
+                torch.testing.assert_allclose(batch_output_dict[key][i, :length], value)
+
+        # the different lengths
+        text_lengths = torch.tensor([4, 2, 1], dtype=torch.long)
+        batch_output_dict = model.batch_inference(text_lengths=text_lengths, **inputs)
+        ds = batch_output_dict["duration"]
+        assert (batch_output_dict["duration_lengths"] == text_lengths + 1).all()
+        assert (ds.masked_select(make_pad_mask(text_lengths + 1)) == 0).all()
+        assert (
+            batch_output_dict["feat_gen_lengths"] == ds.sum(1) * reduction_factor
+        ).all()
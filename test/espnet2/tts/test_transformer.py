@@ -111,3 +111,41 @@ def test_tranformer(
         # teacher forcing
         inputs.update(feats=torch.randn(5, 5))
         model.inference(**inputs, use_teacher_forcing=True)
+
+
+@pytest.mark.parametrize("postnet_layers", [0, 2])
+@pytest.mark.parametrize("reduction_factor", [1, 3])
+@pytest.mark.parametrize("chunk_size", [1, 4, 100])
+def test_transformer_inference_stream(postnet_layers, reduction_factor, chunk_size):
+    model = Transformer(
+        idim=10,
+        odim=5,
+        embed_dim=4,
+        eprenet_conv_layers=0,
+        dprenet_layers=1,
+        dprenet_units=4,
+        adim=4,
+        aheads=2,
+        elayers=1,
+        eunits=4,
+        dlayers=1,
+        dunits=4,
+        postnet_layers=postnet_layers,
+        postnet_chans=4,
+        postnet_filts=5,
+        reduction_factor=reduction_factor,
+    )
+    text = torch.randint(0, 10, (3,))
+    with torch.no_grad():
+        model.eval()
+        # NOTE: The prenet always applies dropout
+        torch.manual_seed(0)
+        feat_gen = model.inference(text, threshold=1.1, maxlenratio=5.0)["feat_gen"]
+        torch.manual_seed(0)
+        chunks = list(
+            model.inference_stream(
+                text, threshold=1.1, maxlenratio=5.0, chunk_size=chunk_size
+            )
+        )
+    assert all(len(c) == chunk_size for c in chunks[:-1])
+    torch.testing.assert_allclose(torch.cat(chunks), feat_gen)
@@ -0,0 +1,54 @@
+import pytest
+import torch
+
+from espnet2.tts.utils.batching import bucket_by_length
+from espnet2.tts.utils.batching import concat_vocode
+from espnet2.utils.griffin_lim import Spectrogram2Waveform
+
+
+class LinearConvVocoder(torch.nn.Module):
+    def __init__(self, odim=4, upsample=3):
+        super().__init__()
+        self.upsample = upsample
+        self.conv = torch.nn.Conv1d(odim, upsample, 5, padding=2, bias=False)
+
+    @torch.no_grad()
+    def forward(self, c):
+        # (T_feats, odim) -> (T_feats * upsample)
+        return self.conv(c.t()[None])[0].t().reshape(-1)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 5])
+def test_bucket_by_length(batch_size):
+    lengths = [3, 10, 4, 9, 5]
+    batches = bucket_by_length(lengths, batch_size)
+    assert all(len(b) == batch_size for b in batches[:-1])
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    sorted_lengths = [lengths[i] for b in batches for i in b]
+    assert sorted_lengths == sorted(lengths, reverse=True)
+
+
+def test_bucket_by_length_empty():
+    assert bucket_by_length([], 2) == []
+
+
+@pytest.mark.parametrize("feat_lengths", [[7], [5, 1, 9], [1, 1]])
+def test_concat_vocode(feat_lengths):
+    vocoder = LinearConvVocoder(upsample=3).eval()
+    feats = [torch.randn(length, 4) for length in feat_lengths]
+    wavs = concat_vocode(vocoder, feats, context=2, upsample=3)
+    assert len(wavs) == len(feats)
+    for feat, wav in zip(feats, wavs):
+        torch.testing.assert_allclose(wav, vocoder(feat))
+
+
+def test_concat_vocode_griffin_lim():
+    vocoder = Spectrogram2Waveform(n_fft=16, n_shift=4, griffin_lim_iters=2)
+    feats = [torch.rand(length, 9) for length in [5, 2, 8]]
+    wavs = concat_vocode(vocoder, feats, context=8, upsample=4)
+    for feat, wav in zip(feats, wavs):
+        assert len(wav) == len(vocoder(feat))
+
+
+def test_concat_vocode_empty():
+    assert concat_vocode(lambda x: x, [], context=2, upsample=1) == []
@@ -0,0 +1,60 @@
+import pytest
+import torch
+
+from espnet.nets.pytorch_backend.tacotron2.decoder import Postnet
+from espnet2.tts.utils.streaming import conv_receptive_field
+from espnet2.tts.utils.streaming import estimate_vocoder_geometry
+from espnet2.tts.utils.streaming import overlapped_chunks
+from espnet2.utils.griffin_lim import Spectrogram2Waveform
+
+
+class ConvVocoder(torch.nn.Module):
+    def __init__(self, odim=4, upsample=3):
+        super().__init__()
+        self.conv1 = torch.nn.Conv1d(odim, 4, 5, padding=2)
+        self.up = torch.nn.ConvTranspose1d(4, 4, upsample * 2, upsample, upsample // 2)
+        self.conv2 = torch.nn.Conv1d(4, 1, 7, dilation=2, padding=6)
+
+    @torch.no_grad()
+    def forward(self, c):
+        # (T_feats, odim) -> (T_feats * upsample)
+        x = torch.tanh(self.conv1(c.t()[None]))
+        x = self.up(x)[..., : c.size(0) * self.up.stride[0]]
+        return self.conv2(x).view(-1)
+
+
+def test_conv_receptive_field():
+    postnet = Postnet(idim=4, odim=4, n_layers=5, n_chans=4, n_filts=5)
+    assert conv_receptive_field(postnet) == 10
+
+
+def test_estimate_vocoder_geometry():
+    vocoder = ConvVocoder(upsample=3).eval()
+    upsample, context = estimate_vocoder_geometry(vocoder, 4)
+    assert upsample == 3
+    # 2 frames by conv1, 1 frame by up, and 12 samples by conv2
+    assert 4 <= context <= 8
+
+
+def test_estimate_vocoder_geometry_griffin_lim():
+    vocoder = Spectrogram2Waveform(n_fft=16, n_shift=4, griffin_lim_iters=2)
+    assert estimate_vocoder_geometry(vocoder, 9) == (4, 8)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 100])
+@pytest.mark.parametrize("frame_sizes", [[20], [1] * 20, [3, 1, 9, 7]])
+def test_overlapped_chunks(chunk_size, frame_sizes):
+    vocoder = ConvVocoder(upsample=3).eval()
+    _, context = estimate_vocoder_geometry(vocoder, 4)
+    feats = torch.randn(sum(frame_sizes), 4)
+    chunks = list(
+        overlapped_chunks(
+            vocoder, feats.split(frame_sizes), context, chunk_size, upsample=3
+        )
+    )
+    assert all(len(c) == chunk_size * 3 for c in chunks[:-1])
+    torch.testing.assert_allclose(torch.cat(chunks), vocoder(feats))
+
+
+def test_overlapped_chunks_empty():
+    assert list(overlapped_chunks(lambda x: x, [], 2, 3)) == []
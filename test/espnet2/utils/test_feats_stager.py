@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from espnet2.utils.feats_stager import FeatsStager
+
+
+def _make_files(src_dir: Path, n: int):
+    src_dir.mkdir()
+    for i in range(n):
+        (src_dir / f"{i}.ark").write_bytes(bytes([i]) * (i + 1))
+    return [str(src_dir / f"{i}.ark") for i in range(n)]
+
+
+@pytest.mark.parametrize("check", ["size_mtime", "checksum"])
+@pytest.mark.parametrize("background", [False, True])
+def test_FeatsStager_stage(tmp_path: Path, check, background):
+    srcs = _make_files(tmp_path / "src", 5)
+    local_dir = tmp_path / "local" / "train"
+    stager = FeatsStager(local_dir, num_workers=2, check=check)
+    stager.acquire()
+    files = [(s, str(local_dir / Path(s).name)) for s in srcs]
+    stager.stage(files, background=background)
+    if background:
+        stager.wait()
+    assert stager.done()
+    assert stager.n_copied == 5
+    for s, t in files:
+        assert Path(t).read_bytes() == Path(s).read_bytes()
+    assert stager.release()
+    assert not local_dir.exists()
+
+
+def test_FeatsStager_resume(tmp_path: Path):
+    srcs = _make_files(tmp_path / "src", 4)
+    local_dir = tmp_path / "local" / "train"
+    files = [(s, str(local_dir / Path(s).name)) for s in srcs]
+
+    stager = FeatsStager(local_dir)
+    stager.acquire()
+    stager.stage(files[:2])
+    assert stager.n_copied == 2
+
+    # Another job sharing the directory copies the rest only
+    stager2 = FeatsStager(local_dir)
+    stager2.holder = stager.holder + "_2"
+    stager2.acquire()
+    stager2.stage(files)
+    assert stager2.n_copied == 2
+
+    assert not stager2.release()
+    assert local_dir.exists()
+    assert stager.release()
+    assert not local_dir.exists()
+
+
+def test_FeatsStager_recopy(tmp_path: Path):
+    srcs = _make_files(tmp_path / "src", 2)
+    local_dir = tmp_path / "local" / "train"
+    files = [(s, str(local_dir / Path(s).name)) for s in srcs]
+    stager = FeatsStager(local_dir)
+    stager.acquire()
+    assert stager.copy(*files[0])
+    assert not stager.copy(*files[0])
+    stager.recopy = True
+    assert stager.copy(*files[0])
+    stager.release()
+
+
+def test_FeatsStager_ignore_dead_holder(tmp_path: Path):
+    local_dir = tmp_path / "local" / "train"
+    stager = FeatsStager(local_dir)
+    stager.acquire()
+    hostname = stager.holder.split()[0]
+    with stager.holders_file.open("a") as f:
+        # The pid is larger than pid_max
+        f.write(f"{hostname} 99999999\n")
+    assert stager.release()
+    assert not local_dir.exists()
+
+
+def test_FeatsStager_invalid_check(tmp_path: Path):
+    with pytest.raises(ValueError):
+        FeatsStager(tmp_path, check="foo")
@@ -0,0 +1,144 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from espnet2.utils.shared_memory_cache import SharedMemoryCache
+
+
+def _value(n, fill=0.0):
+    return {"speech": np.full(n, fill, dtype=np.float32), "text": np.arange(3)}
+
+
+def test_SharedMemoryCache_set_get():
+    cache = SharedMemoryCache(["a", "b"], max_size="1MB", page_size=128 * 1024)
+    cache["a"] = _value(100, 1.0)
+    assert "a" in cache
+    assert "b" not in cache
+    v = cache["a"]
+    np.testing.assert_array_equal(v["speech"], np.full(100, 1.0, np.float32))
+    np.testing.assert_array_equal(v["text"], np.arange(3))
+    assert v["speech"].dtype == np.float32
+    assert len(cache) == 1
+    assert list(cache) == ["a"]
+
+
+def test_SharedMemoryCache_non_array():
+    cache = SharedMemoryCache(["a"], max_size="1MB")
+    cache["a"] = {"speech": np.random.randn(3, 4), "lid": "<en>"}
+    v = cache["a"]
+    assert v["speech"].shape == (3, 4)
+    assert v["lid"] == "<en>"
+
+
+def test_SharedMemoryCache_overwrite_and_delete():
+    cache = SharedMemoryCache(["a"], max_size="1MB")
+    cache["a"] = _value(10, 1.0)
+    cache["a"] = _value(20, 2.0)
+    assert cache["a"]["speech"].shape == (20,)
+    assert cache.stats()["entries"] == 1
+    del cache["a"]
+    assert "a" not in cache
+    assert cache.size == 0
+
+
+def test_SharedMemoryCache_get_copy():
+    cache = SharedMemoryCache(["a"], max_size="1MB")
+    cache["a"] = _value(10, 1.0)
+    v = cache["a"]
+    # The chunk is reused by the overwriting
+    cache["a"] = _value(10, 2.0)
+    np.testing.assert_array_equal(v["speech"], np.full(10, 1.0, np.float32))
+
+
+def test_SharedMemoryCache_unknown_key():
+    cache = SharedMemoryCache(["a"], max_size="1MB")
+    with pytest.raises(KeyError):
+        cache["b"] = _value(10)
+    with pytest.raises(KeyError):
+        cache["b"]
+
+
+def test_SharedMemoryCache_hit_miss():
+    cache = SharedMemoryCache(["a", "b"], max_size="1MB")
+    cache["a"] = _value(10)
+    cache["a"]
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["insertions"] == 1
+
+
+def test_SharedMemoryCache_too_large():
+    cache = SharedMemoryCache(["a"], max_size="1MB", page_size=64 * 1024)
+    cache["a"] = _value(100000)
+    assert "a" not in cache
+    assert cache.stats()["skipped"] == 1
+
+
+@pytest.mark.parametrize("policy", ["lru", "clock"])
+def test_SharedMemoryCache_eviction(policy):
+    keys = [str(i) for i in range(10)]
+    # 4 chunks of the same class in total
+    cache = SharedMemoryCache(
+        keys,
+        max_size=256 * 1024,
+        policy=policy,
+        page_size=128 * 1024,
+        min_chunk_size=64 * 1024,
+    )
+    for k in keys[:4]:
+        cache[k] = _value(10000)
+    assert len(cache) == 4
+    # Reference "0" and insert a new one
+    cache["0"]
+    cache["4"] = _value(10000)
+    assert len(cache) == 4
+    assert "0" in cache
+    assert "4" in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_SharedMemoryCache_lru_order():
+    keys = [str(i) for i in range(5)]
+    cache = SharedMemoryCache(
+        keys, max_size=256 * 1024, page_size=128 * 1024, min_chunk_size=64 * 1024
+    )
+    for k in keys[:4]:
+        cache[k] = _value(10000)
+    cache["0"]
+    cache["2"]
+    cache["3"]
+    cache["4"] = _value(10000)
+    assert "1" not in cache
+    assert all(k in cache for k in ["0", "2", "3", "4"])
+
+
+def test_SharedMemoryCache_take_over_page():
+    keys = [str(i) for i in range(4)]
+    cache = SharedMemoryCache(
+        keys, max_size=128 * 1024, page_size=128 * 1024, min_chunk_size=64 * 1024
+    )
+    cache["0"] = _value(100)
+    cache["1"] = _value(30000)
+    assert "1" in cache
+    assert "0" not in cache
+
+
+def _set(cache):
+    cache["b"] = _value(10, 3.0)
+    assert cache["a"]["speech"][0] == 1.0
+
+
+@pytest.mark.parametrize("method", ["fork", "spawn"])
+def test_SharedMemoryCache_multiprocess(method):
+    cache = SharedMemoryCache(["a", "b"], max_size="1MB")
+    cache["a"] = _value(10, 1.0)
+    mp = multiprocessing.get_context(method)
+    p = mp.Process(target=_set, args=(cache,))
+    p.start()
+    p.join()
+    assert p.exitcode == 0
+    assert cache["b"]["speech"][0] == 3.0
+    assert cache.stats()["hits"] == 2
@@ -189,3 +189,68 @@ def test_batch_beam_search_equal(
         numpy.testing.assert_allclose(
             expected.score.cpu(), actual.score.cpu(), rtol=1e-6
         )
+
+
+@pytest.mark.parametrize(
+    "ctc_weight, lm_weight, maxlenratio, dtype",
+    [
+        (ctc, lm, maxlenratio, dtype)
+        for ctc in (0.0, 0.5, 1.0)
+        for lm in (0.0, 0.5)
+        for maxlenratio in (0.0, 0.3)
+        for dtype in ("float32", "float64")
+    ],
+)
+def test_batch_beam_search_batch_forward(ctc_weight, lm_weight, maxlenratio, dtype):
+    torch.manual_seed(123)
+    dtype = getattr(torch, dtype)
+    model, x, ilens, y, data, train_args = prepare(
+        "transformer", transformer_args, mtlalpha=ctc_weight
+    )
+    model.eval()
+    char_list = train_args.char_list
+    lm = dynamic_import_lm("default", backend="pytorch")(len(char_list), lstm_lm)
+    lm.eval()
+    root = os.path.dirname(os.path.abspath(__file__))
+    scorers = model.scorers()
+    scorers["lm"] = lm
+    scorers["ngram"] = NgramFullScorer(
+        os.path.join(root, "beam_search_test.arpa"), char_list
+    )
+    scorers["length_bonus"] = LengthBonus(len(char_list))
+    weights = dict(
+        decoder=1.0 - ctc_weight,
+        ctc=ctc_weight,
+        lm=lm_weight,
+        ngram=0.5,
+        length_bonus=0.1,
+    )
+    model.to(dtype=dtype)
+    with torch.no_grad():
+        encs = [model.encode(x[b, : ilens[b]].to(dtype=dtype)) for b in range(len(x))]
+    enc_lens = torch.tensor([len(e) for e in encs])
+    xs = torch.nn.utils.rnn.pad_sequence(encs, batch_first=True)
+    assert len(set(enc_lens.tolist())) > 1
+
+    beam = BatchBeamSearch(
+        beam_size=3,
+        vocab_size=len(char_list),
+        weights=weights,
+        scorers=scorers,
+        token_list=char_list,
+        sos=model.sos,
+        eos=model.eos,
+        pre_beam_score_key=None if ctc_weight == 1.0 else "full",
+    )
+    beam.to(dtype=dtype)
+    beam.eval()
+    with torch.no_grad():
+        expected = [beam(x=e, maxlenratio=maxlenratio) for e in encs]
+        actual = beam.batch_forward(xs, enc_lens, maxlenratio=maxlenratio)
+
+    assert len(actual) == len(encs)
+    for expected_nbest, actual_nbest in zip(expected, actual):
+        assert len(expected_nbest) == len(actual_nbest)
+        for e, a in zip(expected_nbest, actual_nbest):
+            assert e.yseq.tolist() == a.yseq.tolist()
+            numpy.testing.assert_allclose(e.score, a.score, rtol=1e-5)
@@ -0,0 +1,126 @@
+import numpy
+import pytest
+import torch
+
+from espnet.nets.batch_beam_search import BatchBeamSearch
+from espnet.nets.ctc_prefix_score import CTCPrefixScore
+from espnet.nets.ctc_prefix_score import CTCPrefixScoreTH
+from espnet.nets.ctc_prefix_score import log_linear_scan
+from espnet.nets.scorers.ctc import CTCPrefixScorer
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 64])
+def test_log_linear_scan(chunk_size):
+    torch.manual_seed(0)
+    a = torch.randn(37, 2, 3, dtype=torch.float64)
+    b = torch.randn(37, 2, 3, dtype=torch.float64)
+    init = torch.randn(2, 3, dtype=torch.float64)
+    desired = []
+    y = init
+    for t in range(len(a)):
+        y = a[t] + torch.logsumexp(torch.stack([y, b[t]]), 0)
+        desired.append(y)
+    actual = log_linear_scan(a, b, init, chunk_size)
+    torch.testing.assert_close(actual, torch.stack(desired))
+
+
+def _select(scorer, state, scores, ys, beam):
+    # keep the best labels except for blank and eos
+    scores = scores.clone()
+    scores[:, 0] = scores[:, -1] = float("-inf")
+    best = scores.view(scorer.batch, -1).topk(beam, -1)[1]
+    odim = scores.size(1)
+    ys = [
+        ys[int(j) // odim + b * beam] + [int(j) % odim]
+        for b in range(scorer.batch)
+        for j in best[b]
+    ]
+    return scorer.index_select_state(state, best), ys
+
+
+@pytest.mark.parametrize("scoring_num", [0, 3])
+def test_CTCPrefixScoreTH_equal_to_CTCPrefixScore(scoring_num):
+    torch.manual_seed(0)
+    odim = 6
+    x = torch.randn(1, 20, odim, dtype=torch.float64).log_softmax(-1)
+    scorer = CTCPrefixScoreTH(x.clone(), torch.tensor([20]), 0, odim - 1)
+    ref = CTCPrefixScore(x[0].numpy(), 0, odim - 1, numpy)
+
+    ys = [[odim - 1]]
+    state = None
+    ref_state = ref.initial_state()
+    for _ in range(3):
+        ids = torch.randperm(odim)[:scoring_num].view(1, -1) if scoring_num else None
+        scores, new_state = scorer(ys, state, ids)
+        cs = ids[0].numpy() if scoring_num else numpy.arange(odim)
+        ref_scores, ref_states = ref(ys[0], cs, ref_state)
+        for c, s in zip(cs, ref_scores):
+            if c != 0:
+                numpy.testing.assert_allclose(
+                    float(new_state[1][0, c]), s, rtol=1e-5, atol=1e-5
+                )
+        state, ys = _select(scorer, new_state, scores, ys, 1)
+        ref_state = ref_states[list(cs).index(ys[0][-1])]
+
+
+@pytest.mark.parametrize("scoring_num", [0, 3])
+def test_CTCPrefixScoreTH_track_alignment_without_window(scoring_num):
+    torch.manual_seed(0)
+    odim, beam = 7, 3
+    x = torch.randn(2, 30, odim, dtype=torch.float64).log_softmax(-1)
+    xlens = torch.tensor([30, 21])
+    scorer = CTCPrefixScoreTH(x.clone(), xlens, 0, odim - 1)
+    windowed = CTCPrefixScoreTH(
+        x.clone(), xlens, 0, odim - 1, margin=100, track_alignment=True
+    )
+
+    ys = [[odim - 1] for _ in range(2 * beam)]
+    state = windowed_state = None
+    for _ in range(5):
+        ids = (
+            torch.stack([torch.randperm(odim)[:scoring_num] for _ in ys])
+            if scoring_num
+            else None
+        )
+        scores, new_state = scorer(ys, state, ids)
+        windowed_scores, new_windowed_state = windowed(ys, windowed_state, ids)
+        valid = scores > -1e5
+        assert torch.equal(valid, windowed_scores > -1e5)
+        torch.testing.assert_close(scores[valid], windowed_scores[valid])
+        windowed_state, _ = _select(windowed, new_windowed_state, scores, ys, beam)
+        state, ys = _select(scorer, new_state, scores, ys, beam)
+
+
+class LogSoftmaxCTC(torch.nn.Module):
+    def log_softmax(self, x):
+        return torch.log_softmax(x, dim=-1)
+
+
+def test_CTCPrefixScorer_window_margin():
+    torch.manual_seed(0)
+    odim, n_labels, n_frames = 10, 15, 600
+    labels = torch.randint(1, odim - 1, (n_labels,))
+    labels[1:][labels[1:] == labels[:-1]] = 1
+    x = 0.5 * torch.randn(n_frames, odim)
+    x[:, 0] += 6
+    for t, label in zip(torch.linspace(10, n_frames - 10, n_labels).long(), labels):
+        x[t : t + 2, label] += 12
+
+    results = []
+    for window_margin in [0, 3]:
+        beam_search = BatchBeamSearch(
+            scorers={
+                "ctc": CTCPrefixScorer(
+                    LogSoftmaxCTC(), odim - 1, window_margin=window_margin
+                )
+            },
+            weights={"ctc": 1.0},
+            beam_size=3,
+            vocab_size=odim,
+            sos=odim - 1,
+            eos=odim - 1,
+            pre_beam_score_key=None,
+        )
+        results.append(beam_search(x, maxlenratio=0.0)[0].yseq[1:-1].tolist())
+    assert results[0] == labels.tolist()
+    assert results[1] == labels.tolist()
@@ -15,3 +15,65 @@ def test_ngram_build(test_sens):
     lm = kenlm.LanguageModel(os.path.join(root, "test.arpa"))
     assert isclose(lm.score(test_sens[0]), -1.04, rel_tol=0.01)
     assert isclose(lm.score(test_sens[1]), -1.18, rel_tol=0.01)
+
+
+def _reference_scores(lm, chardict, y, state):
+    out_state = kenlm.State()
+    tmp = kenlm.State()
+    lm.BaseScore(state, chardict[y[-1]] if len(y) > 1 else "<s>", out_state)
+    return [lm.BaseScore(out_state, w, tmp) for w in chardict], out_state
+
+
+def test_ngram_batch_score():
+    import torch
+
+    from espnet.nets.scorers.ngram import NgramFullScorer
+    from espnet.nets.scorers.ngram import NgramPartScorer
+
+    token_list = ["<blank>", "I", "like", "apple", "you", "foo", "<eos>"]
+    full = NgramFullScorer(os.path.join(root, "test.arpa"), token_list)
+    part = NgramPartScorer(os.path.join(root, "test.arpa"), token_list)
+    xs = torch.zeros(3, 1, 1)
+    ys = torch.tensor([[6, 1], [6, 4], [6, 1]])
+    init = full.init_state(None)
+    states = [init] * 3
+
+    scores, out_states = full.batch_score(ys, states, xs)
+    assert scores.shape == (3, len(token_list))
+    for y, s, state in zip(ys.tolist(), scores, out_states):
+        ref, ref_state = _reference_scores(full.lm, full.chardict, y, init)
+        assert torch.allclose(s, torch.tensor(ref))
+        assert state == ref_state
+        s1, state1 = full.score(torch.tensor(y), init, xs[0])
+        assert torch.allclose(s1, torch.tensor(ref))
+        assert state1 == ref_state
+    # the hypotheses sharing their history share the state
+    assert out_states[0] is out_states[2]
+
+    next_tokens = torch.tensor([[1, 2], [3, 6], [0, 5]])
+    part_scores, part_states = part.batch_score_partial(ys, next_tokens, states, xs)
+    mask = torch.zeros_like(part_scores, dtype=torch.bool)
+    mask.scatter_(1, next_tokens, True)
+    assert torch.allclose(part_scores[mask], scores[mask])
+    assert (part_scores[~mask] == 0).all()
+    assert part.batch_select_state(part_states, [2, 0]) == [
+        part_states[2],
+        part_states[0],
+    ]
+
+
+def test_ngram_cache_limit():
+    import torch
+
+    from espnet.nets.scorers.ngram import NgramFullScorer
+
+    token_list = ["<blank>", "I", "like", "apple", "<eos>"]
+    scorer = NgramFullScorer(
+        os.path.join(root, "test.arpa"), token_list, max_cached_states=4
+    )
+    xs = torch.zeros(2, 1, 1)
+    states = [scorer.init_state(None)] * 2
+    for t in [1, 2, 3]:
+        ys = torch.tensor([[4, t], [4, 1]])
+        scores, states = scorer.batch_score(ys, states, xs)
+        assert len(scorer.states) <= 4